@@ -9,11 +9,13 @@ from nicegui import ui, app
 
 # 导入自定义模块
 from config import APP_CONFIG
-from src.database.database import DatabaseManager, UserManager, TagManager
+from src.database.database import create_database_manager, UserManager, TagManager
+from src.database.query_stats import create_query_stats_middleware
 from src.services.task_manager import TaskManager
 from src.services.pomodoro_manager import PomodoroManager, UserSettingsManager
 from src.services.ai_assistant import AIAssistant
 from src.services.statistics_manager import StatisticsManager
+from src.api import create_api_app
 
 # 导入UI组件
 from src.ui.pages.login_page import LoginPage
@@ -25,7 +27,7 @@ from src.ui.pages.settings_page import SettingsPage
 
 
 # 初始化数据库和服务
-db_manager = DatabaseManager()
+db_manager = create_database_manager()
 user_manager = UserManager(db_manager)
 tag_manager = TagManager(db_manager)
 task_manager = TaskManager(db_manager)
@@ -34,25 +36,24 @@ settings_manager = UserSettingsManager(db_manager)
 ai_assistant = AIAssistant()
 statistics_manager = StatisticsManager(db_manager)
 
+# 按请求统计SQL查询数（响应头 X-Query-Count，汇总见 /api/debug/queries）
+app.middleware('http')(create_query_stats_middleware())
+
+# 同步API（/api/tasks、/api/tags、/api/sessions、/api/settings）
+app.mount('/api', create_api_app(db_manager, user_manager, tag_manager, settings_manager))
+
 # 初始化页面组件
 login_page = LoginPage(user_manager)
 register_page = RegisterPage(user_manager)
-main_page = MainPage(
-    db_manager, user_manager, tag_manager, task_manager,
-    pomodoro_manager, settings_manager, ai_assistant, statistics_manager
-)
 settings_page = SettingsPage(settings_manager, user_manager)
 
-def handle_login_success(user):
-    """处理登录成功"""
-    main_page.set_current_user(user)
-
-# 设置登录成功回调
-login_page.on_login_success = handle_login_success
-
 @ui.page('/')
 def index():
-    """首页"""
+    """首页（每个浏览器标签页使用独立的主页面状态，登录用户从 app.storage.user 恢复）"""
+    main_page = MainPage(
+        db_manager, user_manager, tag_manager, task_manager,
+        pomodoro_manager, settings_manager, ai_assistant, statistics_manager
+    )
     index_handler = main_page.create_index_page(lambda: None)
     index_handler()
 
@@ -79,6 +80,6 @@ if __name__ in {"__main__", "__mp_main__"}:
         title='个人任务与效能管理平台',
         favicon='🍅',
         show=False,
-        reload=APP_CONFIG['debug'],
+        reload=APP_CONFIG['reload'],
         storage_secret=APP_CONFIG['secret_key']
     ) 
\ No newline at end of file
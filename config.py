@@ -13,7 +13,10 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'pomodoro_task_manager'),
     'charset': 'utf8mb4',
     'collation': 'utf8mb4_unicode_ci',
-    'use_unicode': True
+    'use_unicode': True,
+    # 存储后端：mysql 或 sqlite（嵌入式，适合单机部署和测试，不需要数据库服务）
+    'backend': os.getenv('DB_BACKEND', 'mysql'),
+    'sqlite_path': os.getenv('SQLITE_PATH', 'data/todo.db')
 }
 
 # AI API配置 - 按照文档要求使用Gemini2.5-Flash
@@ -22,15 +25,51 @@ AI_CONFIG = {
     'base_url': os.getenv('OPENAI_BASE_URL', ''),
     'model': os.getenv('OPENAI_MODEL', ''),
     'max_tokens': 2000,  # 增加token限制，避免回复被截断
-    'temperature': 0.7
+    'temperature': 0.7,
+    # 确定性调用（如番茄钟预估）的响应缓存
+    'cache_max_entries': int(os.getenv('AI_CACHE_MAX_ENTRIES', 512)),
+    'cache_ttl_seconds': int(os.getenv('AI_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+    'cache_path': os.getenv('AI_CACHE_PATH', ''),  # 为空时仅缓存在内存中
+    'cache_flush_seconds': float(os.getenv('AI_CACHE_FLUSH_SECONDS', 5)),  # 缓存文件的落盘间隔，期间的多次写入合并为一次
+    'cache_redis_url': os.getenv('AI_CACHE_REDIS_URL', ''),  # 多进程部署时各进程共用的Redis缓存，设置后忽略cache_path
+    'batch_estimate_size': 30,  # 批量预估时每次请求打包的任务数
+    'context_token_budget': int(os.getenv('AI_CONTEXT_TOKEN_BUDGET', 3000)),  # 任务上下文的token预算
+    'local_estimate_min_confidence': float(os.getenv('AI_LOCAL_ESTIMATE_MIN_CONFIDENCE', 0.5)),  # 历史预估达到该置信度时不再调用AI
+    'rerank_top_k': int(os.getenv('AI_RERANK_TOP_K', 5)),  # 智能推荐时交给AI重排的候选数，0表示只用本地排序
+    # 并发限制、超时、重试和熔断
+    'max_concurrency': int(os.getenv('AI_MAX_CONCURRENCY', 8)),  # 每个进程同时进行的AI请求数
+    'per_user_concurrency': int(os.getenv('AI_PER_USER_CONCURRENCY', 2)),  # 每个用户同时进行的AI请求数
+    'request_timeout': float(os.getenv('AI_REQUEST_TIMEOUT', 30)),  # 单次HTTP请求超时（秒）
+    'request_deadline': float(os.getenv('AI_REQUEST_DEADLINE', 60)),  # 包含排队和重试的总截止时间（秒）
+    'max_retries': 3,  # 429/5xx/超时的最大重试次数
+    'retry_base_delay': 0.5,  # 重试退避基础时间（秒）
+    'retry_max_delay': 8,  # 单次退避上限（秒）
+    'circuit_failure_threshold': 5,  # 连续失败多少次后熔断
+    'circuit_reset_seconds': 30  # 熔断后多久尝试恢复（秒）
 }
 
 # 应用配置
 APP_CONFIG = {
     'secret_key': os.getenv('SECRET_KEY', 'your-secret-key-here'),
     'debug': os.getenv('DEBUG', 'True').lower() == 'true',
+    'reload': os.getenv('RELOAD', os.getenv('DEBUG', 'True')).lower() == 'true',  # 代码修改后自动重启，多进程模式下关闭
     'port': int(os.getenv('PORT', 8080)),
-    'host': os.getenv('HOST', '0.0.0.0')
+    'host': os.getenv('HOST', '0.0.0.0'),
+    'report_cache_max_entries': int(os.getenv('REPORT_CACHE_MAX_ENTRIES', 256)),  # 统计报告和图表缓存条目数
+    'tag_cache_ttl_seconds': int(os.getenv('TAG_CACHE_TTL_SECONDS', 300)),  # 标签名称到ID映射的缓存时间，限制其他进程改名/删除后的过期时间
+    'autosave_debounce_seconds': float(os.getenv('AUTOSAVE_DEBOUNCE_SECONDS', 0.8)),  # 任务详情修改合并保存的等待时间
+    'api_page_size': int(os.getenv('API_PAGE_SIZE', 200)),  # 同步API每页默认条数（上限为其5倍）
+    'api_auth_cache_seconds': int(os.getenv('API_AUTH_CACHE_SECONDS', 300)),  # 同步API缓存已验证凭据的时间，避免每个请求都做bcrypt校验
+    'import_batch_size': int(os.getenv('IMPORT_BATCH_SIZE', 1000)),  # 批量导入时每个事务写入的任务数，也是断点续传的检查点间隔
+    'recurrence_horizon_days': int(os.getenv('RECURRENCE_HORIZON_DAYS', 14)),  # 批量生成重复任务时向后覆盖的天数
+    'query_debug_endpoint': os.getenv('QUERY_DEBUG_ENDPOINT', 'False').lower() == 'true',  # 开放 /api/debug/queries（进程级统计，含所有用户的语句），默认关闭
+    'query_stats_enabled': os.getenv('QUERY_STATS', os.getenv('QUERY_DEBUG_ENDPOINT', 'False')).lower() == 'true',  # 记录每条SQL的耗时和调用方，默认随调试接口开启
+    'slow_query_ms': float(os.getenv('SLOW_QUERY_MS', 200)),  # 超过该耗时的查询记入慢查询日志，并在首次出现时获取执行计划
+    'slow_query_log_size': int(os.getenv('SLOW_QUERY_LOG_SIZE', 100)),  # 保留的最近慢查询条数
+    'event_broker_url': os.getenv('EVENT_BROKER_URL', ''),  # 多进程部署时共享的事件代理地址（如 redis://localhost:6379/0），为空时只在进程内同步
+    # 多进程部署（serve.py）：每个工作进程监听 worker_base_port 起的连续端口，由反向代理按客户端IP粘性转发
+    'workers': int(os.getenv('WORKERS', 1)),
+    'worker_base_port': int(os.getenv('WORKER_BASE_PORT', 8081))
 }
 
 # 番茄工作法默认配置
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+多进程部署启动脚本
+启动多个 app.py 工作进程（每个进程监听一个端口），并生成按客户端IP粘性转发的Nginx配置。
+
+NiceGUI 的页面状态和 websocket 连接都在创建它的进程中，同一浏览器的请求必须始终转发到同一个进程；
+跨进程共享的数据通过以下环境变量指向同一个Redis：
+    NICEGUI_REDIS_URL   登录状态（app.storage.user），需要 NiceGUI 2.10 及以上并 pip install redis
+    EVENT_BROKER_URL    多标签页实时同步的事件广播
+    AI_CACHE_REDIS_URL  AI响应缓存
+
+用法:
+    python serve.py --workers 4 --nginx-conf deploy/nginx.conf
+"""
+
+import os
+import re
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from importlib import metadata
+from typing import Dict, List, Optional
+
+from config import APP_CONFIG
+
+# 多进程模式下建议配置的共享后端
+SHARED_BACKEND_VARS = ['NICEGUI_REDIS_URL', 'EVENT_BROKER_URL', 'AI_CACHE_REDIS_URL']
+# 支持 NICEGUI_REDIS_URL 的最低NiceGUI版本，更早的版本会忽略该变量，登录状态只保存在各进程内
+NICEGUI_REDIS_MIN_VERSION = (2, 10, 0)
+
+
+def worker_ports(workers: int, base_port: int) -> List[int]:
+    """计算各工作进程的端口"""
+    return [base_port + i for i in range(workers)]
+
+
+def worker_env(port: int, base_env: Dict[str, str] = None) -> Dict[str, str]:
+    """生成工作进程的环境变量：指定端口，关闭自动重载"""
+    env = dict(os.environ if base_env is None else base_env)
+    env['PORT'] = str(port)
+    env['RELOAD'] = 'False'
+    return env
+
+
+def missing_shared_backends(env: Dict[str, str] = None) -> List[str]:
+    """返回未配置的共享后端环境变量"""
+    env = os.environ if env is None else env
+    return [name for name in SHARED_BACKEND_VARS if not env.get(name)]
+
+
+def nicegui_supports_redis(version: Optional[str] = None) -> bool:
+    """检查NiceGUI版本是否支持Redis存储；version 为None时读取已安装的版本，未安装视为不支持"""
+    if version is None:
+        try:
+            version = metadata.version('nicegui')
+        except metadata.PackageNotFoundError:
+            return False
+    parts = tuple(int(part) for part in re.findall(r'\d+', version)[:3])
+    return parts >= NICEGUI_REDIS_MIN_VERSION
+
+
+def render_nginx_config(ports: List[int], listen_port: int = 8080, upstream_host: str = '127.0.0.1') -> str:
+    """
+    生成Nginx反向代理配置
+
+    使用 ip_hash 保证同一客户端的页面请求和 websocket 连接转发到同一个工作进程
+    """
+    servers = '\n'.join(f"    server {upstream_host}:{port};" for port in ports)
+    return f"""upstream todo_workers {{
+    ip_hash;
+{servers}
+}}
+
+map $http_upgrade $connection_upgrade {{
+    default upgrade;
+    ''      close;
+}}
+
+server {{
+    listen {listen_port};
+
+    location / {{
+        proxy_pass http://todo_workers;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection $connection_upgrade;
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_read_timeout 3600s;
+    }}
+}}
+"""
+
+
+def start_workers(ports: List[int]) -> List[subprocess.Popen]:
+    """启动工作进程"""
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    processes = []
+    for port in ports:
+        processes.append(subprocess.Popen([sys.executable, app_path], env=worker_env(port)))
+        print(f"工作进程已启动: 端口 {port}")
+    return processes
+
+
+def stop_workers(processes: List[subprocess.Popen], timeout: float = 10):
+    """停止工作进程，超时后强制结束"""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    deadline = time.time() + timeout
+    for process in processes:
+        try:
+            process.wait(max(deadline - time.time(), 0))
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='以多进程模式运行应用')
+    parser.add_argument('--workers', type=int, default=APP_CONFIG['workers'], help='工作进程数')
+    parser.add_argument('--base-port', type=int, default=APP_CONFIG['worker_base_port'], help='第一个工作进程的端口')
+    parser.add_argument('--listen-port', type=int, default=APP_CONFIG['port'], help='Nginx对外监听的端口')
+    parser.add_argument('--nginx-conf', help='将Nginx配置写入该文件')
+    args = parser.parse_args()
+
+    if args.workers > 1 and not nicegui_supports_redis():
+        required = '.'.join(map(str, NICEGUI_REDIS_MIN_VERSION))
+        print(f"错误: 多进程模式需要 NiceGUI {required} 及以上版本才能通过 NICEGUI_REDIS_URL 共享登录状态，"
+              f"请执行 pip install -U 'nicegui>={required}'", file=sys.stderr)
+        sys.exit(1)
+
+    ports = worker_ports(args.workers, args.base_port)
+
+    if args.nginx_conf:
+        directory = os.path.dirname(args.nginx_conf)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.nginx_conf, 'w', encoding='utf-8') as f:
+            f.write(render_nginx_config(ports, args.listen_port))
+        print(f"Nginx配置已写入: {args.nginx_conf}")
+
+    missing = missing_shared_backends()
+    if args.workers > 1 and missing:
+        print(f"警告: 未配置 {', '.join(missing)}，对应的数据只在各进程内有效")
+
+    processes = start_workers(ports)
+
+    def handle_signal(signum, frame):
+        stop_workers(processes)
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    # 任一工作进程退出时停止全部进程
+    while all(process.poll() is None for process in processes):
+        time.sleep(1)
+    print("有工作进程意外退出，正在停止全部进程")
+    stop_workers(processes)
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+# 对外API模块
+from .sync_api import SyncAPI, create_api_app
+
+__all__ = ['SyncAPI', 'create_api_app']
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+增量同步API模块
+为移动端、命令行等客户端提供JSON接口，挂载在NiceGUI的FastAPI应用的 /api 下
+
+- 全量读取按主键键集分页（after=上一页最后的ID），第一页同时返回事件游标
+- 增量读取使用 since=<事件游标>，基于任务活动日志只返回变化的任务和已删除的任务ID
+- 列表接口返回ETag，客户端带 If-None-Match 且数据未变时返回304
+- 响应超过1KB时gzip压缩
+- /export/{数据集} 以分块响应流式导出任务或专注记录（CSV/JSONL/Parquet）
+- /debug/queries 返回SQL查询统计（需设置 QUERY_DEBUG_ENDPOINT=true）
+"""
+
+import hashlib
+import json
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Callable, Any
+
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.gzip import GZipMiddleware
+
+from config import APP_CONFIG
+from src.database.query_stats import QueryStats, QUERY_ORDERS, get_shared_query_stats
+from src.services.task_events import TaskEventLog
+from src.services.export_service import ExportService, EXPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# 对外返回的任务字段
+TASK_COLUMNS = ("task_id, title, description, due_date, priority, status, repeat_cycle, series_id, "
+                "estimated_pomodoros, used_pomodoros, completed_at, created_at, updated_at")
+SESSION_COLUMNS = "session_id, task_id, session_type, start_time, end_time, duration_minutes, is_completed"
+
+
+class CredentialCache:
+    """已验证凭据的短期缓存，键为凭据的哈希，不保存明文密码"""
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, tuple] = {}  # 凭据哈希 -> (user_id, 过期时间)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(email: str, password: str) -> str:
+        """凭据哈希"""
+        return hashlib.sha256(f"{email}\0{password}".encode('utf-8')).hexdigest()
+
+    def get(self, email: str, password: str) -> Optional[int]:
+        """获取缓存的用户ID，过期或不存在时返回None"""
+        key = self.key(email, password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            self._entries.pop(key, None)
+        return None
+
+    def put(self, email: str, password: str, user_id: int):
+        """缓存验证通过的凭据"""
+        with self._lock:
+            self._entries[self.key(email, password)] = (user_id, time.monotonic() + self.ttl_seconds)
+
+
+class SyncAPI:
+    """同步API的处理逻辑，路由由 create_api_app 注册"""
+
+    def __init__(self, db_manager, user_manager, tag_manager, settings_manager,
+                 event_log: TaskEventLog = None, page_size: int = None, credential_cache: CredentialCache = None,
+                 export_service: ExportService = None, query_stats: QueryStats = None):
+        self.db = db_manager
+        self.user_manager = user_manager
+        self.tag_manager = tag_manager
+        self.settings_manager = settings_manager
+        self.event_log = event_log or TaskEventLog(db_manager)
+        self.page_size = page_size or APP_CONFIG['api_page_size']
+        self.credential_cache = credential_cache or CredentialCache(APP_CONFIG['api_auth_cache_seconds'])
+        self.export_service = export_service or ExportService(db_manager)
+        self.query_stats = query_stats or get_shared_query_stats()
+
+    # ---------- 认证 ----------
+
+    async def authenticate(self, credentials: HTTPBasicCredentials) -> int:
+        """HTTP Basic认证（邮箱+密码），返回用户ID
+
+        用户查询使用共享连接，留在事件循环线程；bcrypt校验不涉及连接且耗时较长，放到线程池执行，
+        避免错误密码（不会进入凭据缓存）的请求阻塞事件循环
+        """
+        user_id = self.credential_cache.get(credentials.username, credentials.password)
+        if user_id is not None:
+            return user_id
+
+        user = self.user_manager.get_user_by_email(credentials.username)
+        if user and await run_in_threadpool(self.user_manager.verify_password,
+                                            credentials.password, user['password_hash']):
+            self.credential_cache.put(credentials.username, credentials.password, user['user_id'])
+            return user['user_id']
+        raise HTTPException(status_code=401, detail='认证失败', headers={'WWW-Authenticate': 'Basic'})
+
+    # ---------- 条件请求 ----------
+
+    def conditional_response(self, request: Request, resource: str, params: Dict,
+                             build: Callable[[], Any], revision_user_id: Optional[int] = None) -> Response:
+        """
+        生成带ETag的JSON响应
+
+        传入 revision_user_id 的资源（任务列表、标签、专注记录）由该用户的数据版本号覆盖：
+        版本号未变时直接返回304，不查询数据；其余情况按响应内容计算ETag
+        """
+        user_id = revision_user_id
+        if_none_match = request.headers.get('if-none-match')
+        revision = self.db.get_data_revision(user_id) if user_id is not None else None
+
+        etag = None
+        if revision is not None:
+            params_key = json.dumps(params, sort_keys=True, default=str)
+            digest = hashlib.sha1(f"{resource}|{user_id}|{revision}|{params_key}".encode('utf-8')).hexdigest()[:16]
+            etag = f'W/"{digest}"'
+            if if_none_match == etag:
+                return Response(status_code=304, headers={'ETag': etag})
+
+        body = json.dumps(jsonable_encoder(build()), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if etag is None:
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if if_none_match == etag:
+                return Response(status_code=304, headers={'ETag': etag})
+        return Response(content=body, media_type='application/json', headers={'ETag': etag})
+
+    # ---------- 调试 ----------
+
+    def query_report(self, limit: int = 20, order_by: str = 'total_ms') -> Dict:
+        """查询统计：耗时最多的语句、最近的慢查询和查询数最多的请求"""
+        return {
+            'slow_query_ms': self.query_stats.slow_query_ms,
+            'top': self.query_stats.top(limit, order_by),
+            'slow': self.query_stats.slow_queries(limit),
+            'requests': self.query_stats.requests(limit)
+        }
+
+    # ---------- 数据 ----------
+
+    def clamp_limit(self, limit: Optional[int]) -> int:
+        """每页条数，默认 page_size，上限为其5倍"""
+        if not limit:
+            return self.page_size
+        return max(1, min(limit, self.page_size * 5))
+
+    def _attach_tags(self, tasks: List[Dict]):
+        """一次查询为一页任务附加标签"""
+        if not tasks:
+            return
+        task_ids = [task['task_id'] for task in tasks]
+        placeholders = ', '.join(['%s'] * len(task_ids))
+        rows = self.db.execute_query(f"""
+        SELECT tt.task_id, t.tag_id, t.name, t.color
+        FROM task_tags tt
+        JOIN tags t ON t.tag_id = tt.tag_id
+        WHERE tt.task_id IN ({placeholders})
+        """, tuple(task_ids)) or []
+        by_task: Dict[int, List[Dict]] = {}
+        for row in rows:
+            by_task.setdefault(row.pop('task_id'), []).append(row)
+        for task in tasks:
+            task['tags'] = by_task.get(task['task_id'], [])
+
+    def list_tasks(self, user_id: int, after: int = 0, limit: int = None) -> Dict:
+        """全量读取任务（按task_id键集分页），第一页附带此后增量同步的起始游标"""
+        limit = self.clamp_limit(limit)
+        result = {}
+        if not after:
+            # 先取游标再读数据：读取期间的修改会在增量同步中再次返回，不会遗漏
+            result['cursor'] = self.event_log.current_cursor(user_id)
+        rows = self.db.execute_query(f"""
+        SELECT {TASK_COLUMNS} FROM tasks
+        WHERE user_id = %s AND task_id > %s
+        ORDER BY task_id
+        LIMIT %s
+        """, (user_id, after or 0, limit + 1)) or []
+        has_more = len(rows) > limit
+        tasks = rows[:limit]
+        self._attach_tags(tasks)
+        result.update({
+            'items': tasks,
+            'next_after': tasks[-1]['task_id'] if has_more else None
+        })
+        return result
+
+    def task_changes(self, user_id: int, since: int, limit: int = None) -> Dict:
+        """增量读取：游标之后变化的任务（最新内容）和已删除的任务ID"""
+        limit = self.clamp_limit(limit)
+        events, cursor = self.event_log.read_since(since, limit, user_id)
+        task_ids = list(dict.fromkeys(e['task_id'] for e in events if e['task_id'] is not None))
+
+        tasks = []
+        if task_ids:
+            placeholders = ', '.join(['%s'] * len(task_ids))
+            tasks = self.db.execute_query(f"""
+            SELECT {TASK_COLUMNS} FROM tasks
+            WHERE user_id = %s AND task_id IN ({placeholders})
+            ORDER BY task_id
+            """, (user_id,) + tuple(task_ids))
+            if tasks is None:
+                # 查询失败时不能把任务当作已删除返回
+                raise HTTPException(status_code=503, detail='数据库暂不可用')
+            self._attach_tags(tasks)
+        found = {task['task_id'] for task in tasks}
+        return {
+            'items': tasks,
+            'deleted': [task_id for task_id in task_ids if task_id not in found],
+            'cursor': cursor,
+            'has_more': len(events) == limit
+        }
+
+    def list_sessions(self, user_id: int, after: int = 0, limit: int = None) -> Dict:
+        """已完成的专注记录（按session_id键集分页，after即为增量游标）"""
+        limit = self.clamp_limit(limit)
+        rows = self.db.execute_query(f"""
+        SELECT {SESSION_COLUMNS} FROM focus_sessions
+        WHERE user_id = %s AND is_completed = TRUE AND session_id > %s
+        ORDER BY session_id
+        LIMIT %s
+        """, (user_id, after or 0, limit + 1)) or []
+        has_more = len(rows) > limit
+        sessions = rows[:limit]
+        return {
+            'items': sessions,
+            'next_after': sessions[-1]['session_id'] if sessions else (after or 0),
+            'has_more': has_more
+        }
+
+
+def create_api_app(db_manager, user_manager, tag_manager, settings_manager, sync_api: SyncAPI = None) -> FastAPI:
+    """
+    创建同步API子应用，在主应用中以 app.mount('/api', ...) 挂载
+
+    gzip中间件只作用于API，不影响NiceGUI页面和websocket
+    """
+    api = sync_api or SyncAPI(db_manager, user_manager, tag_manager, settings_manager)
+    api_app = FastAPI(title='任务同步API', docs_url='/docs', openapi_url='/openapi.json')
+    api_app.add_middleware(GZipMiddleware, minimum_size=1024)
+    security = HTTPBasic()
+
+    # 数据库连接在事件循环线程中使用，接口定义为async以避免在线程池中并发访问同一连接
+    async def current_user(credentials: HTTPBasicCredentials = Depends(security)) -> int:
+        return await api.authenticate(credentials)
+
+    @api_app.get('/tasks')
+    async def get_tasks(request: Request, user_id: int = Depends(current_user),
+                        since: Optional[int] = Query(None, ge=0), after: int = Query(0, ge=0),
+                        limit: Optional[int] = Query(None, ge=1)):
+        """任务：since为事件游标时返回增量，否则按after分页全量读取"""
+        if since is not None:
+            # 增量结果还取决于事件是否已过稳定等待时间，不能只凭版本号判断未变化
+            return api.conditional_response(
+                request, 'task_changes', {'since': since, 'limit': limit},
+                lambda: api.task_changes(user_id, since, limit)
+            )
+        return api.conditional_response(
+            request, 'tasks', {'after': after, 'limit': limit},
+            lambda: api.list_tasks(user_id, after, limit), revision_user_id=user_id
+        )
+
+    @api_app.get('/tags')
+    async def get_tags(request: Request, user_id: int = Depends(current_user)):
+        """标签（含未完成任务数）"""
+        return api.conditional_response(
+            request, 'tags', {},
+            lambda: {'items': tag_manager.get_user_tags_with_count(user_id) or []}, revision_user_id=user_id
+        )
+
+    @api_app.get('/sessions')
+    async def get_sessions(request: Request, user_id: int = Depends(current_user),
+                           after: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
+        """已完成的专注记录"""
+        return api.conditional_response(
+            request, 'sessions', {'after': after, 'limit': limit},
+            lambda: api.list_sessions(user_id, after, limit), revision_user_id=user_id
+        )
+
+    @api_app.get('/settings')
+    async def get_settings(request: Request, user_id: int = Depends(current_user)):
+        """用户设置（不受数据版本号覆盖，按内容计算ETag）"""
+        settings = settings_manager.get_user_settings(user_id)
+        if settings is None:
+            raise HTTPException(status_code=404, detail='设置不存在')
+        return api.conditional_response(request, 'settings', {}, lambda: settings)
+
+    @api_app.get('/export/{dataset}')
+    async def export(dataset: str, user_id: int = Depends(current_user), format: str = Query('csv')):
+        """
+        流式导出（tasks 或 focus_sessions）
+
+        导出使用独立连接的服务端游标，生成器在线程池中迭代，不占用共享连接
+        """
+        try:
+            chunks = api.export_service.export(user_id, dataset, format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        media_type, extension = EXPORT_FORMATS[format]
+        return StreamingResponse(chunks, media_type=media_type, headers={
+            'Content-Disposition': f'attachment; filename="{dataset}.{extension}"'
+        })
+
+    @api_app.get('/debug/queries')
+    async def debug_queries(user_id: int = Depends(current_user), limit: int = Query(20, ge=1, le=200),
+                            order: str = Query('total_ms')):
+        """
+        SQL查询统计（仅在 QUERY_DEBUG_ENDPOINT=true 时开放）
+
+        统计是进程级的，包含所有用户的语句指纹（不含参数值）；order 为 QUERY_ORDERS 之一
+        """
+        if not APP_CONFIG['query_debug_endpoint']:
+            raise HTTPException(status_code=404, detail='Not Found')
+        if order not in QUERY_ORDERS:
+            raise HTTPException(status_code=400, detail=f"order 应为 {', '.join(QUERY_ORDERS)} 之一")
+        return api.query_report(limit, order)
+
+    @api_app.delete('/debug/queries')
+    async def reset_debug_queries(user_id: int = Depends(current_user)):
+        """清空SQL查询统计（仅在 QUERY_DEBUG_ENDPOINT=true 时开放）"""
+        if not APP_CONFIG['query_debug_endpoint']:
+            raise HTTPException(status_code=404, detail='Not Found')
+        api.query_stats.reset()
+        return {'reset': True}
+
+    return api_app
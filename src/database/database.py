@@ -6,26 +6,44 @@
 
 import mysql.connector
 from mysql.connector import Error
-from config import DB_CONFIG
+from mysql.connector.constants import ClientFlag
+from config import DB_CONFIG, APP_CONFIG
+from src.database.query_stats import QueryStats, get_shared_query_stats, instrumented
 import bcrypt
+import time
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# DB_CONFIG 中选择后端的配置项，不传给 mysql.connector
+BACKEND_CONFIG_KEYS = ('backend', 'sqlite_path')
+
+
+def _mysql_config() -> Dict[str, Any]:
+    """MySQL连接参数"""
+    return {key: value for key, value in DB_CONFIG.items() if key not in BACKEND_CONFIG_KEYS}
+
+
 class DatabaseManager:
     """数据库连接管理器"""
     
-    def __init__(self):
+    # SQL方言，需要按数据库区分写法的地方据此判断
+    dialect = 'mysql'
+    
+    def __init__(self, query_stats: QueryStats = None):
         self.connection = None
+        self.query_stats = query_stats or get_shared_query_stats()
         self.connect()
     
     def connect(self):
         """建立数据库连接"""
         try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
+            # FOUND_ROWS：UPDATE 返回匹配的行数而不是实际改变的行数，便于判断记录是否存在
+            self.connection = mysql.connector.connect(**_mysql_config(), client_flags=[ClientFlag.FOUND_ROWS])
             if self.connection.is_connected():
                 logger.info("成功连接到MySQL数据库")
         except Error as e:
@@ -38,6 +56,7 @@ class DatabaseManager:
             self.connection.close()
             logger.info("数据库连接已关闭")
     
+    @instrumented('query')
     def execute_query(self, query: str, params: tuple = None) -> Optional[List[Dict]]:
         """执行查询并返回结果"""
         if not self.connection or not self.connection.is_connected():
@@ -56,6 +75,7 @@ class DatabaseManager:
             if cursor:
                 cursor.close()
     
+    @instrumented('update')
     def execute_update(self, query: str, params: tuple = None) -> bool:
         """执行更新操作"""
         if not self.connection or not self.connection.is_connected():
@@ -75,6 +95,103 @@ class DatabaseManager:
             if cursor:
                 cursor.close()
     
+    @instrumented('rowcount')
+    def execute_update_rowcount(self, query: str, params: tuple = None) -> Optional[int]:
+        """执行更新操作并返回匹配的行数，出错时返回None"""
+        if not self.connection or not self.connection.is_connected():
+            self.connect()
+        
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            self.connection.commit()
+            return cursor.rowcount
+        except Error as e:
+            logger.error(f"执行更新时发生错误: {e}")
+            self.connection.rollback()
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+    
+    @instrumented('many')
+    def execute_many(self, query: str, seq_params: List[tuple]) -> bool:
+        """用同一语句批量执行多组参数（executemany），作为一个事务提交"""
+        if not seq_params:
+            return True
+        if not self.connection or not self.connection.is_connected():
+            self.connect()
+        
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.executemany(query, seq_params)
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error(f"批量执行时发生错误: {e}")
+            self.connection.rollback()
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+    
+    def execute_in_transaction(self, work: Callable[[Any], Any]) -> Any:
+        """
+        在一个事务中执行多条语句：work(cursor) 中的所有写入一起提交，出错时全部回滚
+
+        Returns:
+            work 的返回值，出错时返回None
+        """
+        if not self.connection or not self.connection.is_connected():
+            self.connect()
+        
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            result = work(cursor)
+            self.connection.commit()
+            return result
+        except Error as e:
+            logger.error(f"执行事务时发生错误: {e}")
+            self.connection.rollback()
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+    
+    def stream_query(self, query: str, params: tuple = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        以无缓冲的服务端游标逐行读取查询结果（生成器），内存占用与结果行数无关
+
+        使用独立连接：无缓冲游标在读完之前会占住连接，不能与共享连接上的其他查询交错；
+        生成器可以在其他线程中迭代，提前关闭生成器时连接随之关闭
+        """
+        connection = None
+        cursor = None
+        try:
+            connection = mysql.connector.connect(**_mysql_config())
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        except Error as e:
+            logger.error(f"流式查询时发生错误: {e}")
+            raise
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Error:
+                    # 提前结束时游标中还有未读取的行
+                    pass
+            if connection:
+                connection.close()
+    
     def get_last_insert_id(self) -> Optional[int]:
         """获取最后插入的ID"""
         if not self.connection or not self.connection.is_connected():
@@ -93,6 +210,64 @@ class DatabaseManager:
             if cursor:
                 cursor.close()
 
+    def explain(self, query: str, params: tuple = None) -> Optional[List[Dict]]:
+        """获取查询语句的执行计划（不计入查询统计），非SELECT语句或出错时返回None"""
+        if not query.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        if not self.connection or not self.connection.is_connected():
+            return None
+        
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute(f"EXPLAIN {query}", params)
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"获取执行计划时发生错误: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+
+    def table_exists(self, table: str) -> bool:
+        """检查当前数据库中是否存在指定的表"""
+        result = self.execute_query(
+            """
+            SELECT COUNT(*) as count
+            FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = %s
+            """,
+            (table,)
+        )
+        return bool(result and result[0]['count'] > 0)
+
+    def get_data_revision(self, user_id: int) -> Optional[int]:
+        """
+        获取用户数据版本号（由触发器在任务、标签、专注记录写入时递增）
+        版本表不存在或查询失败时返回None，调用方应视为不可缓存
+        """
+        result = self.execute_query(
+            "SELECT revision FROM user_data_revisions WHERE user_id = %s", (user_id,)
+        )
+        if result is None:
+            return None
+        return result[0]['revision'] if result else 0
+
+def create_database_manager() -> DatabaseManager:
+    """按 DB_CONFIG['backend'] 创建数据库管理器（sqlite 后端延迟导入）"""
+    if DB_CONFIG.get('backend') == 'sqlite':
+        from src.database.sqlite_backend import SQLiteDatabaseManager
+        return SQLiteDatabaseManager(DB_CONFIG['sqlite_path'])
+    return DatabaseManager()
+
+def publish_change(user_id: Optional[int], event_type: str, **payload):
+    """发布数据变更事件（延迟导入事件总线，避免与服务层循环导入）"""
+    try:
+        from src.services.event_bus import get_event_bus
+        get_event_bus().publish(user_id, event_type, **payload)
+    except Exception as e:
+        logger.error(f"发布变更事件失败: {e}")
+
 # 用户管理相关函数
 class UserManager:
     """用户管理类"""
@@ -194,11 +369,60 @@ class UserManager:
 
 # ListManager 类已删除 - 功能已整合到 TagManager
 
+class TagIdCache:
+    """按用户缓存标签名称到ID的映射（进程内共享，线程安全）"""
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, Tuple[float, Dict[str, int]]] = {}  # user_id -> (加载时间, {名称键: tag_id})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str) -> str:
+        """名称键：与数据库的不区分大小写排序规则保持一致"""
+        return name.casefold()
+
+    def lookup(self, user_id: int, names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """查找名称对应的ID，返回 (已缓存的 名称->ID, 未缓存的名称)"""
+        found, missing = {}, []
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and self.ttl_seconds and time.time() - entry[0] > self.ttl_seconds:
+                del self._entries[user_id]
+                entry = None
+            mapping = entry[1] if entry else {}
+            for name in names:
+                tag_id = mapping.get(self.key(name))
+                if tag_id is None:
+                    missing.append(name)
+                else:
+                    found[name] = tag_id
+        return found, missing
+
+    def store(self, user_id: int, mapping: Dict[str, int]):
+        """写入名称到ID的映射"""
+        with self._lock:
+            entry = self._entries.setdefault(user_id, (time.time(), {}))
+            entry[1].update({self.key(name): tag_id for name, tag_id in mapping.items()})
+
+    def invalidate(self, user_id: int = None):
+        """清除用户（或全部）的映射，标签改名或删除后调用"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+# 同一进程内的所有 TagManager 共用，任何实例改名/删除标签都能让其他实例的映射失效
+_tag_id_cache = TagIdCache(APP_CONFIG['tag_cache_ttl_seconds'])
+
 class TagManager:
     """标签管理类"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, tag_id_cache: TagIdCache = None):
         self.db = db_manager
+        self.tag_id_cache = tag_id_cache or _tag_id_cache
     
     def create_tag(self, user_id: int, name: str, color: str = '#757575') -> Optional[int]:
         """创建标签"""
@@ -208,7 +432,11 @@ class TagManager:
         
         query = "INSERT INTO tags (user_id, name, color) VALUES (%s, %s, %s)"
         success = self.db.execute_update(query, (user_id, name, color))
-        return self.db.get_last_insert_id() if success else None
+        if not success:
+            return None
+        tag_id = self.db.get_last_insert_id()
+        publish_change(user_id, 'tag.changed', tag_id=tag_id)
+        return tag_id
     
     def get_user_tags(self, user_id: int) -> List[Dict]:
         """获取用户的所有标签"""
@@ -216,9 +444,23 @@ class TagManager:
         return self.db.execute_query(query, (user_id,))
     
     def get_user_tags_with_count(self, user_id: int) -> List[Dict]:
-        """获取用户的所有标签（包含任务数量）"""
+        """获取用户的所有标签（包含未完成任务数量）
+
+        数量读取由触发器维护的 tags.pending_count，只扫描该用户的标签行；
+        数据库尚未执行 add_tag_pending_count.sql 迁移时退回到连接统计
+        """
         query = """
-        SELECT t.*, COUNT(tt.task_id) as task_count 
+        SELECT *, pending_count AS task_count
+        FROM tags
+        WHERE user_id = %s
+        ORDER BY name
+        """
+        results = self.db.execute_query(query, (user_id,))
+        if results is not None:
+            return results
+
+        fallback_query = """
+        SELECT t.*, COUNT(ts.task_id) as task_count 
         FROM tags t 
         LEFT JOIN task_tags tt ON t.tag_id = tt.tag_id 
         LEFT JOIN tasks ts ON tt.task_id = ts.task_id AND ts.status = 'pending'
@@ -226,7 +468,29 @@ class TagManager:
         GROUP BY t.tag_id
         ORDER BY t.name
         """
-        return self.db.execute_query(query, (user_id,))
+        return self.db.execute_query(fallback_query, (user_id,))
+    
+    def rebuild_pending_counts(self, user_id: int = None) -> bool:
+        """按任务数据重建标签的未完成任务计数（修复任务）
+
+        触发器在正常写入中维护计数；手工改库、导入或迁移前的历史数据可能造成偏差，
+        此时用一条语句重新统计，user_id 为空时重建所有用户；
+        使用关联子查询而不是 UPDATE ... JOIN，MySQL和SQLite都支持
+        """
+        query = """
+        UPDATE tags AS t
+        SET pending_count = (
+            SELECT COUNT(*)
+            FROM task_tags tt
+            JOIN tasks ts ON ts.task_id = tt.task_id AND ts.status = 'pending'
+                AND tt.tag_id = t.tag_id
+        )
+        """
+        params = None
+        if user_id is not None:
+            query += " WHERE t.user_id = %s"
+            params = (user_id,)
+        return self.db.execute_update(query, params)
     
     def get_tag_by_name(self, user_id: int, name: str) -> Optional[Dict]:
         """根据名称获取标签"""
@@ -245,6 +509,55 @@ class TagManager:
             return existing_tag['tag_id']
         return self.create_tag(user_id, name, color)
     
+    def resolve_tags(self, user_id: int, names: List[str], color: str = '#757575') -> Dict[str, int]:
+        """
+        批量获取或创建标签
+
+        未缓存的名称用一条 INSERT ... ON DUPLICATE KEY 补齐缺失的标签，
+        再用一条 IN 查询取回全部ID；已缓存的名称不访问数据库
+
+        Args:
+            user_id: 用户ID
+            names: 标签名称列表（会去除首尾空白，空名称和超过15个字符的名称被忽略）
+            color: 新建标签的颜色
+
+        Returns:
+            名称到标签ID的映射
+        """
+        unique_names = []
+        seen = set()
+        for name in names:
+            name = name.strip()
+            if name and len(name) <= 15 and TagIdCache.key(name) not in seen:
+                seen.add(TagIdCache.key(name))
+                unique_names.append(name)
+        if not unique_names:
+            return {}
+
+        resolved, missing = self.tag_id_cache.lookup(user_id, unique_names)
+        if not missing:
+            return resolved
+
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(missing))
+        params = [value for name in missing for value in (user_id, name, color)]
+        upsert = (f"INSERT INTO tags (user_id, name, color) VALUES {placeholders} "
+                  "ON DUPLICATE KEY UPDATE tag_id = tag_id")
+        if not self.db.execute_update(upsert, tuple(params)):
+            return resolved
+
+        in_placeholders = ', '.join(['%s'] * len(missing))
+        rows = self.db.execute_query(
+            f"SELECT tag_id, name FROM tags WHERE user_id = %s AND name IN ({in_placeholders})",
+            (user_id, *missing)
+        ) or []
+        ids_by_key = {TagIdCache.key(row['name']): row['tag_id'] for row in rows}
+        fetched = {name: ids_by_key[TagIdCache.key(name)] for name in missing if TagIdCache.key(name) in ids_by_key}
+
+        self.tag_id_cache.store(user_id, fetched)
+        resolved.update(fetched)
+        publish_change(user_id, 'tag.changed')
+        return resolved
+    
     def get_task_tags(self, task_id: int) -> List[Dict]:
         """获取任务的所有标签"""
         query = """
@@ -260,6 +573,11 @@ class TagManager:
         query = "INSERT IGNORE INTO task_tags (task_id, tag_id) VALUES (%s, %s)"
         return self.db.execute_update(query, (task_id, tag_id))
     
+    def add_task_tags(self, task_id: int, tag_ids: Iterable[int]) -> bool:
+        """为任务批量添加标签（一次executemany）"""
+        query = "INSERT IGNORE INTO task_tags (task_id, tag_id) VALUES (%s, %s)"
+        return self.db.execute_many(query, [(task_id, tag_id) for tag_id in tag_ids])
+    
     def remove_task_tag(self, task_id: int, tag_id: int) -> bool:
         """移除任务标签"""
         query = "DELETE FROM task_tags WHERE task_id = %s AND tag_id = %s"
@@ -291,12 +609,29 @@ class TagManager:
         
         params.append(tag_id)
         query = f"UPDATE tags SET {', '.join(updates)} WHERE tag_id = %s"
-        return self.db.execute_update(query, tuple(params))
+        success = self.db.execute_update(query, tuple(params))
+        if success:
+            user_id = self._get_tag_owner(tag_id)
+            if name is not None:
+                self.tag_id_cache.invalidate(user_id)
+            publish_change(user_id, 'tag.changed', tag_id=tag_id)
+        return success
     
     def delete_tag(self, tag_id: int) -> bool:
         """删除标签"""
+        # 删除前确定所属用户，删除后无法再查询
+        user_id = self._get_tag_owner(tag_id)
         query = "DELETE FROM tags WHERE tag_id = %s"
-        return self.db.execute_update(query, (tag_id,))
+        success = self.db.execute_update(query, (tag_id,))
+        if success:
+            self.tag_id_cache.invalidate(user_id)
+            publish_change(user_id, 'tag.deleted', tag_id=tag_id)
+        return success
+
+    def _get_tag_owner(self, tag_id: int) -> Optional[int]:
+        """获取标签所属用户ID"""
+        result = self.db.execute_query("SELECT user_id FROM tags WHERE tag_id = %s", (tag_id,))
+        return result[0]['user_id'] if result else None
     
     def get_tag_by_id(self, tag_id: int) -> Optional[Dict]:
         """根据ID获取标签"""
@@ -305,12 +640,23 @@ class TagManager:
         return results[0] if results else None
     
     def complete_tag_tasks(self, tag_id: int) -> bool:
-        """完成标签下的所有任务"""
+        """完成标签下的所有任务，其中的重复任务生成下一次任务"""
+        pending = self.db.execute_query("""
+        SELECT t.task_id FROM tasks t
+        JOIN task_tags tt ON tt.task_id = t.task_id
+        WHERE tt.tag_id = %s AND t.status = 'pending' AND t.repeat_cycle <> 'none'
+        """, (tag_id,)) or []
         query = """
         UPDATE tasks 
-        SET status = 'completed' 
+        SET status = 'completed', completed_at = CURRENT_TIMESTAMP
         WHERE task_id IN (
             SELECT task_id FROM task_tags WHERE tag_id = %s
         ) AND status = 'pending'
         """
-        return self.db.execute_update(query, (tag_id,))
\ No newline at end of file
+        success = self.db.execute_update(query, (tag_id,))
+        if success:
+            if pending:
+                from src.services.recurrence_engine import RecurrenceEngine
+                RecurrenceEngine(self.db).spawn_next([row['task_id'] for row in pending])
+            publish_change(self._get_tag_owner(tag_id), 'tasks.bulk_updated', tag_id=tag_id)
+        return success
\ No newline at end of file
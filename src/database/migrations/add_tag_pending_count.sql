@@ -0,0 +1,39 @@
+-- 迁移：为标签添加未完成任务计数列、维护触发器，并回填已有数据
+USE pomodoro_task_manager;
+
+ALTER TABLE tags ADD COLUMN pending_count INT NOT NULL DEFAULT 0 AFTER color;
+
+-- 标签未完成任务计数触发器
+-- 与写入语句处于同一事务，任务创建打标签、完成、取消完成、删除和改标签时同步维护 tags.pending_count；
+-- 外键级联删除不会触发 task_tags 的触发器，因此删除任务时在 BEFORE DELETE 中先扣减
+
+CREATE TRIGGER task_tags_after_insert_pending_count AFTER INSERT ON task_tags FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count + 1
+    WHERE tag_id = NEW.tag_id
+      AND EXISTS (SELECT 1 FROM tasks WHERE task_id = NEW.task_id AND status = 'pending');
+
+CREATE TRIGGER task_tags_after_delete_pending_count AFTER DELETE ON task_tags FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count - 1
+    WHERE tag_id = OLD.tag_id
+      AND EXISTS (SELECT 1 FROM tasks WHERE task_id = OLD.task_id AND status = 'pending');
+
+CREATE TRIGGER tasks_after_update_pending_count AFTER UPDATE ON tasks FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count + IF(NEW.status = 'pending', 1, -1)
+    WHERE OLD.status <> NEW.status
+      AND (OLD.status = 'pending' OR NEW.status = 'pending')
+      AND tag_id IN (SELECT tag_id FROM task_tags WHERE task_id = NEW.task_id);
+
+CREATE TRIGGER tasks_before_delete_pending_count BEFORE DELETE ON tasks FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count - 1
+    WHERE OLD.status = 'pending'
+      AND tag_id IN (SELECT tag_id FROM task_tags WHERE task_id = OLD.task_id);
+
+-- 回填：与 TagManager.rebuild_pending_counts 使用同一条语句，计数出现偏差时也可单独执行修复
+UPDATE tags t
+LEFT JOIN (
+    SELECT tt.tag_id, COUNT(*) AS pending
+    FROM task_tags tt
+    JOIN tasks ts ON ts.task_id = tt.task_id AND ts.status = 'pending'
+    GROUP BY tt.tag_id
+) c ON c.tag_id = t.tag_id
+SET t.pending_count = COALESCE(c.pending, 0);
@@ -0,0 +1,36 @@
+-- 迁移：为任务添加完成时间列和 (user_id, completed_at) 索引，并在线回填
+-- 加列和建索引使用 INPLACE 算法，执行期间不阻塞读写
+USE pomodoro_task_manager;
+
+ALTER TABLE tasks
+    ADD COLUMN completed_at TIMESTAMP NULL DEFAULT NULL AFTER used_pomodoros,
+    ALGORITHM = INPLACE, LOCK = NONE;
+
+ALTER TABLE tasks
+    ADD INDEX idx_tasks_user_completed (user_id, completed_at),
+    ALGORITHM = INPLACE, LOCK = NONE;
+
+-- 回填：已完成任务的完成时间取最后更新时间（迁移前没有更准确的记录）。
+-- 按主键分批更新，每批单独提交，避免长时间持有大量行锁；
+-- 显式保留 updated_at，防止 ON UPDATE 把它改成迁移时间
+DROP PROCEDURE IF EXISTS backfill_task_completed_at;
+
+DELIMITER //
+CREATE PROCEDURE backfill_task_completed_at(IN batch_size INT)
+BEGIN
+    DECLARE last_id INT DEFAULT 0;
+    DECLARE max_id INT DEFAULT 0;
+    SELECT COALESCE(MAX(task_id), 0) INTO max_id FROM tasks;
+    WHILE last_id < max_id DO
+        UPDATE tasks
+        SET completed_at = updated_at, updated_at = updated_at
+        WHERE task_id > last_id AND task_id <= last_id + batch_size
+            AND status = 'completed' AND completed_at IS NULL;
+        COMMIT;
+        SET last_id = last_id + batch_size;
+    END WHILE;
+END //
+DELIMITER ;
+
+CALL backfill_task_completed_at(5000);
+DROP PROCEDURE backfill_task_completed_at;
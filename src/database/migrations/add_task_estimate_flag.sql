@@ -0,0 +1,11 @@
+-- 迁移：为任务添加“预估番茄钟已设置”标记，批量AI预估只处理从未预估过的任务
+-- 加列时默认值为TRUE：已有任务无法区分默认的1和用户有意设置的1，一律视为已预估，不会被批量预估覆盖；
+-- 之后新建的任务默认为FALSE，由用户、AI或导入设置预估值时置为TRUE
+USE pomodoro_task_manager;
+
+ALTER TABLE tasks
+    ADD COLUMN pomodoros_estimated BOOLEAN NOT NULL DEFAULT TRUE AFTER estimated_pomodoros,
+    ALGORITHM = INPLACE, LOCK = NONE;
+
+ALTER TABLE tasks
+    ALTER COLUMN pomodoros_estimated SET DEFAULT FALSE;
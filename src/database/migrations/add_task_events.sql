@@ -0,0 +1,93 @@
+-- 迁移：添加只追加的任务活动日志、消费者游标表和记录触发器
+-- 需要先执行 add_task_series.sql 和 add_task_completed_at.sql（触发器引用 series_id 和 completed_at）
+USE pomodoro_task_manager;
+
+-- 任务活动日志（只追加）
+-- 由触发器在写入语句的同一事务中记录，集合式语句（批量完成、批量生成重复任务）在一条语句内写入全部事件；
+-- 消费者按 event_id 游标增量读取，见 src/services/task_events.py
+CREATE TABLE IF NOT EXISTS task_events (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    task_id INT NULL,  -- 任务删除后保留事件；未关联任务的专注记录为NULL
+    event_type ENUM('create', 'complete', 'reopen', 'edit', 'retag', 'pomodoro', 'delete') NOT NULL,
+    payload JSON NULL,
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_task_events_user (user_id, event_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- 消费者游标：每个消费者已处理到的 event_id
+CREATE TABLE IF NOT EXISTS task_event_cursors (
+    consumer VARCHAR(64) PRIMARY KEY,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER tasks_after_insert_event AFTER INSERT ON tasks FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (NEW.user_id, NEW.task_id, 'create',
+            JSON_OBJECT('title', NEW.title, 'due_date', NEW.due_date, 'priority', NEW.priority,
+                        'series_id', NEW.series_id));
+
+-- 一次更新可能同时产生多种事件（如编辑时顺带完成），用 UNION ALL 在一条语句中写入
+CREATE TRIGGER tasks_after_update_event AFTER UPDATE ON tasks FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'complete', JSON_OBJECT('completed_at', NEW.completed_at)
+    FROM DUAL WHERE OLD.status = 'pending' AND NEW.status = 'completed'
+    UNION ALL
+    SELECT NEW.user_id, NEW.task_id, 'reopen', JSON_OBJECT('completed_at', OLD.completed_at)
+    FROM DUAL WHERE OLD.status = 'completed' AND NEW.status = 'pending'
+    UNION ALL
+    SELECT NEW.user_id, NEW.task_id, 'edit',
+           JSON_OBJECT(
+               'fields', CONCAT_WS(',',
+                   IF(OLD.title <=> NEW.title, NULL, 'title'),
+                   IF(OLD.description <=> NEW.description, NULL, 'description'),
+                   IF(OLD.due_date <=> NEW.due_date, NULL, 'due_date'),
+                   IF(OLD.priority <=> NEW.priority, NULL, 'priority'),
+                   IF(OLD.estimated_pomodoros <=> NEW.estimated_pomodoros, NULL, 'estimated_pomodoros'),
+                   IF(OLD.repeat_cycle <=> NEW.repeat_cycle, NULL, 'repeat_cycle')),
+               'before', JSON_OBJECT('title', OLD.title, 'description', OLD.description,
+                                     'due_date', OLD.due_date, 'priority', OLD.priority,
+                                     'estimated_pomodoros', OLD.estimated_pomodoros,
+                                     'repeat_cycle', OLD.repeat_cycle))
+    FROM DUAL
+    WHERE NOT (OLD.title <=> NEW.title AND OLD.description <=> NEW.description
+               AND OLD.due_date <=> NEW.due_date AND OLD.priority <=> NEW.priority
+               AND OLD.estimated_pomodoros <=> NEW.estimated_pomodoros
+               AND OLD.repeat_cycle <=> NEW.repeat_cycle);
+
+-- 删除事件保存完整的任务内容，供撤销使用
+CREATE TRIGGER tasks_after_delete_event AFTER DELETE ON tasks FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (OLD.user_id, OLD.task_id, 'delete',
+            JSON_OBJECT('title', OLD.title, 'description', OLD.description, 'due_date', OLD.due_date,
+                        'priority', OLD.priority, 'status', OLD.status, 'repeat_cycle', OLD.repeat_cycle,
+                        'series_id', OLD.series_id, 'estimated_pomodoros', OLD.estimated_pomodoros,
+                        'used_pomodoros', OLD.used_pomodoros, 'completed_at', OLD.completed_at,
+                        'created_at', OLD.created_at));
+
+CREATE TRIGGER task_tags_after_insert_event AFTER INSERT ON task_tags FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT user_id, task_id, 'retag', JSON_OBJECT('added', NEW.tag_id)
+    FROM tasks WHERE task_id = NEW.task_id;
+
+CREATE TRIGGER task_tags_after_delete_event AFTER DELETE ON task_tags FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT user_id, task_id, 'retag', JSON_OBJECT('removed', OLD.tag_id)
+    FROM tasks WHERE task_id = OLD.task_id;
+
+-- 番茄钟：工作专注记录完成时记录一次（直接以完成状态写入或由未完成更新为完成）
+CREATE TRIGGER focus_sessions_after_insert_event AFTER INSERT ON focus_sessions FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'pomodoro',
+           JSON_OBJECT('session_id', NEW.session_id, 'duration_minutes', NEW.duration_minutes,
+                       'start_time', NEW.start_time)
+    FROM DUAL WHERE NEW.session_type = 'work' AND NEW.is_completed;
+
+CREATE TRIGGER focus_sessions_after_update_event AFTER UPDATE ON focus_sessions FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'pomodoro',
+           JSON_OBJECT('session_id', NEW.session_id, 'duration_minutes', NEW.duration_minutes,
+                       'start_time', NEW.start_time)
+    FROM DUAL WHERE NEW.session_type = 'work' AND NEW.is_completed AND NOT OLD.is_completed;
@@ -0,0 +1,16 @@
+-- 迁移：添加批量导入检查点表
+USE pomodoro_task_manager;
+
+-- 每批任务和检查点在同一事务中提交，中断后从 rows_done 条源记录之后继续，见 src/services/task_import.py
+CREATE TABLE IF NOT EXISTS task_imports (
+    import_id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    source_name VARCHAR(255) NOT NULL DEFAULT '',
+    status ENUM('running', 'completed') NOT NULL DEFAULT 'running',
+    rows_done INT NOT NULL DEFAULT 0,  -- 已处理的源记录数（含跳过的无效记录）
+    tasks_imported INT NOT NULL DEFAULT 0,
+    rows_skipped INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
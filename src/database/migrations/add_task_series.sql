@@ -0,0 +1,9 @@
+-- 迁移：为任务添加重复系列ID，(series_id, due_date) 唯一保证重复任务生成幂等
+USE pomodoro_task_manager;
+
+ALTER TABLE tasks
+    ADD COLUMN series_id INT NULL AFTER repeat_cycle,
+    ADD UNIQUE KEY unique_series_occurrence (series_id, due_date);
+
+-- 已有的重复任务各自成为系列的第一个任务
+UPDATE tasks SET series_id = task_id WHERE repeat_cycle <> 'none';
@@ -0,0 +1,59 @@
+-- 迁移：为已有数据库添加用户数据版本表和触发器
+USE pomodoro_task_manager;
+
+-- 用户数据版本表
+-- 任务、标签、任务标签和专注记录的任何写入都会使对应用户的版本号递增，
+-- 统计报告和图表缓存以版本号判断是否过期
+CREATE TABLE IF NOT EXISTS user_data_revisions (
+    user_id INT PRIMARY KEY,
+    revision BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- 写入触发器：任务、标签和专注记录自带 user_id，任务标签通过任务查找用户
+
+CREATE TRIGGER tasks_after_insert_revision AFTER INSERT ON tasks FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tasks_after_update_revision AFTER UPDATE ON tasks FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tasks_after_delete_revision AFTER DELETE ON tasks FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tags_after_insert_revision AFTER INSERT ON tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tags_after_update_revision AFTER UPDATE ON tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tags_after_delete_revision AFTER DELETE ON tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER focus_sessions_after_insert_revision AFTER INSERT ON focus_sessions FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER focus_sessions_after_update_revision AFTER UPDATE ON focus_sessions FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER focus_sessions_after_delete_revision AFTER DELETE ON focus_sessions FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER task_tags_after_insert_revision AFTER INSERT ON task_tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision)
+    SELECT user_id, 1 FROM tasks WHERE task_id = NEW.task_id
+    ON DUPLICATE KEY UPDATE revision = user_data_revisions.revision + 1;
+
+CREATE TRIGGER task_tags_after_delete_revision AFTER DELETE ON task_tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision)
+    SELECT user_id, 1 FROM tasks WHERE task_id = OLD.task_id
+    ON DUPLICATE KEY UPDATE revision = user_data_revisions.revision + 1;
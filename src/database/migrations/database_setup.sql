@@ -19,6 +19,7 @@ CREATE TABLE tags (
     user_id INT NOT NULL,
     name VARCHAR(100) NOT NULL,
     color VARCHAR(7) DEFAULT '#757575',
+    pending_count INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE KEY unique_user_tag (user_id, name),
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
@@ -34,10 +35,15 @@ CREATE TABLE tasks (
     priority ENUM('high', 'medium', 'low') DEFAULT 'medium',
     status ENUM('pending', 'completed') DEFAULT 'pending',
     repeat_cycle ENUM('none', 'daily', 'weekly', 'monthly') DEFAULT 'none',
+    series_id INT NULL,  -- 重复系列ID（系列第一个任务的ID），非重复任务为NULL
     estimated_pomodoros INT DEFAULT 1,
+    pomodoros_estimated BOOLEAN NOT NULL DEFAULT FALSE,  -- 预估番茄钟是否由用户、AI或导入设置过（否则为默认的1）
     used_pomodoros INT DEFAULT 0,
+    completed_at TIMESTAMP NULL DEFAULT NULL,  -- 完成时间，取消完成时清空；完成统计按此列而不是 updated_at
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_series_occurrence (series_id, due_date),
+    INDEX idx_tasks_user_completed (user_id, completed_at),
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
@@ -77,3 +83,190 @@ CREATE TABLE focus_sessions (
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (task_id) REFERENCES tasks(task_id) ON DELETE SET NULL
 );
+
+-- 用户数据版本表
+-- 任务、标签、任务标签和专注记录的任何写入都会使对应用户的版本号递增，
+-- 统计报告和图表缓存以版本号判断是否过期
+CREATE TABLE IF NOT EXISTS user_data_revisions (
+    user_id INT PRIMARY KEY,
+    revision BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- 写入触发器：任务、标签和专注记录自带 user_id，任务标签通过任务查找用户
+
+CREATE TRIGGER tasks_after_insert_revision AFTER INSERT ON tasks FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tasks_after_update_revision AFTER UPDATE ON tasks FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tasks_after_delete_revision AFTER DELETE ON tasks FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tags_after_insert_revision AFTER INSERT ON tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tags_after_update_revision AFTER UPDATE ON tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER tags_after_delete_revision AFTER DELETE ON tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER focus_sessions_after_insert_revision AFTER INSERT ON focus_sessions FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER focus_sessions_after_update_revision AFTER UPDATE ON focus_sessions FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER focus_sessions_after_delete_revision AFTER DELETE ON focus_sessions FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE revision = revision + 1;
+
+CREATE TRIGGER task_tags_after_insert_revision AFTER INSERT ON task_tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision)
+    SELECT user_id, 1 FROM tasks WHERE task_id = NEW.task_id
+    ON DUPLICATE KEY UPDATE revision = user_data_revisions.revision + 1;
+
+CREATE TRIGGER task_tags_after_delete_revision AFTER DELETE ON task_tags FOR EACH ROW
+    INSERT INTO user_data_revisions (user_id, revision)
+    SELECT user_id, 1 FROM tasks WHERE task_id = OLD.task_id
+    ON DUPLICATE KEY UPDATE revision = user_data_revisions.revision + 1;
+
+-- 标签未完成任务计数触发器
+-- 与写入语句处于同一事务，任务创建打标签、完成、取消完成、删除和改标签时同步维护 tags.pending_count；
+-- 外键级联删除不会触发 task_tags 的触发器，因此删除任务时在 BEFORE DELETE 中先扣减
+
+CREATE TRIGGER task_tags_after_insert_pending_count AFTER INSERT ON task_tags FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count + 1
+    WHERE tag_id = NEW.tag_id
+      AND EXISTS (SELECT 1 FROM tasks WHERE task_id = NEW.task_id AND status = 'pending');
+
+CREATE TRIGGER task_tags_after_delete_pending_count AFTER DELETE ON task_tags FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count - 1
+    WHERE tag_id = OLD.tag_id
+      AND EXISTS (SELECT 1 FROM tasks WHERE task_id = OLD.task_id AND status = 'pending');
+
+CREATE TRIGGER tasks_after_update_pending_count AFTER UPDATE ON tasks FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count + IF(NEW.status = 'pending', 1, -1)
+    WHERE OLD.status <> NEW.status
+      AND (OLD.status = 'pending' OR NEW.status = 'pending')
+      AND tag_id IN (SELECT tag_id FROM task_tags WHERE task_id = NEW.task_id);
+
+CREATE TRIGGER tasks_before_delete_pending_count BEFORE DELETE ON tasks FOR EACH ROW
+    UPDATE tags SET pending_count = pending_count - 1
+    WHERE OLD.status = 'pending'
+      AND tag_id IN (SELECT tag_id FROM task_tags WHERE task_id = OLD.task_id);
+
+-- 任务活动日志（只追加）
+-- 由触发器在写入语句的同一事务中记录，集合式语句（批量完成、批量生成重复任务）在一条语句内写入全部事件；
+-- 消费者按 event_id 游标增量读取，见 src/services/task_events.py
+CREATE TABLE IF NOT EXISTS task_events (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    task_id INT NULL,  -- 任务删除后保留事件；未关联任务的专注记录为NULL
+    event_type ENUM('create', 'complete', 'reopen', 'edit', 'retag', 'pomodoro', 'delete') NOT NULL,
+    payload JSON NULL,
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_task_events_user (user_id, event_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- 消费者游标：每个消费者已处理到的 event_id
+CREATE TABLE IF NOT EXISTS task_event_cursors (
+    consumer VARCHAR(64) PRIMARY KEY,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER tasks_after_insert_event AFTER INSERT ON tasks FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (NEW.user_id, NEW.task_id, 'create',
+            JSON_OBJECT('title', NEW.title, 'due_date', NEW.due_date, 'priority', NEW.priority,
+                        'series_id', NEW.series_id));
+
+-- 一次更新可能同时产生多种事件（如编辑时顺带完成），用 UNION ALL 在一条语句中写入
+CREATE TRIGGER tasks_after_update_event AFTER UPDATE ON tasks FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'complete', JSON_OBJECT('completed_at', NEW.completed_at)
+    FROM DUAL WHERE OLD.status = 'pending' AND NEW.status = 'completed'
+    UNION ALL
+    SELECT NEW.user_id, NEW.task_id, 'reopen', JSON_OBJECT('completed_at', OLD.completed_at)
+    FROM DUAL WHERE OLD.status = 'completed' AND NEW.status = 'pending'
+    UNION ALL
+    SELECT NEW.user_id, NEW.task_id, 'edit',
+           JSON_OBJECT(
+               'fields', CONCAT_WS(',',
+                   IF(OLD.title <=> NEW.title, NULL, 'title'),
+                   IF(OLD.description <=> NEW.description, NULL, 'description'),
+                   IF(OLD.due_date <=> NEW.due_date, NULL, 'due_date'),
+                   IF(OLD.priority <=> NEW.priority, NULL, 'priority'),
+                   IF(OLD.estimated_pomodoros <=> NEW.estimated_pomodoros, NULL, 'estimated_pomodoros'),
+                   IF(OLD.repeat_cycle <=> NEW.repeat_cycle, NULL, 'repeat_cycle')),
+               'before', JSON_OBJECT('title', OLD.title, 'description', OLD.description,
+                                     'due_date', OLD.due_date, 'priority', OLD.priority,
+                                     'estimated_pomodoros', OLD.estimated_pomodoros,
+                                     'repeat_cycle', OLD.repeat_cycle))
+    FROM DUAL
+    WHERE NOT (OLD.title <=> NEW.title AND OLD.description <=> NEW.description
+               AND OLD.due_date <=> NEW.due_date AND OLD.priority <=> NEW.priority
+               AND OLD.estimated_pomodoros <=> NEW.estimated_pomodoros
+               AND OLD.repeat_cycle <=> NEW.repeat_cycle);
+
+-- 删除事件保存完整的任务内容，供撤销使用
+CREATE TRIGGER tasks_after_delete_event AFTER DELETE ON tasks FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (OLD.user_id, OLD.task_id, 'delete',
+            JSON_OBJECT('title', OLD.title, 'description', OLD.description, 'due_date', OLD.due_date,
+                        'priority', OLD.priority, 'status', OLD.status, 'repeat_cycle', OLD.repeat_cycle,
+                        'series_id', OLD.series_id, 'estimated_pomodoros', OLD.estimated_pomodoros,
+                        'used_pomodoros', OLD.used_pomodoros, 'completed_at', OLD.completed_at,
+                        'created_at', OLD.created_at));
+
+CREATE TRIGGER task_tags_after_insert_event AFTER INSERT ON task_tags FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT user_id, task_id, 'retag', JSON_OBJECT('added', NEW.tag_id)
+    FROM tasks WHERE task_id = NEW.task_id;
+
+CREATE TRIGGER task_tags_after_delete_event AFTER DELETE ON task_tags FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT user_id, task_id, 'retag', JSON_OBJECT('removed', OLD.tag_id)
+    FROM tasks WHERE task_id = OLD.task_id;
+
+-- 番茄钟：工作专注记录完成时记录一次（直接以完成状态写入或由未完成更新为完成）
+CREATE TRIGGER focus_sessions_after_insert_event AFTER INSERT ON focus_sessions FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'pomodoro',
+           JSON_OBJECT('session_id', NEW.session_id, 'duration_minutes', NEW.duration_minutes,
+                       'start_time', NEW.start_time)
+    FROM DUAL WHERE NEW.session_type = 'work' AND NEW.is_completed;
+
+CREATE TRIGGER focus_sessions_after_update_event AFTER UPDATE ON focus_sessions FOR EACH ROW
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'pomodoro',
+           JSON_OBJECT('session_id', NEW.session_id, 'duration_minutes', NEW.duration_minutes,
+                       'start_time', NEW.start_time)
+    FROM DUAL WHERE NEW.session_type = 'work' AND NEW.is_completed AND NOT OLD.is_completed;
+
+-- 批量导入检查点
+-- 每批任务和检查点在同一事务中提交，中断后从 rows_done 条源记录之后继续，见 src/services/task_import.py
+CREATE TABLE IF NOT EXISTS task_imports (
+    import_id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    source_name VARCHAR(255) NOT NULL DEFAULT '',
+    status ENUM('running', 'completed') NOT NULL DEFAULT 'running',
+    rows_done INT NOT NULL DEFAULT 0,  -- 已处理的源记录数（含跳过的无效记录）
+    tasks_imported INT NOT NULL DEFAULT 0,
+    rows_skipped INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
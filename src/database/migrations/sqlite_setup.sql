@@ -0,0 +1,323 @@
+-- SQLite 嵌入式后端的表结构（与 database_setup.sql 对应）
+-- 由 SQLiteDatabaseManager 在数据库文件为空时自动执行；修改 MySQL 表结构时需同步修改本文件
+-- 与 MySQL 的差异：ENUM 用 CHECK 约束，时间以本地时间文本保存，ON UPDATE CURRENT_TIMESTAMP 由触发器维护，
+-- MySQL 为外键自动创建的索引在这里显式创建
+
+-- 用户表
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email VARCHAR(255) NOT NULL UNIQUE COLLATE NOCASE,
+    password_hash VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 标签表（名称与 MySQL 的 utf8mb4_unicode_ci 一样不区分大小写）
+CREATE TABLE IF NOT EXISTS tags (
+    tag_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    name VARCHAR(100) NOT NULL COLLATE NOCASE,
+    color VARCHAR(7) DEFAULT '#757575',
+    pending_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (user_id, name)
+);
+
+-- 任务表
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    due_date DATE,
+    priority VARCHAR(6) DEFAULT 'medium' CHECK (priority IN ('high', 'medium', 'low')),
+    status VARCHAR(9) DEFAULT 'pending' CHECK (status IN ('pending', 'completed')),
+    repeat_cycle VARCHAR(7) DEFAULT 'none' CHECK (repeat_cycle IN ('none', 'daily', 'weekly', 'monthly')),
+    series_id INT NULL,  -- 重复系列ID（系列第一个任务的ID），非重复任务为NULL
+    estimated_pomodoros INT DEFAULT 1,
+    pomodoros_estimated BOOLEAN NOT NULL DEFAULT FALSE,  -- 预估番茄钟是否由用户、AI或导入设置过（否则为默认的1）
+    used_pomodoros INT DEFAULT 0,
+    completed_at TIMESTAMP NULL DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (series_id, due_date)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_completed ON tasks (user_id, completed_at);
+
+-- 任务标签关联表
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id INT NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
+    tag_id INT NOT NULL REFERENCES tags(tag_id) ON DELETE CASCADE,
+    PRIMARY KEY (task_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags (tag_id);
+
+-- 用户设置表
+CREATE TABLE IF NOT EXISTS user_settings (
+    user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    pomodoro_work_duration INT DEFAULT 25,
+    pomodoro_short_break_duration INT DEFAULT 5,
+    pomodoro_long_break_duration INT DEFAULT 15,
+    pomodoro_long_break_interval INT DEFAULT 4,
+    notification_sound VARCHAR(50) DEFAULT 'default',
+    auto_start_next_pomodoro BOOLEAN DEFAULT FALSE,
+    auto_start_break BOOLEAN DEFAULT FALSE,
+    daily_focus_target_minutes INT DEFAULT 120
+);
+
+-- 专注记录表
+CREATE TABLE IF NOT EXISTS focus_sessions (
+    session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    task_id INT REFERENCES tasks(task_id) ON DELETE SET NULL,
+    session_type VARCHAR(11) NOT NULL CHECK (session_type IN ('work', 'short_break', 'long_break')),
+    start_time DATETIME NOT NULL,
+    end_time DATETIME,
+    duration_minutes INT NOT NULL,
+    is_completed BOOLEAN DEFAULT FALSE
+);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_user_start ON focus_sessions (user_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_task ON focus_sessions (task_id);
+
+-- 用户数据版本表（统计报告和图表缓存以版本号判断是否过期）
+CREATE TABLE IF NOT EXISTS user_data_revisions (
+    user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    revision BIGINT NOT NULL DEFAULT 0
+);
+
+-- 任务活动日志（只追加），见 src/services/task_events.py
+CREATE TABLE IF NOT EXISTS task_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    task_id INT NULL,
+    event_type VARCHAR(8) NOT NULL
+        CHECK (event_type IN ('create', 'complete', 'reopen', 'edit', 'retag', 'pomodoro', 'delete')),
+    payload JSON NULL,
+    created_at TIMESTAMP(3) NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_task_events_user ON task_events (user_id, event_id);
+
+CREATE TABLE IF NOT EXISTS task_event_cursors (
+    consumer VARCHAR(64) PRIMARY KEY,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 批量导入检查点，见 src/services/task_import.py
+CREATE TABLE IF NOT EXISTS task_imports (
+    import_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    source_name VARCHAR(255) NOT NULL DEFAULT '',
+    status VARCHAR(9) NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed')),
+    rows_done INT NOT NULL DEFAULT 0,
+    tasks_imported INT NOT NULL DEFAULT 0,
+    rows_skipped INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- updated_at：语句没有显式修改时由触发器更新（嵌套的 UPDATE 只改 updated_at，不会产生活动日志）
+-- tasks 的 updated_at 在数据版本触发器中一并更新：嵌套的 UPDATE 会再次触发其他 AFTER UPDATE 触发器，
+-- 而正在执行的触发器不会被自身的嵌套语句再次触发（recursive_triggers 默认关闭），每次修改数据版本只加1
+
+CREATE TRIGGER IF NOT EXISTS users_touch_updated_at AFTER UPDATE ON users FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE users SET updated_at = datetime('now', 'localtime') WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_event_cursors_touch_updated_at AFTER UPDATE ON task_event_cursors FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE task_event_cursors SET updated_at = datetime('now', 'localtime') WHERE consumer = NEW.consumer;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_imports_touch_updated_at AFTER UPDATE ON task_imports FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE task_imports SET updated_at = datetime('now', 'localtime') WHERE import_id = NEW.import_id;
+END;
+
+-- 数据版本触发器
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_insert_revision AFTER INSERT ON tasks FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_update_revision AFTER UPDATE ON tasks FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+    UPDATE tasks SET updated_at = datetime('now', 'localtime')
+    WHERE task_id = NEW.task_id AND NEW.updated_at IS OLD.updated_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_delete_revision AFTER DELETE ON tasks FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tags_after_insert_revision AFTER INSERT ON tags FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tags_after_update_revision AFTER UPDATE ON tags FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tags_after_delete_revision AFTER DELETE ON tags FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS focus_sessions_after_insert_revision AFTER INSERT ON focus_sessions FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS focus_sessions_after_update_revision AFTER UPDATE ON focus_sessions FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS focus_sessions_after_delete_revision AFTER DELETE ON focus_sessions FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision) VALUES (OLD.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_tags_after_insert_revision AFTER INSERT ON task_tags FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision)
+    SELECT user_id, 1 FROM tasks WHERE task_id = NEW.task_id
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_tags_after_delete_revision AFTER DELETE ON task_tags FOR EACH ROW
+BEGIN
+    INSERT INTO user_data_revisions (user_id, revision)
+    SELECT user_id, 1 FROM tasks WHERE task_id = OLD.task_id
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+-- 标签未完成任务计数触发器
+-- 级联删除 task_tags 时任务行已经删除，task_tags 触发器中的 EXISTS 不成立，删除任务时同样在 BEFORE DELETE 中扣减
+
+CREATE TRIGGER IF NOT EXISTS task_tags_after_insert_pending_count AFTER INSERT ON task_tags FOR EACH ROW
+BEGIN
+    UPDATE tags SET pending_count = pending_count + 1
+    WHERE tag_id = NEW.tag_id
+      AND EXISTS (SELECT 1 FROM tasks WHERE task_id = NEW.task_id AND status = 'pending');
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_tags_after_delete_pending_count AFTER DELETE ON task_tags FOR EACH ROW
+BEGIN
+    UPDATE tags SET pending_count = pending_count - 1
+    WHERE tag_id = OLD.tag_id
+      AND EXISTS (SELECT 1 FROM tasks WHERE task_id = OLD.task_id AND status = 'pending');
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_update_pending_count AFTER UPDATE OF status ON tasks FOR EACH ROW
+WHEN OLD.status <> NEW.status AND (OLD.status = 'pending' OR NEW.status = 'pending')
+BEGIN
+    UPDATE tags SET pending_count = pending_count + (CASE WHEN NEW.status = 'pending' THEN 1 ELSE -1 END)
+    WHERE tag_id IN (SELECT tag_id FROM task_tags WHERE task_id = NEW.task_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_before_delete_pending_count BEFORE DELETE ON tasks FOR EACH ROW
+WHEN OLD.status = 'pending'
+BEGIN
+    UPDATE tags SET pending_count = pending_count - 1
+    WHERE tag_id IN (SELECT tag_id FROM task_tags WHERE task_id = OLD.task_id);
+END;
+
+-- 任务活动日志触发器
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_insert_event AFTER INSERT ON tasks FOR EACH ROW
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (NEW.user_id, NEW.task_id, 'create',
+            json_object('title', NEW.title, 'due_date', NEW.due_date, 'priority', NEW.priority,
+                        'series_id', NEW.series_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_update_event AFTER UPDATE ON tasks FOR EACH ROW
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT NEW.user_id, NEW.task_id, 'complete', json_object('completed_at', NEW.completed_at)
+    WHERE OLD.status = 'pending' AND NEW.status = 'completed'
+    UNION ALL
+    SELECT NEW.user_id, NEW.task_id, 'reopen', json_object('completed_at', OLD.completed_at)
+    WHERE OLD.status = 'completed' AND NEW.status = 'pending'
+    UNION ALL
+    SELECT NEW.user_id, NEW.task_id, 'edit',
+           json_object(
+               'fields', rtrim(
+                   (CASE WHEN OLD.title IS NEW.title THEN '' ELSE 'title,' END) ||
+                   (CASE WHEN OLD.description IS NEW.description THEN '' ELSE 'description,' END) ||
+                   (CASE WHEN OLD.due_date IS NEW.due_date THEN '' ELSE 'due_date,' END) ||
+                   (CASE WHEN OLD.priority IS NEW.priority THEN '' ELSE 'priority,' END) ||
+                   (CASE WHEN OLD.estimated_pomodoros IS NEW.estimated_pomodoros THEN '' ELSE 'estimated_pomodoros,' END) ||
+                   (CASE WHEN OLD.repeat_cycle IS NEW.repeat_cycle THEN '' ELSE 'repeat_cycle,' END), ','),
+               'before', json_object('title', OLD.title, 'description', OLD.description,
+                                     'due_date', OLD.due_date, 'priority', OLD.priority,
+                                     'estimated_pomodoros', OLD.estimated_pomodoros,
+                                     'repeat_cycle', OLD.repeat_cycle))
+    WHERE NOT (OLD.title IS NEW.title AND OLD.description IS NEW.description
+               AND OLD.due_date IS NEW.due_date AND OLD.priority IS NEW.priority
+               AND OLD.estimated_pomodoros IS NEW.estimated_pomodoros
+               AND OLD.repeat_cycle IS NEW.repeat_cycle);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_after_delete_event AFTER DELETE ON tasks FOR EACH ROW
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (OLD.user_id, OLD.task_id, 'delete',
+            json_object('title', OLD.title, 'description', OLD.description, 'due_date', OLD.due_date,
+                        'priority', OLD.priority, 'status', OLD.status, 'repeat_cycle', OLD.repeat_cycle,
+                        'series_id', OLD.series_id, 'estimated_pomodoros', OLD.estimated_pomodoros,
+                        'used_pomodoros', OLD.used_pomodoros, 'completed_at', OLD.completed_at,
+                        'created_at', OLD.created_at));
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_tags_after_insert_event AFTER INSERT ON task_tags FOR EACH ROW
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT user_id, task_id, 'retag', json_object('added', NEW.tag_id)
+    FROM tasks WHERE task_id = NEW.task_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_tags_after_delete_event AFTER DELETE ON task_tags FOR EACH ROW
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    SELECT user_id, task_id, 'retag', json_object('removed', OLD.tag_id)
+    FROM tasks WHERE task_id = OLD.task_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS focus_sessions_after_insert_event AFTER INSERT ON focus_sessions FOR EACH ROW
+WHEN NEW.session_type = 'work' AND NEW.is_completed
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (NEW.user_id, NEW.task_id, 'pomodoro',
+            json_object('session_id', NEW.session_id, 'duration_minutes', NEW.duration_minutes,
+                        'start_time', NEW.start_time));
+END;
+
+CREATE TRIGGER IF NOT EXISTS focus_sessions_after_update_event AFTER UPDATE ON focus_sessions FOR EACH ROW
+WHEN NEW.session_type = 'work' AND NEW.is_completed AND NOT OLD.is_completed
+BEGIN
+    INSERT INTO task_events (user_id, task_id, event_type, payload)
+    VALUES (NEW.user_id, NEW.task_id, 'pomodoro',
+            json_object('session_id', NEW.session_id, 'duration_minutes', NEW.duration_minutes,
+                        'start_time', NEW.start_time));
+END;
@@ -0,0 +1,305 @@
+"""
+SQL查询统计模块
+记录每条语句的耗时、行数和调用方，按归一化后的语句指纹汇总；
+超过阈值的查询记入慢查询日志并附带执行计划，请求范围内的查询数由 query_scope 统计
+"""
+
+import re
+import sys
+import time
+import functools
+import threading
+import logging
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# top() 支持的排序字段
+QUERY_ORDERS = ('total_ms', 'count', 'avg_ms', 'max_ms', 'rows')
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*', re.DOTALL)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(query: str) -> str:
+    """
+    语句指纹：去掉注释，字面量和占位符替换为 ?，IN 列表和多行 VALUES 合并，空白压缩为一个空格
+
+    同一模板不同参数、不同 IN 列表长度的语句得到相同的指纹
+    """
+    text = _COMMENT.sub(' ', query)
+    text = _STRING.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    text = _VALUES_LIST.sub(r'\1, ...', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def find_caller(skip: Callable[[Any], bool]) -> str:
+    """
+    调用方名称（类名.方法名 或 模块.函数名）
+
+    从调用栈向外查找第一个不属于数据库管理器的帧，skip(self) 为True的帧被跳过
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+        if owner is None or not skip(owner):
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            module = frame.f_globals.get('__name__', '?').rsplit('.', 1)[-1]
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return '?'
+
+
+class QueryScope:
+    """一个请求（或其他工作单元）内的查询计数"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_ms = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def add(self, query_fingerprint: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.fingerprints[query_fingerprint] += 1
+
+    def repeated(self, minimum: int = 2) -> List[Dict]:
+        """同一指纹执行了多次的语句（常见于循环中逐条查询）"""
+        return [{'fingerprint': fp, 'count': count}
+                for fp, count in self.fingerprints.most_common() if count >= minimum]
+
+
+_current_scope: ContextVar[Optional[QueryScope]] = ContextVar('query_scope', default=None)
+
+
+class QueryStats:
+    """按语句指纹汇总的查询统计，线程安全"""
+
+    def __init__(self, slow_query_ms: float = 200, slow_log_size: int = 100,
+                 max_entries: int = 1000, enabled: bool = True):
+        self.slow_query_ms = slow_query_ms
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: Dict[str, Dict] = {}
+        self._slow: deque = deque(maxlen=slow_log_size)
+        self._requests: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, query: str, elapsed_ms: float, rows: Optional[int] = None, caller: str = '?',
+               failed: bool = False, explain: Callable[[], Optional[List[Dict]]] = None):
+        """
+        记录一次语句执行
+
+        Args:
+            query: 原始SQL
+            elapsed_ms: 耗时（毫秒）
+            rows: 返回或影响的行数，未知时为None
+            caller: 调用方名称
+            failed: 执行是否出错
+            explain: 获取执行计划的函数；慢查询的指纹第一次出现时调用，其余时候不执行
+        """
+        query_fingerprint = fingerprint(query)
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.add(query_fingerprint, elapsed_ms)
+
+        slow = elapsed_ms >= self.slow_query_ms
+        with self._lock:
+            entry = self._entries.get(query_fingerprint)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    return
+                entry = self._entries[query_fingerprint] = {
+                    'fingerprint': query_fingerprint, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'errors': 0, 'slow': 0, 'callers': Counter(), 'plan': None
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows or 0
+            entry['errors'] += int(failed)
+            entry['callers'][caller] += 1
+            needs_plan = slow and entry['plan'] is None and explain is not None
+            if slow:
+                entry['slow'] += 1
+
+        if not slow:
+            return
+        # 执行计划在锁外获取，EXPLAIN 本身也要访问数据库
+        plan = explain() if needs_plan else None
+        with self._lock:
+            if plan is not None:
+                entry['plan'] = plan
+            self._slow.append({
+                'fingerprint': query_fingerprint,
+                'elapsed_ms': round(elapsed_ms, 2),
+                'rows': rows,
+                'caller': caller,
+                'request': scope.name if scope is not None else None,
+                'at': datetime.now().isoformat(timespec='seconds')
+            })
+        logger.warning(f"慢查询 {elapsed_ms:.1f}ms ({caller}): {query_fingerprint[:200]}")
+
+    def record_request(self, scope: QueryScope):
+        """汇总一个请求的查询数，没有执行查询的请求（静态文件等）不记录"""
+        if not scope.count:
+            return
+        repeated = scope.repeated()
+        with self._lock:
+            entry = self._requests.get(scope.name)
+            if entry is None:
+                if len(self._requests) >= self.max_entries:
+                    self._requests.popitem(last=False)
+                entry = self._requests[scope.name] = {
+                    'name': scope.name, 'requests': 0, 'queries': 0, 'total_ms': 0.0,
+                    'max_queries': 0, 'top_repeated': None
+                }
+            entry['requests'] += 1
+            entry['queries'] += scope.count
+            entry['total_ms'] += scope.total_ms
+            if scope.count >= entry['max_queries']:
+                entry['max_queries'] = scope.count
+                entry['top_repeated'] = repeated[0] if repeated else None
+
+    def top(self, limit: int = 20, order_by: str = 'total_ms') -> List[Dict]:
+        """按 order_by（QUERY_ORDERS之一）从高到低返回前 limit 个语句指纹的汇总"""
+        if order_by not in QUERY_ORDERS:
+            raise ValueError(f"不支持的排序字段: {order_by}")
+        with self._lock:
+            rows = [self._summarize(entry) for entry in self._entries.values()]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    @staticmethod
+    def _summarize(entry: Dict) -> Dict:
+        return {
+            'fingerprint': entry['fingerprint'],
+            'count': entry['count'],
+            'total_ms': round(entry['total_ms'], 2),
+            'avg_ms': round(entry['total_ms'] / entry['count'], 2),
+            'max_ms': round(entry['max_ms'], 2),
+            'rows': entry['rows'],
+            'errors': entry['errors'],
+            'slow': entry['slow'],
+            'callers': dict(entry['callers'].most_common(5)),
+            'plan': entry['plan']
+        }
+
+    def slow_queries(self, limit: int = 50) -> List[Dict]:
+        """最近的慢查询（新的在前）"""
+        with self._lock:
+            return list(reversed(self._slow))[:limit]
+
+    def requests(self, limit: int = 20) -> List[Dict]:
+        """按平均查询数从高到低返回请求汇总"""
+        with self._lock:
+            rows = [dict(entry, total_ms=round(entry['total_ms'], 2),
+                         avg_queries=round(entry['queries'] / entry['requests'], 1))
+                    for entry in self._requests.values()]
+        rows.sort(key=lambda row: row['avg_queries'], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._entries.clear()
+            self._slow.clear()
+            self._requests.clear()
+
+
+@contextmanager
+def query_scope(name: str, stats: QueryStats = None) -> Iterator[QueryScope]:
+    """
+    统计 with 块内（包括在其中创建的线程池任务）执行的查询，结束时汇总到 stats
+
+    作用域保存在上下文变量中，run.io_bound 等复制上下文的调用也计入同一作用域
+    """
+    scope = QueryScope(name)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        (stats or get_shared_query_stats()).record_request(scope)
+
+
+def create_query_stats_middleware(stats: QueryStats = None) -> Callable:
+    """
+    HTTP中间件：每个请求一个查询作用域，响应头 X-Query-Count / X-Query-Time-Ms 给出本次请求的查询数和总耗时
+
+    用法: app.middleware('http')(create_query_stats_middleware())
+    流式响应在返回响应头之后执行的查询不计入
+    """
+    async def middleware(request, call_next):
+        active = stats or get_shared_query_stats()
+        if not active.enabled:
+            return await call_next(request)
+        with query_scope(f"{request.method} {request.url.path}", active) as scope:
+            response = await call_next(request)
+        response.headers['X-Query-Count'] = str(scope.count)
+        response.headers['X-Query-Time-Ms'] = f"{scope.total_ms:.1f}"
+        return response
+    return middleware
+
+
+def instrumented(kind: str):
+    """
+    数据库管理器方法的统计装饰器
+
+    kind: 'query'（返回行列表）、'update'（返回是否成功）、'rowcount'（返回行数）、'many'（批量参数）
+    被装饰的方法签名为 (self, query, params, ...)，实例需提供 query_stats 和 explain()
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, query: str, params=None, *args, **kwargs):
+            stats = self.query_stats
+            if stats is None or not stats.enabled:
+                return method(self, query, params, *args, **kwargs)
+            started = time.perf_counter()
+            result = method(self, query, params, *args, **kwargs)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            if kind == 'query':
+                rows, failed = (len(result) if result is not None else None), result is None
+            elif kind == 'rowcount':
+                rows, failed = result, result is None
+            elif kind == 'many':
+                rows, failed = len(params or ()), not result
+            else:
+                rows, failed = None, not result
+            explain = None
+            if kind == 'query':
+                explain = lambda: self.explain(query, params)
+            stats.record(query, elapsed_ms, rows, find_caller(lambda owner: owner is self),
+                         failed, explain)
+            return result
+        return wrapper
+    return decorator
+
+
+_shared_query_stats: Optional[QueryStats] = None
+
+
+def get_shared_query_stats() -> QueryStats:
+    """获取进程内共享的查询统计"""
+    global _shared_query_stats
+    if _shared_query_stats is None:
+        _shared_query_stats = QueryStats(APP_CONFIG['slow_query_ms'], APP_CONFIG['slow_query_log_size'],
+                                         enabled=APP_CONFIG['query_stats_enabled'])
+    return _shared_query_stats
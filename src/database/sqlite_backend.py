@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""
+SQLite 嵌入式数据库后端
+供单机部署、测试和基准测试使用，不需要外部数据库服务；在 DB_CONFIG 中设置 backend='sqlite' 启用
+
+服务层的SQL按MySQL方言编写，本模块在执行前将其翻译为SQLite方言：
+- %s 占位符改为 ?，双引号字符串改为单引号
+- INSERT/UPDATE IGNORE、ON DUPLICATE KEY UPDATE、expr + INTERVAL n UNIT、GROUP_CONCAT(... SEPARATOR ...) 改写为等价语法
+- CURDATE、YEARWEEK、DATE_FORMAT、FIELD 等MySQL函数以Python函数注册到连接上，按MySQL语义计算
+
+日期时间以本地时间文本保存，表列按声明类型转换回 date/datetime；
+DATE(x) 等计算列与MySQL不同，返回 'YYYY-MM-DD' 文本
+"""
+
+import os
+import re
+import sqlite3
+import calendar
+import threading
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.database.database import DatabaseManager
+from src.database.query_stats import QueryStats, instrumented
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', 'sqlite_setup.sql')
+
+# 连接参数：WAL允许读写并发；NORMAL同步在WAL下只在检查点时fsync，断电最多丢失最后的事务
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA foreign_keys = ON',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',  # 64MB页缓存
+    'PRAGMA mmap_size = 268435456'  # 256MB内存映射读取
+)
+
+
+# ---------- 值的适配与转换 ----------
+
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(' ')
+
+
+def _convert_date(value: bytes) -> date:
+    return date.fromisoformat(value[:10].decode())
+
+
+def _convert_datetime(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('DATETIME', _convert_datetime)
+sqlite3.register_converter('TIMESTAMP', _convert_datetime)
+
+
+# ---------- MySQL函数 ----------
+
+def _parse_temporal(value):
+    """将SQLite中的日期时间文本解析为 (datetime, 是否带时间)，无法解析时返回 (None, False)"""
+    if value is None:
+        return None, False
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text), len(text) > 10
+    except ValueError:
+        return None, False
+
+
+def _format_temporal(value: datetime, with_time: bool) -> str:
+    if not with_time:
+        return value.date().isoformat()
+    return value.isoformat(' ', timespec='microseconds' if value.microsecond else 'seconds')
+
+
+def _temporal_function(fn: Callable) -> Callable:
+    """参数为空或无法解析时返回NULL（与MySQL一致）"""
+    def wrapper(value, *args):
+        parsed, _ = _parse_temporal(value)
+        return fn(parsed, *args) if parsed is not None else None
+    return wrapper
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    """按月加减，日期超过目标月份天数时取月末（与MySQL一致）"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def _date_add_interval(value, amount, unit):
+    """expr + INTERVAL amount UNIT"""
+    parsed, with_time = _parse_temporal(value)
+    if parsed is None or amount is None:
+        return None
+    unit = unit.upper()
+    amount = int(amount)
+    if unit in ('MONTH', 'YEAR', 'QUARTER'):
+        result = _add_months(parsed, amount * {'MONTH': 1, 'QUARTER': 3, 'YEAR': 12}[unit])
+    else:
+        seconds = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400, 'WEEK': 604800}[unit]
+        result = parsed + timedelta(seconds=amount * seconds)
+        with_time = with_time or unit in ('SECOND', 'MINUTE', 'HOUR')
+    return _format_temporal(result, with_time)
+
+
+def _timestampdiff(unit, start, end):
+    """TIMESTAMPDIFF(unit, start, end)：按完整单位计数，向零取整"""
+    start, _ = _parse_temporal(start)
+    end, _ = _parse_temporal(end)
+    if start is None or end is None:
+        return None
+    unit = unit.upper()
+    if unit in ('MONTH', 'QUARTER', 'YEAR'):
+        months = (end.year - start.year) * 12 + end.month - start.month
+        # 末端未到起点的日和时间时，最后一个月不完整
+        tail_end = (end.day, end.time())
+        tail_start = (start.day, start.time())
+        if months > 0 and tail_end < tail_start:
+            months -= 1
+        elif months < 0 and tail_end > tail_start:
+            months += 1
+        return int(months / {'MONTH': 1, 'QUARTER': 3, 'YEAR': 12}[unit])
+    seconds = (end - start).total_seconds()
+    return int(seconds / {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400, 'WEEK': 604800}[unit])
+
+
+def _week(value: datetime, mode: int = 0) -> int:
+    """WEEK()：模式0以周日为一周开始，第一个周日之前为第0周；其他模式按ISO周"""
+    if mode == 0:
+        return int(value.strftime('%U'))
+    return value.isocalendar()[1]
+
+
+def _yearweek(value: datetime, mode: int = 0) -> int:
+    """YEARWEEK()：模式0以周日为一周开始，年初不完整的一周属于上一年；其他模式按ISO周"""
+    if mode == 0:
+        sunday = value - timedelta(days=value.isoweekday() % 7)
+        return sunday.year * 100 + int(sunday.strftime('%U'))
+    iso = value.isocalendar()
+    return iso[0] * 100 + iso[1]
+
+
+_DATE_FORMAT_CODES = {
+    'Y': '%Y', 'y': '%y', 'm': '%m', 'd': '%d', 'H': '%H', 'i': '%M', 's': '%S', 'S': '%S',
+    'M': '%B', 'b': '%b', 'W': '%A', 'a': '%a', 'j': '%j', 'p': '%p', 'T': '%H:%M:%S', 'U': '%U', '%': '%%'
+}
+
+
+def _date_format(value: datetime, fmt: str) -> str:
+    """DATE_FORMAT()：常用格式符转换为strftime"""
+    parts = []
+    index = 0
+    while index < len(fmt):
+        char = fmt[index]
+        if char == '%' and index + 1 < len(fmt):
+            code = fmt[index + 1]
+            if code == 'c':
+                parts.append(str(value.month))
+            elif code == 'e':
+                parts.append(str(value.day))
+            elif code == 'k':
+                parts.append(str(value.hour))
+            elif code in _DATE_FORMAT_CODES:
+                parts.append(value.strftime(_DATE_FORMAT_CODES[code]))
+            else:
+                parts.append(code)
+            index += 2
+        else:
+            parts.append(char)
+            index += 1
+    return ''.join(parts)
+
+
+def _extreme(pick: Callable) -> Callable:
+    """GREATEST/LEAST：任一参数为NULL时返回NULL"""
+    def wrapper(*args):
+        if any(arg is None for arg in args):
+            return None
+        return pick(args)
+    return wrapper
+
+
+def _field(value, *candidates) -> int:
+    """FIELD()：值在候选列表中的位置（从1开始），不在列表中为0"""
+    for index, candidate in enumerate(candidates, start=1):
+        if value is not None and value == candidate:
+            return index
+    return 0
+
+
+def _now(precision: int = 0) -> str:
+    now = datetime.now()
+    if precision:
+        return now.isoformat(' ', timespec='milliseconds' if precision <= 3 else 'microseconds')
+    return now.isoformat(' ', timespec='seconds')
+
+
+def _register_functions(connection: sqlite3.Connection):
+    """在连接上注册MySQL函数"""
+    deterministic = [
+        ('YEAR', 1, _temporal_function(lambda v: v.year)),
+        ('MONTH', 1, _temporal_function(lambda v: v.month)),
+        ('DAY', 1, _temporal_function(lambda v: v.day)),
+        ('HOUR', 1, _temporal_function(lambda v: v.hour)),
+        ('DAYOFWEEK', 1, _temporal_function(lambda v: v.isoweekday() % 7 + 1)),
+        ('WEEKDAY', 1, _temporal_function(lambda v: v.weekday())),
+        ('WEEK', -1, _temporal_function(_week)),
+        ('YEARWEEK', -1, _temporal_function(_yearweek)),
+        ('DATE_FORMAT', 2, _temporal_function(_date_format)),
+        ('DATEDIFF', 2, lambda a, b: (_timestampdiff('DAY', b[:10], a[:10]) if a and b else None)),
+        ('TIMESTAMPDIFF', 3, _timestampdiff),
+        ('DATE_ADD_INTERVAL', 3, _date_add_interval),
+        ('GREATEST', -1, _extreme(max)),
+        ('LEAST', -1, _extreme(min)),
+        ('FIELD', -1, _field),
+    ]
+    for name, arity, fn in deterministic:
+        connection.create_function(name, arity, fn, deterministic=True)
+    connection.create_function('CURDATE', 0, lambda: date.today().isoformat())
+    connection.create_function('NOW', -1, _now)
+
+
+# ---------- SQL方言翻译 ----------
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+  | (?P<param>%s)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*(?:\.(?:[A-Za-z_][A-Za-z0-9_]*|\*))*)
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<space>\s+)
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+# INTERVAL 左侧为括号时，括号前的这些关键字不是函数名
+_KEYWORDS = {'AND', 'OR', 'NOT', 'WHEN', 'THEN', 'ELSE', 'WHERE', 'ON', 'SELECT', 'IN', 'BETWEEN', 'CASE', 'AS'}
+
+
+class _Token:
+    __slots__ = ('kind', 'text', 'space')
+
+    def __init__(self, kind: str, text: str, space: str = ''):
+        self.kind = kind
+        self.text = text
+        self.space = space  # 该记号之前的空白
+
+    def is_word(self, *words: str) -> bool:
+        return self.kind == 'word' and self.text.upper() in words
+
+
+def _tokenize(query: str) -> List[_Token]:
+    tokens, space = [], ''
+    for match in _TOKEN_PATTERN.finditer(query):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == 'space':
+            space += text
+            continue
+        if kind == 'string' and text.startswith('"'):
+            # MySQL中双引号是字符串，SQLite中是标识符
+            text = "'" + text[1:-1].replace('\\"', '"').replace('""', '"').replace("'", "''") + "'"
+        elif kind == 'param':
+            text = '?'
+        tokens.append(_Token(kind, text, space))
+        space = ''
+    return tokens
+
+
+def _join(tokens: List[_Token]) -> str:
+    return ''.join(token.space + token.text for token in tokens)
+
+
+def _matching(tokens: List[_Token], index: int, step: int) -> int:
+    """从括号位置 index 向 step 方向查找配对的括号"""
+    opening, closing = ('(', ')') if step > 0 else (')', '(')
+    depth = 0
+    while 0 <= index < len(tokens):
+        if tokens[index].text == opening:
+            depth += 1
+        elif tokens[index].text == closing:
+            depth -= 1
+            if depth == 0:
+                return index
+        index += step
+    raise ValueError('括号不匹配')
+
+
+def _operand_end(tokens: List[_Token], start: int) -> int:
+    """从 start 开始的一个操作数（函数调用、括号表达式或单个记号）的结束位置"""
+    if tokens[start].text == '(':
+        return _matching(tokens, start, 1)
+    if tokens[start].kind == 'word' and start + 1 < len(tokens) and tokens[start + 1].text == '(':
+        return _matching(tokens, start + 1, 1)
+    return start
+
+
+def _operand_start(tokens: List[_Token], end: int) -> int:
+    """以 end 结束的一个操作数的开始位置"""
+    if tokens[end].text != ')':
+        return end
+    start = _matching(tokens, end, -1)
+    if start > 0 and tokens[start - 1].kind == 'word' and tokens[start - 1].text.upper() not in _KEYWORDS:
+        return start - 1
+    return start
+
+
+def _rewrite_intervals(tokens: List[_Token]) -> List[_Token]:
+    """a + INTERVAL n UNIT / a - INTERVAL n UNIT -> DATE_ADD_INTERVAL(a, ±(n), 'UNIT')"""
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token.is_word('INTERVAL') and index >= 2 and tokens[index - 1].text in ('+', '-'):
+            sign = '-' if tokens[index - 1].text == '-' else ''
+            left_start = _operand_start(tokens, index - 2)
+            amount_end = _operand_end(tokens, index + 1)
+            unit = tokens[amount_end + 1].text.upper()
+            text = (f"DATE_ADD_INTERVAL({_join(tokens[left_start:index - 1]).strip()}, "
+                    f"{sign}({_join(tokens[index + 1:amount_end + 1]).strip()}), '{unit}')")
+            tokens[left_start:amount_end + 2] = [_Token('expr', text, tokens[left_start].space)]
+            index = left_start
+        index += 1
+    return tokens
+
+
+def _rewrite_group_concat(tokens: List[_Token]) -> List[_Token]:
+    """GROUP_CONCAT(x ORDER BY y SEPARATOR s) -> GROUP_CONCAT(x, s)（SQLite 3.44之前不支持聚合内排序）"""
+    index = 0
+    while index < len(tokens):
+        if tokens[index].is_word('GROUP_CONCAT') and index + 1 < len(tokens) and tokens[index + 1].text == '(':
+            close = _matching(tokens, index + 1, 1)
+            inner = tokens[index + 2:close]
+            cut = next((i for i, t in enumerate(inner) if t.is_word('ORDER', 'SEPARATOR')), len(inner))
+            separator = next((inner[i + 1].text for i, t in enumerate(inner) if t.is_word('SEPARATOR')), None)
+            args = _join(inner[:cut]).strip() + (f", {separator}" if separator else '')
+            tokens[index:close + 1] = [_Token('expr', f"GROUP_CONCAT({args})", tokens[index].space)]
+        index += 1
+    return tokens
+
+
+def translate(query: str) -> str:
+    """将MySQL方言的SQL翻译为SQLite方言"""
+    tokens = _tokenize(query)
+    result = []
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if token.is_word('INSERT', 'UPDATE') and following and following.is_word('IGNORE'):
+            result.append(_Token('word', f"{token.text} OR IGNORE", token.space))
+            index += 2
+            continue
+        if token.is_word('ON') and following and following.is_word('DUPLICATE'):
+            # ON DUPLICATE KEY UPDATE -> ON CONFLICT DO UPDATE SET，其中 VALUES(col) -> excluded.col
+            result.append(_Token('word', 'ON CONFLICT DO UPDATE SET', token.space))
+            index += 4
+            while index < len(tokens):
+                if tokens[index].is_word('VALUES') and index + 3 < len(tokens) and tokens[index + 1].text == '(':
+                    result.append(_Token('word', f"excluded.{tokens[index + 2].text}", tokens[index].space))
+                    index += 4
+                else:
+                    result.append(tokens[index])
+                    index += 1
+            break
+        if token.is_word('TIMESTAMPDIFF') and following and following.text == '(':
+            unit = tokens[index + 2]
+            result.extend([token, following, _Token('string', f"'{unit.text.upper()}'", unit.space)])
+            index += 3
+            continue
+        if token.is_word('CURRENT_TIMESTAMP'):
+            # SQLite的CURRENT_TIMESTAMP是UTC时间
+            result.append(_Token('expr', 'NOW()', token.space))
+            index += 1
+            continue
+        result.append(token)
+        index += 1
+    return _join(_rewrite_group_concat(_rewrite_intervals(result)))
+
+
+_INSERT_TARGET = re.compile(r'^\s*INSERT\s+(?:OR\s+\w+\s+)?INTO\s+(\w+)', re.IGNORECASE)
+_UPSERT = re.compile(r'\bON\s+CONFLICT\b.*\bDO\s+UPDATE\b', re.IGNORECASE | re.DOTALL)
+
+
+class _SQLiteCursor:
+    """按mysql.connector游标的接口包装SQLite游标：执行前翻译SQL，lastrowid 为多行插入的第一行ID"""
+
+    def __init__(self, manager: 'SQLiteDatabaseManager', dictionary: bool = False):
+        self.manager = manager
+        self.cursor = manager.connection.cursor()
+        self.dictionary = dictionary
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def _scalar(self, query: str, params: tuple = ()):
+        return self.manager.connection.execute(query, params).fetchone()[0]
+
+    def _upsert_watermark(self, query: str) -> Optional[tuple]:
+        """ON CONFLICT DO UPDATE 执行前记录目标表当前最大的rowid，其他语句返回None"""
+        target = _INSERT_TARGET.match(query)
+        if target is None or not _UPSERT.search(query):
+            return None
+        return target.group(1), self._scalar(f"SELECT COALESCE(MAX(rowid), 0) FROM {target.group(1)}")
+
+    def _record_insert(self, query: str, watermark: Optional[tuple]):
+        """
+        INSERT 后按MySQL的 LAST_INSERT_ID 语义记录本次插入的第一行ID，没有插入新行时保持不变
+
+        普通插入和 INSERT OR IGNORE 的 rowcount 只计实际插入的行，同一语句插入的rowid连续，由最后一行倒推；
+        ON CONFLICT DO UPDATE 的 rowcount 包含更新的行，从目标表查回执行前最大rowid之后的第一行
+        """
+        self.lastrowid = None
+        if self.rowcount <= 0 or not _INSERT_TARGET.match(query):
+            return
+        if watermark is None:
+            first = self._scalar('SELECT last_insert_rowid()') - self.rowcount + 1
+        else:
+            table, before = watermark
+            first = self._scalar(f"SELECT MIN(rowid) FROM {table} WHERE rowid > ?", (before,))
+        if first is not None:
+            self.lastrowid = first
+            self.manager.last_insert_id = first
+
+    def execute(self, query: str, params=None):
+        translated = self.manager.translate(query)
+        watermark = self._upsert_watermark(translated)
+        self.cursor.execute(translated, tuple(params or ()))
+        self.rowcount = self.cursor.rowcount
+        self._record_insert(translated, watermark)
+
+    def executemany(self, query: str, seq_params):
+        translated = self.manager.translate(query)
+        watermark = self._upsert_watermark(translated)
+        self.cursor.executemany(translated, [tuple(params) for params in seq_params])
+        self.rowcount = self.cursor.rowcount
+        self._record_insert(translated, watermark)
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return tuple(row) if row is not None else None
+        return {column[0]: value for column, value in zip(self.cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self.cursor.fetchone())
+
+    def fetchmany(self, size: int):
+        return [self._row(row) for row in self.cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self.cursor.fetchall()]
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteDatabaseManager(DatabaseManager):
+    """SQLite数据库管理器（接口与 DatabaseManager 一致）"""
+
+    dialect = 'sqlite'
+
+    def __init__(self, path: str = ':memory:', query_stats: QueryStats = None):
+        self.path = path
+        self.last_insert_id = None
+        self._translations: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        super().__init__(query_stats)
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+        _register_functions(connection)
+        return connection
+
+    def connect(self):
+        """打开数据库文件（不存在时创建并建表）"""
+        try:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.connection = self._open()
+            if not self.table_exists('users'):
+                with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+                    self.connection.executescript(f.read())
+                logger.info(f"已初始化SQLite数据库: {self.path}")
+            logger.info("成功连接到SQLite数据库")
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"连接数据库时发生错误: {e}")
+            self.connection = None
+
+    def disconnect(self):
+        """关闭数据库连接"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+            logger.info("数据库连接已关闭")
+
+    def translate(self, query: str) -> str:
+        """翻译SQL（按原文缓存，服务层的SQL是有限的几种模板）"""
+        translated = self._translations.get(query)
+        if translated is None:
+            translated = translate(query)
+            if len(self._translations) < 1024:
+                self._translations[query] = translated
+        return translated
+
+    def _run(self, work: Callable[[_SQLiteCursor], Any], dictionary: bool = False, commit: bool = True,
+             error_message: str = "执行更新时发生错误", default: Any = None) -> Any:
+        """执行 work(cursor)，成功时提交，出错时回滚并返回 default"""
+        if not self.connection:
+            self.connect()
+        if not self.connection:
+            return default
+        with self._lock:
+            cursor = None
+            try:
+                cursor = _SQLiteCursor(self, dictionary)
+                result = work(cursor)
+                if commit:
+                    self.connection.commit()
+                return result
+            except (sqlite3.Error, ValueError, IndexError) as e:
+                logger.error(f"{error_message}: {e}")
+                self.connection.rollback()
+                return default
+            finally:
+                if cursor:
+                    cursor.close()
+
+    @instrumented('query')
+    def execute_query(self, query: str, params: tuple = None) -> Optional[List[Dict]]:
+        """执行查询并返回结果"""
+        def work(cursor):
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        return self._run(work, dictionary=True, commit=False, error_message="执行查询时发生错误")
+
+    @instrumented('update')
+    def execute_update(self, query: str, params: tuple = None) -> bool:
+        """执行更新操作"""
+        return self._run(lambda cursor: cursor.execute(query, params) or True, default=False)
+
+    @instrumented('rowcount')
+    def execute_update_rowcount(self, query: str, params: tuple = None) -> Optional[int]:
+        """执行更新操作并返回匹配的行数，出错时返回None"""
+        def work(cursor):
+            cursor.execute(query, params)
+            return cursor.rowcount
+        return self._run(work)
+
+    @instrumented('many')
+    def execute_many(self, query: str, seq_params: List[tuple]) -> bool:
+        """用同一语句批量执行多组参数，作为一个事务提交"""
+        if not seq_params:
+            return True
+        return self._run(lambda cursor: cursor.executemany(query, seq_params) or True,
+                         error_message="批量执行时发生错误", default=False)
+
+    def execute_in_transaction(self, work: Callable[[Any], Any]) -> Any:
+        """在一个事务中执行多条语句"""
+        return self._run(work, error_message="执行事务时发生错误")
+
+    def stream_query(self, query: str, params: tuple = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        逐批读取查询结果（生成器）
+
+        文件数据库使用独立的只读连接，WAL模式下读取不阻塞写入；
+        内存数据库只能使用主连接，在锁内一次读出全部结果后再逐行返回，避免与其他线程的语句交错
+        """
+        if self.path == ':memory:':
+            def work(cursor):
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            rows = self._run(work, dictionary=True, commit=False, error_message="流式查询时发生错误")
+            if rows is None:
+                raise sqlite3.OperationalError("流式查询失败")
+            yield from rows
+            return
+
+        connection = self._open()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(self.translate(query), tuple(params or ()))
+            columns = None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns = columns or [column[0] for column in cursor.description]
+                for row in rows:
+                    yield dict(zip(columns, row))
+        except sqlite3.Error as e:
+            logger.error(f"流式查询时发生错误: {e}")
+            raise
+        finally:
+            cursor.close()
+            connection.close()
+
+    def explain(self, query: str, params: tuple = None) -> Optional[List[Dict]]:
+        """获取查询语句的执行计划（EXPLAIN QUERY PLAN，不计入查询统计）"""
+        if not query.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+
+        def work(cursor):
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return cursor.fetchall()
+        return self._run(work, dictionary=True, commit=False, error_message="获取执行计划时发生错误")
+
+    def get_last_insert_id(self) -> Optional[int]:
+        """获取最后一条INSERT语句插入的第一行ID（与MySQL的 LAST_INSERT_ID() 一致）"""
+        return self.last_insert_id
+
+    def table_exists(self, table: str) -> bool:
+        """检查表是否存在"""
+        if not self.connection:
+            return False
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        return bool(row and row[0])
@@ -4,38 +4,94 @@ AI助手服务 - 简化版本
 """
 
 import json
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
 from openai import OpenAI, AsyncOpenAI
 from config import AI_CONFIG
+from src.services.ai_cache import AIResponseCache, get_shared_cache, make_cache_key
+from src.services.ai_limiter import AIRequestLimiter, get_shared_limiter
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_estimate(value: Any) -> Optional[int]:
+    """解析番茄钟预估值：正整数（或其字符串）有效，0、负数和非数字返回None；单个与批量预估共用"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value.isdigit():
+            return None
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        return None
+    return count if count > 0 else None
+
+
 class AIAssistant:
-    def __init__(self):
+    def __init__(self, response_cache: AIResponseCache = None, limiter: AIRequestLimiter = None):
         """初始化AI助手，使用OpenAI格式调用外部API"""
+        # 重试由限流器统一处理，关闭SDK自带的重试
         self.client = AsyncOpenAI(
             api_key=AI_CONFIG['api_key'],
-            base_url=AI_CONFIG['base_url']
+            base_url=AI_CONFIG['base_url'],
+            timeout=AI_CONFIG['request_timeout'],
+            max_retries=0
         )
         self.model = AI_CONFIG['model']
         self.max_tokens = AI_CONFIG['max_tokens']
         self.temperature = AI_CONFIG['temperature']
+        # 未指定时使用进程内共享缓存，使各组件创建的实例共享命中
+        self.response_cache = response_cache if response_cache is not None else get_shared_cache()
+        # 并发限制和熔断状态同样在进程内共享
+        self.limiter = limiter if limiter is not None else get_shared_limiter()
+    
+    async def call_llm_api(self, prompt: str, system_prompt: str = None, use_cache: bool = False,
+                           cache_validator: Callable[[str], bool] = None, user_id: int = None) -> Optional[str]:
+        """
+        封装与第三方大型语言模型API的底层通信
+        
+        Args:
+            prompt: 用户提示词
+            system_prompt: 系统提示词
+            use_cache: 是否使用响应缓存，仅适用于相同输入期望相同输出的确定性调用
+            cache_validator: 可选的响应校验函数，返回False的响应不写入缓存
+            user_id: 发起请求的用户ID，用于用户级并发限制
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = self._cache_key(prompt, system_prompt)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        content = await self._request_completion(prompt, system_prompt, user_id=user_id)
+        
+        # 只缓存有效响应，失败的调用下次仍会重试
+        if cache_key and content is not None:
+            if cache_validator is None or cache_validator(content):
+                self.response_cache.set(cache_key, content)
+        
+        return content
     
-    async def call_llm_api(self, prompt: str, system_prompt: str = None) -> Optional[str]:
-        """封装与第三方大型语言模型API的底层通信"""
+    async def _request_completion(self, prompt: str, system_prompt: str = None, user_id: int = None) -> Optional[str]:
+        """经限流器发送聊天补全请求并解析响应内容"""
         try:
             messages = []
             if system_prompt:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            response = await self.limiter.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature
+                ),
+                user_id=user_id
             )
             
             # 检查响应类型
@@ -69,26 +125,226 @@ class AIAssistant:
             logger.error(f"调用AI API时发生错误: {e}")
             return None
 
-    async def estimate_pomodoro_count(self, task_title: str, task_description: Optional[str], pomodoro_duration: int = 25) -> Optional[int]:
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取AI调用的缓存命中、排队等待和耗时等运行指标"""
+        return {
+            'cache': self.response_cache.get_stats(),
+            'limiter': self.limiter.get_metrics()
+        }
+
+    def _cache_key(self, prompt: str, system_prompt: str = None) -> str:
+        """生成当前模型和参数下的缓存键"""
+        return make_cache_key(prompt, system_prompt, self.model, {
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature
+        })
+
+    def _build_estimate_prompts(self, task_title: str, task_description: Optional[str], pomodoro_duration: int):
+        """构建单个任务番茄钟预估的提示词"""
+        prompt = (
+            f"请根据以下任务的标题和描述，预估完成该任务所需的番茄钟数量（每个番茄钟时长为 {pomodoro_duration} 分钟）。\n"
+            f"任务标题: {task_title}\n"
+            f"任务描述: {task_description if task_description else '无'}\n\n"
+            f"请直接返回一个整数数字，不要包含任何其他文字或解释。"
+        )
+        system_prompt = f"你是一个任务工作量预估AI，专门根据任务描述预估番茄钟数量。每个番茄钟时长为 {pomodoro_duration} 分钟。请只返回数字。"
+        return prompt, system_prompt
+
+    async def estimate_pomodoro_count(self, task_title: str, task_description: Optional[str], pomodoro_duration: int = 25,
+                                      user_id: int = None) -> Optional[int]:
         """
         使用AI预估完成任务所需的番茄钟数量。
         :param task_title: 任务标题
         :param task_description: 任务描述
         :param pomodoro_duration: 每个番茄钟的时长（分钟），默认为25
+        :param user_id: 发起请求的用户ID
         :return: 预估的番茄钟数量（整数）或 None
         """
+        prompt, system_prompt = self._build_estimate_prompts(task_title, task_description, pomodoro_duration)
+
+        response = await self.call_llm_api(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            use_cache=True,
+            cache_validator=lambda text: _parse_estimate(text) is not None,
+            user_id=user_id
+        )
+
+        count = _parse_estimate(response)
+        if count is None:
+            logger.warning(f"AI未能给出有效预估或返回非数字内容: {response}")
+        return count
+
+    async def estimate_pomodoro_counts(self, tasks: List[Dict], pomodoro_duration: int = 25,
+                                       user_id: int = None) -> Dict[int, int]:
+        """
+        批量预估多个任务的番茄钟数量，一次请求打包多个任务。
+        已缓存的任务直接返回，批量响应中无法解析的任务才回退为单个预估请求。
+        :param tasks: 任务列表，每项需包含 task_id、title，可选 description
+        :param pomodoro_duration: 每个番茄钟的时长（分钟），默认为25
+        :param user_id: 发起请求的用户ID
+        :return: task_id 到预估番茄钟数量的映射，预估失败的任务不包含在内
+        """
+        results: Dict[int, int] = {}
+        pending: List[Dict] = []
+
+        # 先查询单任务缓存，与 estimate_pomodoro_count 共用缓存键
+        for task in tasks:
+            prompt, system_prompt = self._build_estimate_prompts(
+                task['title'], task.get('description'), pomodoro_duration
+            )
+            cached = _parse_estimate(self.response_cache.get(self._cache_key(prompt, system_prompt)))
+            if cached is not None:
+                results[task['task_id']] = cached
+            else:
+                pending.append(task)
+
+        if not pending:
+            return results
+
+        batch_size = AI_CONFIG['batch_estimate_size']
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        batch_results = await asyncio.gather(
+            *(self._estimate_batch(batch, pomodoro_duration, user_id) for batch in batches)
+        )
+
+        failed: List[Dict] = []
+        for batch, parsed in zip(batches, batch_results):
+            for task in batch:
+                count = parsed.get(task['task_id'])
+                if count is None:
+                    failed.append(task)
+                    continue
+                results[task['task_id']] = count
+                # 写入单任务缓存，之后单独预估同一任务时直接命中
+                prompt, system_prompt = self._build_estimate_prompts(
+                    task['title'], task.get('description'), pomodoro_duration
+                )
+                self.response_cache.set(self._cache_key(prompt, system_prompt), str(count))
+
+        if failed:
+            logger.info(f"批量预估中有 {len(failed)} 个任务未能解析，回退为单个预估")
+            fallback = await asyncio.gather(
+                *(self.estimate_pomodoro_count(task['title'], task.get('description'), pomodoro_duration, user_id)
+                  for task in failed)
+            )
+            for task, count in zip(failed, fallback):
+                if count is not None:
+                    results[task['task_id']] = count
+
+        return results
+
+    async def _estimate_batch(self, tasks: List[Dict], pomodoro_duration: int, user_id: int = None) -> Dict[int, int]:
+        """发送一次批量预估请求，返回成功解析的 task_id 到番茄钟数量的映射"""
+        items = [
+            {
+                'id': task['task_id'],
+                'title': task['title'],
+                'description': task.get('description') or ''
+            }
+            for task in tasks
+        ]
         prompt = (
-            f"请根据以下任务的标题和描述，预估完成该任务所需的番茄钟数量（每个番茄钟时长为 {pomodoro_duration} 分钟）。\n"
-            f"任务标题: {task_title}\n"
-            f"任务描述: {task_description if task_description else '无'}\n\n"
-            f"请直接返回一个整数数字，不要包含任何其他文字或解释。"
+            f"请预估以下每个任务所需的番茄钟数量（每个番茄钟时长为 {pomodoro_duration} 分钟）。\n"
+            f"任务列表(JSON):\n{json.dumps(items, ensure_ascii=False)}\n\n"
+            f"请只返回一个JSON数组，每个元素形如 {{\"id\": 任务id, \"pomodoros\": 整数}}，不要包含任何其他文字或解释。"
         )
-        system_prompt = f"你是一个任务工作量预估AI，专门根据任务描述预估番茄钟数量。每个番茄钟时长为 {pomodoro_duration} 分钟。请只返回数字。"
+        system_prompt = f"你是一个任务工作量预估AI，专门根据任务描述批量预估番茄钟数量。每个番茄钟时长为 {pomodoro_duration} 分钟。请只返回JSON。"
 
-        response = await self.call_llm_api(prompt=prompt, system_prompt=system_prompt)
+        response = await self.call_llm_api(prompt=prompt, system_prompt=system_prompt, user_id=user_id)
+        return self._parse_batch_estimates(response, {task['task_id'] for task in tasks})
 
-        if response and response.strip().isdigit():
-            return int(response.strip())
-        else:
-            logger.warning(f"AI未能给出有效预估或返回非数字内容: {response}")
-            return None
\ No newline at end of file
+    def _parse_batch_estimates(self, response: Optional[str], expected_ids) -> Dict[int, int]:
+        """解析批量预估响应，忽略格式不正确或不属于本批次的行"""
+        if not response:
+            return {}
+
+        # 兼容模型用代码块包裹JSON或附带说明文字的情况
+        start = response.find('[')
+        end = response.rfind(']')
+        if start == -1 or end <= start:
+            logger.warning(f"批量预估响应中未找到JSON数组: {response[:200]}")
+            return {}
+
+        try:
+            rows = json.loads(response[start:end + 1])
+        except ValueError as e:
+            logger.warning(f"批量预估响应JSON解析失败: {e}")
+            return {}
+
+        parsed: Dict[int, int] = {}
+        for row in rows if isinstance(rows, list) else []:
+            if not isinstance(row, dict):
+                continue
+            try:
+                task_id = int(row.get('id'))
+            except (TypeError, ValueError):
+                continue
+            count = _parse_estimate(row.get('pomodoros'))
+            if task_id in expected_ids and count is not None:
+                parsed[task_id] = count
+        return parsed
+
+    async def rerank_tasks(self, tasks: List[Dict], user_id: int = None) -> List[int]:
+        """
+        让AI对本地排序后的候选任务重新排序，只发送少量候选任务。
+        :param tasks: 候选任务列表（已按本地分数排序）
+        :param user_id: 发起请求的用户ID
+        :return: 按AI推荐顺序排列的 task_id 列表；AI未给出的任务保持原有相对顺序追加在后，
+                 调用失败时返回原顺序
+        """
+        original_ids = [task['task_id'] for task in tasks]
+        if len(tasks) <= 1:
+            return original_ids
+
+        items = [
+            {
+                'id': task['task_id'],
+                'title': task['title'],
+                'priority': task.get('priority'),
+                'due_date': str(task['due_date']) if task.get('due_date') else None,
+                'remaining_pomodoros': max((task.get('estimated_pomodoros') or 1) - (task.get('used_pomodoros') or 0), 0)
+            }
+            for task in tasks
+        ]
+        prompt = (
+            f"以下是用户当前最值得处理的候选任务(JSON):\n{json.dumps(items, ensure_ascii=False)}\n\n"
+            f"请综合紧急程度、重要性和工作量，按现在最应该处理的顺序重新排序。"
+            f"只返回任务id组成的JSON数组，例如 [3, 1, 2]，不要包含任何其他文字或解释。"
+        )
+        system_prompt = "你是一个任务推荐助手，只根据给定的候选任务排序，并只返回JSON数组。"
+
+        response = await self.call_llm_api(prompt=prompt, system_prompt=system_prompt, user_id=user_id)
+        ordered = self._parse_task_id_order(response, set(original_ids))
+        if not ordered:
+            return original_ids
+        return ordered + [task_id for task_id in original_ids if task_id not in ordered]
+
+    def _parse_task_id_order(self, response: Optional[str], expected_ids) -> List[int]:
+        """解析AI返回的任务id数组，忽略重复和不属于候选集的id"""
+        if not response:
+            return []
+
+        start = response.find('[')
+        end = response.rfind(']')
+        if start == -1 or end <= start:
+            logger.warning(f"重排序响应中未找到JSON数组: {response[:200]}")
+            return []
+
+        try:
+            rows = json.loads(response[start:end + 1])
+        except ValueError as e:
+            logger.warning(f"重排序响应JSON解析失败: {e}")
+            return []
+
+        ordered: List[int] = []
+        for row in rows if isinstance(rows, list) else []:
+            # 兼容模型返回 {"id": 1} 形式的元素
+            value = row.get('id') if isinstance(row, dict) else row
+            try:
+                task_id = int(value)
+            except (TypeError, ValueError):
+                continue
+            if task_id in expected_ids and task_id not in ordered:
+                ordered.append(task_id)
+        return ordered
@@ -0,0 +1,255 @@
+"""
+AI响应缓存
+对确定性的AI调用（如番茄钟预估）按内容寻址缓存，避免重复的网络请求和token消耗
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+from config import AI_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """规范化提示词：去除首尾空白并合并连续空白，使等价的提示词得到相同的键"""
+    if not text:
+        return ''
+    return ' '.join(text.split())
+
+
+def make_cache_key(prompt: str, system_prompt: Optional[str], model: str, params: Dict[str, Any] = None) -> str:
+    """根据规范化的提示词、模型和调用参数生成缓存键"""
+    payload = {
+        'model': model,
+        'system_prompt': normalize_prompt(system_prompt),
+        'prompt': normalize_prompt(prompt),
+        'params': params or {}
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AIResponseCache:
+    """
+    带LRU和TTL淘汰、可选磁盘持久化的AI响应缓存
+
+    写入只标记为待保存，flush_seconds 秒内的多次写入合并为一次落盘（在锁外写临时文件后原子替换），
+    进程退出时保存尚未落盘的修改
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: int = 7 * 24 * 3600, persist_path: str = None,
+                 flush_seconds: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path or None
+        self.flush_seconds = flush_seconds
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 落盘串行执行，避免较早的快照覆盖较新的文件
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+
+        # 命中率统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.persist_path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，未命中或已过期返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if self._is_expired(entry):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            # LRU：命中后移到末尾
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def set(self, key: str, value: str):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = {'value': value, 'created_at': time.time()}
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._schedule_flush()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._schedule_flush()
+
+    def flush(self):
+        """立即保存尚未落盘的修改（没有修改或未配置持久化时不写文件）"""
+        with self._save_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = list(self._entries.items())
+            self._save(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0
+            }
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """检查条目是否已过期"""
+        if not self.ttl_seconds:
+            return False
+        return time.time() - entry['created_at'] > self.ttl_seconds
+
+    def _schedule_flush(self):
+        """标记有待保存的修改，flush_seconds 后在后台线程落盘（调用方需持有锁）"""
+        if not self.persist_path:
+            return
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_seconds, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _load(self):
+        """从磁盘加载缓存，跳过已过期的条目"""
+        if not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"加载AI缓存文件失败，将使用空缓存: {e}")
+            return
+
+        # 文件中按最近使用顺序保存，保留最后的max_entries条
+        for key, entry in data.get('entries', [])[-self.max_entries:]:
+            if not self._is_expired(entry):
+                self._entries[key] = entry
+
+    def _save(self, entries: list):
+        """将缓存快照写入临时文件后原子替换，写入失败时原文件保持不变"""
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            directory = os.path.dirname(self.persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            logger.warning(f"保存AI缓存文件失败: {e}")
+
+
+class RedisResponseCache:
+    """存放在Redis中的AI响应缓存，多个工作进程共用（需要安装redis包），接口与AIResponseCache一致"""
+
+    def __init__(self, url: str, ttl_seconds: int = 7 * 24 * 3600, key_prefix: str = 'todo:ai_cache:'):
+        import redis  # 可选依赖，只有配置了共享缓存时才需要
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，未命中、已过期或Redis不可用时返回None"""
+        try:
+            value = self.client.get(self.key_prefix + key)
+        except Exception as e:
+            logger.warning(f"读取共享AI缓存失败: {e}")
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value.decode('utf-8')
+
+    def set(self, key: str, value: str):
+        """写入缓存，过期由Redis负责"""
+        try:
+            self.client.set(self.key_prefix + key, value, ex=self.ttl_seconds or None)
+        except Exception as e:
+            logger.warning(f"写入共享AI缓存失败: {e}")
+
+    def clear(self):
+        """清空缓存"""
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.key_prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"清空共享AI缓存失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取本进程的缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0
+            }
+
+
+_shared_cache: Optional[AIResponseCache] = None
+
+
+def get_shared_cache() -> AIResponseCache:
+    """获取进程内共享的AI响应缓存（多个AIAssistant实例共用），配置了 AI_CACHE_REDIS_URL 时各进程共用Redis缓存"""
+    global _shared_cache
+    if _shared_cache is None and AI_CONFIG['cache_redis_url']:
+        try:
+            _shared_cache = RedisResponseCache(AI_CONFIG['cache_redis_url'], AI_CONFIG['cache_ttl_seconds'])
+        except Exception as e:
+            logger.error(f"无法使用共享AI缓存，改用进程内缓存: {e}")
+    if _shared_cache is None:
+        _shared_cache = AIResponseCache(
+            max_entries=AI_CONFIG['cache_max_entries'],
+            ttl_seconds=AI_CONFIG['cache_ttl_seconds'],
+            persist_path=AI_CONFIG['cache_path'],
+            flush_seconds=AI_CONFIG['cache_flush_seconds']
+        )
+    return _shared_cache
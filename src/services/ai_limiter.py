@@ -0,0 +1,305 @@
+"""
+AI请求限流模块
+为AI调用提供进程级和用户级并发限制、请求截止时间、带抖动的重试退避和熔断，
+并统计排队等待和请求耗时的分布
+"""
+
+import time
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+
+import openai
+
+from config import AI_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class AIUnavailableError(Exception):
+    """AI服务暂不可用（熔断、排队超时或超过截止时间）"""
+
+
+class LatencyHistogram:
+    """按固定桶统计耗时分布（单位：秒）"""
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为 +Inf
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        """记录一次耗时"""
+        index = len(self.buckets)
+        for i, upper in enumerate(self.buckets):
+            if seconds <= upper:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数"""
+        if not self.total:
+            return 0.0
+        target = q * self.total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取直方图快照"""
+        labels = [f"<={upper}s" for upper in self.buckets] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.total,
+            'avg': round(self.sum / self.total, 3) if self.total else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95)
+        }
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败达到阈值后打开，在冷却时间内直接拒绝请求；
+    冷却结束后进入半开状态，只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """检查当前是否允许发出请求"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        # 半开状态只放行一个探测请求
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        """记录一次成功调用"""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """放弃本次探测机会（请求未真正到达上游时调用）"""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """记录一次失败调用"""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"AI服务连续失败 {self.consecutive_failures} 次，熔断器打开")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """判断错误是否值得重试：限流(429)、服务端错误(5xx)、超时和连接错误"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class AIRequestLimiter:
+    """AI请求限流器，进程内共享"""
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 per_user_concurrency: int = 2,
+                 deadline_seconds: float = 60,
+                 max_retries: int = 3,
+                 retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 8,
+                 circuit_breaker: CircuitBreaker = None):
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        # 用户信号量按需创建，无人使用时回收：user_id -> [semaphore, 引用数]
+        self._user_semaphores: Dict[int, List] = {}
+
+        self.queue_wait = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.in_flight = 0
+        self.rejected = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def _acquire(self, semaphore: asyncio.Semaphore, deadline: float):
+        """在截止时间内获取信号量"""
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self._remaining(deadline))
+        except asyncio.TimeoutError:
+            raise AIUnavailableError('AI请求排队超时')
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    @asynccontextmanager
+    async def _user_slot(self, user_id: Optional[int], deadline: float):
+        """获取用户级并发槽位"""
+        if user_id is None:
+            yield
+            return
+
+        entry = self._user_semaphores.setdefault(user_id, [asyncio.Semaphore(self.per_user_concurrency), 0])
+        entry[1] += 1
+        try:
+            async with self._acquire(entry[0], deadline):
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._user_semaphores.pop(user_id, None)
+
+    async def call(self, request: Callable[[], Awaitable[Any]], user_id: int = None) -> Any:
+        """
+        在并发限制和截止时间内执行请求，可重试错误按指数退避加全抖动重试
+
+        Args:
+            request: 每次调用返回一个新协程的请求函数
+            user_id: 发起请求的用户ID，用于用户级并发限制
+
+        Returns:
+            请求结果
+
+        Raises:
+            AIUnavailableError: 熔断打开、排队超时或超过截止时间
+        """
+        if not self.circuit_breaker.allow_request():
+            self.rejected += 1
+            raise AIUnavailableError('AI服务暂时不可用（熔断中）')
+
+        deadline = time.monotonic() + self.deadline_seconds
+        queued_at = time.monotonic()
+        started_at = None
+
+        try:
+            async with self._user_slot(user_id, deadline), self._acquire(self._global_semaphore, deadline):
+                self.queue_wait.observe(time.monotonic() - queued_at)
+                self.in_flight += 1
+                started_at = time.monotonic()
+                try:
+                    result = await self._call_with_retry(request, deadline)
+                finally:
+                    self.in_flight -= 1
+                    self.latency.observe(time.monotonic() - started_at)
+        except Exception as e:
+            if started_at is None:
+                # 排队阶段就失败，请求没有到达上游
+                self.rejected += 1
+                self.circuit_breaker.release_probe()
+            elif is_retryable_error(e) or isinstance(e, AIUnavailableError):
+                self.circuit_breaker.record_failure()
+            else:
+                # 请求本身有误（如4xx），不计入上游故障
+                self.circuit_breaker.release_probe()
+            raise
+        except BaseException:
+            # 被取消（客户端断开、外层 wait_for 超时）时结果未知，不计入故障，但必须交还探测机会，
+            # 否则半开状态一直认为探测请求仍在进行，之后的请求全部被拒绝
+            self.circuit_breaker.release_probe()
+            raise
+
+        self.circuit_breaker.record_success()
+        return result
+
+    async def _call_with_retry(self, request: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        """在截止时间内带退避地重试请求"""
+        attempt = 0
+        while True:
+            remaining = self._remaining(deadline)
+            if remaining <= 0:
+                raise AIUnavailableError('AI请求超过截止时间')
+
+            try:
+                return await asyncio.wait_for(request(), timeout=remaining)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    raise
+
+                # 指数退避 + 全抖动，避免大量请求同时重试
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+                if delay >= self._remaining(deadline):
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"AI请求失败，{delay:.2f}秒后进行第{attempt}次重试: {e}")
+                await asyncio.sleep(delay)
+
+    def _remaining(self, deadline: float) -> float:
+        """距离截止时间的剩余秒数"""
+        return max(0.0, deadline - time.monotonic())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取限流器运行指标"""
+        return {
+            'in_flight': self.in_flight,
+            'active_users': len(self._user_semaphores),
+            'rejected': self.rejected,
+            'retries': self.retries,
+            'circuit_state': self.circuit_breaker.state,
+            'queue_wait': self.queue_wait.snapshot(),
+            'latency': self.latency.snapshot()
+        }
+
+
+_shared_limiter: Optional[AIRequestLimiter] = None
+
+
+def get_shared_limiter() -> AIRequestLimiter:
+    """获取进程内共享的AI请求限流器"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = AIRequestLimiter(
+            max_concurrency=AI_CONFIG['max_concurrency'],
+            per_user_concurrency=AI_CONFIG['per_user_concurrency'],
+            deadline_seconds=AI_CONFIG['request_deadline'],
+            max_retries=AI_CONFIG['max_retries'],
+            retry_base_delay=AI_CONFIG['retry_base_delay'],
+            retry_max_delay=AI_CONFIG['retry_max_delay'],
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=AI_CONFIG['circuit_failure_threshold'],
+                reset_seconds=AI_CONFIG['circuit_reset_seconds']
+            )
+        )
+    return _shared_limiter
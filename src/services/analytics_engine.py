@@ -0,0 +1,266 @@
+"""
+统计分析引擎
+一次性拉取用户时间窗口内的任务、标签和专注记录（只投影需要的列并指定类型），
+再用pandas向量化分组计算各报告部分，返回与StatisticsManager各方法相同的数据结构
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 报告的全部部分及其依赖的数据
+REPORT_SECTIONS = {
+    'overview': ('tasks', 'sessions'),
+    'completion_analysis': ('tasks',),
+    'priority_distribution': ('tasks',),
+    'tag_performance': ('tasks', 'task_tags'),
+    'pattern_analysis': ('sessions',),
+    'efficiency_trends': ('tasks', 'sessions')
+}
+
+PRIORITY_ORDER = ['high', 'medium', 'low']
+DAY_NAMES = {1: '周日', 2: '周一', 3: '周二', 4: '周三', 5: '周四', 6: '周五', 7: '周六'}
+
+TASK_DTYPES = {
+    'task_id': 'int64',
+    'status': 'category',
+    'priority': 'category',
+    'estimated_pomodoros': 'int64',
+    'used_pomodoros': 'int64',
+    'created_at': 'datetime64[ns]',
+    'completed_at': 'datetime64[ns]'  # 完成时间，未完成为空
+}
+
+SESSION_DTYPES = {
+    'session_id': 'int64',
+    'task_id': 'Int64',  # 专注记录可能没有关联任务
+    'start_time': 'datetime64[ns]',
+    'duration_minutes': 'int64'
+}
+
+TASK_TAG_DTYPES = {
+    'task_id': 'int64',
+    'tag': 'object'
+}
+
+
+def _frame(rows: List[Dict], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """将查询结果转换为指定类型的DataFrame"""
+    df = pd.DataFrame.from_records(rows or [], columns=list(dtypes))
+    for column, dtype in dtypes.items():
+        if dtype.startswith('datetime'):
+            df[column] = pd.to_datetime(df[column])
+        elif dtype == 'int64':
+            df[column] = df[column].fillna(0).astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+class AnalyticsEngine:
+    """基于pandas的统计报告引擎"""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def build_report(self, user_id: int, days: int = 7, sections: Iterable[str] = None,
+                     now: datetime = None) -> Dict[str, Any]:
+        """
+        计算统计报告
+
+        Args:
+            user_id: 用户ID
+            days: 统计的天数
+            sections: 需要的报告部分，默认全部
+            now: 当前时间，默认为现在
+
+        Returns:
+            {部分名称: 数据}，每部分的结构与StatisticsManager对应方法相同
+        """
+        sections = list(sections) if sections else list(REPORT_SECTIONS)
+        now = now or datetime.now()
+        start_date = now - timedelta(days=days)
+        today = pd.Timestamp(now).normalize()
+
+        needed = {source for section in sections for source in REPORT_SECTIONS[section]}
+        tasks = self._load_tasks(user_id) if 'tasks' in needed else None
+        task_tags = self._load_task_tags(user_id) if 'task_tags' in needed else None
+        # 专注记录窗口同时覆盖今天和统计周期
+        sessions = self._load_sessions(user_id, min(start_date, today.to_pydatetime())) if 'sessions' in needed else None
+
+        builders = {
+            'overview': lambda: self._overview(tasks, sessions, today, start_date),
+            'completion_analysis': lambda: self._completion_analysis(tasks, start_date),
+            'priority_distribution': lambda: self._priority_distribution(tasks),
+            'tag_performance': lambda: self._tag_performance(tasks, task_tags, start_date),
+            'pattern_analysis': lambda: self._pattern_analysis(sessions, start_date),
+            'efficiency_trends': lambda: self._efficiency_trends(tasks, sessions, start_date)
+        }
+        return {section: builders[section]() for section in sections}
+
+    def _load_tasks(self, user_id: int) -> pd.DataFrame:
+        """加载用户全部任务（只取统计需要的列）"""
+        query = """
+        SELECT task_id, status, priority, estimated_pomodoros, used_pomodoros, created_at, completed_at
+        FROM tasks
+        WHERE user_id = %s
+        """
+        return _frame(self.db.execute_query(query, (user_id,)), TASK_DTYPES)
+
+    def _load_task_tags(self, user_id: int) -> pd.DataFrame:
+        """加载用户任务与标签名称的对应关系"""
+        query = """
+        SELECT tt.task_id, tg.name as tag
+        FROM task_tags tt
+        JOIN tags tg ON tg.tag_id = tt.tag_id
+        WHERE tg.user_id = %s
+        """
+        return _frame(self.db.execute_query(query, (user_id,)), TASK_TAG_DTYPES)
+
+    def _load_sessions(self, user_id: int, since: datetime) -> pd.DataFrame:
+        """加载时间窗口内已完成的工作专注记录"""
+        query = """
+        SELECT session_id, task_id, start_time, duration_minutes
+        FROM focus_sessions
+        WHERE user_id = %s AND session_type = 'work' AND is_completed = TRUE
+        AND start_time >= %s
+        """
+        return _frame(self.db.execute_query(query, (user_id, since)), SESSION_DTYPES)
+
+    def _overview(self, tasks: pd.DataFrame, sessions: pd.DataFrame,
+                  today: pd.Timestamp, start_date: datetime) -> Dict[str, Any]:
+        """生产力概览，对应 get_productivity_overview"""
+        session_today = sessions['start_time'].dt.normalize() == today
+        session_period = sessions['start_time'] >= start_date
+
+        completed = tasks['status'] == 'completed'
+        completed_today = completed & (tasks['completed_at'].dt.normalize() == today)
+        completed_period = completed & (tasks['completed_at'] >= start_date)
+
+        return {
+            'today_focus_minutes': int(sessions.loc[session_today, 'duration_minutes'].sum()),
+            'period_focus_minutes': int(sessions.loc[session_period, 'duration_minutes'].sum()),
+            'today_focus_sessions': int(session_today.sum()),
+            'period_focus_sessions': int(session_period.sum()),
+            'today_completed_tasks': int(completed_today.sum()),
+            'period_completed_tasks': int(completed_period.sum()),
+            'pending_tasks': int((tasks['status'] == 'pending').sum()),
+            'today_pomodoros_used': int(tasks.loc[completed_today, 'used_pomodoros'].sum())
+        }
+
+    def _completion_analysis(self, tasks: pd.DataFrame, start_date: datetime) -> Dict[str, Any]:
+        """任务完成率，对应 get_task_completion_rate"""
+        window = tasks[tasks['created_at'] >= start_date]
+        if window.empty:
+            return {
+                'total_tasks': 0,
+                'completed_tasks': 0,
+                'completion_rate': 0,
+                'avg_pomodoros_per_task': 0,
+                'estimation_accuracy': 100
+            }
+
+        done = window[window['status'] == 'completed']
+        estimated = done['estimated_pomodoros'].where(done['estimated_pomodoros'] != 0)
+        accuracy = (done['used_pomodoros'] / estimated).mean()
+        avg_used = done['used_pomodoros'].mean()
+
+        return {
+            'total_tasks': len(window),
+            'completed_tasks': len(done),
+            'completion_rate': round(len(done) / len(window) * 100, 1),
+            'avg_pomodoros_per_task': round(float(avg_used) if pd.notna(avg_used) else 0, 1),
+            'estimation_accuracy': round((float(accuracy) if pd.notna(accuracy) else 1) * 100, 1)
+        }
+
+    def _priority_distribution(self, tasks: pd.DataFrame) -> List[Dict]:
+        """优先级分布，对应 get_priority_distribution"""
+        grouped = (
+            tasks.assign(completed=tasks['status'] == 'completed')
+            .groupby(tasks['priority'].astype('object'))
+            .agg(task_count=('task_id', 'size'), completed_count=('completed', 'sum'))
+        )
+        grouped = grouped.reindex([p for p in PRIORITY_ORDER if p in grouped.index])
+        return grouped.rename_axis('priority').reset_index().to_dict('records')
+
+    def _tag_performance(self, tasks: pd.DataFrame, task_tags: pd.DataFrame, start_date: datetime) -> List[Dict]:
+        """标签表现，对应 get_tag_performance"""
+        window = tasks[tasks['created_at'] >= start_date]
+        if window.empty:
+            return []
+
+        merged = window.merge(task_tags, on='task_id', how='left')
+        merged['tag'] = merged['tag'].fillna('无标签')
+        merged['completed'] = merged['status'] == 'completed'
+        merged['completed_pomodoros'] = merged['used_pomodoros'].where(merged['completed'])
+
+        grouped = merged.groupby('tag').agg(
+            total_tasks=('task_id', 'size'),
+            completed_tasks=('completed', 'sum'),
+            total_pomodoros=('completed_pomodoros', 'sum'),
+            avg_pomodoros=('completed_pomodoros', 'mean')
+        )
+        grouped['total_pomodoros'] = grouped['total_pomodoros'].astype('int64')
+        grouped['avg_pomodoros'] = grouped['avg_pomodoros'].fillna(0).round(1)
+        grouped['completion_rate'] = (grouped['completed_tasks'] / grouped['total_tasks'] * 100).round(1)
+        grouped = grouped.sort_values('completed_tasks', ascending=False, kind='stable')
+        return grouped.reset_index().to_dict('records')
+
+    def _pattern_analysis(self, sessions: pd.DataFrame, start_date: datetime) -> Dict[str, Any]:
+        """日常工作模式，对应 get_daily_pattern_analysis"""
+        window = sessions[sessions['start_time'] >= start_date]
+
+        hourly = (
+            window.groupby(window['start_time'].dt.hour.rename('hour'))
+            .agg(session_count=('session_id', 'size'),
+                 total_minutes=('duration_minutes', 'sum'),
+                 avg_duration=('duration_minutes', 'mean'))
+            .sort_index()
+        )
+        hourly['avg_duration'] = hourly['avg_duration'].round(2)
+
+        # 与MySQL的DAYOFWEEK一致：周日为1，周六为7
+        day_of_week = ((window['start_time'].dt.dayofweek + 1) % 7 + 1).rename('day_of_week')
+        weekly = (
+            window.groupby(day_of_week)
+            .agg(session_count=('session_id', 'size'), total_minutes=('duration_minutes', 'sum'))
+            .sort_index()
+            .reset_index()
+        )
+        weekly['day_name'] = weekly['day_of_week'].map(DAY_NAMES).fillna('未知')
+
+        return {
+            'hourly_pattern': hourly.reset_index().to_dict('records'),
+            'weekly_pattern': weekly.to_dict('records')
+        }
+
+    def _efficiency_trends(self, tasks: pd.DataFrame, sessions: pd.DataFrame, start_date: datetime) -> Dict[str, Any]:
+        """效率趋势，对应 get_efficiency_trends"""
+        window = sessions[sessions['start_time'] >= start_date]
+        if window.empty:
+            return {'daily_trends': []}
+
+        task_info = tasks[['task_id', 'status', 'completed_at']].astype({'task_id': 'Int64'})
+        merged = window.merge(task_info, on='task_id', how='left')
+        merged['date'] = merged['start_time'].dt.date
+        # 当天专注且当天完成的任务记录
+        merged['completed_same_day'] = (
+            (merged['status'] == 'completed') & (merged['completed_at'].dt.date == merged['date'])
+        )
+
+        daily = merged.groupby('date').agg(
+            focus_sessions=('session_id', 'nunique'),
+            focus_minutes=('duration_minutes', 'sum'),
+            tasks_worked_on=('task_id', 'nunique'),
+            tasks_completed=('completed_same_day', 'sum')
+        ).sort_index()
+        daily['efficiency_score'] = (
+            (daily['tasks_completed'] / daily['focus_minutes'].where(daily['focus_minutes'] > 0) * 100)
+            .round(2).fillna(0)
+        )
+
+        return {'daily_trends': daily.reset_index().to_dict('records')}
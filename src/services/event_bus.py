@@ -0,0 +1,212 @@
+"""
+数据变更事件总线
+按 user_id 发布和订阅精简的变更事件，使同一用户的多个标签页/设备实时同步。
+事件经由代理（broker）分发：单进程使用进程内代理，多进程部署可换成共享的Redis代理
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+TASK_CREATED = 'task.created'
+TASK_UPDATED = 'task.updated'
+TASK_DELETED = 'task.deleted'
+TASKS_BULK_UPDATED = 'tasks.bulk_updated'
+TAG_CHANGED = 'tag.changed'
+TAG_DELETED = 'tag.deleted'
+SESSION_CHANGED = 'session.changed'
+SETTINGS_UPDATED = 'settings.updated'
+
+
+def _current_origin() -> Optional[str]:
+    """获取触发写操作的页面客户端ID，不在页面上下文中时返回None"""
+    try:
+        from nicegui import context
+        return context.client.id
+    except Exception:
+        return None
+
+
+class LocalBroker:
+    """进程内代理：发布的消息直接交给本进程的总线，用于单进程部署和测试"""
+
+    def __init__(self):
+        self._on_message: Optional[Callable[[Dict], None]] = None
+
+    def start(self, on_message: Callable[[Dict], None]):
+        """开始接收消息"""
+        self._on_message = on_message
+
+    def publish(self, message: Dict):
+        """发布消息"""
+        if self._on_message:
+            self._on_message(message)
+
+    def close(self):
+        """停止接收消息"""
+        self._on_message = None
+
+
+class RedisBroker:
+    """Redis发布订阅代理：在多个工作进程之间广播消息（需要安装redis包）"""
+
+    def __init__(self, url: str, channel: str = 'todo:events'):
+        import redis  # 可选依赖，只有配置了共享代理时才需要
+
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, on_message: Callable[[Dict], None]):
+        """在后台线程中订阅频道"""
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+
+        def handle(raw):
+            try:
+                on_message(json.loads(raw['data']))
+            except Exception as e:
+                logger.error(f"处理事件消息失败: {e}")
+
+        self._pubsub.subscribe(**{self.channel: handle})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, message: Dict):
+        """发布消息，所有进程（包括本进程）都会收到"""
+        try:
+            self.client.publish(self.channel, json.dumps(message, default=str))
+        except Exception as e:
+            logger.error(f"发布事件消息失败: {e}")
+
+    def close(self):
+        """停止订阅"""
+        if self._thread:
+            self._thread.stop()
+        if self._pubsub:
+            self._pubsub.close()
+
+
+class EventBus:
+    """按用户分发变更事件的发布订阅总线"""
+
+    def __init__(self, broker=None, origin_provider: Callable[[], Optional[str]] = _current_origin):
+        self.broker = broker or LocalBroker()
+        self.origin_provider = origin_provider
+        self._subscribers: Dict[int, Dict[str, Callable[[Dict], None]]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.broker.start(self._on_broker_message)
+
+    def subscribe(self, user_id: int, callback: Callable[[Dict], None]) -> str:
+        """
+        订阅用户的变更事件
+
+        Args:
+            user_id: 用户ID
+            callback: 收到事件时调用，参数为事件字典
+
+        Returns:
+            订阅ID，用于取消订阅
+        """
+        subscription_id = uuid.uuid4().hex
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[subscription_id] = callback
+        # 记录事件循环，代理线程收到消息时切回事件循环再回调
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: str):
+        """取消订阅"""
+        with self._lock:
+            for user_id, callbacks in list(self._subscribers.items()):
+                if callbacks.pop(subscription_id, None) is not None:
+                    if not callbacks:
+                        del self._subscribers[user_id]
+                    return
+
+    def publish(self, user_id: int, event_type: str, **payload):
+        """
+        发布变更事件
+
+        Args:
+            user_id: 数据所属用户ID
+            event_type: 事件类型，如 task.updated
+            **payload: 事件内容，如 task_id、fields，需可JSON序列化
+        """
+        if user_id is None:
+            return
+        message = {
+            'user_id': user_id,
+            'type': event_type,
+            'origin': self.origin_provider() if self.origin_provider else None,
+            'ts': time.time(),
+            **payload
+        }
+        try:
+            self.broker.publish(message)
+        except Exception as e:
+            logger.error(f"发布事件失败: {e}")
+
+    def _on_broker_message(self, message: Dict):
+        """代理收到消息：在事件循环中分发，当前写操作完成后再通知订阅者"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._dispatch(message)
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            loop.call_soon(self._dispatch, message)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: Dict):
+        """调用该用户的所有订阅回调"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(message.get('user_id'), {}).values())
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"处理变更事件失败: {e}")
+
+    def subscriber_count(self, user_id: int = None) -> int:
+        """获取订阅数量"""
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, {}))
+            return sum(len(callbacks) for callbacks in self._subscribers.values())
+
+
+_shared_event_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """获取进程内共享的事件总线，配置了 EVENT_BROKER_URL 时使用Redis代理"""
+    global _shared_event_bus
+    if _shared_event_bus is None:
+        broker = None
+        broker_url = APP_CONFIG['event_broker_url']
+        if broker_url:
+            try:
+                broker = RedisBroker(broker_url)
+            except Exception as e:
+                logger.error(f"无法连接事件代理，改用进程内代理: {e}")
+        _shared_event_bus = EventBus(broker)
+    return _shared_event_bus
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+数据导出模块
+以生成器逐行读取任务和专注记录，增量编码为CSV、JSONL或Parquet字节块，
+配合分块HTTP响应导出任意长的历史记录，内存占用不随数据量增长
+"""
+
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 导出数据集：列顺序即文件中的列顺序
+EXPORT_DATASETS = {
+    'tasks': {
+        'columns': ['task_id', 'title', 'description', 'due_date', 'priority', 'status', 'repeat_cycle',
+                    'estimated_pomodoros', 'used_pomodoros', 'completed_at', 'created_at', 'updated_at', 'tags'],
+        # 标签名用 GROUP_CONCAT 合并为一列，避免为每个任务再查询一次
+        'query': """
+        SELECT t.task_id, t.title, t.description, t.due_date, t.priority, t.status, t.repeat_cycle,
+               t.estimated_pomodoros, t.used_pomodoros, t.completed_at, t.created_at, t.updated_at,
+               (SELECT GROUP_CONCAT(tg.name ORDER BY tg.name SEPARATOR ',')
+                FROM task_tags tt JOIN tags tg ON tg.tag_id = tt.tag_id
+                WHERE tt.task_id = t.task_id) AS tags
+        FROM tasks t
+        WHERE t.user_id = %s
+        ORDER BY t.task_id
+        """
+    },
+    'focus_sessions': {
+        'columns': ['session_id', 'task_id', 'task_title', 'session_type', 'start_time', 'end_time',
+                    'duration_minutes', 'is_completed'],
+        'query': """
+        SELECT fs.session_id, fs.task_id, t.title AS task_title, fs.session_type, fs.start_time,
+               fs.end_time, fs.duration_minutes, fs.is_completed
+        FROM focus_sessions fs
+        LEFT JOIN tasks t ON fs.task_id = t.task_id
+        WHERE fs.user_id = %s
+        ORDER BY fs.session_id
+        """
+    }
+}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def _plain_value(value):
+    """将数据库值转换为可序列化的基本类型"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    return value
+
+
+class ExportService:
+    """流式导出服务"""
+
+    def __init__(self, db_manager, chunk_rows: int = 1000):
+        self.db = db_manager
+        self.chunk_rows = chunk_rows
+
+    @staticmethod
+    def parquet_available() -> bool:
+        """Parquet导出依赖可选的pyarrow"""
+        try:
+            import pyarrow  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def rows(self, user_id: int, dataset: str) -> Iterator[Dict]:
+        """逐行读取导出数据"""
+        spec = EXPORT_DATASETS[dataset]
+        return self.db.stream_query(spec['query'], (user_id,), batch_size=self.chunk_rows)
+
+    def export(self, user_id: int, dataset: str, fmt: str) -> Iterator[bytes]:
+        """
+        导出数据集为指定格式的字节块生成器
+
+        Args:
+            user_id: 用户ID
+            dataset: 数据集名称 (tasks, focus_sessions)
+            fmt: 格式 (csv, jsonl, parquet)
+
+        Returns:
+            字节块生成器，适合直接作为分块HTTP响应的内容
+        """
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f"不支持的导出数据集: {dataset}")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        if fmt == 'parquet' and not self.parquet_available():
+            raise ValueError('Parquet导出需要安装pyarrow')
+
+        columns = EXPORT_DATASETS[dataset]['columns']
+        writer = {'csv': self.iter_csv, 'jsonl': self.iter_jsonl, 'parquet': self.iter_parquet}[fmt]
+        return writer(self.rows(user_id, dataset), columns)
+
+    def _batches(self, rows: Iterable[Dict]) -> Iterator[List[Dict]]:
+        """将逐行数据按 chunk_rows 分批"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.chunk_rows:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_csv(self, rows: Iterable[Dict], columns: List[str]) -> Iterator[bytes]:
+        """CSV：首块带BOM和表头（便于Excel识别UTF-8），之后每批一块"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+        for batch in self._batches(rows):
+            buffer.seek(0)
+            buffer.truncate()
+            for row in batch:
+                writer.writerow([_plain_value(row.get(column)) for column in columns])
+            yield buffer.getvalue().encode('utf-8')
+
+    def iter_jsonl(self, rows: Iterable[Dict], columns: List[str]) -> Iterator[bytes]:
+        """JSONL：每行一个JSON对象，每批一块"""
+        for batch in self._batches(rows):
+            lines = [
+                json.dumps({column: _plain_value(row.get(column)) for column in columns}, ensure_ascii=False)
+                for row in batch
+            ]
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def iter_parquet(self, rows: Iterable[Dict], columns: List[str]) -> Iterator[bytes]:
+        """Parquet：每批写为一个行组并立即输出已编码的字节，文件尾在最后输出"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = _DrainableSink()
+        writer = None
+        try:
+            for batch in self._batches(rows):
+                table = pa.Table.from_pylist(
+                    [{column: _plain_value(row.get(column)) for column in columns} for row in batch]
+                )
+                if writer is None:
+                    # 首批中全为空的列无法推断类型，按字符串处理；之后各批按首批的结构统一
+                    schema = pa.schema([
+                        pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                        for field in table.schema
+                    ])
+                    writer = pq.ParquetWriter(sink, schema)
+                table = table.cast(writer.schema)
+                writer.write_table(table)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+            if writer is None:
+                # 没有数据时输出只有表结构的空文件
+                schema = pa.schema([(column, pa.string()) for column in columns])
+                writer = pq.ParquetWriter(sink, schema)
+        finally:
+            if writer is not None:
+                writer.close()
+        yield sink.drain()
+
+
+class _DrainableSink(io.RawIOBase):
+    """只追加的写入目标，drain() 取走已写入的字节，缓冲区不随文件增长"""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
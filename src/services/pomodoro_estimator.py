@@ -0,0 +1,247 @@
+"""
+基于历史任务的番茄钟预估模块
+用用户自己已完成任务的实际番茄钟数，按标题和描述的字符n-gram TF-IDF向量做近邻预估，
+置信度不足时再交给AI预估
+"""
+
+import re
+import time
+import zlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _UserHistory:
+    """单个用户的历史任务向量"""
+
+    def __init__(self, n_features: int):
+        self.task_ids: List[int] = []
+        self.index: Dict[int, int] = {}  # task_id -> 行号
+        self.tf = np.zeros((0, n_features), dtype=np.float32)
+        self.targets = np.zeros(0, dtype=np.float32)
+        self.doc_freq = np.zeros(n_features, dtype=np.float32)
+        self.last_sync: Optional[datetime] = None
+        self.last_refresh = 0.0
+        self._weighted: Optional[np.ndarray] = None  # 归一化后的TF-IDF矩阵缓存
+        self._idf: Optional[np.ndarray] = None
+
+    def load(self, task_ids: List[int], tf: np.ndarray, targets: np.ndarray):
+        """用一次性构建好的矩阵替换全部历史（首次加载时使用，避免逐行拼接）"""
+        self.task_ids = list(task_ids)
+        self.index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.tf = tf
+        self.targets = targets
+        self.doc_freq = (tf > 0).sum(axis=0).astype(np.float32)
+        self._weighted = None
+
+    def upsert(self, task_id: int, tf_row: np.ndarray, target: float):
+        """新增或更新一行"""
+        if task_id in self.index:
+            row = self.index[task_id]
+            self.doc_freq -= (self.tf[row] > 0)
+            self.tf[row] = tf_row
+            self.targets[row] = target
+        else:
+            self.index[task_id] = len(self.task_ids)
+            self.task_ids.append(task_id)
+            self.tf = np.vstack([self.tf, tf_row[np.newaxis, :]])
+            self.targets = np.append(self.targets, np.float32(target))
+        self.doc_freq += (tf_row > 0)
+        self._weighted = None
+
+    def remove(self, task_id: int):
+        """删除一行（任务被重新打开或不再计入历史）"""
+        row = self.index.pop(task_id, None)
+        if row is None:
+            return
+        self.doc_freq -= (self.tf[row] > 0)
+        self.tf = np.delete(self.tf, row, axis=0)
+        self.targets = np.delete(self.targets, row)
+        del self.task_ids[row]
+        self.index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self._weighted = None
+
+    def trim(self, max_rows: int):
+        """只保留最近的 max_rows 行"""
+        while len(self.task_ids) > max_rows:
+            self.remove(self.task_ids[0])
+
+    def weighted(self):
+        """获取归一化的TF-IDF矩阵和IDF向量"""
+        if self._weighted is None:
+            n_docs = len(self.task_ids)
+            self._idf = (np.log((1.0 + n_docs) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+            matrix = self.tf * self._idf
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._weighted = matrix / norms
+        return self._weighted, self._idf
+
+
+class PomodoroEstimator:
+    """按用户历史任务的近邻预估番茄钟数量"""
+
+    def __init__(self, db_manager, n_features: int = 1024, ngram_range: tuple = (1, 3),
+                 k: int = 5, max_history: int = 500, refresh_interval: float = 0):
+        self.db = db_manager
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.k = k
+        self.max_history = max_history
+        self.refresh_interval = refresh_interval
+        self._histories: Dict[int, _UserHistory] = {}
+
+    def vectorize(self, title: str, description: str = None) -> np.ndarray:
+        """
+        将标题和描述转换为哈希后的字符n-gram词频向量（对数缩放）
+        标题计两次，使其比描述更重要
+        """
+        text = f"{title or ''} {title or ''} {description or ''}".lower()
+        text = re.sub(r'\s+', ' ', text).strip()
+
+        row = np.zeros(self.n_features, dtype=np.float32)
+        min_n, max_n = self.ngram_range
+        for n in range(min_n, max_n + 1):
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                if gram.isspace():
+                    continue
+                # crc32 在不同进程间稳定，不受哈希随机化影响
+                row[zlib.crc32(gram.encode('utf-8')) % self.n_features] += 1
+        nonzero = row > 0
+        row[nonzero] = 1.0 + np.log(row[nonzero])
+        return row
+
+    def refresh(self, user_id: int) -> int:
+        """
+        增量同步用户的已完成任务：首次加载最近的历史，之后只查询上次同步后更新过的任务
+
+        Returns:
+            本次同步变更的任务数
+        """
+        history = self._histories.get(user_id)
+        if history is None:
+            history = _UserHistory(self.n_features)
+            self._histories[user_id] = history
+        elif time.monotonic() - history.last_refresh < self.refresh_interval:
+            return 0
+
+        try:
+            if history.last_sync is None:
+                query = """
+                SELECT task_id, title, description, status, used_pomodoros, updated_at
+                FROM tasks
+                WHERE user_id = %s AND status = 'completed' AND used_pomodoros > 0
+                ORDER BY updated_at DESC
+                LIMIT %s
+                """
+                rows = self.db.execute_query(query, (user_id, self.max_history)) or []
+                rows.reverse()
+            else:
+                # 时间戳精度为秒，用 >= 避免漏掉同一秒内的更新，重复行按 task_id 覆盖
+                query = """
+                SELECT task_id, title, description, status, used_pomodoros, updated_at
+                FROM tasks
+                WHERE user_id = %s AND updated_at >= %s
+                ORDER BY updated_at
+                """
+                rows = self.db.execute_query(query, (user_id, history.last_sync)) or []
+        except Exception as e:
+            logger.error(f"同步历史任务失败: {e}")
+            return 0
+
+        if history.last_sync is None and rows:
+            # 首次加载：预分配整块矩阵一次填充，逐行 vstack 在数百行时是平方级开销
+            tf = np.empty((len(rows), self.n_features), dtype=np.float32)
+            for i, row in enumerate(rows):
+                tf[i] = self.vectorize(row['title'], row['description'])
+            history.load([row['task_id'] for row in rows], tf,
+                         np.array([row['used_pomodoros'] for row in rows], dtype=np.float32))
+            history.last_sync = max((row['updated_at'] for row in rows if row['updated_at'] is not None),
+                                    default=None)
+            rows_to_apply = []
+        else:
+            rows_to_apply = rows
+
+        for row in rows_to_apply:
+            if row['status'] == 'completed' and (row['used_pomodoros'] or 0) > 0:
+                history.upsert(row['task_id'], self.vectorize(row['title'], row['description']),
+                               float(row['used_pomodoros']))
+            else:
+                history.remove(row['task_id'])
+            if row['updated_at'] is not None and (history.last_sync is None or row['updated_at'] > history.last_sync):
+                history.last_sync = row['updated_at']
+
+        history.trim(self.max_history)
+        if history.last_sync is None:
+            # 没有任何历史时从现在开始增量同步
+            history.last_sync = datetime.now()
+        history.last_refresh = time.monotonic()
+        return len(rows)
+
+    def estimate(self, user_id: int, title: str, description: str = None,
+                 exclude_task_id: int = None) -> Optional[Dict[str, Any]]:
+        """
+        根据最相似的历史任务预估番茄钟数量
+
+        Args:
+            user_id: 用户ID
+            title: 任务标题
+            description: 任务描述
+            exclude_task_id: 需要排除的任务ID（通常是正在预估的任务本身）
+
+        Returns:
+            {'pomodoros': 预估数量, 'confidence': 0~1的置信度, 'neighbors': 参考的任务ID}，
+            没有可参考的历史任务时返回None
+        """
+        self.refresh(user_id)
+        history = self._histories.get(user_id)
+        if history is None or not history.task_ids:
+            return None
+
+        matrix, idf = history.weighted()
+        query = self.vectorize(title, description) * idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        similarities = matrix @ (query / norm)
+        if exclude_task_id in history.index:
+            similarities[history.index[exclude_task_id]] = -1.0
+
+        k = min(self.k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[similarities[top] > 0]
+        if top.size == 0:
+            return None
+
+        weights = similarities[top]
+        targets = history.targets[top]
+        mean = float(np.average(targets, weights=weights))
+        spread = float(np.sqrt(np.average((targets - mean) ** 2, weights=weights)))
+
+        # 置信度：近邻越相似、实际用量越一致越高
+        agreement = 1.0 / (1.0 + spread / max(mean, 1.0))
+        confidence = float(weights.mean()) * agreement
+
+        return {
+            'pomodoros': max(1, int(round(mean))),
+            'confidence': round(confidence, 3),
+            'neighbors': [history.task_ids[i] for i in top[np.argsort(-weights)]]
+        }
+
+
+_shared_estimator: Optional[PomodoroEstimator] = None
+
+
+def get_shared_estimator(db_manager) -> PomodoroEstimator:
+    """获取进程内共享的番茄钟预估器（历史按用户缓存，多个页面共用，避免每个页面各自重新加载和向量化）"""
+    global _shared_estimator
+    if _shared_estimator is None:
+        _shared_estimator = PomodoroEstimator(db_manager)
+    return _shared_estimator
@@ -1,4 +1,5 @@
 from src.database.database import DatabaseManager
+from src.services import event_bus as events
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import logging
@@ -8,8 +9,18 @@ from nicegui import ui
 logger = logging.getLogger(__name__)
 
 class PomodoroManager:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, event_bus: events.EventBus = None):
         self.db = db_manager
+        self.event_bus = event_bus or events.get_event_bus()
+
+    def _publish_session_change(self, user_id: Optional[int], task_id: Optional[int] = None):
+        """发布专注记录变更事件；番茄数随之变化的任务同时发布任务更新事件"""
+        try:
+            self.event_bus.publish(user_id, events.SESSION_CHANGED, task_id=task_id)
+            if task_id:
+                self.event_bus.publish(user_id, events.TASK_UPDATED, task_id=task_id, fields=['used_pomodoros'])
+        except Exception as e:
+            logger.error(f"发布专注记录变更事件失败: {e}")
 
     def start_focus_session(self, user_id: int, task_id: Optional[int] = None,
                            session_type: str = 'work', duration_minutes: int = 25) -> Optional[int]:
@@ -29,6 +40,7 @@ class PomodoroManager:
         if self.db.execute_update(query, params):
             session_id = self.db.get_last_insert_id()
             logger.info(f"开始{session_type}会话: ID {session_id}, 时长 {duration_minutes} 分钟")
+            self._publish_session_change(user_id)
             return session_id
         return None
 
@@ -61,6 +73,9 @@ class PomodoroManager:
                         # 更新用户每日专注统计数据表
                         self._update_today_focus_minutes(session_info['user_id'], session_info['duration_minutes'])
 
+                    worked_task_id = session_info['task_id'] if session_info['session_type'] == 'work' else None
+                    self._publish_session_change(session_info['user_id'], worked_task_id)
+
                 logger.info(f"完成专注会话: ID {session_id}")
                 ui.notify(f"已完成专注 {session_info['duration_minutes']} 分钟", type='positive')
             else:
@@ -94,6 +109,7 @@ class PomodoroManager:
             # 如果关联了任务，更新任务的已使用番茄数
             if task_id:
                 self.update_task_used_pomodoros(task_id)
+            self._publish_session_change(user_id, task_id)
         else:
             logger.error(f"记录专注会话失败: 用户 {user_id}, 时长 {duration_minutes} 分钟")
 
@@ -105,6 +121,15 @@ class PomodoroManager:
         result = self.db.execute_query(query, (session_id,))
         return result[0] if result else None
 
+    def _get_session_owner(self, session_id: int) -> Optional[int]:
+        """获取会话所属用户ID，查询失败时返回None"""
+        try:
+            session_info = self.get_session_by_id(session_id)
+            return session_info['user_id'] if session_info else None
+        except Exception as e:
+            logger.error(f"获取会话所属用户失败: {e}")
+            return None
+
     def update_task_used_pomodoros(self, task_id: int) -> bool:
         """更新任务已使用的番茄数"""
         query = "UPDATE tasks SET used_pomodoros = used_pomodoros + 1 WHERE task_id = %s"
@@ -235,6 +260,7 @@ class PomodoroManager:
         success = self.db.execute_update(query, (datetime.now(), session_id))
         if success:
             logger.info(f"取消专注会话: ID {session_id}")
+            self._publish_session_change(self._get_session_owner(session_id))
         return success
 
 class UserSettingsManager:
@@ -273,6 +299,7 @@ class UserSettingsManager:
         success = self.db.execute_update(query, tuple(params))
         if success:
             logger.info(f"成功更新用户设置: {user_id}")
+            events.get_event_bus().publish(user_id, events.SETTINGS_UPDATED)
         return success
 
     def get_daily_focus_goal_progress(self, user_id: int) -> Dict[str, Any]:
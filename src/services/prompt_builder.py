@@ -0,0 +1,154 @@
+"""
+AI提示词组装模块
+按相关性排序任务并在token预算内构建任务上下文，超出预算的部分汇总为统计信息
+"""
+
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from config import AI_CONFIG
+
+PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+PRIORITY_NAMES = {'high': '高', 'medium': '中', 'low': '低'}
+STATUS_NAMES = {'pending': '待完成', 'completed': '已完成'}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数量
+    中日韩字符按每字约1个token计算，其余字符按每4个字符约1个token计算
+    """
+    if not text:
+        return 0
+    cjk_count = sum(1 for ch in text if '⺀' <= ch <= '鿿' or '가' <= ch <= '힯' or '＀' <= ch <= '￯')
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
+
+
+def _to_date(value) -> Optional[date]:
+    """将数据库返回的日期值统一转换为date"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).split()[0])
+    except ValueError:
+        return None
+
+
+def _to_timestamp(value) -> float:
+    """将更新时间转换为时间戳，无法解析时返回0"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def rank_tasks(tasks: List[Dict], today: date = None) -> List[Dict]:
+    """
+    按相关性对任务排序：待完成优先，其次截止日期越近越靠前（已过期最前），
+    再按优先级从高到低，最后按最近更新时间
+    """
+    today = today or date.today()
+
+    def sort_key(task: Dict):
+        due = _to_date(task.get('due_date'))
+        days_left = (due - today).days if due else float('inf')
+        return (
+            task.get('status') != 'pending',
+            days_left,
+            PRIORITY_RANK.get(task.get('priority'), 1),
+            -_to_timestamp(task.get('updated_at'))
+        )
+
+    return sorted(tasks, key=sort_key)
+
+
+def format_task_line(task: Dict) -> str:
+    """将单个任务格式化为紧凑的一行文本"""
+    tags = task.get('tags') or []
+    tag_names = [tag.get('name', '') for tag in tags if tag.get('name')]
+    parts = [
+        f"[#{task['task_id']}] {task['title']}",
+        f"状态:{STATUS_NAMES.get(task.get('status'), task.get('status'))}",
+        f"优先级:{PRIORITY_NAMES.get(task.get('priority'), task.get('priority'))}",
+        f"截止:{_to_date(task.get('due_date')) or '无'}",
+        f"番茄:{task.get('used_pomodoros', 0)}/{task.get('estimated_pomodoros', 1)}"
+    ]
+    if tag_names:
+        parts.append(f"标签:{','.join(tag_names)}")
+    return ' | '.join(parts)
+
+
+def summarize_tasks(tasks: List[Dict], today: date = None) -> str:
+    """将未能放入上下文的任务汇总为统计信息"""
+    today = today or date.today()
+    status_counts = Counter(task.get('status') for task in tasks)
+    priority_counts = Counter(task.get('priority') for task in tasks if task.get('status') == 'pending')
+    tag_counts = Counter(
+        tag.get('name') for task in tasks for tag in (task.get('tags') or []) if tag.get('name')
+    )
+
+    overdue = 0
+    remaining_pomodoros = 0
+    for task in tasks:
+        if task.get('status') != 'pending':
+            continue
+        due = _to_date(task.get('due_date'))
+        if due and due < today:
+            overdue += 1
+        remaining_pomodoros += max(0, (task.get('estimated_pomodoros') or 1) - (task.get('used_pomodoros') or 0))
+
+    lines = [
+        f"另有 {len(tasks)} 个任务未逐条列出：待完成 {status_counts.get('pending', 0)} 个，已完成 {status_counts.get('completed', 0)} 个",
+        f"其中待完成任务优先级分布：高 {priority_counts.get('high', 0)}，中 {priority_counts.get('medium', 0)}，低 {priority_counts.get('low', 0)}；"
+        f"已过期 {overdue} 个；剩余预估番茄钟 {remaining_pomodoros} 个"
+    ]
+    if tag_counts:
+        top_tags = '、'.join(f"{name}({count})" for name, count in tag_counts.most_common(5))
+        lines.append(f"常见标签：{top_tags}")
+    return '\n'.join(lines)
+
+
+def build_task_context(tasks: List[Dict], token_budget: int = None, today: date = None) -> str:
+    """
+    在token预算内构建任务上下文
+
+    Args:
+        tasks: 任务列表
+        token_budget: token预算，默认使用 AI_CONFIG['context_token_budget']
+        today: 计算截止日期时使用的当前日期
+
+    Returns:
+        按相关性排列的任务文本，放不下的任务以汇总统计形式附在末尾
+    """
+    if not tasks:
+        return "暂无任务数据"
+
+    token_budget = token_budget or AI_CONFIG['context_token_budget']
+    ranked = rank_tasks(tasks, today)
+
+    # 预留汇总信息所需的token，保证总长度不超过预算
+    summary_reserve = estimate_tokens(summarize_tasks(ranked, today))
+    available = max(0, token_budget - summary_reserve)
+
+    lines = []
+    used = 0
+    for index, task in enumerate(ranked):
+        line = format_task_line(task)
+        cost = estimate_tokens(line) + 1
+        if used + cost > available:
+            lines.append(summarize_tasks(ranked[index:], today))
+            break
+        lines.append(line)
+        used += cost
+
+    return '\n'.join(lines)
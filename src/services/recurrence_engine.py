@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+重复任务模块
+完成重复任务时生成下一次任务，并为所有用户批量生成未来一段时间内的重复任务
+
+同一重复系列的任务共享 series_id（系列第一个任务的ID），
+(series_id, due_date) 唯一键保证重复执行时不会生成重复的任务，
+所有生成操作都是集合式SQL，不在Python中逐个任务循环
+"""
+
+from typing import Optional, Iterable
+from datetime import date, timedelta
+import logging
+
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 新任务复制的字段（状态、番茄钟使用数取默认值）
+_COPIED_COLUMNS = ("user_id, title, description, due_date, priority, estimated_pomodoros, pomodoros_estimated, "
+                   "repeat_cycle, series_id")
+
+
+class RecurrenceEngine:
+    """重复任务引擎"""
+
+    def __init__(self, db_manager, horizon_days: int = None):
+        self.db = db_manager
+        self.horizon_days = horizon_days if horizon_days is not None else APP_CONFIG['recurrence_horizon_days']
+
+    def spawn_next(self, task_ids: Iterable[int], user_id: int = None, today: date = None) -> Optional[int]:
+        """
+        为已完成的重复任务生成下一次任务，并复制标签
+
+        下一次的截止日期从原截止日期（没有截止日期时为今天）按周期推进到今天之后，
+        过期很久才完成的任务不会生成一串过期任务。原任务同时加入自己的系列（series_id = task_id）；
+        系列中已有比原任务更新的任务时不再生成，没有截止日期的任务反复完成、取消完成也只生成一次
+
+        Args:
+            task_ids: 刚完成的任务ID
+            user_id: 任务所属用户ID；传入时只处理该用户的任务
+            today: 当前日期
+
+        Returns:
+            生成的第一个任务ID，没有生成任务（非重复任务、未完成或已生成过）返回None
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return None
+        today = today or date.today()
+        placeholders = ', '.join(['%s'] * len(task_ids))
+        user_filter = " AND t.user_id = %s" if user_id is not None else ""
+        user_params = (user_id,) if user_id is not None else ()
+
+        # 原任务加入自己的系列，下一次任务和原任务共享 series_id
+        self.db.execute_update(
+            f"""
+            UPDATE IGNORE tasks AS t SET series_id = task_id
+            WHERE t.task_id IN ({placeholders}) AND t.series_id IS NULL
+                AND t.status = 'completed' AND t.repeat_cycle <> 'none'{user_filter}
+            """,
+            tuple(task_ids) + user_params
+        )
+
+        query = f"""
+        INSERT IGNORE INTO tasks ({_COPIED_COLUMNS})
+        SELECT user_id, title, description,
+            CASE repeat_cycle
+                WHEN 'daily' THEN base_date + INTERVAL GREATEST(1, DATEDIFF(%s, base_date) + 1) DAY
+                WHEN 'weekly' THEN base_date + INTERVAL GREATEST(1, FLOOR(DATEDIFF(%s, base_date) / 7) + 1) WEEK
+                ELSE base_date + INTERVAL GREATEST(1, TIMESTAMPDIFF(MONTH, base_date, %s) + 1) MONTH
+            END,
+            priority, estimated_pomodoros, pomodoros_estimated, repeat_cycle, COALESCE(series_id, task_id)
+        FROM (
+            SELECT t.*, COALESCE(t.due_date, %s) AS base_date
+            FROM tasks t
+            WHERE t.task_id IN ({placeholders})
+                AND t.status = 'completed'
+                AND t.repeat_cycle <> 'none'{user_filter}
+                AND NOT EXISTS (
+                    SELECT 1 FROM tasks later
+                    WHERE later.series_id = COALESCE(t.series_id, t.task_id) AND later.task_id > t.task_id
+                )
+        ) s
+        """
+        params = (today, today, today, today) + tuple(task_ids) + user_params
+        inserted = self.db.execute_update_rowcount(query, params)
+        if not inserted:
+            return None
+
+        first_id = self.db.get_last_insert_id()
+        tags_query = f"""
+        INSERT IGNORE INTO task_tags (task_id, tag_id)
+        SELECT n.task_id, tt.tag_id
+        FROM tasks s
+        JOIN tasks n ON n.series_id = COALESCE(s.series_id, s.task_id) AND n.task_id >= %s
+        JOIN task_tags tt ON tt.task_id = s.task_id
+        WHERE s.task_id IN ({placeholders})
+        """
+        self.db.execute_update(tags_query, (first_id,) + tuple(task_ids))
+        logger.info(f"生成下一次重复任务: {inserted} 个")
+        return first_id
+
+    def materialize(self, today: date = None) -> int:
+        """
+        批量生成所有用户未来 horizon_days 天内的重复任务（适合每晚定时执行）
+
+        以每个系列截止日期最晚的任务为模板，按周期生成落在 [今天, 今天+horizon_days] 内的任务；
+        已存在的 (series_id, due_date) 被唯一键忽略，重复执行不会产生多余任务
+
+        Returns:
+            新生成的任务数量，失败返回0
+        """
+        today = today or date.today()
+        horizon_end = today + timedelta(days=self.horizon_days)
+
+        # 尚未加入系列的重复任务成为自己系列的第一个任务
+        self.db.execute_update(
+            "UPDATE IGNORE tasks SET series_id = task_id WHERE series_id IS NULL AND repeat_cycle <> 'none'"
+        )
+
+        # 步数从今天之前已经过去的周期数之后开始，最晚任务已过期很久的系列也能补齐今天起的任务；
+        # 按月推进时跳过的周期数可能少算一个，多出的一步由 BETWEEN 过滤
+        shifted_due = """CASE s.repeat_cycle
+                WHEN 'daily' THEN s.due_date + INTERVAL (s.skipped + steps.n) DAY
+                WHEN 'weekly' THEN s.due_date + INTERVAL (s.skipped + steps.n) WEEK
+                ELSE s.due_date + INTERVAL (s.skipped + steps.n) MONTH
+            END"""
+        query = f"""
+        INSERT IGNORE INTO tasks ({_COPIED_COLUMNS})
+        WITH RECURSIVE steps (n) AS (
+            SELECT 1 UNION ALL SELECT n + 1 FROM steps WHERE n < %s
+        )
+        SELECT s.user_id, s.title, s.description, {shifted_due},
+            s.priority, s.estimated_pomodoros, s.pomodoros_estimated, s.repeat_cycle, s.series_id
+        FROM (
+            SELECT t.*,
+                CASE t.repeat_cycle
+                    WHEN 'daily' THEN GREATEST(0, DATEDIFF(%s, t.due_date) - 1)
+                    WHEN 'weekly' THEN GREATEST(0, FLOOR((DATEDIFF(%s, t.due_date) - 1) / 7))
+                    ELSE GREATEST(0, TIMESTAMPDIFF(MONTH, t.due_date, %s) - 1)
+                END AS skipped
+            FROM tasks t
+            JOIN (
+                SELECT series_id, MAX(due_date) AS last_due
+                FROM tasks
+                WHERE series_id IS NOT NULL
+                GROUP BY series_id
+            ) latest ON latest.series_id = t.series_id AND latest.last_due = t.due_date
+            WHERE t.repeat_cycle <> 'none'
+        ) s
+        JOIN steps
+        WHERE {shifted_due} BETWEEN %s AND %s
+        """
+        params = (self.horizon_days + 1, today, today, today, today, horizon_end)
+        inserted = self.db.execute_update_rowcount(query, params)
+        if not inserted:
+            return 0
+
+        # 新任务复制其系列中原有最晚任务的标签
+        first_id = self.db.get_last_insert_id()
+        tags_query = """
+        INSERT IGNORE INTO task_tags (task_id, tag_id)
+        SELECT n.task_id, tt.tag_id
+        FROM tasks n
+        JOIN (
+            SELECT series_id, MAX(due_date) AS last_due
+            FROM tasks
+            WHERE task_id < %s
+                AND series_id IN (SELECT series_id FROM tasks WHERE task_id >= %s)
+            GROUP BY series_id
+        ) latest ON latest.series_id = n.series_id
+        JOIN tasks s ON s.series_id = latest.series_id AND s.due_date = latest.last_due
+        JOIN task_tags tt ON tt.task_id = s.task_id
+        WHERE n.task_id >= %s
+        """
+        self.db.execute_update(tags_query, (first_id, first_id, first_id))
+        logger.info(f"批量生成重复任务: {inserted} 个")
+        return inserted
+
+
+def main():
+    """命令行入口：python -m src.services.recurrence_engine，供定时任务调用"""
+    from src.database.database import create_database_manager
+
+    logging.basicConfig(level=logging.INFO)
+    db = create_database_manager()
+    if not db.connection:
+        return 1
+    try:
+        created = RecurrenceEngine(db).materialize()
+        print(f"生成重复任务 {created} 个")
+        return 0
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
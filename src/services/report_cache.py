@@ -0,0 +1,115 @@
+"""
+统计报告缓存模块
+按 (用户, 报告名, 参数, 数据版本) 缓存统计报告和图表数据，
+用户数据一旦写入版本号递增，旧结果自然失效
+"""
+
+import json
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class RevisionedCache:
+    """以数据版本号为失效依据的LRU缓存，线程安全"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._latest_revision: Dict[int, int] = {}  # user_id -> 已见过的最新版本
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(user_id: int, report: str, params: Dict = None, revision: int = 0) -> tuple:
+        """生成缓存键，参数按键排序序列化"""
+        params_key = json.dumps(params or {}, sort_keys=True, default=str)
+        return (user_id, report, params_key, revision)
+
+    def get_or_compute(self, user_id: int, report: str, params: Dict, revision: Optional[int],
+                       compute: Callable[[], Any]) -> Any:
+        """
+        获取缓存结果，未命中时计算并写入
+
+        Args:
+            user_id: 用户ID
+            report: 报告或图表名称
+            params: 影响结果的参数（如天数、日期）
+            revision: 用户数据版本号，为None时不使用缓存
+            compute: 计算结果的函数
+
+        Returns:
+            报告结果
+        """
+        if revision is None:
+            return compute()
+
+        key = self.make_key(user_id, report, params, revision)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            latest = self._latest_revision.get(user_id)
+            if latest is not None and revision < latest:
+                # 计算期间已有更新版本的结果写入，旧版本结果不再缓存
+                return value
+            if latest is None or revision > latest:
+                self._drop_user(user_id)
+                self._latest_revision[user_id] = revision
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def _drop_user(self, user_id: int):
+        """删除用户的所有缓存条目（调用方需持有锁）"""
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+    def invalidate(self, user_id: int = None):
+        """手动清除缓存"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._latest_revision.clear()
+            else:
+                self._drop_user(user_id)
+                self._latest_revision.pop(user_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0
+            }
+
+
+_shared_report_cache: Optional[RevisionedCache] = None
+
+
+def get_shared_report_cache() -> RevisionedCache:
+    """获取进程内共享的统计报告缓存"""
+    global _shared_report_cache
+    if _shared_report_cache is None:
+        _shared_report_cache = RevisionedCache(APP_CONFIG['report_cache_max_entries'])
+    return _shared_report_cache
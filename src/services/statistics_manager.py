@@ -1,13 +1,18 @@
 from src.database.database import DatabaseManager
-from datetime import datetime, timedelta
+from src.services.analytics_engine import AnalyticsEngine
+from src.services.report_cache import RevisionedCache, get_shared_report_cache
+from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
 class StatisticsManager:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, report_cache: RevisionedCache = None):
         self.db = db_manager
+        self.analytics_engine = AnalyticsEngine(db_manager)
+        # 未指定时使用进程内共享缓存
+        self.report_cache = report_cache if report_cache is not None else get_shared_report_cache()
     
     def get_focus_duration_by_period(self, user_id: int, period_type: str, 
                                    start_date: datetime, end_date: datetime) -> List[Dict]:
@@ -44,11 +49,11 @@ class StatisticsManager:
                                     start_date: datetime, end_date: datetime) -> List[Dict]:
         """按指定周期聚合用户完成的任务数量，用于图表展示"""
         if period_type == 'daily':
-            date_group = 'DATE(updated_at)'
+            date_group = 'DATE(completed_at)'
         elif period_type == 'weekly':
-            date_group = 'YEARWEEK(updated_at, 1)'
+            date_group = 'YEARWEEK(completed_at, 1)'
         elif period_type == 'monthly':
-            date_group = 'DATE_FORMAT(updated_at, "%Y-%m")'
+            date_group = 'DATE_FORMAT(completed_at, "%Y-%m")'
         else:
             logger.error(f"不支持的周期类型: {period_type}")
             return []
@@ -59,7 +64,7 @@ class StatisticsManager:
                SUM(used_pomodoros) as total_pomodoros_used
         FROM tasks 
         WHERE user_id = %s AND status = 'completed'
-        AND updated_at >= %s AND updated_at <= %s
+        AND completed_at >= %s AND completed_at <= %s
         GROUP BY {date_group}
         ORDER BY period
         """
@@ -93,13 +98,13 @@ class StatisticsManager:
                 'period_focus_sessions': result[0]['period_sessions'] or 0
             })
         
-        # 任务完成统计
+        # 任务完成统计（completed_at 只在完成状态下有值）
         query = """
         SELECT 
-            COUNT(CASE WHEN DATE(updated_at) = CURDATE() THEN 1 END) as today_completed,
-            COUNT(CASE WHEN updated_at >= %s THEN 1 END) as period_completed,
+            COUNT(CASE WHEN completed_at >= CURDATE() THEN 1 END) as today_completed,
+            COUNT(CASE WHEN completed_at >= %s THEN 1 END) as period_completed,
             COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_tasks,
-            SUM(CASE WHEN DATE(updated_at) = CURDATE() THEN used_pomodoros ELSE 0 END) as today_pomodoros_used
+            SUM(CASE WHEN completed_at >= CURDATE() THEN used_pomodoros ELSE 0 END) as today_pomodoros_used
         FROM tasks 
         WHERE user_id = %s
         """
@@ -168,33 +173,7 @@ class StatisticsManager:
     
     def get_tag_performance(self, user_id: int, days: int = 30) -> List[Dict]:
         """获取标签相关的任务表现"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        query = """
-        SELECT 
-            COALESCE(tag, '无标签') as tag,
-            COUNT(*) as total_tasks,
-            COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_tasks,
-            SUM(CASE WHEN status = 'completed' THEN used_pomodoros ELSE 0 END) as total_pomodoros,
-            AVG(CASE WHEN status = 'completed' THEN used_pomodoros END) as avg_pomodoros
-        FROM tasks 
-        WHERE user_id = %s AND created_at >= %s
-        GROUP BY tag
-        HAVING total_tasks > 0
-        ORDER BY completed_tasks DESC
-        """
-        
-        result = self.db.execute_query(query, (user_id, start_date))
-        if result:
-            for row in result:
-                if row['total_tasks'] > 0:
-                    row['completion_rate'] = round((row['completed_tasks'] / row['total_tasks']) * 100, 1)
-                else:
-                    row['completion_rate'] = 0
-                row['avg_pomodoros'] = round(row['avg_pomodoros'] or 0, 1)
-        
-        return result if result else []
+        return self.analytics_engine.build_report(user_id, days, sections=['tag_performance'])['tag_performance']
     
     def get_daily_pattern_analysis(self, user_id: int, days: int = 30) -> Dict[str, Any]:
         """分析用户的日常工作模式"""
@@ -256,7 +235,7 @@ class StatisticsManager:
             SUM(fs.duration_minutes) as focus_minutes,
             COUNT(DISTINCT t.task_id) as tasks_worked_on,
             COUNT(CASE WHEN t.status = 'completed' 
-                  AND DATE(t.updated_at) = DATE(fs.start_time) THEN 1 END) as tasks_completed
+                  AND DATE(t.completed_at) = DATE(fs.start_time) THEN 1 END) as tasks_completed
         FROM focus_sessions fs
         LEFT JOIN tasks t ON fs.task_id = t.task_id
         WHERE fs.user_id = %s AND fs.session_type = 'work' AND fs.is_completed = TRUE
@@ -281,29 +260,19 @@ class StatisticsManager:
         }
     
     def generate_summary_report(self, user_id: int, days: int = 7) -> Dict[str, Any]:
-        """生成综合汇总报告数据"""
-        report = {}
-        
-        # 基础概览
-        report['overview'] = self.get_productivity_overview(user_id, days)
-        
-        # 完成率分析
-        report['completion_analysis'] = self.get_task_completion_rate(user_id, days)
-        
-        # 优先级分布
-        report['priority_distribution'] = self.get_priority_distribution(user_id)
-        
-        # 标签表现
-        report['tag_performance'] = self.get_tag_performance(user_id, days)
-        
-        # 工作模式分析
-        report['pattern_analysis'] = self.get_daily_pattern_analysis(user_id, days)
-        
-        # 效率趋势
-        report['efficiency_trends'] = self.get_efficiency_trends(user_id, days)
+        """生成综合汇总报告数据（数据版本未变时直接返回缓存）"""
+        revision = self.db.get_data_revision(user_id)
+        return self.report_cache.get_or_compute(
+            user_id, 'summary_report', {'days': days, 'date': date.today()}, revision,
+            lambda: self._build_summary_report(user_id, days)
+        )
+    
+    def _build_summary_report(self, user_id: int, days: int) -> Dict[str, Any]:
+        """计算综合汇总报告（一次加载窗口数据，各部分在内存中计算）"""
+        report = self.analytics_engine.build_report(user_id, days)
         
         # 报告生成时间
         report['generated_at'] = datetime.now().isoformat()
         report['period_days'] = days
         
-        return report 
\ No newline at end of file
+        return report
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+任务活动日志模块
+读取由数据库触发器写入的只追加事件（task_events），供统计汇总、同步和撤销增量处理
+
+事件在写入任务、任务标签和专注记录的同一事务中记录，应用代码无需额外写入；
+消费者按 event_id 游标读取新事件，处理完成后保存游标，下次从游标处继续
+"""
+
+import json
+import logging
+from typing import List, Dict, Tuple, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+EVENT_CREATE = 'create'
+EVENT_COMPLETE = 'complete'
+EVENT_REOPEN = 'reopen'
+EVENT_EDIT = 'edit'
+EVENT_RETAG = 'retag'
+EVENT_POMODORO = 'pomodoro'
+EVENT_DELETE = 'delete'
+
+
+class TaskEventLog:
+    """任务活动日志的游标式读取接口"""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def read_since(self, cursor: int = 0, limit: int = 500, user_id: int = None,
+                   settle_seconds: int = 1) -> Tuple[List[Dict], int]:
+        """
+        读取游标之后的事件
+
+        Args:
+            cursor: 已处理的最后一个 event_id，从头读取时为0
+            limit: 最多返回的事件数
+            user_id: 只读取该用户的事件，为空时读取全部用户
+            settle_seconds: 只读取写入超过该秒数的事件；并发事务可能以较小的ID稍后提交，
+                留出这段时间避免游标越过尚未提交的事件
+
+        Returns:
+            (事件列表, 新游标)；没有新事件时游标不变，查询失败时返回空列表和原游标
+        """
+        query = """
+        SELECT event_id, user_id, task_id, event_type, payload, created_at
+        FROM task_events
+        WHERE event_id > %s
+        """
+        params = [cursor]
+        if user_id is not None:
+            query += " AND user_id = %s"
+            params.append(user_id)
+        if settle_seconds:
+            query += " AND created_at <= NOW(3) - INTERVAL %s SECOND"
+            params.append(settle_seconds)
+        query += " ORDER BY event_id LIMIT %s"
+        params.append(limit)
+
+        rows = self.db.execute_query(query, tuple(params))
+        if not rows:
+            return [], cursor
+
+        for row in rows:
+            payload = row.get('payload')
+            if isinstance(payload, (bytes, bytearray)):
+                payload = payload.decode('utf-8')
+            if isinstance(payload, str):
+                try:
+                    payload = json.loads(payload)
+                except ValueError:
+                    logger.error(f"任务事件内容解析失败: {row['event_id']}")
+                    payload = None
+            row['payload'] = payload
+        return rows, rows[-1]['event_id']
+
+    def current_cursor(self, user_id: int = None) -> int:
+        """获取当前最新的 event_id，作为全量读取前的起始游标"""
+        query = "SELECT COALESCE(MAX(event_id), 0) AS cursor_id FROM task_events"
+        params = None
+        if user_id is not None:
+            query += " WHERE user_id = %s"
+            params = (user_id,)
+        result = self.db.execute_query(query, params)
+        return result[0]['cursor_id'] if result else 0
+
+    def load_cursor(self, consumer: str) -> int:
+        """获取消费者已处理到的游标，未记录过时为0"""
+        result = self.db.execute_query(
+            "SELECT last_event_id FROM task_event_cursors WHERE consumer = %s", (consumer,)
+        )
+        return result[0]['last_event_id'] if result else 0
+
+    def save_cursor(self, consumer: str, cursor: int) -> bool:
+        """保存消费者游标（只前进不后退）"""
+        query = """
+        INSERT INTO task_event_cursors (consumer, last_event_id) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE last_event_id = GREATEST(last_event_id, VALUES(last_event_id))
+        """
+        return self.db.execute_update(query, (consumer, cursor))
+
+    def consume(self, consumer: str, handler: Callable[[List[Dict]], None],
+                limit: int = 500, user_id: Optional[int] = None) -> int:
+        """
+        从消费者游标处读取一批事件交给 handler 处理，处理成功后保存游标
+
+        handler 抛出异常时游标不前进，下次重新读取同一批事件（至少一次投递），
+        handler 应能安全地重复处理同一事件
+
+        Returns:
+            本次处理的事件数
+        """
+        cursor = self.load_cursor(consumer)
+        events, next_cursor = self.read_since(cursor, limit, user_id)
+        if not events:
+            return 0
+        try:
+            handler(events)
+        except Exception as e:
+            logger.error(f"任务事件消费者 {consumer} 处理失败: {e}")
+            return 0
+        self.save_cursor(consumer, next_cursor)
+        return len(events)
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+任务批量导入模块
+从CSV、JSON或JSONL（包括其他待办应用导出的常见列名）逐条解析和校验任务，
+每批一次性解析标签，用 executemany 写入任务和任务标签，
+任务、标签关联和检查点在同一事务中提交，中断后可以从检查点继续
+"""
+
+import csv
+import json
+import re
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from config import APP_CONFIG
+from src.database.database import TagManager, TagIdCache, publish_change
+
+logger = logging.getLogger(__name__)
+
+# 源数据列名（小写）到任务字段的映射，覆盖本应用导出文件和常见待办应用的导出列
+FIELD_ALIASES = {
+    'title': ('title', 'content', 'name', 'task', 'task name', '标题', '任务', '任务名称'),
+    'description': ('description', 'notes', 'note', 'desc', '描述', '备注'),
+    'due_date': ('due_date', 'due', 'due date', 'date', 'deadline', '截止日期', '日期'),
+    'priority': ('priority', '优先级'),
+    'status': ('status', 'completed', 'is_completed', 'done', '状态'),
+    'completed_at': ('completed_at', 'completed date', 'completed time', 'completion date', '完成时间'),
+    'repeat_cycle': ('repeat_cycle', 'repeat', 'recurrence', '重复'),
+    'estimated_pomodoros': ('estimated_pomodoros', 'pomodoros', 'estimate', '预估番茄钟'),
+    'tags': ('tags', 'labels', 'label', 'list', '标签'),
+    'type': ('type',)
+}
+_ALIAS_TO_FIELD = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+PRIORITY_VALUES = {
+    'high': 'high', 'medium': 'medium', 'low': 'low',
+    '高': 'high', '中': 'medium', '低': 'low',
+    'p1': 'high', 'p2': 'medium', 'p3': 'low', 'p4': 'low',
+    '1': 'high', '2': 'medium', '3': 'low', '4': 'low'
+}
+REPEAT_VALUES = {
+    'none': 'none', 'daily': 'daily', 'weekly': 'weekly', 'monthly': 'monthly',
+    '': 'none', '每天': 'daily', '每周': 'weekly', '每月': 'monthly',
+    'every day': 'daily', 'every week': 'weekly', 'every month': 'monthly'
+}
+COMPLETED_VALUES = {'completed', 'done', 'true', '1', 'yes', 'x', '已完成'}
+_DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%m/%d/%Y', '%Y年%m月%d日')
+_TAG_SEPARATORS = re.compile(r'[,;，；]')
+
+IMPORT_FORMATS = ('csv', 'json', 'jsonl')
+
+_INSERT_TASK = """
+INSERT INTO tasks (user_id, title, description, due_date, priority, status, repeat_cycle,
+                   estimated_pomodoros, pomodoros_estimated, completed_at)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def detect_format(filename: str) -> str:
+    """按扩展名判断导入格式，无法识别时按CSV处理"""
+    lowered = (filename or '').lower()
+    if lowered.endswith('.jsonl') or lowered.endswith('.ndjson'):
+        return 'jsonl'
+    if lowered.endswith('.json'):
+        return 'json'
+    return 'csv'
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Dict]:
+    """
+    从文本流逐条读取原始记录（CSV和JSONL不会整体读入内存）
+
+    Args:
+        stream: 文本流
+        fmt: 格式 (csv, json, jsonl)；json 可以是任务数组或带 tasks 键的对象
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # 无法解析的行按无效记录跳过，不中断整个导入
+                    yield line
+    elif fmt == 'json':
+        data = json.load(stream)
+        yield from (data.get('tasks', []) if isinstance(data, dict) else data)
+    else:
+        raise ValueError(f"不支持的导入格式: {fmt}")
+
+
+def _parse_date(value) -> Optional[date]:
+    """解析日期，空值返回None，无法解析时抛出ValueError"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).date()
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"无法识别的日期: {text}")
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """解析完成时间，只有日期时取当天零点"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return datetime.combine(_parse_date(value), datetime.min.time())
+
+
+def normalize_record(raw: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    将一条原始记录映射为任务字段并校验
+
+    Returns:
+        (任务字典, None)；应跳过的记录返回 (None, 原因)
+    """
+    record = {}
+    for key, value in raw.items():
+        field = _ALIAS_TO_FIELD.get(str(key).strip().lower()) if key is not None else None
+        if field and field not in record:
+            record[field] = value.strip() if isinstance(value, str) else value
+
+    # 其他应用的导出文件中可能混有分组、备注等非任务行
+    if record.get('type') and str(record['type']).lower() != 'task':
+        return None, f"非任务记录: {record['type']}"
+
+    title = str(record.get('title') or '').strip()
+    if not title:
+        return None, '缺少标题'
+    if len(title) > 255:
+        return None, '标题超过255个字符'
+
+    try:
+        due_date = _parse_date(record.get('due_date'))
+        completed_at = _parse_datetime(record.get('completed_at'))
+    except ValueError as e:
+        return None, str(e)
+
+    priority = PRIORITY_VALUES.get(str(record.get('priority') or 'medium').strip().lower())
+    if priority is None:
+        return None, f"无法识别的优先级: {record.get('priority')}"
+
+    repeat_cycle = REPEAT_VALUES.get(str(record.get('repeat_cycle') or '').strip().lower())
+    if repeat_cycle is None:
+        return None, f"无法识别的重复周期: {record.get('repeat_cycle')}"
+
+    status_value = record.get('status')
+    completed = status_value is True or str(status_value or '').strip().lower() in COMPLETED_VALUES
+    if completed:
+        completed_at = completed_at or datetime.now()
+    else:
+        completed_at = None
+
+    try:
+        estimated = int(record.get('estimated_pomodoros') or 1)
+    except (TypeError, ValueError):
+        return None, f"预估番茄钟不是整数: {record.get('estimated_pomodoros')}"
+
+    tags = record.get('tags') or []
+    if isinstance(tags, str):
+        tags = _TAG_SEPARATORS.split(tags)
+    tags = [str(tag).strip().lstrip('#@') for tag in tags if str(tag).strip()]
+
+    description = record.get('description')
+    return {
+        'title': title,
+        'description': str(description) if description not in (None, '') else None,
+        'due_date': due_date,
+        'priority': priority,
+        'status': 'completed' if completed else 'pending',
+        'repeat_cycle': repeat_cycle,
+        'estimated_pomodoros': max(1, min(estimated, 99)),
+        'pomodoros_estimated': record.get('estimated_pomodoros') not in (None, ''),
+        'completed_at': completed_at,
+        'tags': tags
+    }, None
+
+
+class TaskImporter:
+    """任务批量导入器"""
+
+    # 返回结果中保留的错误条数
+    MAX_REPORTED_ERRORS = 100
+
+    def __init__(self, db_manager, tag_manager: TagManager = None, batch_size: int = None):
+        self.db = db_manager
+        self.tag_manager = tag_manager or TagManager(db_manager)
+        self.batch_size = batch_size or APP_CONFIG['import_batch_size']
+
+    def start(self, user_id: int, source_name: str = '') -> Optional[int]:
+        """创建导入检查点，返回导入ID"""
+        if not self.db.execute_update(
+            "INSERT INTO task_imports (user_id, source_name) VALUES (%s, %s)", (user_id, source_name[:255])
+        ):
+            return None
+        return self.db.get_last_insert_id()
+
+    def get_import(self, import_id: int, user_id: int) -> Optional[Dict]:
+        """获取导入检查点"""
+        rows = self.db.execute_query(
+            "SELECT * FROM task_imports WHERE import_id = %s AND user_id = %s", (import_id, user_id)
+        )
+        return rows[0] if rows else None
+
+    def run(self,
+            user_id: int,
+            records: Iterable[Dict],
+            import_id: int = None,
+            source_name: str = '',
+            progress: Callable[[Dict], None] = None) -> Dict:
+        """
+        导入任务
+
+        Args:
+            user_id: 用户ID
+            records: 原始记录（iter_records 的结果）
+            import_id: 要继续的导入ID；为None时新建导入。继续时需传入同一份源数据，
+                       前 rows_done 条记录会被跳过
+            source_name: 源文件名，仅用于记录
+            progress: 每提交一批后调用，参数为当前进度
+
+        Returns:
+            {'import_id', 'rows_done', 'imported', 'skipped', 'errors', 'completed'}，
+            errors 为 (源记录序号, 原因) 列表，最多保留 MAX_REPORTED_ERRORS 条
+        """
+        summary = {'import_id': import_id, 'rows_done': 0, 'imported': 0, 'skipped': 0,
+                   'errors': [], 'completed': False}
+        if import_id is None:
+            import_id = self.start(user_id, source_name)
+            if import_id is None:
+                return summary
+            summary['import_id'] = import_id
+        else:
+            checkpoint = self.get_import(import_id, user_id)
+            if not checkpoint:
+                return summary
+            summary.update(rows_done=checkpoint['rows_done'], imported=checkpoint['tasks_imported'],
+                           skipped=checkpoint['rows_skipped'])
+            if checkpoint['status'] == 'completed':
+                summary['completed'] = True
+                return summary
+
+        resume_from = summary['rows_done']
+        batch, batch_rows, batch_skipped = [], 0, 0
+        for index, raw in enumerate(records, start=1):
+            if index <= resume_from:
+                continue
+            task, error = normalize_record(raw) if isinstance(raw, dict) else (None, '无法解析的记录')
+            batch_rows += 1
+            if task is None:
+                batch_skipped += 1
+                if len(summary['errors']) < self.MAX_REPORTED_ERRORS:
+                    summary['errors'].append((index, error))
+            else:
+                batch.append(task)
+
+            if batch_rows >= self.batch_size:
+                if not self._commit_batch(user_id, import_id, batch, batch_rows, batch_skipped, summary):
+                    return summary
+                if progress:
+                    progress(dict(summary))
+                batch, batch_rows, batch_skipped = [], 0, 0
+
+        if batch_rows and not self._commit_batch(user_id, import_id, batch, batch_rows, batch_skipped, summary):
+            return summary
+        self.db.execute_update(
+            "UPDATE task_imports SET status = 'completed' WHERE import_id = %s", (import_id,)
+        )
+        summary['completed'] = True
+        if progress:
+            progress(dict(summary))
+        if summary['imported']:
+            publish_change(user_id, 'tasks.bulk_updated')
+        logger.info(f"导入完成: 导入 {summary['imported']} 个任务，跳过 {summary['skipped']} 条记录")
+        return summary
+
+    def _commit_batch(self, user_id: int, import_id: int, tasks: List[Dict],
+                      rows: int, skipped: int, summary: Dict) -> bool:
+        """在一个事务中写入一批任务、任务标签并推进检查点"""
+        tag_ids = {}
+        tag_names = [name for task in tasks for name in task['tags']]
+        if tag_names:
+            resolved = self.tag_manager.resolve_tags(user_id, tag_names)
+            tag_ids = {TagIdCache.key(name): tag_id for name, tag_id in resolved.items()}
+
+        task_rows = [
+            (user_id, task['title'], task['description'], task['due_date'], task['priority'], task['status'],
+             task['repeat_cycle'], task['estimated_pomodoros'], task['pomodoros_estimated'], task['completed_at'])
+            for task in tasks
+        ]
+
+        def work(cursor):
+            if task_rows:
+                task_ids = self._insert_tasks(cursor, user_id, task_rows)
+                tag_rows = list(dict.fromkeys(
+                    (task_id, tag_ids[TagIdCache.key(name)])
+                    for task_id, task in zip(task_ids, tasks)
+                    for name in task['tags'] if TagIdCache.key(name) in tag_ids
+                ))
+                if tag_rows:
+                    cursor.executemany("INSERT IGNORE INTO task_tags (task_id, tag_id) VALUES (%s, %s)", tag_rows)
+            cursor.execute(
+                """
+                UPDATE task_imports
+                SET rows_done = rows_done + %s, tasks_imported = tasks_imported + %s, rows_skipped = rows_skipped + %s
+                WHERE import_id = %s
+                """,
+                (rows, len(task_rows), skipped, import_id)
+            )
+            return True
+
+        if not self.db.execute_in_transaction(work):
+            logger.error(f"导入批次写入失败，可从第 {summary['rows_done'] + 1} 条记录继续: import_id={import_id}")
+            return False
+        summary['rows_done'] += rows
+        summary['imported'] += len(task_rows)
+        summary['skipped'] += skipped
+        return True
+
+    @staticmethod
+    def _insert_tasks(cursor, user_id: int, task_rows: List[tuple]) -> List[int]:
+        """
+        写入一批任务，按顺序返回新任务的ID
+
+        executemany 将同一 INSERT 改写为一条多行语句，lastrowid 是第一行的ID；
+        只有确认插入行数一致、且 [first, first+n-1] 范围内正好是本批次的任务时才按偏移推算ID。
+        自增ID与并发插入交错（innodb_autoinc_lock_mode=2）时回滚到保存点，逐行插入并分别读取ID
+        """
+        cursor.execute("SAVEPOINT import_batch")
+        cursor.executemany(_INSERT_TASK, task_rows)
+        first_id = cursor.lastrowid
+        if first_id and cursor.rowcount == len(task_rows):
+            cursor.execute(
+                "SELECT task_id, title FROM tasks WHERE task_id BETWEEN %s AND %s AND user_id = %s ORDER BY task_id",
+                (first_id, first_id + len(task_rows) - 1, user_id)
+            )
+            inserted = cursor.fetchall()
+            if [title for _, title in inserted] == [row[1] for row in task_rows]:
+                return [task_id for task_id, _ in inserted]
+
+        logger.warning(f"导入批次的任务ID不连续，改为逐行插入: first_id={first_id}, rows={len(task_rows)}")
+        cursor.execute("ROLLBACK TO SAVEPOINT import_batch")
+        task_ids = []
+        for row in task_rows:
+            cursor.execute(_INSERT_TASK, row)
+            task_ids.append(cursor.lastrowid)
+        return task_ids
+
+
+def import_file(db_manager, user_id: int, path: str, fmt: str = None, import_id: int = None,
+                progress: Callable[[Dict], None] = None, source_name: str = None) -> Dict:
+    """从文件导入任务（带BOM的UTF-8也可以识别）；source_name 默认为文件名（上传的临时文件可传入原文件名）"""
+    fmt = fmt or detect_format(path)
+    source_name = source_name or path.replace('\\', '/').split('/')[-1]
+    with open(path, 'r', encoding='utf-8-sig', newline='') as stream:
+        return TaskImporter(db_manager).run(user_id, iter_records(stream, fmt), import_id=import_id,
+                                            source_name=source_name, progress=progress)
+
+
+def main():
+    """命令行入口：python -m src.services.task_import --user-id 1 tasks.csv [--resume 导入ID]"""
+    import argparse
+    from src.database.database import create_database_manager
+
+    parser = argparse.ArgumentParser(description='批量导入任务')
+    parser.add_argument('path', help='CSV、JSON或JSONL文件')
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--format', choices=IMPORT_FORMATS, default=None)
+    parser.add_argument('--resume', type=int, default=None, help='继续中断的导入')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = create_database_manager()
+    if not db.connection:
+        return 1
+    try:
+        summary = import_file(
+            db, args.user_id, args.path, args.format, args.resume,
+            progress=lambda p: print(f"已处理 {p['rows_done']} 条，导入 {p['imported']} 个任务")
+        )
+        for index, error in summary['errors']:
+            print(f"第 {index} 条记录已跳过: {error}")
+        if not summary['completed']:
+            print(f"导入中断，可使用 --resume {summary['import_id']} 继续")
+            return 1
+        print(f"导入完成: {summary['imported']} 个任务，跳过 {summary['skipped']} 条记录")
+        return 0
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
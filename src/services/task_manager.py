@@ -9,15 +9,37 @@ from datetime import datetime, date, timedelta
 import logging
 
 from src.database.database import DatabaseManager, TagManager
+from src.services import event_bus as events
+from src.services.report_cache import RevisionedCache, get_shared_report_cache
+from src.services.recurrence_engine import RecurrenceEngine
 
 logger = logging.getLogger(__name__)
 
+# update_task 因重复系列的 (series_id, due_date) 唯一键失败时返回的错误信息
+SERIES_DATE_TAKEN = '该重复任务在这一天已有一次，请选择其他日期'
+
 class TaskManager:
     """任务管理类 - 实现文档5.2.1节详细设计"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, event_bus: events.EventBus = None,
+                 report_cache: RevisionedCache = None):
         self.db = db_manager
         self.tag_manager = TagManager(db_manager)
+        self.event_bus = event_bus or events.get_event_bus()
+        self.report_cache = report_cache if report_cache is not None else get_shared_report_cache()
+        self.recurrence = RecurrenceEngine(db_manager)
+
+    def _publish(self, user_id: Optional[int], event_type: str, **payload):
+        """发布任务变更事件，通知该用户的其他会话"""
+        try:
+            self.event_bus.publish(user_id, event_type, **payload)
+        except Exception as e:
+            logger.error(f"发布任务变更事件失败: {e}")
+
+    def _get_task_owner(self, task_id: int) -> Optional[int]:
+        """获取任务所属用户ID"""
+        result = self.db.execute_query("SELECT user_id FROM tasks WHERE task_id = %s", (task_id,))
+        return result[0]['user_id'] if result else None
     
     def create_task(self, 
                    user_id: int, 
@@ -25,7 +47,7 @@ class TaskManager:
                    description: str = None,
                    due_date: date = None,
                    priority: str = 'medium',
-                   estimated_pomodoros: int = 1,
+                   estimated_pomodoros: int = None,
                    repeat_cycle: str = 'none',
                    tags: List[str] = None) -> Optional[int]:
           """
@@ -37,7 +59,7 @@ class TaskManager:
               description: 任务描述
               due_date: 截止日期（只包含日期，不包含时间）
               priority: 优先级 (high, medium, low)
-              estimated_pomodoros: 预估番茄钟数量
+              estimated_pomodoros: 预估番茄钟数量；不传时为1，且任务记为未预估（可由AI批量预估）
               repeat_cycle: 重复周期 (none, daily, weekly, monthly)
               tags: 标签列表
               
@@ -47,11 +69,14 @@ class TaskManager:
           try:
               # 创建任务
               query = """
-              INSERT INTO tasks (user_id, title, description, due_date, priority, estimated_pomodoros, repeat_cycle)
-              VALUES (%s, %s, %s, %s, %s, %s, %s)
+              INSERT INTO tasks (user_id, title, description, due_date, priority, estimated_pomodoros,
+                                 pomodoros_estimated, repeat_cycle)
+              VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
               """
               
-              params = (user_id, title, description, due_date, priority, estimated_pomodoros, repeat_cycle)
+              params = (user_id, title, description, due_date, priority,
+                        estimated_pomodoros if estimated_pomodoros is not None else 1,
+                        estimated_pomodoros is not None, repeat_cycle)
               
               if self.db.execute_update(query, params):
                   task_id = self.db.get_last_insert_id()
@@ -61,6 +86,8 @@ class TaskManager:
                       self._add_tags_to_task(task_id, user_id, tags)
                   
                   logger.info(f"任务创建成功: {title}")
+                  if task_id:
+                      self._publish(user_id, events.TASK_CREATED, task_id=task_id)
                   return task_id
               
               return None
@@ -238,6 +265,105 @@ class TaskManager:
     def get_upcoming_days_setting(self) -> int:
         """获取即将截止的天数设置"""
         return 7  # 默认7天
+
+    def get_view_counts(self, user_id: int) -> Dict[str, Any]:
+        """
+        获取侧边栏各视图的任务数量（数据版本未变时直接返回缓存）
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            {'my_day': n, 'planned': n, 'important': n, 'all': n, 'tags': {tag_id: 未完成数}}，
+            视图数量与 get_tasks_by_view 的筛选条件一致
+        """
+        today = date.today()
+        revision = self.db.get_data_revision(user_id)
+        try:
+            return self.report_cache.get_or_compute(
+                user_id, 'view_counts', {'date': today}, revision,
+                lambda: self._query_view_counts(user_id, today)
+            )
+        except Exception as e:
+            logger.error(f"查询视图任务数量失败: {e}")
+            return {'my_day': 0, 'planned': 0, 'important': 0, 'all': 0, 'tags': {}}
+
+    def _query_view_counts(self, user_id: int, today: date) -> Dict[str, Any]:
+        """
+        用一条查询统计所有视图的数量：内置视图对任务表做条件聚合，
+        标签数量直接取触发器维护的 pending_count，查询代价不随视图和标签数量增加
+        """
+        future_date = today + timedelta(days=self.get_upcoming_days_setting())
+        query = """
+        SELECT NULL AS tag_id,
+            COALESCE(SUM(status = 'pending' AND due_date <= %s), 0) AS my_day,
+            COALESCE(SUM(status = 'pending' AND due_date > %s AND due_date <= %s), 0) AS planned,
+            COALESCE(SUM(priority = 'high'), 0) AS important,
+            COUNT(*) AS all_tasks
+        FROM tasks
+        WHERE user_id = %s
+        UNION ALL
+        SELECT tag_id, pending_count, NULL, NULL, NULL
+        FROM tags
+        WHERE user_id = %s
+        """
+        rows = self.db.execute_query(query, (today, today, future_date, user_id, user_id))
+        if rows is None:
+            # 查询失败时抛出，避免把空结果缓存到下一次数据变更
+            raise RuntimeError('视图数量查询失败')
+
+        counts = {'my_day': 0, 'planned': 0, 'important': 0, 'all': 0, 'tags': {}}
+        for row in rows:
+            if row['tag_id'] is None:
+                counts['my_day'] = int(row['my_day'])
+                counts['planned'] = int(row['planned'])
+                counts['important'] = int(row['important'])
+                counts['all'] = int(row['all_tasks'])
+            else:
+                # 联合查询的列名取第一段，标签行的 pending_count 落在 my_day 列
+                counts['tags'][row['tag_id']] = int(row['my_day'])
+        return counts
+
+    def task_matches_view(self, task: Dict, view_type: str, today: date = None) -> bool:
+        """
+        判断任务是否属于某个视图，与 get_tasks_by_view 的筛选条件一致，
+        用于收到变更事件时在本地增量更新任务列表
+
+        Args:
+            task: 任务字典（包含tags）
+            view_type: 视图类型 (my_day, planned, important, all, tag_<id>)
+            today: 当前日期
+
+        Returns:
+            任务属于该视图返回True
+        """
+        today = today or date.today()
+        due_date = task.get('due_date')
+        if isinstance(due_date, datetime):
+            due_date = due_date.date()
+        elif isinstance(due_date, str):
+            try:
+                due_date = date.fromisoformat(due_date.split()[0])
+            except ValueError:
+                due_date = None
+        pending = task.get('status') == 'pending'
+
+        if view_type == 'my_day':
+            return pending and due_date is not None and due_date <= today
+        if view_type == 'planned':
+            future_date = today + timedelta(days=self.get_upcoming_days_setting())
+            return pending and due_date is not None and today < due_date <= future_date
+        if view_type == 'important':
+            return task.get('priority') == 'high'
+        if view_type == 'all':
+            return True
+        if view_type.startswith('tag_'):
+            try:
+                tag_id = int(view_type.split('_', 1)[1])
+            except ValueError:
+                return False
+            return any(tag.get('tag_id') == tag_id for tag in task.get('tags') or [])
+        return False
     
     def should_remove_from_my_day(self, task_id: int, new_due_date) -> bool:
         """
@@ -348,7 +474,8 @@ class TaskManager:
                    estimated_pomodoros: int = None,
                    repeat_cycle: str = None,
                    tags: List[str] = None,
-                   current_view: str = None) -> Dict:  # 返回更详细的信息
+                   current_view: str = None,
+                   user_id: int = None) -> Dict:  # 返回更详细的信息
         """
         更新任务
         
@@ -361,16 +488,14 @@ class TaskManager:
             estimated_pomodoros: 预估番茄钟数量
             repeat_cycle: 重复周期 (none, daily, weekly, monthly)
             tags: 标签列表
-            current_view: 当前视图类型，用于检查是否需要从视图中移除任务
+            current_view: 当前视图类型，用于检查是否需要从视图中移除任务（根据传入的新截止日期判断，不查询旧值）
+            user_id: 任务所属用户ID；传入时更新限定在该用户的任务上，不传时从数据库查询
             
         Returns:
-            包含更新结果和视图变更信息的字典
+            包含更新结果和视图变更信息的字典；截止日期与同一重复系列的其他任务冲突时
+            success 为False，error 为 SERIES_DATE_TAKEN
         """
         try:
-            # 获取任务更新前的状态
-            old_task = self.get_task_by_id(task_id) if current_view else None
-            old_due_date = old_task.get('due_date') if old_task else None
-            
             # 构建更新语句
             updates = []
             params = []
@@ -405,30 +530,44 @@ class TaskManager:
             if not updates and tags is None:
                 return {'success': True, 'view_change': None}
             
-            # 更新任务基本信息
-            if updates:
-                updates.append("updated_at = CURRENT_TIMESTAMP")
-                params.append(task_id)
-                
-                query = f"UPDATE tasks SET {', '.join(updates)} WHERE task_id = %s"
-                logger.info(f"执行SQL更新: {query} with params: {params}")
-                
-                if not self.db.execute_update(query, tuple(params)):
-                    logger.error(f"数据库更新失败: task_id={task_id}")
-                    return {'success': False, 'view_change': None}
-            
-            # 更新标签
+            fields = [update.split(' = ')[0] for update in updates]
             if tags is not None:
-                # 获取任务信息以获取user_id
-                task = self.get_task_by_id(task_id)
-                if task:
-                    self._update_task_tags(task_id, task['user_id'], tags)
+                fields.append('tags')
+
+            if estimated_pomodoros is not None:
+                updates.append("pomodoros_estimated = TRUE")
+            # 单条语句更新任务（只改标签时也更新updated_at，同时校验任务归属）
+            updates.append("updated_at = CURRENT_TIMESTAMP")
+            query = f"UPDATE tasks SET {', '.join(updates)} WHERE task_id = %s"
+            params.append(task_id)
+            if user_id is not None:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            logger.info(f"执行SQL更新: {query} with params: {params}")
+            
+            affected = self.db.execute_update_rowcount(query, tuple(params))
+            if affected is None and due_date not in ('UNSET', None) and self._series_date_taken(task_id, due_date):
+                # (series_id, due_date) 唯一键冲突：只在写入失败后查询原因，成功的更新不多一次往返
+                logger.warning(f"重复系列在该日期已有任务: task_id={task_id}, due_date={due_date}")
+                return {'success': False, 'view_change': None, 'error': SERIES_DATE_TAKEN}
+            if not affected:
+                logger.error(f"数据库更新失败或任务不存在: task_id={task_id}")
+                return {'success': False, 'view_change': None}
+            
+            if user_id is None:
+                user_id = self._get_task_owner(task_id)
+
+            # 更新标签
+            if tags is not None and user_id is not None:
+                self._update_task_tags(task_id, user_id, tags)
+
+            self._publish(user_id, events.TASK_UPDATED, task_id=task_id, fields=fields)
             
             # 检查视图变更
             view_change_info = None
             if current_view and due_date != 'UNSET':
                 view_change_info = self.check_and_notify_view_change(
-                    task_id, old_due_date, due_date, current_view
+                    task_id, None, due_date, current_view
                 )
             
             logger.info(f"任务更新成功: {task_id}")
@@ -438,14 +577,44 @@ class TaskManager:
             logger.error(f"更新任务失败: {e}")
             return {'success': False, 'view_change': None}
     
-    def delete_task(self, task_id: int) -> bool:
-        """删除任务"""
+    def _series_date_taken(self, task_id: int, due_date) -> bool:
+        """任务所在的重复系列中是否已有其他任务使用该截止日期"""
+        result = self.db.execute_query(
+            """
+            SELECT 1 FROM tasks o
+            JOIN tasks t ON t.series_id = o.series_id
+            WHERE t.task_id = %s AND o.task_id <> t.task_id AND o.due_date = %s
+            LIMIT 1
+            """,
+            (task_id, due_date)
+        )
+        return bool(result)
+    
+    def delete_task(self, task_id: int, user_id: int = None) -> bool:
+        """
+        删除任务
+
+        Args:
+            task_id: 任务ID
+            user_id: 任务所属用户ID；传入时只删除该用户的任务
+
+        Returns:
+            任务存在且删除成功返回True
+        """
         try:
             query = "DELETE FROM tasks WHERE task_id = %s"
-            success = self.db.execute_update(query, (task_id,))
+            params = [task_id]
+            if user_id is not None:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            else:
+                # 删除前确定所属用户，删除后无法再查询
+                user_id = self._get_task_owner(task_id)
+            success = bool(self.db.execute_update_rowcount(query, tuple(params)))
             
             if success:
                 logger.info(f"任务删除成功: {task_id}")
+                self._publish(user_id, events.TASK_DELETED, task_id=task_id)
             
             return success
             
@@ -453,22 +622,51 @@ class TaskManager:
             logger.error(f"删除任务失败: {e}")
             return False
     
-    def toggle_task_status(self, task_id: int, status: str = None) -> bool:
-        """切换任务状态"""
+    def toggle_task_status(self, task_id: int, status: str = None, user_id: int = None,
+                           repeat_cycle: str = None) -> bool:
+        """
+        切换任务状态，完成重复任务时生成下一次任务
+
+        Args:
+            task_id: 任务ID
+            status: 目标状态，为None时在数据库中原子地翻转当前状态
+            user_id: 任务所属用户ID；传入时更新限定在该用户的任务上
+            repeat_cycle: 任务的重复周期；只有明确标记完成（status='completed'）的重复任务才生成下一次任务
+
+        Returns:
+            任务存在且更新成功返回True
+        """
         try:
+            # completed_at 在 status 之前赋值，MySQL按顺序赋值，此时读到的仍是原状态
             if status is None:
-                # 自动切换状态
-                task = self.get_task_by_id(task_id)
-                if not task:
-                    return False
-                
-                status = 'completed' if task['status'] == 'pending' else 'pending'
+                completed_expr = "CASE WHEN status = 'pending' THEN CURRENT_TIMESTAMP ELSE NULL END"
+                status_expr = "CASE WHEN status = 'pending' THEN 'completed' ELSE 'pending' END"
+                params = [task_id]
+            else:
+                if status == 'completed':
+                    # 重复标记完成时保留原完成时间
+                    completed_expr = "CASE WHEN status = 'completed' THEN completed_at ELSE CURRENT_TIMESTAMP END"
+                else:
+                    completed_expr = "NULL"
+                status_expr = "%s"
+                params = [status, task_id]
             
-            query = "UPDATE tasks SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE task_id = %s"
-            success = self.db.execute_update(query, (status, task_id))
+            query = (f"UPDATE tasks SET completed_at = {completed_expr}, status = {status_expr}, "
+                     "updated_at = CURRENT_TIMESTAMP WHERE task_id = %s")
+            if user_id is not None:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            success = bool(self.db.execute_update_rowcount(query, tuple(params)))
             
             if success:
-                logger.info(f"任务状态更新成功: {task_id} -> {status}")
+                logger.info(f"任务状态更新成功: {task_id} -> {status or '切换'}")
+                if user_id is None:
+                    user_id = self._get_task_owner(task_id)
+                self._publish(user_id, events.TASK_UPDATED, task_id=task_id, fields=['status'])
+                if status == 'completed' and repeat_cycle not in (None, 'none'):
+                    next_task_id = self.recurrence.spawn_next([task_id], user_id)
+                    if next_task_id:
+                        self._publish(user_id, events.TASK_CREATED, task_id=next_task_id)
             
             return success
             
@@ -476,7 +674,7 @@ class TaskManager:
             logger.error(f"切换任务状态失败: {e}")
             return False
     
-    def increment_used_pomodoros(self, task_id: int) -> bool:
+    def increment_used_pomodoros(self, task_id: int, user_id: int = None) -> bool:
         """增加任务已使用的番茄钟数量"""
         try:
             query = """
@@ -484,7 +682,16 @@ class TaskManager:
             SET used_pomodoros = used_pomodoros + 1, updated_at = CURRENT_TIMESTAMP
             WHERE task_id = %s
             """
-            return self.db.execute_update(query, (task_id,))
+            params = [task_id]
+            if user_id is not None:
+                query += " AND user_id = %s"
+                params.append(user_id)
+            success = bool(self.db.execute_update_rowcount(query, tuple(params)))
+            if success:
+                if user_id is None:
+                    user_id = self._get_task_owner(task_id)
+                self._publish(user_id, events.TASK_UPDATED, task_id=task_id, fields=['used_pomodoros'])
+            return success
             
         except Exception as e:
             logger.error(f"更新番茄钟数量失败: {e}")
@@ -517,9 +724,9 @@ class TaskManager:
             query = """
             SELECT COUNT(*) as today_completed 
             FROM tasks 
-            WHERE user_id = %s AND status = 'completed' AND DATE(updated_at) = %s
+            WHERE user_id = %s AND completed_at >= %s AND completed_at < %s
             """
-            result = self.db.execute_query(query, (user_id, today))
+            result = self.db.execute_query(query, (user_id, today, today + timedelta(days=1)))
             stats['today_completed_tasks'] = result[0]['today_completed'] if result else 0
             
             # 过期任务数
@@ -550,12 +757,8 @@ class TaskManager:
     def _add_tags_to_task(self, task_id: int, user_id: int, tags: List[str]) -> bool:
         """为任务添加标签"""
         try:
-            for tag_name in tags:
-                if tag_name.strip():
-                    tag_id = self.tag_manager.get_or_create_tag(user_id, tag_name.strip())
-                    if tag_id:
-                        self.tag_manager.add_task_tag(task_id, tag_id)
-            return True
+            tag_ids = self.tag_manager.resolve_tags(user_id, tags)
+            return self.tag_manager.add_task_tags(task_id, tag_ids.values())
         except Exception as e:
             logger.error(f"添加标签失败: {e}")
             return False
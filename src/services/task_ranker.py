@@ -0,0 +1,172 @@
+"""
+任务推荐排序模块
+在内存中的任务列表上用NumPy向量化计算推荐分数，综合截止日期、优先级、
+剩余番茄钟、任务存在时间以及从专注记录中学习到的标签偏好
+"""
+
+import time
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.services.prompt_builder import _to_date
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_WEIGHTS = {'high': 1.0, 'medium': 0.5, 'low': 0.0}
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    """将数据库返回的时间值统一转换为datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+class TaskRanker:
+    """本地任务推荐排序器"""
+
+    # 各特征的权重，特征均已归一化到 [0, 1]
+    DEFAULT_WEIGHTS = {
+        'urgency': 3.0,       # 截止日期越近越高，已过期为1
+        'priority': 2.0,      # 高/中/低优先级
+        'quick_win': 1.0,     # 剩余番茄钟越少越高
+        'staleness': 0.5,     # 创建越久越高，避免任务一直被搁置
+        'tag_affinity': 1.5   # 用户近期常专注的标签
+    }
+
+    def __init__(self, db_manager=None, weights: Dict[str, float] = None,
+                 affinity_days: int = 30, affinity_ttl_seconds: float = 600):
+        self.db = db_manager
+        self.weights = dict(self.DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.affinity_days = affinity_days
+        self.affinity_ttl_seconds = affinity_ttl_seconds
+        # 标签偏好缓存：user_id -> (计算时间, {tag_id: 偏好值})
+        self._affinity_cache: Dict[int, tuple] = {}
+
+    def get_tag_affinity(self, user_id: int) -> Dict[int, float]:
+        """
+        从近期已完成的工作专注记录中学习标签偏好
+
+        Returns:
+            {tag_id: 偏好值}，按专注时长最多的标签归一化到 [0, 1]
+        """
+        if self.db is None:
+            return {}
+
+        cached = self._affinity_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < self.affinity_ttl_seconds:
+            return cached[1]
+
+        query = """
+        SELECT tt.tag_id, SUM(fs.duration_minutes) as focus_minutes
+        FROM focus_sessions fs
+        JOIN task_tags tt ON tt.task_id = fs.task_id
+        WHERE fs.user_id = %s AND fs.session_type = 'work' AND fs.is_completed = TRUE
+        AND fs.start_time >= %s
+        GROUP BY tt.tag_id
+        """
+        since = datetime.now() - timedelta(days=self.affinity_days)
+        try:
+            rows = self.db.execute_query(query, (user_id, since)) or []
+        except Exception as e:
+            logger.error(f"获取标签偏好失败: {e}")
+            rows = []
+
+        minutes = {row['tag_id']: float(row['focus_minutes'] or 0) for row in rows}
+        peak = max(minutes.values(), default=0)
+        affinity = {tag_id: value / peak for tag_id, value in minutes.items()} if peak > 0 else {}
+
+        self._affinity_cache[user_id] = (time.monotonic(), affinity)
+        return affinity
+
+    def invalidate(self, user_id: int = None):
+        """清除标签偏好缓存"""
+        if user_id is None:
+            self._affinity_cache.clear()
+        else:
+            self._affinity_cache.pop(user_id, None)
+
+    def score_tasks(self, tasks: List[Dict], tag_affinity: Dict[int, float] = None,
+                    today: date = None) -> np.ndarray:
+        """
+        计算任务的推荐分数
+
+        Args:
+            tasks: 任务列表
+            tag_affinity: 标签偏好 {tag_id: 偏好值}
+            today: 当前日期，默认今天
+
+        Returns:
+            与任务列表一一对应的分数数组
+        """
+        if not tasks:
+            return np.zeros(0)
+
+        today = today or date.today()
+        now = datetime.combine(today, datetime.min.time())
+        tag_affinity = tag_affinity or {}
+
+        due_days = np.full(len(tasks), np.nan)
+        priority = np.empty(len(tasks))
+        remaining = np.empty(len(tasks))
+        age_days = np.zeros(len(tasks))
+        affinity = np.zeros(len(tasks))
+
+        for i, task in enumerate(tasks):
+            due = _to_date(task.get('due_date'))
+            if due is not None:
+                due_days[i] = (due - today).days
+            priority[i] = PRIORITY_WEIGHTS.get(task.get('priority'), 0.5)
+            remaining[i] = (task.get('estimated_pomodoros') or 1) - (task.get('used_pomodoros') or 0)
+            created_at = _to_datetime(task.get('created_at'))
+            if created_at is not None:
+                age_days[i] = (now - created_at).total_seconds() / 86400
+            tag_ids = [tag.get('tag_id') for tag in task.get('tags') or []]
+            affinity[i] = max((tag_affinity.get(tag_id, 0.0) for tag_id in tag_ids), default=0.0)
+
+        # 无截止日期为0，已过期和今天到期为1，之后按天数衰减
+        urgency = np.where(np.isnan(due_days), 0.0, 1.0 / (1.0 + np.clip(np.nan_to_num(due_days), 0, None)))
+        quick_win = 1.0 / (1.0 + np.clip(remaining, 0, None))
+        staleness = np.minimum(np.log1p(np.clip(age_days, 0, None)) / np.log1p(30), 1.0)
+
+        features = np.vstack([urgency, priority, quick_win, staleness, affinity])
+        weights = np.array([
+            self.weights['urgency'],
+            self.weights['priority'],
+            self.weights['quick_win'],
+            self.weights['staleness'],
+            self.weights['tag_affinity']
+        ])
+        return weights @ features
+
+    def rank(self, tasks: List[Dict], user_id: int = None, today: date = None) -> List[Dict]:
+        """
+        对待完成任务按推荐分数从高到低排序
+
+        Args:
+            tasks: 任务列表（已完成任务会被忽略）
+            user_id: 用户ID，提供时使用该用户的标签偏好
+            today: 当前日期，默认今天
+
+        Returns:
+            排序后的待完成任务列表
+        """
+        pending = [task for task in tasks if task.get('status') == 'pending']
+        if not pending:
+            return []
+
+        tag_affinity = self.get_tag_affinity(user_id) if user_id is not None else {}
+        scores = self.score_tasks(pending, tag_affinity, today)
+        # 稳定排序，分数相同时保持原有顺序
+        order = np.argsort(-scores, kind='stable')
+        return [pending[i] for i in order]
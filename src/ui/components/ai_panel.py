@@ -4,8 +4,12 @@ AI功能面板组件 - 纯API版本
 
 from nicegui import ui
 from typing import Dict, List, Callable, Optional
+from datetime import datetime, timedelta
 import asyncio
 
+from src.services.prompt_builder import build_task_context
+from src.services.report_cache import get_shared_report_cache
+
 
 class AIPanelComponent:
     def __init__(self, ai_assistant, task_manager, statistics_manager, current_user: Dict):
@@ -15,6 +19,8 @@ class AIPanelComponent:
         self.current_user = current_user
         self.current_mode = 'general'  # 当前AI模式
         self.chat_history = []  # 聊天历史
+        self.is_processing = False  # 是否有消息正在等待AI回复
+        self.report_cache = get_shared_report_cache()
         
     def set_ai_mode(self, mode: str, dialog):
         """设置AI模式"""
@@ -47,116 +53,181 @@ class AIPanelComponent:
     
     def add_message_to_chat(self, dialog, message: str, sender: str):
         """添加消息到聊天记录"""
+        # 聊天历史始终记录，对话框已关闭或未创建聊天区域时只是不渲染
+        self.chat_history.append({'message': message, 'sender': sender})
+        
         if hasattr(dialog, 'chat_area'):
-            # 添加新消息到历史记录
-            self.chat_history.append({'message': message, 'sender': sender})
-            
-            # 清空聊天区域并重新显示所有消息
-            dialog.chat_area.clear()
-            
-            # 重新显示所有消息
+            # 只追加新消息，避免每次都重绘整个聊天区域
             with dialog.chat_area:
-                for msg in self.chat_history:
-                    if msg['sender'] == 'user':
-                        with ui.row().classes('w-full justify-end mb-2'):
-                            ui.label(msg['message']).classes('bg-blue-100 p-2 rounded-lg text-sm max-w-3/4')
-                    else:
-                        with ui.row().classes('w-full justify-start mb-2'):
-                            ui.label(msg['message']).classes('bg-grey-100 p-2 rounded-lg text-sm max-w-3/4')
+                self._render_message(message, sender)
+    
+    def render_history(self, dialog):
+        """在新打开的对话框中显示已有的聊天记录"""
+        if not hasattr(dialog, 'chat_area'):
+            return
+        
+        dialog.chat_area.clear()
+        with dialog.chat_area:
+            for msg in self.chat_history:
+                self._render_message(msg['message'], msg['sender'])
     
-    def send_message(self, dialog):
+    def _render_message(self, message: str, sender: str):
+        """渲染单条消息"""
+        if sender == 'user':
+            with ui.row().classes('w-full justify-end mb-2'):
+                ui.label(message).classes('bg-blue-100 p-2 rounded-lg text-sm max-w-3/4')
+        else:
+            with ui.row().classes('w-full justify-start mb-2'):
+                ui.label(message).classes('bg-grey-100 p-2 rounded-lg text-sm max-w-3/4')
+    
+    def _set_busy(self, dialog, busy: bool):
+        """切换发送按钮的加载状态和“正在思考”提示"""
+        if hasattr(dialog, 'send_button'):
+            if busy:
+                dialog.send_button.props('loading')
+            else:
+                dialog.send_button.props(remove='loading')
+        
+        if not hasattr(dialog, 'chat_area'):
+            return
+        
+        if busy:
+            with dialog.chat_area:
+                with ui.row().classes('w-full justify-start mb-2 items-center gap-2') as thinking_row:
+                    ui.spinner('dots', size='sm', color='primary')
+                    ui.label('AI正在思考...').classes('text-xs text-grey-6')
+            dialog.thinking_row = thinking_row
+        elif getattr(dialog, 'thinking_row', None) is not None:
+            dialog.thinking_row.delete()
+            dialog.thinking_row = None
+    
+    async def send_message(self, dialog):
         """发送消息给AI"""
         if not hasattr(dialog, 'message_input'):
             return
         
+        # 上一条消息仍在处理时忽略重复点击，避免并行发出请求
+        if self.is_processing:
+            return
+        
         message = dialog.message_input.value.strip()
         if not message:
             return
         
+        # 检查和置位之间没有await，同一事件循环内不会被并发穿插
+        self.is_processing = True
+        
         # 清空输入框
         dialog.message_input.value = ''
         
         # 添加用户消息到聊天记录
         self.add_message_to_chat(dialog, message, 'user')
         
-        # 根据当前模式处理消息
-        self.process_message_with_mode(dialog, message)
+        self._set_busy(dialog, True)
+        try:
+            # 根据当前模式处理消息
+            await self.process_message_with_mode(dialog, message)
+        finally:
+            self._set_busy(dialog, False)
+            self.is_processing = False
     
-    def process_message_with_mode(self, dialog, message: str):
+    async def process_message_with_mode(self, dialog, message: str):
         """根据当前模式处理消息"""
         try:
             if self.current_mode == 'task_recommendation':
-                self.handle_task_recommendation(dialog, message)
+                await self.handle_task_recommendation(dialog, message)
             elif self.current_mode == 'workload_estimation':
-                self.handle_workload_estimation(dialog, message)
+                await self.handle_workload_estimation(dialog, message)
             elif self.current_mode == 'efficiency_report':
-                self.handle_efficiency_report(dialog, message)
+                await self.handle_efficiency_report(dialog, message)
             elif self.current_mode == 'work_pattern':
-                self.handle_work_pattern(dialog, message)
+                await self.handle_work_pattern(dialog, message)
             else:
-                self.handle_general_chat(dialog, message)
+                await self.handle_general_chat(dialog, message)
         except Exception as e:
             self.add_message_to_chat(dialog, f'处理消息时出错: {str(e)}', 'ai')
     
+    async def ask_ai(self, dialog, prompt: str, system_prompt: str):
+        """调用AI并把回复写入聊天记录"""
+        response = await self.ai_assistant.call_llm_api(
+            prompt, system_prompt, user_id=self.current_user['user_id']
+        )
+        
+        if response:
+            self.add_message_to_chat(dialog, response, 'ai')
+        else:
+            self.add_message_to_chat(dialog, 'AI暂时无法回复，请稍后再试', 'ai')
+    
     def get_user_data(self) -> Dict:
-        """获取用户数据"""
+        """
+        获取用户数据（数据版本未变时使用缓存）
+
+        在事件循环线程中执行：各组件共用同一个数据库连接，不能在线程池中并发访问
+        """
+        current_time = datetime.now()
         try:
-            from datetime import datetime, timedelta
-            
             user_id = self.current_user['user_id']
-            current_time = datetime.now()
-            
-            # 获取最近7天的数据
-            end_date = current_time
-            start_date = end_date - timedelta(days=7)
-            
-            # 获取所有任务数据
-            all_tasks = self.task_manager.get_tasks(
-                user_id=user_id,
-                sort_by='created_at',
-                sort_order='DESC'
-            )
+            revision = self.task_manager.db.get_data_revision(user_id)
             
-            # 获取效能数据
-            productivity_data = self.statistics_manager.get_productivity_overview(
-                user_id, 
-                days=7
+            # 统计窗口以当天为准，日期也作为缓存参数
+            data = self.report_cache.get_or_compute(
+                user_id, 'ai_user_data', {'date': current_time.date()}, revision,
+                lambda: self._load_user_data(user_id, current_time)
             )
-            
-            # 获取专注时长数据
-            focus_data = self.statistics_manager.get_focus_duration_by_period(
-                user_id,
-                'daily',
-                start_date,
-                end_date
-            )
-            
-            # 获取任务完成数据
-            completed_tasks = self.statistics_manager.get_tasks_completed_by_period(
-                user_id,
-                'daily',
-                start_date,
-                end_date
-            )
-            
-            return {
-                'current_time': current_time.strftime('%Y-%m-%d %H:%M'),
-                'all_tasks': all_tasks,
-                'productivity_data': productivity_data,
-                'focus_data': focus_data,
-                'completed_tasks': completed_tasks
-            }
+            return {'current_time': current_time.strftime('%Y-%m-%d %H:%M'), **data}
             
         except Exception as e:
             return {
-                'current_time': datetime.now().strftime('%Y-%m-%d %H:%M'),
+                'current_time': current_time.strftime('%Y-%m-%d %H:%M'),
                 'all_tasks': [],
                 'productivity_data': {},
                 'focus_data': [],
                 'completed_tasks': []
             }
     
-    def handle_task_recommendation(self, dialog, message: str):
+    def _load_user_data(self, user_id: int, current_time: datetime) -> Dict:
+        """从数据库加载AI分析所需的用户数据"""
+        # 获取最近7天的数据
+        end_date = current_time
+        start_date = end_date - timedelta(days=7)
+        
+        # 获取所有任务数据
+        all_tasks = self.task_manager.get_tasks(
+            user_id=user_id,
+            sort_by='created_at',
+            sort_order='DESC'
+        )
+        
+        # 获取效能数据
+        productivity_data = self.statistics_manager.get_productivity_overview(
+            user_id, 
+            days=7
+        )
+        
+        # 获取专注时长数据
+        focus_data = self.statistics_manager.get_focus_duration_by_period(
+            user_id,
+            'daily',
+            start_date,
+            end_date
+        )
+        
+        # 获取任务完成数据
+        completed_tasks = self.statistics_manager.get_tasks_completed_by_period(
+            user_id,
+            'daily',
+            start_date,
+            end_date
+        )
+        
+        return {
+            'all_tasks': all_tasks,
+            'productivity_data': productivity_data,
+            'focus_data': focus_data,
+            'completed_tasks': completed_tasks
+        }
+    
+    async def handle_task_recommendation(self, dialog, message: str):
         """处理任务推荐模式的消息"""
         try:
             # 获取用户数据
@@ -192,15 +263,12 @@ class AIPanelComponent:
 请根据以上数据推荐最适合的任务。"""
             
             # 调用AI
-            response = self.ai_assistant.call_llm_api(prompt, system_prompt)
-            
-            if response:
-                self.add_message_to_chat(dialog, response, 'ai')
+            await self.ask_ai(dialog, prompt, system_prompt)
             
         except Exception as e:
             self.add_message_to_chat(dialog, f'生成任务推荐时出错: {str(e)}', 'ai')
     
-    def handle_workload_estimation(self, dialog, message: str):
+    async def handle_workload_estimation(self, dialog, message: str):
         """处理工作量预估模式的消息"""
         try:
             # 获取用户数据
@@ -241,15 +309,12 @@ class AIPanelComponent:
 请根据以上数据预估工作量。"""
             
             # 调用AI
-            response = self.ai_assistant.call_llm_api(prompt, system_prompt)
-            
-            if response:
-                self.add_message_to_chat(dialog, response, 'ai')
+            await self.ask_ai(dialog, prompt, system_prompt)
             
         except Exception as e:
             self.add_message_to_chat(dialog, f'预估工作量时出错: {str(e)}', 'ai')
     
-    def handle_efficiency_report(self, dialog, message: str):
+    async def handle_efficiency_report(self, dialog, message: str):
         """处理效能分析模式的消息"""
         try:
             # 获取用户数据
@@ -292,15 +357,12 @@ class AIPanelComponent:
 请根据以上数据生成效能分析报告。"""
             
             # 调用AI
-            response = self.ai_assistant.call_llm_api(prompt, system_prompt)
-            
-            if response:
-                self.add_message_to_chat(dialog, response, 'ai')
+            await self.ask_ai(dialog, prompt, system_prompt)
             
         except Exception as e:
             self.add_message_to_chat(dialog, f'生成效能报告时出错: {str(e)}', 'ai')
     
-    def handle_work_pattern(self, dialog, message: str):
+    async def handle_work_pattern(self, dialog, message: str):
         """处理工作模式分析模式的消息"""
         try:
             # 获取用户数据
@@ -343,15 +405,12 @@ class AIPanelComponent:
 请根据以上数据分析工作模式。"""
             
             # 调用AI
-            response = self.ai_assistant.call_llm_api(prompt, system_prompt)
-            
-            if response:
-                self.add_message_to_chat(dialog, response, 'ai')
+            await self.ask_ai(dialog, prompt, system_prompt)
             
         except Exception as e:
             self.add_message_to_chat(dialog, f'分析工作模式时出错: {str(e)}', 'ai')
     
-    def handle_general_chat(self, dialog, message: str):
+    async def handle_general_chat(self, dialog, message: str):
         """处理通用聊天模式的消息"""
         try:
             # 获取用户数据
@@ -387,39 +446,11 @@ class AIPanelComponent:
 请根据以上数据提供帮助。"""
             
             # 调用AI
-            response = self.ai_assistant.call_llm_api(prompt, system_prompt)
-            
-            if response:
-                self.add_message_to_chat(dialog, response, 'ai')
+            await self.ask_ai(dialog, prompt, system_prompt)
                 
         except Exception as e:
             self.add_message_to_chat(dialog, f'处理消息时出错: {str(e)}', 'ai')
     
     def format_tasks_for_ai(self, tasks: List[Dict]) -> str:
-        """格式化任务数据供AI使用"""
-        if not tasks:
-            return "暂无任务数据"
-        
-        formatted_tasks = []
-        for task in tasks:
-            # 处理标签信息
-            tags = task.get('tags', [])
-            tag_names = [tag.get('name', '') for tag in tags] if tags else []
-            tag_info = ', '.join(tag_names) if tag_names else '无标签'
-            
-            task_info = f"""任务ID: {task['task_id']}
-标题: {task['title']}
-状态: {task['status']}
-优先级: {task['priority']}
-截止日期: {task['due_date'] if task['due_date'] else '无'}
-预估番茄钟: {task['estimated_pomodoros']}
-已用番茄钟: {task['used_pomodoros']}
-标签: {tag_info}
-创建时间: {task['created_at']}
-更新时间: {task['updated_at']}"""
-            
-            formatted_tasks.append(task_info)
-        
-        return "\n\n".join(formatted_tasks)
-    
-
+        """格式化任务数据供AI使用（按相关性排序并限制在token预算内）"""
+        return build_task_context(tasks)
@@ -175,7 +175,9 @@ class MainContentComponent:
 请根据以上数据推荐最适合现在处理的任务。"""
         
         # 调用AI
-        response = await ai_panel.ai_assistant.call_llm_api(prompt, system_prompt)
+        response = await ai_panel.ai_assistant.call_llm_api(
+            prompt, system_prompt, user_id=self.current_user['user_id']
+        )
         
         # 清空加载状态并显示结果
         self.ai_result_container.clear()
@@ -214,7 +216,9 @@ class MainContentComponent:
 请分析所有待完成任务的工作量。"""
         
         # 调用AI
-        response = await ai_panel.ai_assistant.call_llm_api(prompt, system_prompt)
+        response = await ai_panel.ai_assistant.call_llm_api(
+            prompt, system_prompt, user_id=self.current_user['user_id']
+        )
         
         # 清空加载状态并显示结果
         self.ai_result_container.clear()
@@ -258,7 +262,9 @@ class MainContentComponent:
 请生成效能分析报告。不要使用md。"""
         
         # 调用AI
-        response = await ai_panel.ai_assistant.call_llm_api(prompt, system_prompt)
+        response = await ai_panel.ai_assistant.call_llm_api(
+            prompt, system_prompt, user_id=self.current_user['user_id']
+        )
         
         # 清空加载状态并显示结果
         self.ai_result_container.clear()
@@ -567,7 +567,9 @@ class PomodoroTimerComponent:
                         if updated_task['used_pomodoros'] >= updated_task['estimated_pomodoros']:
                             print(f"DEBUG: complete_phase - 任务 '{updated_task['title']}' 达到预估番茄数，尝试自动完成")
                             # 自动标记任务为完成
-                            completion_success = self.task_manager.toggle_task_status(task_id, 'completed')
+                            completion_success = self.task_manager.toggle_task_status(
+                                task_id, 'completed', user_id=self.current_user['user_id'],
+                                repeat_cycle=updated_task.get('repeat_cycle'))
                             if completion_success:
                                 print(f"DEBUG: complete_phase - >>> 🎉 任务 '{updated_task['title']}' 已自动完成！")
                                 # 使用安全的通知方式
@@ -2,8 +2,11 @@
 设置对话框组件
 """
 
-from nicegui import ui, app
+from nicegui import ui, app, run
 from typing import Dict, Callable
+import os
+import csv
+import tempfile
 
 
 class SettingsDialogComponent:
@@ -203,6 +206,12 @@ class SettingsDialogComponent:
                 on_click=self.show_change_password_dialog
             ).props('color=secondary').classes('w-full')
 
+            ui.button(
+                '导入任务',
+                icon='upload_file',
+                on_click=self.show_import_dialog
+            ).props('color=primary').classes('w-full')
+
             #ui.button(
             #    '导出数据',
             #    icon='download',
@@ -324,6 +333,96 @@ class SettingsDialogComponent:
         except Exception as e:
             ui.notify(f'密码修改失败: {str(e)}', type='negative')
 
+    def show_import_dialog(self):
+        """显示导入任务对话框"""
+        # 中断的导入保留上传的文件和导入ID，点击“继续导入”时从检查点继续，不会重复写入已提交的批次
+        pending = {'path': None, 'filename': None, 'import_id': None}
+
+        def discard_pending():
+            if pending['path'] and os.path.exists(pending['path']):
+                os.remove(pending['path'])
+            pending.update(path=None, filename=None, import_id=None)
+
+        with ui.dialog() as import_dialog:
+            with ui.card().classes('w-96').style('padding: 24px;'):
+                ui.label('导入任务').classes('text-h6 mb-2')
+                ui.label('支持CSV、JSON和JSONL文件，可识别常见待办应用导出的列名').classes('text-caption text-grey-7 mb-2')
+                status_label = ui.label('')
+                progress_bar = ui.linear_progress(value=0, show_value=False).classes('w-full')
+                progress_bar.set_visibility(False)
+                widgets = {'status': status_label, 'progress': progress_bar}
+                ui.upload(
+                    label='选择文件',
+                    auto_upload=True,
+                    on_upload=lambda e: self.import_tasks(e, pending, widgets, discard_pending)
+                ).props('accept=".csv,.json,.jsonl"').classes('w-full')
+                with ui.row().classes('w-full justify-end'):
+                    widgets['resume'] = ui.button(
+                        '继续导入', on_click=lambda: self.run_import(pending, widgets, discard_pending)
+                    ).props('flat color=primary')
+                    widgets['resume'].set_visibility(False)
+                    ui.button('关闭', on_click=import_dialog.close).props('flat')
+
+        import_dialog.on_value_change(lambda e: None if e.value else discard_pending())
+        import_dialog.open()
+
+    async def import_tasks(self, e, pending: Dict, widgets: Dict, discard_pending: Callable):
+        """保存上传的文件并开始新的导入（之前中断的导入不再继续）"""
+        discard_pending()
+        filename = e.file.name
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1])
+        os.close(fd)
+        await e.file.save(path)
+        pending.update(path=path, filename=filename)
+        await self.run_import(pending, widgets, discard_pending)
+
+    async def run_import(self, pending: Dict, widgets: Dict, discard_pending: Callable):
+        """在工作线程中用独立数据库连接执行导入，定时刷新进度；pending 中有导入ID时从检查点继续"""
+        from src.database.database import create_database_manager
+        from src.services.task_import import import_file, detect_format
+
+        if not pending['path']:
+            return
+        status_label, progress_bar, resume_button = widgets['status'], widgets['progress'], widgets['resume']
+        state = {'rows_done': 0, 'imported': 0}
+
+        def run_import():
+            db = create_database_manager()
+            try:
+                return import_file(db, self.current_user['user_id'], pending['path'], detect_format(pending['filename']),
+                                   import_id=pending['import_id'], progress=state.update,
+                                   source_name=pending['filename'])
+            finally:
+                db.disconnect()
+
+        resume_button.set_visibility(False)
+        progress_bar.set_visibility(True)
+        progress_bar.props('indeterminate')
+        timer = ui.timer(0.5, lambda: status_label.set_text(
+            f"已处理 {state['rows_done']} 条，导入 {state['imported']} 个任务"
+        ))
+        try:
+            summary = await run.io_bound(run_import)
+        except (ValueError, UnicodeDecodeError, csv.Error) as err:
+            # 出错位置之前已提交的批次保留在数据库中
+            status_label.set_text(f"文件无法解析（已导入 {state['imported']} 个任务）: {err}")
+            ui.notify('文件格式不正确', type='negative', icon='error')
+            discard_pending()
+            return
+        finally:
+            timer.cancel()
+            progress_bar.set_visibility(False)
+
+        if summary['completed']:
+            status_label.set_text(f"导入完成: {summary['imported']} 个任务，跳过 {summary['skipped']} 条记录")
+            ui.notify(f"已导入 {summary['imported']} 个任务", type='positive', icon='check')
+            discard_pending()
+        else:
+            pending['import_id'] = summary['import_id'] or pending['import_id']
+            status_label.set_text(f"导入中断，已导入 {summary['imported']} 个任务，可点击“继续导入”从中断处继续")
+            ui.notify('导入中断，请点击“继续导入”', type='negative', icon='error')
+            resume_button.set_visibility(True)
+
     def export_user_data(self):
         """导出用户数据"""
         ui.notify('数据导出功能开发中...', type='info')
@@ -23,6 +23,8 @@ class SidebarComponent:
         self.sidebar_collapsed = True
         self.current_view = 'my_day'
         self.user_tags: List[Dict] = []
+        self.view_counts: Dict = {}  # 各视图任务数量，来自 task_manager.get_view_counts
+        self.view_badges: Dict[str, ui.badge] = {}  # 视图类型 -> 数量徽标
         self.sidebar_container = None
         self.sidebar_tags_container = None
         self.ai_panel_container = None
@@ -60,6 +62,7 @@ class SidebarComponent:
     def create_sidebar(self, container):
         """创建左侧边栏"""
         self.sidebar_container = container
+        self.view_badges = {}
         
         # 根据初始状态应用CSS类
         if self.sidebar_collapsed:
@@ -155,6 +158,10 @@ class SidebarComponent:
             ui.icon(icon).classes('text-xl text-grey-7 flex-shrink-0')
             if not self.sidebar_collapsed:
                 ui.label(label).classes('text-sm flex-1 truncate').style('white-space: nowrap; overflow: hidden; text-overflow: ellipsis; min-width: 0;')
+                count = self.view_counts.get(view_type, 0)
+                badge = ui.badge(str(count)).props('color=grey-5').classes('flex-shrink-0')
+                badge.set_visibility(count > 0)
+                self.view_badges[view_type] = badge
 
     def refresh_sidebar_tags(self):
         """刷新侧边栏标签列表"""
@@ -162,8 +169,9 @@ class SidebarComponent:
         if self.sidebar_tags_container:
             self.sidebar_tags_container.clear()
         
-        # 重新获取用户标签
+        # 重新获取用户标签和视图数量
         self.refresh_user_tags()
+        self.refresh_view_counts()
         
         # 为每个标签创建侧边栏项目
         with self.sidebar_tags_container:
@@ -200,8 +208,9 @@ class SidebarComponent:
                 ui.element('div').classes('w-4 h-4 rounded-full flex-shrink-0').style(f'background-color: {user_tag.get("color", "#757575")}; min-width: 16px; min-height: 16px;')
                 if not self.sidebar_collapsed:
                     ui.label(user_tag['name']).classes('text-sm truncate flex-1').style('white-space: nowrap; overflow: hidden; text-overflow: ellipsis; min-width: 0; max-width: 120px;')
-                    if user_tag.get('task_count', 0) > 0:
-                        ui.badge(str(user_tag['task_count'])).props('color=grey-5').classes('flex-shrink-0')
+                    task_count = self.view_counts.get('tags', {}).get(user_tag['tag_id'], user_tag.get('task_count', 0))
+                    if task_count > 0:
+                        ui.badge(str(task_count)).props('color=grey-5').classes('flex-shrink-0')
             
             # 右侧：三个点菜单按钮（hover时显示）
             if not self.sidebar_collapsed:
@@ -252,6 +261,18 @@ class SidebarComponent:
         if self.current_user:
             self.user_tags = self.tag_manager.get_user_tags_with_count(self.current_user['user_id'])
 
+    def refresh_view_counts(self):
+        """刷新视图数量并更新已渲染的徽标（只改文字，不重建侧边栏）"""
+        if not self.current_user:
+            return
+        self.view_counts = self.task_manager.get_view_counts(self.current_user['user_id'])
+        for view_type, badge in self.view_badges.items():
+            if badge.is_deleted:
+                continue
+            count = self.view_counts.get(view_type, 0)
+            badge.set_text(str(count))
+            badge.set_visibility(count > 0)
+
     def set_current_view(self, view: str):
         """设置当前视图"""
         self.current_view = view
@@ -393,16 +414,18 @@ class SidebarComponent:
                 # 聊天记录显示区域
                 chat_area = ui.scroll_area().classes('w-full h-64 mb-4 border rounded p-2')
                 dialog.chat_area = chat_area
+                self.ai_panel.render_history(dialog)
                 
                 # 输入区域
                 with ui.row().classes('w-full gap-2'):
                     message_input = ui.input('输入您的问题...').classes('flex-1')
                     dialog.message_input = message_input
                     
-                    def send_message():
-                        self.ai_panel.send_message(dialog)
+                    async def send_message():
+                        await self.ai_panel.send_message(dialog)
                     
-                    ui.button('发送', icon='send', on_click=send_message).props('color=primary')
+                    message_input.on('keydown.enter', send_message)
+                    dialog.send_button = ui.button('发送', icon='send', on_click=send_message).props('color=primary')
                 
                 # 当前模式显示
                 mode_label = ui.label('当前模式: 通用助手').classes('text-xs text-grey-6 mt-2')
@@ -2,10 +2,12 @@
 统计仪表板UI组件
 """
 from datetime import datetime, date, timedelta
-from typing import Dict, List
+from typing import Dict, List, Any, Callable
 from nicegui import ui
 import json
 
+from src.services.report_cache import get_shared_report_cache
+
 
 class StatisticsDashboardComponent:
     """统计仪表板组件"""
@@ -14,10 +16,22 @@ class StatisticsDashboardComponent:
         self.statistics_manager = statistics_manager
         self.pomodoro_manager = pomodoro_manager
         self.current_user = current_user
+        self.report_cache = get_shared_report_cache()
+        self.data_revision = None  # 本次渲染使用的数据版本
+    
+    def get_cached_data(self, user_id: int, name: str, getter: Callable[[int], Any]) -> Any:
+        """按数据版本缓存图表数据（数据与当天日期相关，日期也作为参数）"""
+        return self.report_cache.get_or_compute(
+            user_id, f'dashboard.{name}', {'date': date.today()}, self.data_revision,
+            lambda: getter(user_id)
+        )
     
     def create_stats_overview(self, user_id: int) -> ui.column:
         """创建统计概览"""
-        stats = self.get_today_detailed_stats(user_id)
+        # 每次打开统计页只查询一次数据版本，数据未变时各图表直接使用缓存
+        self.data_revision = self.statistics_manager.db.get_data_revision(user_id) if self.statistics_manager else None
+        
+        stats = self.get_cached_data(user_id, 'today_detailed_stats', self.get_today_detailed_stats)
         
         with ui.column().classes('w-full gap-4') as container:
             # 今日统计标题
@@ -124,7 +138,7 @@ class StatisticsDashboardComponent:
     
     def create_weekly_completion_chart(self, user_id: int):
         """创建本周完成趋势图"""
-        weekly_data = self.get_weekly_completion_data(user_id)
+        weekly_data = self.get_cached_data(user_id, 'weekly_completion', self.get_weekly_completion_data)
         
         with ui.card().classes('w-full p-4'):
             ui.label('本周完成趋势').classes('text-h6 mb-3')
@@ -164,7 +178,7 @@ class StatisticsDashboardComponent:
     
     def create_priority_distribution_chart(self, user_id: int):
         """创建任务优先级分布图"""
-        priority_data = self.get_priority_distribution_data(user_id)
+        priority_data = self.get_cached_data(user_id, 'priority_distribution', self.get_priority_distribution_data)
         
         with ui.card().classes('w-full p-4'):
             ui.label('任务优先级分布').classes('text-h6 mb-3')
@@ -190,7 +204,7 @@ class StatisticsDashboardComponent:
     
     def create_focus_time_chart(self, user_id: int):
         """创建专注时长趋势图"""
-        focus_data = self.get_weekly_focus_data(user_id)
+        focus_data = self.get_cached_data(user_id, 'weekly_focus', self.get_weekly_focus_data)
         
         with ui.card().classes('w-full p-4'):
             ui.label('本周专注时长').classes('text-h6 mb-3')
@@ -221,7 +235,7 @@ class StatisticsDashboardComponent:
     
     def create_task_status_chart(self, user_id: int):
         """创建任务状态分布图"""
-        status_data = self.get_task_status_data(user_id)
+        status_data = self.get_cached_data(user_id, 'task_status', self.get_task_status_data)
         
         with ui.card().classes('w-full p-4'):
             ui.label('任务状态分布').classes('text-h6 mb-3')
@@ -263,10 +277,10 @@ class StatisticsDashboardComponent:
             AND due_date IS NOT NULL
             AND DATE(due_date) <= %s
             AND (status = 'pending' OR status = 'in_progress' OR 
-                 (status = 'completed' AND DATE(updated_at) = %s))
+                 (status = 'completed' AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY))
             """
             today_due_result = self.statistics_manager.db.execute_query(
-                today_due_query, (user_id, today, today)
+                today_due_query, (user_id, today, today, today)
             )
             today_due_tasks = today_due_result[0]['count'] if today_due_result else 0
             
@@ -278,10 +292,10 @@ class StatisticsDashboardComponent:
             AND due_date IS NOT NULL
             AND DATE(due_date) <= %s
             AND status = 'completed'
-            AND DATE(updated_at) = %s
+            AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY
             """
             completed_due_result = self.statistics_manager.db.execute_query(
-                today_completed_due_query, (user_id, today, today)
+                today_completed_due_query, (user_id, today, today, today)
             )
             today_completed_due = completed_due_result[0]['count'] if completed_due_result else 0
             
@@ -291,11 +305,11 @@ class StatisticsDashboardComponent:
             FROM tasks 
             WHERE user_id = %s 
             AND status = 'completed'
-            AND DATE(updated_at) = %s
+            AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY
             AND (due_date IS NULL OR DATE(due_date) > %s)
             """
             extra_completed_result = self.statistics_manager.db.execute_query(
-                extra_completed_query, (user_id, today, today)
+                extra_completed_query, (user_id, today, today, today)
             )
             extra_completed = extra_completed_result[0]['count'] if extra_completed_result else 0
             
@@ -359,15 +373,7 @@ class StatisticsDashboardComponent:
         """获取今日番茄钟数量"""
         try:
             # 检查表是否存在
-            check_table_query = """
-            SELECT COUNT(*) as count
-            FROM information_schema.tables 
-            WHERE table_schema = DATABASE() 
-            AND table_name = 'pomodoro_sessions'
-            """
-            table_result = self.statistics_manager.db.execute_query(check_table_query)
-            
-            if not table_result or table_result[0]['count'] == 0:
+            if not self.statistics_manager.db.table_exists('pomodoro_sessions'):
                 # 表不存在，返回0
                 return 0
             
@@ -396,10 +402,10 @@ class StatisticsDashboardComponent:
             AND due_date IS NOT NULL
             AND DATE(due_date) <= %s
             AND (status != 'completed' OR 
-                 (status = 'completed' AND DATE(updated_at) = %s))
+                 (status = 'completed' AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY))
             """
             total_due_result = self.statistics_manager.db.execute_query(
-                total_due_query, (user_id, target_date, target_date)
+                total_due_query, (user_id, target_date, target_date, target_date)
             )
             total_due_tasks = total_due_result[0]['count'] if total_due_result else 0
             
@@ -411,10 +417,10 @@ class StatisticsDashboardComponent:
             AND due_date IS NOT NULL
             AND DATE(due_date) <= %s
             AND status = 'completed'
-            AND DATE(updated_at) = %s
+            AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY
             """
             completed_due_result = self.statistics_manager.db.execute_query(
-                completed_due_query, (user_id, target_date, target_date)
+                completed_due_query, (user_id, target_date, target_date, target_date)
             )
             completed_due_tasks = completed_due_result[0]['count'] if completed_due_result else 0
             
@@ -449,10 +455,10 @@ class StatisticsDashboardComponent:
                     AND due_date IS NOT NULL
                     AND DATE(due_date) <= %s
                     AND (status != 'completed' OR 
-                         (status = 'completed' AND DATE(updated_at) = %s))
+                         (status = 'completed' AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY))
                     """
                     due_result = self.statistics_manager.db.execute_query(
-                        due_query, (user_id, target_date, target_date)
+                        due_query, (user_id, target_date, target_date, target_date)
                     )
                 else:
                     due_query = """
@@ -477,10 +483,10 @@ class StatisticsDashboardComponent:
                 AND due_date IS NOT NULL
                 AND DATE(due_date) <= %s
                 AND status = 'completed'
-                AND DATE(updated_at) = %s
+                AND completed_at >= %s AND completed_at < %s + INTERVAL 1 DAY
                 """
                 completed_result = self.statistics_manager.db.execute_query(
-                    completed_due_query, (user_id, target_date, target_date)
+                    completed_due_query, (user_id, target_date, target_date, target_date)
                 )
                 completed_tasks = completed_result[0]['count'] if completed_result else 0
                 
@@ -525,14 +531,7 @@ class StatisticsDashboardComponent:
         
         # 检查表是否存在
         try:
-            check_table_query = """
-            SELECT COUNT(*) as count
-            FROM information_schema.tables 
-            WHERE table_schema = DATABASE() 
-            AND table_name = 'pomodoro_sessions'
-            """
-            table_result = self.statistics_manager.db.execute_query(check_table_query)
-            table_exists = table_result and table_result[0]['count'] > 0
+            table_exists = self.statistics_manager.db.table_exists('pomodoro_sessions')
         except:
             table_exists = False
         
@@ -627,8 +626,8 @@ class StatisticsDashboardComponent:
                 FROM tasks
                 WHERE user_id = %s
                 AND status = 'completed'
-                AND DATE(updated_at) >= %s
-                AND DATE(updated_at) <= %s
+                AND completed_at >= %s
+                AND completed_at < %s + INTERVAL 1 DAY
                 """
                 completed_result = self.statistics_manager.db.execute_query(
                     completed_query, (user_id, month_start, month_end)
@@ -651,7 +650,7 @@ class StatisticsDashboardComponent:
 
     def create_monthly_task_chart(self, user_id: int):
         """创建每月任务创建和完成趋势图"""
-        monthly_data = self.get_monthly_task_data(user_id)
+        monthly_data = self.get_cached_data(user_id, 'monthly_tasks', self.get_monthly_task_data)
 
         with ui.card().classes('w-full p-4'):
             ui.label('每月任务趋势').classes('text-h6 mb-3')
@@ -731,7 +730,7 @@ class StatisticsDashboardComponent:
 
     def create_daily_creation_completion_chart(self, user_id: int):
         """创建每日任务创建和完成对比图"""
-        daily_data = self.get_weekly_data(user_id) # 复用 get_weekly_data
+        daily_data = self.get_cached_data(user_id, 'weekly_creation_completion', self.get_weekly_data) # 复用 get_weekly_data
 
         with ui.card().classes('w-full p-4'):
             ui.label('每日任务创建与完成').classes('text-h6 mb-3')
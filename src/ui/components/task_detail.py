@@ -6,23 +6,34 @@ from nicegui import ui
 from typing import Dict, Optional, Callable, List
 from datetime import date
 from .tag_edit_dialog import TagEditDialog
+from config import AI_CONFIG, APP_CONFIG
 from src.services.ai_assistant import AIAssistant
 from src.services.pomodoro_manager import UserSettingsManager
+from src.services.pomodoro_estimator import get_shared_estimator
 
 
 class TaskDetailComponent:
-    def __init__(self, task_manager, on_task_update: Callable, on_start_pomodoro: Callable, on_close: Callable, user_id: int = 1):
+    def __init__(self, task_manager, on_task_update: Callable, on_start_pomodoro: Callable, on_close: Callable, user_id: int = 1,
+                 on_task_patched: Callable[[Dict], None] = None):
         self.task_manager = task_manager
         self.on_task_update = on_task_update
+        self.on_task_patched = on_task_patched  # 字段保存后只更新对应任务行，未提供时整体刷新
         self.on_start_pomodoro = on_start_pomodoro
         self.on_close = on_close
         self.user_id = user_id
         self.ai_assistant = AIAssistant()
         self.user_settings_manager = UserSettingsManager(task_manager.db) # 实例化 UserSettingsManager
+        self.pomodoro_estimator = get_shared_estimator(task_manager.db)  # 历史向量在各页面间共享
         self.selected_task: Optional[Dict] = None
         self.initial_task_state: Optional[Dict] = None  # 保存初始状态
         self.task_detail_open = False
         self.current_view = None  # 跟踪当前视图
+
+        # 待保存的字段修改：短时间内的多次修改合并为一次更新
+        self.pending_changes: Dict = {}
+        self.pending_task_id: Optional[int] = None
+        self.save_timer = None
+        self.debounce_seconds = APP_CONFIG['autosave_debounce_seconds']
         
         # UI 组件引用
         self.title_input = None
@@ -61,7 +72,8 @@ class TaskDetailComponent:
                         # 完成按钮
                         def toggle_complete():
                             new_status = 'completed' if self.selected_task['status'] == 'pending' else 'pending'
-                            self.task_manager.toggle_task_status(self.selected_task['task_id'], new_status)
+                            self.task_manager.toggle_task_status(self.selected_task['task_id'], new_status, user_id=self.user_id,
+                                                               repeat_cycle=self.selected_task.get('repeat_cycle'))
                             self.selected_task['status'] = new_status
                             self.on_task_update()
                             self.create_task_detail_panel(container)  # 刷新面板
@@ -83,7 +95,7 @@ class TaskDetailComponent:
                             value=self.selected_task['title']
                         ).classes('flex-1 text-base sm:text-lg font-medium').props('borderless')
                         # 添加失去焦点时自动保存
-                        self.title_input.on('blur', lambda: self.auto_save_field('title'))
+                        self.title_input.on('blur', lambda: self.auto_save_field('title', flush=True))
                         
                         # 删除按钮
                         ui.button(icon='delete', on_click=self.delete_task).props('flat round size=sm color=negative').tooltip('删除任务')
@@ -121,8 +133,9 @@ class TaskDetailComponent:
                                         # 更新任务标签
                                         if self.task_manager.update_task(
                                             task_id=self.selected_task['task_id'],
-                                            tags=tag_names
-                                        ):
+                                            tags=tag_names,
+                                            user_id=self.user_id
+                                        ).get('success', False):
                                             self.selected_task['tags'] = updated_tags
                                             self.refresh_tags_display()
                                             # 通知主界面更新
@@ -163,7 +176,7 @@ class TaskDetailComponent:
                                 max=20
                             ).classes('w-12 sm:w-16').props('borderless dense')
                             # 添加失去焦点时自动保存
-                            self.estimated_pomodoros_input.on('blur', lambda: self.auto_save_field('estimated_pomodoros'))
+                            self.estimated_pomodoros_input.on('blur', lambda: self.auto_save_field('estimated_pomodoros', flush=True))
                             ui.label('个').classes('text-xs sm:text-sm')
                             
                             # AI 预估按钮
@@ -187,7 +200,7 @@ class TaskDetailComponent:
                                 value=due_date_value or ''
                             ).props('type=date borderless').classes('flex-1 min-w-0')
                             # 添加失去焦点时自动保存
-                            self.due_date_input.on('blur', lambda: self.auto_save_field('due_date'))
+                            self.due_date_input.on('blur', lambda: self.auto_save_field('due_date', flush=True))
                             
                             # 添加清除截止日期按钮
                             ui.button(icon='clear', on_click=self.clear_due_date).props('flat round dense color=grey size=sm').tooltip('清除截止日期')
@@ -223,7 +236,7 @@ class TaskDetailComponent:
                                 value=self.selected_task.get('description', '') or ''
                             ).classes('w-full min-h-20').props('borderless auto-grow')
                             # 添加失去焦点时自动保存
-                            self.description_input.on('blur', lambda: self.auto_save_field('description'))
+                            self.description_input.on('blur', lambda: self.auto_save_field('description', flush=True))
                     
                     # 底部区域
                     ui.space().classes('flex-grow min-h-4')
@@ -244,6 +257,7 @@ class TaskDetailComponent:
 
     def close_task_detail(self):
         """关闭任务详情面板"""
+        self.flush_pending_changes()
         self.task_detail_open = False
         self.selected_task = None
         self.initial_task_state = None  # 清理初始状态
@@ -277,6 +291,18 @@ class TaskDetailComponent:
             ui.notify('任务标题为空，无法进行AI预估', type='warning')
             return
 
+        # 先用历史任务在本地预估，置信度足够时不再调用AI
+        local_estimate = self.pomodoro_estimator.estimate(
+            self.user_id, task_title, task_description,
+            exclude_task_id=self.selected_task.get('task_id')
+        )
+        if local_estimate and local_estimate['confidence'] >= AI_CONFIG['local_estimate_min_confidence']:
+            estimated_value = local_estimate['pomodoros']
+            self.estimated_pomodoros_input.set_value(estimated_value)
+            self.auto_save_field('estimated_pomodoros', new_value=estimated_value)
+            ui.notify(f'根据相似的历史任务预估番茄钟数量为: {estimated_value} 个', type='positive')
+            return
+
         notification_handle = ui.notify('正在使用AI预估番茄钟数量，请稍候...', type='info', timeout=1) # timeout=0 表示不自动关闭
 
         try:
@@ -284,12 +310,17 @@ class TaskDetailComponent:
             estimated_value = await self.ai_assistant.estimate_pomodoro_count(
                 task_title=task_title,
                 task_description=task_description,
-                pomodoro_duration=pomodoro_duration
+                pomodoro_duration=pomodoro_duration,
+                user_id=self.user_id
             )
 
             if not self.task_detail_open: # 再次检查，如果面板已关闭则不更新UI
                 return
 
+            if estimated_value is None and local_estimate:
+                # AI不可用时退回置信度较低的本地预估
+                estimated_value = local_estimate['pomodoros']
+
             if estimated_value is not None:
                 self.estimated_pomodoros_input.set_value(estimated_value)
                 self.auto_save_field('estimated_pomodoros', new_value=estimated_value)
@@ -301,44 +332,24 @@ class TaskDetailComponent:
                 if notification_handle: # 检查是否为None
                     notification_handle.close() # 关闭初始通知
                 ui.notify(f'AI预估过程中发生错误: {str(e)}', type='negative')
+
     def clear_due_date(self):
         """清除截止日期"""
         if not self.selected_task or not self.task_detail_open:
             ui.notify('无法清除截止日期：没有选中的任务', type='warning')
             return
         
-        try:
-            # 清空输入框
-            if self.due_date_input:
-                self.due_date_input.value = ''
-            
-            # 保存到数据库，传递当前视图信息
-            task_id = self.selected_task['task_id']
-            result = self.task_manager.update_task(
-                task_id=task_id,
-                due_date=None,
-                current_view=self.current_view
-            )
-            
-            if result.get('success', False):
-                self.selected_task['due_date'] = None
-                ui.notify('截止日期已清除', type='positive', timeout=1500)
-                
-                # 检查是否需要显示视图变更通知
-                view_change = result.get('view_change')
-                if view_change and view_change.get('should_remove'):
-                    ui.notify(view_change['notification'], type='info', timeout=3000)
-                
-                self.on_task_update()
-            else:
-                ui.notify('清除截止日期失败：数据库更新失败', type='negative')
-                
-        except Exception as e:
-            ui.notify(f'清除截止日期失败：{str(e)}', type='negative')
+        # 清空输入框，与其他待保存的修改一起立即写入
+        if self.due_date_input:
+            self.due_date_input.value = ''
+        self.queue_field_change('due_date', None, flush=True)
 
 
     def show_task_detail(self, task: Dict, container):
         """显示任务详情"""
+        # 切换任务前先保存上一个任务未写入的修改
+        if self.pending_task_id is not None and self.pending_task_id != task.get('task_id'):
+            self.flush_pending_changes()
         self.selected_task = task
         # 保存初始状态，用于重置功能
         self.initial_task_state = {
@@ -371,7 +382,7 @@ class TaskDetailComponent:
         
         def confirm_delete():
             try:
-                success = self.task_manager.delete_task(self.selected_task['task_id'])
+                success = self.task_manager.delete_task(self.selected_task['task_id'], user_id=self.user_id)
                 if success:
                     ui.notify('任务删除成功', type='positive')
                     # 通知父组件更新任务列表
@@ -486,8 +497,9 @@ class TaskDetailComponent:
                         tag_names = [t['name'] for t in updated_tags]
                         if self.task_manager.update_task(
                             task_id=self.selected_task['task_id'],
-                            tags=tag_names
-                        ):
+                            tags=tag_names,
+                            user_id=self.user_id
+                        ).get('success', False):
                             self.selected_task['tags'] = updated_tags
                             self.refresh_tags_display()
                             # 通知主界面更新
@@ -555,8 +567,9 @@ class TaskDetailComponent:
         tag_names = [tag['name'] for tag in current_tags] + [tag_name]
         if self.task_manager.update_task(
             task_id=self.selected_task['task_id'],
-            tags=tag_names
-        ):
+            tags=tag_names,
+            user_id=self.user_id
+        ).get('success', False):
             # 重新获取任务数据以获取更新后的标签信息
             updated_task = self.task_manager.get_task_by_id(self.selected_task['task_id'])
             if updated_task:
@@ -586,8 +599,11 @@ class TaskDetailComponent:
         """显示编辑标签对话框"""
         self.tag_edit_dialog.show_edit_dialog(user_tag)
 
-    def auto_save_field(self, field_name: str, new_value: any = None):
-        """自动保存单个字段。可以接收来自事件的值，也可以自己从组件获取。"""
+    def auto_save_field(self, field_name: str, new_value: any = None, flush: bool = False):
+        """
+        自动保存单个字段。可以接收来自事件的值，也可以自己从组件获取。
+        修改先进入待保存队列，flush=True（如失去焦点）时立即写入，否则等待防抖时间后合并写入。
+        """
         if not self.selected_task or not self.task_detail_open:
             return
 
@@ -636,38 +652,94 @@ class TaskDetailComponent:
             if field_name in ['priority', 'repeat_cycle'] and original_value is None:
                 original_value = 'medium' if field_name == 'priority' else 'none'
             
-            # 检查是否有变化
-            if current_value == original_value:
+            # 检查是否有变化（与已保存的值和待保存的值都相同才跳过）
+            if current_value == self.pending_changes.get(field_name, original_value):
+                if flush:
+                    self.flush_pending_changes()
                 return  # 没有变化，不需要保存
 
-            # 构建并执行更新
-            update_params = {
-                'task_id': self.selected_task['task_id'],
-                field_name: current_value,
-                'current_view': self.current_view  # 传递当前视图信息
-            }
-            
-            result = self.task_manager.update_task(**update_params)
-            
-            if result.get('success', False):
-                self.selected_task[field_name] = current_value
-                field_display_names = {
-                    'title': '标题', 'description': '描述', 'due_date': '到期日',
-                    'priority': '优先级', 'estimated_pomodoros': '预估番茄钟', 'repeat_cycle': '重复周期'
-                }
-                field_display = field_display_names.get(field_name, field_name)
-                ui.notify(f'{field_display}已保存', type='info', timeout=1500, position='top')
-                
-                # 检查是否需要显示视图变更通知
-                view_change = result.get('view_change')
-                if view_change and view_change.get('should_remove'):
-                    ui.notify(view_change['notification'], type='info', timeout=3000)
-                
-                self.on_task_update()
-            else:
-                ui.notify(f'保存失败', type='negative')
+            self.queue_field_change(field_name, current_value, flush=flush)
 
         except (ValueError, TypeError) as e:
             ui.notify(f'输入值无效: {e}', type='warning')
         except Exception as e:
-            ui.notify(f'保存失败: {str(e)}', type='negative')
\ No newline at end of file
+            ui.notify(f'保存失败: {str(e)}', type='negative')
+
+    def queue_field_change(self, field_name: str, value, flush: bool = False):
+        """将字段修改加入待保存队列，并重新开始防抖计时"""
+        if not self.selected_task:
+            return
+        task_id = self.selected_task['task_id']
+        if self.pending_task_id is not None and self.pending_task_id != task_id:
+            self.flush_pending_changes()
+        self.pending_task_id = task_id
+        self.pending_changes[field_name] = value
+
+        self._cancel_save_timer()
+        if flush or not self.debounce_seconds:
+            self.flush_pending_changes()
+        else:
+            # 计时器挂在页面根布局上，详情面板重建时不会被一起删除
+            with ui.context.client.layout:
+                self.save_timer = ui.timer(self.debounce_seconds, self.flush_pending_changes, once=True)
+
+    def _cancel_save_timer(self):
+        """取消尚未触发的防抖计时器"""
+        if self.save_timer:
+            self.save_timer.cancel()
+            self.save_timer = None
+
+    def flush_pending_changes(self, update_ui: bool = True) -> bool:
+        """
+        将待保存的修改合并为一次更新写入数据库
+
+        Args:
+            update_ui: 是否显示保存提示并更新任务列表（页面断开时只写入数据库）
+
+        Returns:
+            没有待保存的修改或写入成功返回True
+        """
+        self._cancel_save_timer()
+        if not self.pending_changes:
+            return True
+
+        task_id = self.pending_task_id
+        changes, self.pending_changes, self.pending_task_id = self.pending_changes, {}, None
+        task = self.selected_task if self.selected_task and self.selected_task['task_id'] == task_id else None
+        old_due_date = task.get('due_date') if task else None
+
+        # 所属用户和视图变更都由调用方提供，避免写入前再查询任务
+        result = self.task_manager.update_task(task_id=task_id, user_id=self.user_id, **changes)
+        if not result.get('success', False):
+            if update_ui:
+                ui.notify(result.get('error') or '保存失败', type='negative')
+            return False
+
+        view_change = None
+        if 'due_date' in changes and self.current_view:
+            view_change = self.task_manager.check_and_notify_view_change(
+                task_id, old_due_date, changes['due_date'], self.current_view
+            )
+
+        if task:
+            task.update(changes)
+
+        if not update_ui:
+            return True
+
+        field_display_names = {
+            'title': '标题', 'description': '描述', 'due_date': '到期日',
+            'priority': '优先级', 'estimated_pomodoros': '预估番茄钟', 'repeat_cycle': '重复周期'
+        }
+        field_display = '、'.join(field_display_names.get(field, field) for field in changes)
+        ui.notify(f'{field_display}已保存', type='info', timeout=1500, position='top')
+
+        # 检查是否需要显示视图变更通知
+        if view_change and view_change.get('should_remove'):
+            ui.notify(view_change['notification'], type='info', timeout=3000)
+
+        if task and self.on_task_patched:
+            self.on_task_patched(task)
+        else:
+            self.on_task_update()
+        return True
\ No newline at end of file
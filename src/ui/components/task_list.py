@@ -5,7 +5,9 @@
 from nicegui import ui
 from datetime import date
 from typing import Dict, List, Callable, Optional
+from config import AI_CONFIG
 from src.services.ai_assistant import AIAssistant
+from src.services.task_ranker import TaskRanker
 
 
 class TaskListComponent:
@@ -21,6 +23,9 @@ class TaskListComponent:
         self.current_tasks: List[Dict] = []
         self.current_view = 'my_day'
         self.ai_assistant = AIAssistant()
+        self.task_ranker = TaskRanker(task_manager.db)
+        self.task_rows: Dict[int, ui.row] = {}  # task_id -> 待完成任务的卡片，用于单行更新
+        self.stats_container = None
 
     def create_add_task_input(self, container):
         """创建添加任务输入框"""
@@ -48,39 +53,26 @@ class TaskListComponent:
                 ''')
 
         async def handle_smart_recommendation():
-            # 调用AI服务获取推荐任务
-            ui.notify('正在生成智能推荐任务...', type='info', timeout=1) # 显示加载提示
+            # 先用本地排序引擎给出候选，避免把全部任务发给AI
+            ranked_tasks = self.task_ranker.rank(self.current_tasks, user_id=self.current_user['user_id'])
             
-            # 获取当前任务列表标题
-            current_task_titles = [task['title'] for task in self.current_tasks if task['status'] == 'pending']
-            
-            if not current_task_titles:
+            if not ranked_tasks:
                 ui.notify('当前没有待办任务可供推荐', type='warning')
                 return
-
-            # 修改提示词，使其旨在从现有任务中选择一个最相关的任务标题
-            prompt = f"请从以下任务列表中选择一个你认为最相关或最紧急的任务标题，只返回一个任务标题，不要有其他任何内容。任务列表：{', '.join(current_task_titles)}"
-            system_prompt = "你是一个任务推荐助手，只返回一个任务标题，不要有其他任何内容。"
             
-            recommended_task_title = await self.ai_assistant.call_llm_api(prompt, system_prompt)
-            ui.notify('智能推荐任务生成完毕', type='positive', timeout=1000) # 隐藏加载提示
-
-            if recommended_task_title:
-                recommended_task_title = recommended_task_title.strip()
-                # 找到对应的现有任务
-                found_task = next((task for task in self.current_tasks if task['title'] == recommended_task_title), None)
-                
-                if found_task:
-                    print(f"DEBUG: Calling highlight_task for task_id: {found_task['task_id']} from handle_smart_recommendation")
-                    await self.highlight_task(found_task['task_id'])
-                    print(f"DEBUG: highlight_task called for task_id: {found_task['task_id']} from handle_smart_recommendation")
-                    ui.notify(f'推荐任务: {found_task["title"]}', type='positive')
-                else:
-                    print(f"DEBUG: Recommended task '{recommended_task_title}' not found in current_tasks.")
-                    ui.notify(f'未能找到推荐任务: {recommended_task_title}，请稍后再试', type='warning')
-            else:
-                print("DEBUG: Failed to get smart recommendation from AI service.")
-                ui.notify('未能获取智能推荐任务，请检查AI服务', type='negative')
+            recommended_task = ranked_tasks[0]
+            
+            # 可选：只把前K个候选交给AI重排，按task_id匹配结果
+            top_k = AI_CONFIG['rerank_top_k']
+            if top_k > 1 and len(ranked_tasks) > 1 and AI_CONFIG['api_key']:
+                ui.notify('正在生成智能推荐任务...', type='info', timeout=1)
+                candidates = ranked_tasks[:top_k]
+                ordered_ids = await self.ai_assistant.rerank_tasks(candidates, user_id=self.current_user['user_id'])
+                candidates_by_id = {task['task_id']: task for task in candidates}
+                recommended_task = candidates_by_id.get(ordered_ids[0], recommended_task)
+            
+            await self.highlight_task(recommended_task['task_id'])
+            ui.notify(f'推荐任务: {recommended_task["title"]}', type='positive')
 
         with container:
             with ui.row().classes('w-full mb-6 items-center'): # Add items-center for vertical alignment
@@ -88,8 +80,45 @@ class TaskListComponent:
                 # 使用on方法监听键盘事件
                 task_input.on('keydown', handle_enter_key)
                 ui.button(icon='auto_awesome', on_click=handle_smart_recommendation).props('flat round color=purple').tooltip('智能推荐任务') # New button
+                ui.button(icon='batch_prediction', on_click=self.estimate_unestimated_tasks).props('flat round color=purple').tooltip('预估全部未预估任务')
                 ui.button(icon='add', on_click=handle_button_add).props('flat round color=primary')
 
+    def get_unestimated_tasks(self) -> List[Dict]:
+        """获取当前视图中从未设置过预估的待办任务（用户有意设置的1个番茄不会被覆盖）"""
+        return [
+            task for task in self.current_tasks
+            if task['status'] == 'pending' and not task.get('pomodoros_estimated')
+        ]
+
+    async def estimate_unestimated_tasks(self):
+        """一次AI请求批量预估当前视图中所有未预估的任务"""
+        tasks = self.get_unestimated_tasks()
+        if not tasks:
+            ui.notify('当前视图没有需要预估的任务', type='info')
+            return
+
+        ui.notify(f'正在使用AI预估 {len(tasks)} 个任务...', type='info', timeout=1)
+
+        user_settings = self.settings_manager.get_user_settings(self.current_user['user_id'])
+        pomodoro_duration = user_settings.get('pomodoro_work_duration', 25) if user_settings else 25
+
+        estimates = await self.ai_assistant.estimate_pomodoro_counts(
+            tasks, pomodoro_duration, user_id=self.current_user['user_id']
+        )
+        if not estimates:
+            ui.notify('AI未能给出有效预估，请检查AI服务', type='negative')
+            return
+
+        updated_count = 0
+        for task_id, count in estimates.items():
+            result = self.task_manager.update_task(task_id=task_id, estimated_pomodoros=count,
+                                                   user_id=self.current_user['user_id'])
+            if result.get('success', False):
+                updated_count += 1
+
+        ui.notify(f'已预估 {updated_count}/{len(tasks)} 个任务', type='positive')
+        self.on_refresh()
+
     def create_quick_task(self, title: str): # Modified function signature
         """快速创建任务"""
         # 根据当前视图设置默认属性
@@ -126,6 +155,7 @@ class TaskListComponent:
     def create_task_list(self, container):
         """创建任务列表（卡片式）"""
         pending_tasks = [task for task in self.current_tasks if task['status'] == 'pending']
+        self.task_rows = {}
         
         with container:
             if not pending_tasks:
@@ -136,8 +166,8 @@ class TaskListComponent:
                 for task in pending_tasks:
                     self.create_task_item(task)
 
-    def create_task_item(self, task: Dict):
-        """创建任务项（卡片式）"""
+    def create_task_item(self, task: Dict, card_element=None):
+        """创建任务项（卡片式），传入已有卡片时清空后按新数据重建"""
         
         # 添加调试输出，显示正在创建的任务项的详细信息
         print(f"\n--- 创建任务项: {task.get('title', 'N/A')} ---")
@@ -147,7 +177,8 @@ class TaskListComponent:
         print(f"status: {task.get('status', 'N/A')}")
         
         def toggle_complete():
-            self.task_manager.toggle_task_status(task['task_id'], 'completed')
+            self.task_manager.toggle_task_status(task['task_id'], 'completed', user_id=self.current_user['user_id'],
+                                                repeat_cycle=task.get('repeat_cycle'))
             self.on_refresh()
         
         def start_pomodoro():
@@ -161,7 +192,12 @@ class TaskListComponent:
         if task.get('due_date') and task['due_date'] < date.today():
             card_classes = 'task-item w-full p-4 bg-red-50 rounded shadow-sm items-center gap-3'
 
-        card_element = ui.row().classes(card_classes).props(f'data-task-id="{task["task_id"]}"')
+        if card_element is None:
+            card_element = ui.row().classes(card_classes).props(f'data-task-id="{task["task_id"]}"')
+        else:
+            card_element.clear()
+            card_element.classes(replace=card_classes)
+        self.task_rows[task['task_id']] = card_element
         
         # 如果是新创建的任务，添加短暂高亮效果
         if task.get('is_newly_created'):
@@ -300,7 +336,7 @@ class TaskListComponent:
     def create_completed_task_item(self, task: Dict):
         """创建已完成任务项（卡片式）"""
         def toggle_uncomplete():
-            self.task_manager.toggle_task_status(task['task_id'], 'pending')
+            self.task_manager.toggle_task_status(task['task_id'], 'pending', user_id=self.current_user['user_id'])
             self.on_refresh()
         
         with ui.row().classes('w-full p-3 bg-white rounded shadow-sm items-center gap-3 opacity-70'):
@@ -313,12 +349,14 @@ class TaskListComponent:
                     ui.label(description).classes('text-sm text-grey-500 line-through')
                 
                 # 完成时间显示
-                updated_at = task.get('updated_at', '')
-                if updated_at:
-                    if isinstance(updated_at, str):
-                        # 只显示日期部分
-                        date_part = updated_at.split()[0] if ' ' in updated_at else updated_at
-                        ui.label(f"完成于: {date_part}").classes('text-xs text-grey-500')
+                completed_at = task.get('completed_at')
+                if completed_at:
+                    # MySQL返回datetime，SQLite返回字符串，只显示日期部分
+                    if isinstance(completed_at, date):
+                        date_part = completed_at.strftime('%Y-%m-%d')
+                    else:
+                        date_part = str(completed_at).split()[0]
+                    ui.label(f"完成于: {date_part}").classes('text-xs text-grey-500')
 
     def set_current_tasks(self, tasks: List[Dict]):
         """设置当前任务列表"""
@@ -346,8 +384,36 @@ class TaskListComponent:
         """设置当前视图"""
         self.current_view = view
 
+    def patch_task_row(self, task: Dict) -> bool:
+        """
+        只重建单个待完成任务的卡片
+
+        Returns:
+            找到对应卡片并更新返回True，否则需要调用方整体重建列表
+        """
+        card_element = self.task_rows.get(task['task_id'])
+        if card_element is None or card_element.is_deleted or task.get('status') != 'pending':
+            return False
+        self.create_task_item(task, card_element)
+        return True
+
+    def remove_task_row(self, task_id: int) -> bool:
+        """移除单个任务的卡片"""
+        card_element = self.task_rows.pop(task_id, None)
+        if card_element is None or card_element.is_deleted:
+            return False
+        card_element.delete()
+        return True
+
+    def refresh_stats_bar(self):
+        """按当前任务列表重建统计栏"""
+        if self.stats_container and not self.stats_container.is_deleted:
+            self.stats_container.clear()
+            self.create_stats_bar(self.stats_container)
+
     def create_stats_bar(self, container):
         """创建统计栏"""
+        self.stats_container = container
         stats = self.get_view_stats()
         
         with container:
@@ -12,6 +12,7 @@ from ..components.statistics_dashboard import StatisticsDashboardComponent
 from ..components.task_detail import TaskDetailComponent
 from ..components.settings_dialog import SettingsDialogComponent
 from ..components.main_content import MainContentComponent
+from ...services import event_bus as events
 
 
 class MainPage:
@@ -50,6 +51,11 @@ class MainPage:
         self.settings_component = None
         self.main_content_component = None
 
+        # 变更事件订阅（同一用户其他标签页/设备的修改）
+        self.event_bus = events.get_event_bus()
+        self.subscription_id: Optional[str] = None
+        self.client_id: Optional[str] = None
+
     def create_index_page(self, on_logout: Callable):
         """创建首页路由"""
         def index():
@@ -112,6 +118,119 @@ class MainPage:
         # 添加CSS样式
         self.add_css_styles()
 
+        # 订阅该用户在其他会话中的修改，页面关闭时取消订阅
+        self.subscribe_changes()
+
+    def subscribe_changes(self):
+        """订阅当前用户的数据变更事件"""
+        self.unsubscribe_changes()
+        client = ui.context.client
+        self.client_id = client.id
+        self.subscription_id = self.event_bus.subscribe(self.current_user['user_id'], self.handle_change_event)
+        client.on_delete(self.unsubscribe_changes)
+        # 页面关闭前写入详情面板中未保存的修改
+        client.on_disconnect(lambda: self.task_detail_component.flush_pending_changes(update_ui=False))
+
+    def unsubscribe_changes(self):
+        """取消变更事件订阅"""
+        if self.subscription_id:
+            self.event_bus.unsubscribe(self.subscription_id)
+            self.subscription_id = None
+
+    def handle_change_event(self, event: Dict):
+        """
+        处理其他会话发布的变更事件，只更新受影响的部分：
+        单个任务的变更只重新查询该任务，标签和批量变更才重新加载列表
+        """
+        if not self.current_user or event.get('origin') == self.client_id:
+            # 本页面发起的修改已经在回调中刷新过
+            return
+
+        event_type = event.get('type')
+        if event_type in (events.TASK_CREATED, events.TASK_UPDATED, events.TASK_DELETED):
+            self.apply_task_change(event['task_id'], event_type)
+        elif event_type in (events.TAG_CHANGED, events.TAG_DELETED, events.TASKS_BULK_UPDATED):
+            if event_type == events.TAG_DELETED and self.current_view == f"tag_{event.get('tag_id')}":
+                self.current_view = 'all'
+            self.refresh_current_tasks()
+            self.load_user_data()
+            if self.sidebar_component:
+                self.sidebar_component.refresh_sidebar_tags()
+            self.render_main_content()
+        elif event_type == events.SETTINGS_UPDATED:
+            if self.pomodoro_component:
+                self.pomodoro_component.on_settings_updated()
+
+    def apply_task_change(self, task_id: int, event_type: str):
+        """按单个任务的变更增量更新当前任务列表和详情面板"""
+        task = None if event_type == events.TASK_DELETED else self.task_manager.get_task_by_id(task_id)
+        index = next((i for i, t in enumerate(self.current_tasks) if t['task_id'] == task_id), None)
+
+        in_view = task is not None and self.task_manager.task_matches_view(task, self.current_view)
+
+        if in_view or index is not None:
+            if not in_view:
+                self.current_tasks.pop(index)
+            elif index is None:
+                self.current_tasks.insert(0, task)
+            else:
+                self.current_tasks[index] = task
+            if self.task_list_component:
+                self.task_list_component.set_current_tasks(self.current_tasks)
+            self.render_main_content()
+        self.refresh_view_counts()
+
+        # 详情面板正在显示该任务
+        if self.task_detail_open and self.selected_task and self.selected_task['task_id'] == task_id:
+            if task is None:
+                self.close_task_detail()
+            else:
+                self.selected_task = task
+                self.task_detail_component.show_task_detail(task, self.task_detail_container)
+
+    def patch_task(self, task: Dict):
+        """任务详情保存后只更新该任务所在的行和统计栏，不重建整个页面"""
+        index = next((i for i, t in enumerate(self.current_tasks) if t['task_id'] == task['task_id']), None)
+        in_view = self.task_manager.task_matches_view(task, self.current_view)
+
+        if in_view and index is not None:
+            self.current_tasks[index] = task
+            patched = self.task_list_component.patch_task_row(task)
+        elif not in_view and index is not None:
+            self.current_tasks.pop(index)
+            patched = self.task_list_component.remove_task_row(task['task_id'])
+        elif in_view:
+            # 修改后新进入当前视图的任务
+            self.current_tasks.insert(0, task)
+            patched = False
+        else:
+            patched = True  # 不在当前视图中的任务无需处理
+
+        self.task_list_component.current_tasks = self.current_tasks
+        if patched:
+            self.task_list_component.refresh_stats_bar()
+        else:
+            self.render_main_content()
+        self.refresh_view_counts()
+
+    def refresh_view_counts(self):
+        """更新侧边栏视图数量徽标"""
+        if self.sidebar_component:
+            self.sidebar_component.refresh_view_counts()
+
+    def render_main_content(self):
+        """按当前任务列表重新渲染主内容区域（统计视图不受任务变更影响）"""
+        if not self.main_content_component or not self.main_content_container:
+            return
+        if self.current_view == 'statistics':
+            return
+        self.main_content_component.update_user_tags(self.user_tags)
+        self.main_content_component.create_main_content(
+            self.main_content_container,
+            self.current_view,
+            self.task_list_component
+        )
+
     def load_user_data(self):
         """加载用户数据"""
         if self.current_user:
@@ -167,7 +286,8 @@ class MainPage:
             self.refresh_and_update_ui,
             self.start_pomodoro_for_task,
             self.close_task_detail,
-            self.current_user['user_id']
+            self.current_user['user_id'],
+            on_task_patched=self.patch_task
         )
         
         # 设置组件
@@ -227,6 +347,8 @@ class MainPage:
 
     def on_view_change(self, view_type: str):
         """视图切换回调"""
+        if self.task_detail_component:
+            self.task_detail_component.flush_pending_changes()
         self.current_view = view_type
         
         # 更新任务详情组件的当前视图
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+服务层基准测试脚本（不属于单元测试，需手动运行）
+
+对本地数据库中的基准用户（由 tests/data_generator.py 生成）重复调用热点入口，
+统计每个入口的中位数和P95耗时，与保存的基线比较，中位数变慢超过阈值时以非零状态退出。
+所有缓存在每次调用前清空，测量的是未命中缓存时的查询耗时。
+
+用法:
+    python tests/benchmark.py --generate --users 3 --tasks-per-user 5000   # 生成数据并测试
+    python tests/benchmark.py --save-baseline                               # 记录基线
+    python tests/benchmark.py --threshold 0.2                               # 与基线比较
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.data_generator import add_scale_arguments, benchmark_email, seed_database
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# 耗时过短的入口受计时抖动影响大，基线中位数低于该值时按该值比较
+MIN_COMPARABLE_MS = 1.0
+
+
+def build_benchmarks(db) -> Dict[str, Callable[[int], object]]:
+    """热点入口：名称到 fn(user_id) 的映射"""
+    from src.services.report_cache import RevisionedCache
+    from src.services.task_manager import TaskManager
+    from src.services.statistics_manager import StatisticsManager
+    from src.services.pomodoro_manager import PomodoroManager
+    from src.ui.components.statistics_dashboard import StatisticsDashboardComponent
+
+    cache = RevisionedCache()
+    task_manager = TaskManager(db, report_cache=cache)
+    statistics_manager = StatisticsManager(db, report_cache=cache)
+    dashboard = StatisticsDashboardComponent(statistics_manager, PomodoroManager(db), {'user_id': None})
+    dashboard.report_cache = cache
+
+    def uncached(fn: Callable[[int], object]) -> Callable[[int], object]:
+        def run(user_id: int):
+            cache.invalidate()
+            return fn(user_id)
+        return run
+
+    benchmarks = {
+        f"tasks_by_view.{view}": (lambda user_id, view=view: task_manager.get_tasks_by_view(user_id, view))
+        for view in ('my_day', 'planned', 'important', 'all')
+    }
+    benchmarks.update({
+        'view_counts': task_manager.get_view_counts,
+        'task_summary_stats': task_manager.get_task_summary_stats,
+        'summary_report.7d': lambda user_id: statistics_manager.generate_summary_report(user_id, 7),
+        'summary_report.30d': lambda user_id: statistics_manager.generate_summary_report(user_id, 30),
+        'dashboard.today_detailed_stats': dashboard.get_today_detailed_stats,
+        'dashboard.weekly_completion': dashboard.get_weekly_completion_data,
+        'dashboard.priority_distribution': dashboard.get_priority_distribution_data,
+        'dashboard.weekly_focus': dashboard.get_weekly_focus_data,
+        'dashboard.task_status': dashboard.get_task_status_data,
+        'dashboard.monthly_tasks': dashboard.get_monthly_task_data,
+        'dashboard.weekly_data': dashboard.get_weekly_data,
+    })
+    return {name: uncached(fn) for name, fn in benchmarks.items()}
+
+
+def time_benchmark(fn: Callable[[int], object], user_ids: List[int], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """对每个用户调用 repeat 次，返回耗时统计（毫秒）"""
+    for user_id in user_ids:
+        for _ in range(warmup):
+            fn(user_id)
+    samples = []
+    for _ in range(repeat):
+        for user_id in user_ids:
+            started = time.perf_counter()
+            fn(user_id)
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'samples': len(samples)
+    }
+
+
+def compare_results(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict]:
+    """
+    与基线比较中位数耗时
+
+    Returns:
+        变慢超过阈值的入口列表 [{'name', 'baseline_ms', 'current_ms', 'ratio'}]，基线中没有的入口不比较
+    """
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        baseline_ms = max(baseline[name]['median_ms'], MIN_COMPARABLE_MS)
+        ratio = result['median_ms'] / baseline_ms
+        if ratio > 1 + threshold:
+            regressions.append({'name': name, 'baseline_ms': baseline[name]['median_ms'],
+                                'current_ms': result['median_ms'], 'ratio': round(ratio, 2)})
+    return regressions
+
+
+def load_baseline(path: str) -> Dict:
+    """读取基线文件，不存在时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Dict[str, Dict], scale: Dict):
+    """保存基线（附带数据规模和运行环境，规模不同的基线不可比较）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': scale,
+            'results': results
+        }, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def main():
+    """主函数"""
+    from src.database.database import create_database_manager, UserManager
+
+    parser = argparse.ArgumentParser(description='服务层基准测试')
+    add_scale_arguments(parser)
+    parser.add_argument('--generate', action='store_true', help='测试前生成基准数据（已存在的用户跳过）')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用户的重复次数')
+    parser.add_argument('--only', nargs='*', default=None, help='只运行名称以这些前缀开头的入口')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='中位数变慢超过该比例视为退化')
+    args = parser.parse_args()
+    scale = {key: getattr(args, key) for key in
+             ('seed', 'users', 'tasks_per_user', 'tags_per_user', 'years', 'sessions_per_day')}
+
+    db = create_database_manager()
+    if not db.connection:
+        print('无法连接数据库')
+        return 1
+    try:
+        if args.generate:
+            user_ids = seed_database(db, **scale)
+        else:
+            user_manager = UserManager(db)
+            users = [user_manager.get_user_by_email(benchmark_email(args.seed, index)) for index in range(args.users)]
+            user_ids = [user['user_id'] for user in users if user]
+        if not user_ids:
+            print('没有基准用户，请先使用 --generate 生成数据')
+            return 1
+
+        benchmarks = build_benchmarks(db)
+        if args.only:
+            benchmarks = {name: fn for name, fn in benchmarks.items()
+                          if any(name.startswith(prefix) for prefix in args.only)}
+
+        results = {}
+        print(f"{'入口':<36} {'中位数(ms)':>12} {'P95(ms)':>10}")
+        for name, fn in benchmarks.items():
+            results[name] = time_benchmark(fn, user_ids, args.repeat)
+            print(f"{name:<36} {results[name]['median_ms']:>12.2f} {results[name]['p95_ms']:>10.2f}")
+
+        if args.save_baseline:
+            save_baseline(args.baseline, results, scale)
+            print(f"\n基线已保存: {args.baseline}")
+            return 0
+
+        baseline = load_baseline(args.baseline)
+        if not baseline:
+            print('\n没有基线，使用 --save-baseline 记录')
+            return 0
+        if baseline.get('scale') != scale:
+            print(f"\n提示: 基线的数据规模 {baseline.get('scale')} 与本次不同，比较结果仅供参考")
+        regressions = compare_results(results, baseline.get('results', {}), args.threshold)
+        if not regressions:
+            print(f"\n与基线相比没有超过 {args.threshold:.0%} 的退化")
+            return 0
+        print(f"\n性能退化（超过 {args.threshold:.0%}）:")
+        for item in regressions:
+            print(f"  {item['name']}: {item['baseline_ms']:.2f}ms -> {item['current_ms']:.2f}ms (x{item['ratio']})")
+        return 1
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+基准测试数据生成脚本（不属于单元测试，需手动运行）
+
+按随机种子生成可复现的用户、标签、任务和多年的专注记录，写入本地数据库，供 tests/benchmark.py 使用。
+同一种子和规模生成的数据完全相同；已存在的基准用户会被跳过，重复运行不会重复写入。
+
+用法:
+    python tests/data_generator.py --users 5 --tasks-per-user 5000 --years 3 --seed 42
+"""
+
+import os
+import sys
+import random
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCHMARK_PASSWORD = 'benchmark'
+
+TAG_POOL = ['工作', '学习', '运动', '阅读', '家务', '购物', '项目A', '项目B', '会议', '写作',
+            '编程', '健康', '财务', '旅行', '社交', '复习']
+TAG_COLORS = ['#757575', '#e53935', '#fb8c00', '#43a047', '#1e88e5', '#8e24aa']
+TITLE_VERBS = ['完成', '整理', '准备', '复习', '撰写', '检查', '安排', '回复', '修改', '阅读']
+TITLE_OBJECTS = ['周报', '会议纪要', '课程作业', '项目计划', '邮件', '代码评审', '读书笔记', '预算表', '演示文稿', '测试用例']
+
+PRIORITY_WEIGHTS = {'high': 2, 'medium': 5, 'low': 3}
+REPEAT_WEIGHTS = {'none': 90, 'daily': 4, 'weekly': 4, 'monthly': 2}
+
+
+def benchmark_email(seed: int, index: int) -> str:
+    """基准用户邮箱，种子不同的数据集互不冲突"""
+    return f"bench-{seed}-{index}@example.com"
+
+
+def generate_user(rng: random.Random, tasks: int, tags: int, years: int,
+                  sessions_per_day: float, today: date) -> Dict[str, List]:
+    """
+    生成一个用户的数据（不含数据库ID，任务和标签以列表下标互相引用）
+
+    Returns:
+        {'tags': [(name, color)], 'tasks': [字段元组], 'task_tags': [(任务下标, 标签下标)],
+         'sessions': [(任务下标或None, 类型, 开始, 结束, 分钟, 是否完成)]}
+    """
+    history_days = years * 365
+    history_start = today - timedelta(days=history_days)
+
+    tag_rows = [(name, rng.choice(TAG_COLORS)) for name in rng.sample(TAG_POOL, min(tags, len(TAG_POOL)))]
+
+    task_rows, task_tag_rows = [], []
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+    repeats, repeat_weights = zip(*REPEAT_WEIGHTS.items())
+    for index in range(tasks):
+        # 越近的任务越多：创建时间偏向最近
+        created = history_start + timedelta(days=int(history_days * rng.random() ** 0.5))
+        created_at = datetime.combine(created, time()) + timedelta(seconds=rng.randrange(8 * 3600, 23 * 3600))
+        due_date = None
+        if rng.random() < 0.7:
+            due_date = created + timedelta(days=rng.randint(0, 14))
+        # 很久以前的任务大多已完成，最近的任务大多待办
+        age_days = (today - created).days
+        completed = rng.random() < min(0.95, 0.3 + age_days / 60)
+        completed_at = None
+        if completed:
+            completed_at = min(created_at + timedelta(hours=rng.randint(1, 24 * 10)),
+                               datetime.combine(today, time(23, 59)))
+        estimated = rng.randint(1, 6)
+        task_rows.append((
+            f"{rng.choice(TITLE_VERBS)}{rng.choice(TITLE_OBJECTS)} #{index + 1}",
+            rng.choice([None, '', '详见附件', '需要和团队确认细节']),
+            due_date,
+            rng.choices(priorities, priority_weights)[0],
+            'completed' if completed else 'pending',
+            rng.choices(repeats, repeat_weights)[0],
+            estimated,
+            rng.randint(0, estimated + 1) if completed else rng.randint(0, estimated),
+            completed_at,
+            created_at
+        ))
+        tag_count = min(rng.choice([0, 1, 1, 1, 2, 3]), len(tag_rows))
+        for tag_index in rng.sample(range(len(tag_rows)), tag_count):
+            task_tag_rows.append((index, tag_index))
+
+    session_rows = []
+    for day_offset in range(history_days):
+        day = history_start + timedelta(days=day_offset)
+        # 工作日专注更多
+        expected = sessions_per_day * (1.3 if day.weekday() < 5 else 0.5)
+        count = max(0, int(rng.gauss(expected, expected / 2)))
+        start = datetime.combine(day, time(8)) + timedelta(minutes=rng.randrange(0, 120))
+        for number in range(count):
+            session_type = 'work'
+            duration = 25
+            if number % 2 == 1:
+                session_type = 'long_break' if number % 8 == 7 else 'short_break'
+                duration = 15 if session_type == 'long_break' else 5
+            task_index = rng.randrange(tasks) if tasks and session_type == 'work' and rng.random() < 0.8 else None
+            is_completed = rng.random() < 0.9
+            actual = duration if is_completed else rng.randint(1, duration)
+            end = start + timedelta(minutes=actual)
+            session_rows.append((task_index, session_type, start, end, actual, is_completed))
+            start = end + timedelta(minutes=rng.randrange(0, 90))
+
+    return {'tags': tag_rows, 'tasks': task_rows, 'task_tags': task_tag_rows, 'sessions': session_rows}
+
+
+def load_user(db, user_id: int, data: Dict[str, List], chunk: int = 1000) -> bool:
+    """将一个用户的数据批量写入数据库（每 chunk 行一次 executemany）"""
+    if not db.execute_many("INSERT INTO tags (user_id, name, color) VALUES (%s, %s, %s)",
+                           [(user_id, name, color) for name, color in data['tags']]):
+        return False
+    rows = db.execute_query("SELECT tag_id, name FROM tags WHERE user_id = %s", (user_id,)) or []
+    tag_ids_by_name = {row['name']: row['tag_id'] for row in rows}
+    tag_ids = [tag_ids_by_name.get(name) for name, _ in data['tags']]
+
+    task_ids = []
+    for offset in range(0, len(data['tasks']), chunk):
+        batch = [(user_id, *row) for row in data['tasks'][offset:offset + chunk]]
+
+        def insert_tasks(cursor, batch=batch):
+            cursor.executemany(
+                """
+                INSERT INTO tasks (user_id, title, description, due_date, priority, status, repeat_cycle,
+                                   estimated_pomodoros, used_pomodoros, completed_at, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                batch
+            )
+            # 多行INSERT一次分配连续的自增ID
+            return cursor.lastrowid
+
+        first_id = db.execute_in_transaction(insert_tasks)
+        if first_id is None:
+            return False
+        task_ids.extend(range(first_id, first_id + len(batch)))
+
+    task_tag_rows = [(task_ids[task_index], tag_ids[tag_index]) for task_index, tag_index in data['task_tags']
+                     if tag_ids[tag_index]]
+    session_rows = [
+        (user_id, task_ids[task_index] if task_index is not None else None, *rest)
+        for task_index, *rest in data['sessions']
+    ]
+    for offset in range(0, max(len(task_tag_rows), len(session_rows)), chunk):
+        if not db.execute_many("INSERT IGNORE INTO task_tags (task_id, tag_id) VALUES (%s, %s)",
+                               task_tag_rows[offset:offset + chunk]):
+            return False
+        if not db.execute_many(
+            """
+            INSERT INTO focus_sessions (user_id, task_id, session_type, start_time, end_time,
+                                        duration_minutes, is_completed)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            session_rows[offset:offset + chunk]
+        ):
+            return False
+    return True
+
+
+def seed_database(db, seed: int = 42, users: int = 3, tasks_per_user: int = 2000, tags_per_user: int = 8,
+                  years: int = 2, sessions_per_day: float = 6, today: date = None) -> List[int]:
+    """
+    生成并写入基准数据，返回基准用户ID列表
+
+    每个用户使用由种子派生的独立随机数，单个用户的数据生成后立即写入，内存占用与用户数无关
+    """
+    from src.database.database import UserManager
+
+    today = today or date.today()
+    user_manager = UserManager(db)
+    user_ids = []
+    for index in range(users):
+        email = benchmark_email(seed, index)
+        existing = user_manager.get_user_by_email(email)
+        if existing:
+            print(f"已存在，跳过: {email}")
+            user_ids.append(existing['user_id'])
+            continue
+        user_id = user_manager.create_user(email, BENCHMARK_PASSWORD)
+        if not user_id:
+            raise RuntimeError(f"创建基准用户失败: {email}")
+        data = generate_user(random.Random(f"{seed}-{index}"), tasks_per_user, tags_per_user,
+                             years, sessions_per_day, today)
+        if not load_user(db, user_id, data):
+            raise RuntimeError(f"写入基准数据失败: {email}")
+        print(f"{email}: {len(data['tasks'])} 个任务，{len(data['sessions'])} 条专注记录")
+        user_ids.append(user_id)
+    return user_ids
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    """数据规模参数（benchmark.py 共用）"""
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--users', type=int, default=3, help='用户数')
+    parser.add_argument('--tasks-per-user', type=int, default=2000, help='每个用户的任务数')
+    parser.add_argument('--tags-per-user', type=int, default=8, help='每个用户的标签数')
+    parser.add_argument('--years', type=int, default=2, help='专注记录覆盖的年数')
+    parser.add_argument('--sessions-per-day', type=float, default=6, help='每天平均专注记录数')
+
+
+def main():
+    """主函数"""
+    from src.database.database import create_database_manager
+
+    parser = argparse.ArgumentParser(description='生成基准测试数据')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    db = create_database_manager()
+    if not db.connection:
+        print('无法连接数据库')
+        return 1
+    try:
+        seed_database(db, args.seed, args.users, args.tasks_per_user, args.tags_per_user,
+                      args.years, args.sessions_per_day)
+        return 0
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
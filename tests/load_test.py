@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+多进程部署本地压测脚本（不属于单元测试，需手动运行）
+
+依次以不同的工作进程数启动应用，用多个客户端进程持续请求页面，
+每个客户端固定访问一个工作进程（模拟反向代理的IP粘性转发），输出吞吐量和相对单进程的加速比。
+
+用法:
+    python tests/load_test.py --workers 1 2 4 --clients-per-worker 4 --duration 10
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import http.client
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serve import worker_ports, start_workers, stop_workers
+
+
+def wait_for_ports(ports: List[int], processes: List, timeout: float = 60) -> bool:
+    """等待所有工作进程开始监听，有进程提前退出时返回False"""
+    deadline = time.time() + timeout
+    pending = set(ports)
+    while pending and time.time() < deadline:
+        if any(process.poll() is not None for process in processes):
+            return False
+        for port in list(pending):
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    pending.discard(port)
+            except OSError:
+                pass
+        time.sleep(0.2)
+    return not pending
+
+
+def run_client(port: int, path: str, duration: float) -> Dict[str, float]:
+    """单个客户端：在给定时间内使用长连接循环请求页面"""
+    completed, errors, latency_total = 0, 0, 0.0
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status < 400:
+                completed += 1
+                latency_total += time.perf_counter() - started
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.close()
+    return {'completed': completed, 'errors': errors, 'latency_total': latency_total}
+
+
+def measure(workers: int, base_port: int, clients_per_worker: int, path: str,
+            duration: float, warmup: float) -> Dict[str, float]:
+    """以指定工作进程数启动应用并压测"""
+    ports = worker_ports(workers, base_port)
+    processes = start_workers(ports)
+    try:
+        if not wait_for_ports(ports, processes):
+            raise RuntimeError('工作进程启动失败或超时')
+
+        client_ports = [port for port in ports for _ in range(clients_per_worker)]
+        with ProcessPoolExecutor(max_workers=len(client_ports)) as executor:
+            # 预热：触发各进程的首次页面渲染
+            list(executor.map(run_client, client_ports, [path] * len(client_ports), [warmup] * len(client_ports)))
+            results = list(executor.map(run_client, client_ports, [path] * len(client_ports), [duration] * len(client_ports)))
+    finally:
+        stop_workers(processes)
+
+    completed = sum(r['completed'] for r in results)
+    return {
+        'workers': workers,
+        'requests_per_second': completed / duration,
+        'avg_latency_ms': sum(r['latency_total'] for r in results) / completed * 1000 if completed else 0.0,
+        'errors': sum(r['errors'] for r in results)
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='多进程部署本地压测')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='依次测试的工作进程数')
+    parser.add_argument('--base-port', type=int, default=18081, help='第一个工作进程的端口')
+    parser.add_argument('--clients-per-worker', type=int, default=4, help='每个工作进程的并发客户端数')
+    parser.add_argument('--path', default='/login', help='请求的页面路径')
+    parser.add_argument('--duration', type=float, default=10, help='每轮压测时长（秒）')
+    parser.add_argument('--warmup', type=float, default=2, help='每轮预热时长（秒）')
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    if max(args.workers) * (args.clients_per_worker + 1) > cpu_count * 2:
+        print(f"提示: 本机只有 {cpu_count} 个CPU核心，客户端进程与工作进程争用CPU时加速比会偏低")
+
+    rows = []
+    for workers in args.workers:
+        print(f"\n压测 {workers} 个工作进程...")
+        rows.append(measure(workers, args.base_port, args.clients_per_worker,
+                            args.path, args.duration, args.warmup))
+
+    baseline = rows[0]['requests_per_second'] / rows[0]['workers'] if rows[0]['requests_per_second'] else 0
+    print(f"\n{'进程数':>6} {'请求/秒':>10} {'平均延迟(ms)':>14} {'错误':>6} {'加速比':>8} {'线性效率':>8}")
+    for row in rows:
+        speedup = row['requests_per_second'] / baseline if baseline else 0
+        efficiency = speedup / row['workers'] * 100
+        print(f"{row['workers']:>6} {row['requests_per_second']:>10.1f} {row['avg_latency_ms']:>14.1f} "
+              f"{row['errors']:>6} {speedup:>8.2f} {efficiency:>7.0f}%")
+
+
+if __name__ == '__main__':
+    main()
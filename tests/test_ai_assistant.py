@@ -0,0 +1,90 @@
+"""
+AI助手功能测试
+"""
+import unittest
+from unittest.mock import patch
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.ai_cache import AIResponseCache
+from src.services.ai_assistant import AIAssistant
+
+
+class TestBatchEstimation(unittest.TestCase):
+    """批量番茄钟预估测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        config_patcher = patch.dict('src.services.ai_assistant.AI_CONFIG', {
+            'api_key': 'test-key',
+            'base_url': 'http://127.0.0.1:9/v1',
+            'model': 'test-model'
+        })
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        self.assistant = AIAssistant(response_cache=AIResponseCache())
+        self.tasks = [
+            {'task_id': 1, 'title': '写周报', 'description': None},
+            {'task_id': 2, 'title': '重构登录模块', 'description': '拆分会话逻辑'},
+            {'task_id': 3, 'title': '回复邮件', 'description': ''}
+        ]
+
+    def test_single_round_trip(self):
+        """测试多个任务只发送一次请求"""
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            return '```json\n[{"id": 1, "pomodoros": 2}, {"id": 2, "pomodoros": 6}, {"id": 3, "pomodoros": 1}]\n```'
+
+        with patch.object(self.assistant, '_request_completion', side_effect=fake_request) as mock_request:
+            result = asyncio.run(self.assistant.estimate_pomodoro_counts(self.tasks, 25))
+
+        self.assertEqual(result, {1: 2, 2: 6, 3: 1})
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_fallback_only_for_unparsed_rows(self):
+        """测试只对无法解析的行回退为单个预估"""
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            if '任务列表(JSON)' in prompt:
+                return '[{"id": 1, "pomodoros": 2}, {"id": 2, "pomodoros": "很多"}]'
+            return '3'
+
+        with patch.object(self.assistant, '_request_completion', side_effect=fake_request) as mock_request:
+            result = asyncio.run(self.assistant.estimate_pomodoro_counts(self.tasks, 25))
+
+        self.assertEqual(result, {1: 2, 2: 3, 3: 3})
+        # 1次批量请求 + 2次单独回退
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_batch_results_fill_single_cache(self):
+        """测试批量结果写入单任务缓存"""
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            return '[{"id": 1, "pomodoros": 2}, {"id": 2, "pomodoros": 6}, {"id": 3, "pomodoros": 1}]'
+
+        with patch.object(self.assistant, '_request_completion', side_effect=fake_request) as mock_request:
+            asyncio.run(self.assistant.estimate_pomodoro_counts(self.tasks, 25))
+            single = asyncio.run(self.assistant.estimate_pomodoro_count('重构登录模块', '拆分会话逻辑', 25))
+
+        self.assertEqual(single, 6)
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_zero_rejected_by_both_paths(self):
+        """测试批量和单个预估都不接受0个番茄钟"""
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            if '任务列表(JSON)' in prompt:
+                return '[{"id": 1, "pomodoros": 0}, {"id": 2, "pomodoros": "4"}, {"id": 3, "pomodoros": true}]'
+            return '0'
+
+        with patch.object(self.assistant, '_request_completion', side_effect=fake_request):
+            result = asyncio.run(self.assistant.estimate_pomodoro_counts(self.tasks, 25))
+            single = asyncio.run(self.assistant.estimate_pomodoro_count('写周报', None, 25))
+
+        self.assertEqual(result, {2: 4})
+        self.assertIsNone(single)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+AI响应缓存测试
+"""
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.ai_cache import AIResponseCache, make_cache_key
+from src.services.ai_assistant import AIAssistant
+
+
+class TestAIResponseCache(unittest.TestCase):
+    """AI响应缓存测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        config_patcher = patch.dict('src.services.ai_assistant.AI_CONFIG', {
+            'api_key': 'test-key',
+            'base_url': 'http://127.0.0.1:9/v1',
+            'model': 'test-model'
+        })
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+    def test_key_ignores_whitespace_differences(self):
+        """测试等价提示词得到相同的缓存键"""
+        key1 = make_cache_key('预估  任务\n', '系统', 'model-a', {'temperature': 0.7})
+        key2 = make_cache_key(' 预估 任务', '系统', 'model-a', {'temperature': 0.7})
+        key3 = make_cache_key('预估 任务', '系统', 'model-b', {'temperature': 0.7})
+
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = AIResponseCache(max_entries=2, ttl_seconds=0)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+
+        self.assertEqual(cache.get('a'), '1')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_ttl_expiration(self):
+        """测试过期条目不再命中"""
+        cache = AIResponseCache(max_entries=10, ttl_seconds=60)
+        with patch('src.services.ai_cache.time.time', return_value=1000):
+            cache.set('a', '1')
+        with patch('src.services.ai_cache.time.time', return_value=1061):
+            self.assertIsNone(cache.get('a'))
+
+        self.assertEqual(cache.get_stats()['expirations'], 1)
+
+    def test_persistence(self):
+        """测试缓存写入磁盘并可重新加载"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'ai_cache.json')
+            cache = AIResponseCache(persist_path=path)
+            cache.set('a', '3')
+            cache.flush()
+
+            reloaded = AIResponseCache(persist_path=path)
+            self.assertEqual(reloaded.get('a'), '3')
+
+    def test_writes_are_batched(self):
+        """测试多次写入合并为一次延迟落盘，没有修改时不写文件"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'ai_cache.json')
+            cache = AIResponseCache(persist_path=path, flush_seconds=60)
+
+            with patch.object(cache, '_save', wraps=cache._save) as save:
+                for i in range(5):
+                    cache.set(str(i), str(i))
+                self.assertFalse(os.path.exists(path))
+
+                cache.flush()
+                cache.flush()
+            save.assert_called_once()
+            self.assertFalse(os.path.exists(f"{path}.tmp"))
+            self.assertEqual(AIResponseCache(persist_path=path).get('4'), '4')
+
+    def test_estimate_uses_cache(self):
+        """测试重复预估不会再次请求API"""
+        assistant = AIAssistant(response_cache=AIResponseCache())
+
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            return '4'
+
+        with patch.object(assistant, '_request_completion', side_effect=fake_request) as mock_request:
+            first = asyncio.run(assistant.estimate_pomodoro_count('写报告', '周报', 25))
+            second = asyncio.run(assistant.estimate_pomodoro_count('写报告', '周报', 25))
+
+        self.assertEqual(first, 4)
+        self.assertEqual(second, 4)
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(assistant.response_cache.get_stats()['hits'], 1)
+
+    def test_invalid_response_not_cached(self):
+        """测试非数字响应不会写入缓存"""
+        assistant = AIAssistant(response_cache=AIResponseCache())
+
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            return '大约三个'
+
+        with patch.object(assistant, '_request_completion', side_effect=fake_request) as mock_request:
+            asyncio.run(assistant.estimate_pomodoro_count('写报告', None, 25))
+            asyncio.run(assistant.estimate_pomodoro_count('写报告', None, 25))
+
+        self.assertEqual(mock_request.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
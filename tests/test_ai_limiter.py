@@ -0,0 +1,151 @@
+"""
+AI请求限流测试
+"""
+import unittest
+from unittest.mock import patch
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.ai_limiter import AIRequestLimiter, AIUnavailableError, CircuitBreaker
+
+
+class RetryableError(Exception):
+    """模拟可重试的上游错误"""
+
+
+class TestAIRequestLimiter(unittest.TestCase):
+    """AI请求限流器测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        retryable_patcher = patch('src.services.ai_limiter.is_retryable_error',
+                                  side_effect=lambda e: isinstance(e, (RetryableError, asyncio.TimeoutError)))
+        retryable_patcher.start()
+        self.addCleanup(retryable_patcher.stop)
+
+    def make_limiter(self, **overrides):
+        """构造测试用限流器（退避时间极短）"""
+        options = {
+            'max_concurrency': 4,
+            'per_user_concurrency': 2,
+            'deadline_seconds': 5,
+            'max_retries': 3,
+            'retry_base_delay': 0.001,
+            'retry_max_delay': 0.002
+        }
+        options.update(overrides)
+        return AIRequestLimiter(**options)
+
+    def test_retry_then_success(self):
+        """测试可重试错误在重试后成功"""
+        limiter = self.make_limiter()
+        attempts = []
+
+        async def request():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RetryableError('429')
+            return 'ok'
+
+        result = asyncio.run(limiter.call(request, user_id=1))
+
+        self.assertEqual(result, 'ok')
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(limiter.retries, 2)
+        self.assertEqual(limiter.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_non_retryable_error_not_retried(self):
+        """测试不可重试错误直接抛出且不计入熔断"""
+        limiter = self.make_limiter()
+        attempts = []
+
+        async def request():
+            attempts.append(1)
+            raise ValueError('bad request')
+
+        with self.assertRaises(ValueError):
+            asyncio.run(limiter.call(request))
+
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(limiter.circuit_breaker.consecutive_failures, 0)
+
+    def test_circuit_opens_and_fails_fast(self):
+        """测试连续失败后熔断器打开并快速失败"""
+        limiter = self.make_limiter(max_retries=0, circuit_breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+        attempts = []
+
+        async def request():
+            attempts.append(1)
+            raise RetryableError('503')
+
+        for _ in range(2):
+            with self.assertRaises(RetryableError):
+                asyncio.run(limiter.call(request))
+
+        with self.assertRaises(AIUnavailableError):
+            asyncio.run(limiter.call(request))
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(limiter.circuit_breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(limiter.rejected, 1)
+
+    def test_cancelled_probe_releases_half_open(self):
+        """测试半开状态的探测请求被取消后，下一个请求仍可作为探测发出"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        limiter = self.make_limiter(circuit_breaker=breaker)
+
+        async def hanging():
+            await asyncio.sleep(10)
+
+        async def ok():
+            return 'ok'
+
+        async def cancel_probe():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(limiter.call(hanging), timeout=0.05)
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            return await limiter.call(ok)
+
+        self.assertEqual(asyncio.run(cancel_probe()), 'ok')
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_per_user_concurrency_cap(self):
+        """测试单个用户的并发请求数不超过上限"""
+        limiter = self.make_limiter(per_user_concurrency=2)
+        active = {'now': 0, 'peak': 0}
+
+        async def request():
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+            await asyncio.sleep(0.01)
+            active['now'] -= 1
+            return 'ok'
+
+        async def run_all():
+            return await asyncio.gather(*[limiter.call(request, user_id=7) for _ in range(6)])
+
+        results = asyncio.run(run_all())
+
+        self.assertEqual(results, ['ok'] * 6)
+        self.assertEqual(active['peak'], 2)
+        self.assertEqual(limiter.get_metrics()['active_users'], 0)
+        self.assertEqual(limiter.get_metrics()['latency']['count'], 6)
+
+    def test_deadline_exceeded(self):
+        """测试超过截止时间的请求被中止"""
+        limiter = self.make_limiter(deadline_seconds=0.05, max_retries=0)
+
+        async def request():
+            await asyncio.sleep(1)
+
+        with self.assertRaises((AIUnavailableError, asyncio.TimeoutError)):
+            asyncio.run(limiter.call(request))
+
+
+if __name__ == '__main__':
+    unittest.main()
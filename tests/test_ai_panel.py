@@ -0,0 +1,182 @@
+"""
+AI面板消息处理测试（使用本地桩LLM服务）
+"""
+import unittest
+from unittest.mock import Mock, patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import threading
+import asyncio
+import json
+import time
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.ai_cache import AIResponseCache
+from src.services.ai_limiter import AIRequestLimiter
+from src.services.ai_assistant import AIAssistant
+from src.ui.components.ai_panel import AIPanelComponent
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """兼容OpenAI聊天补全接口的桩服务"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        self.server.requests.append(body)
+        time.sleep(self.server.delay)
+
+        user_message = body['messages'][-1]['content']
+        payload = {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': f"收到{len(user_message)}字"},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+        }
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAIPanelMessaging(unittest.TestCase):
+    """AI面板消息处理测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动桩LLM服务"""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubLLMHandler)
+        cls.server.requests = []
+        cls.server.delay = 0
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭桩LLM服务"""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """测试前的设置"""
+        self.server.requests.clear()
+        self.server.delay = 0
+
+        config_patcher = patch.dict('src.services.ai_assistant.AI_CONFIG', {
+            'api_key': 'test-key',
+            'base_url': f'http://127.0.0.1:{self.server.server_port}/v1',
+            'model': 'stub-model'
+        })
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        assistant = AIAssistant(response_cache=AIResponseCache(), limiter=AIRequestLimiter(max_retries=0))
+
+        task_manager = Mock()
+        task_manager.db.get_data_revision.return_value = None
+        task_manager.get_tasks.return_value = [
+            {'task_id': 1, 'title': '写周报', 'status': 'pending', 'priority': 'high', 'tags': []}
+        ]
+        statistics_manager = Mock()
+        statistics_manager.get_productivity_overview.return_value = {}
+        statistics_manager.get_focus_duration_by_period.return_value = []
+        statistics_manager.get_tasks_completed_by_period.return_value = []
+
+        self.panel = AIPanelComponent(assistant, task_manager, statistics_manager, {'user_id': 1})
+
+    def make_dialog(self, message):
+        """构造只含输入框的对话框（不渲染UI）"""
+        return SimpleNamespace(message_input=SimpleNamespace(value=message))
+
+    def test_handler_awaits_response(self):
+        """测试发送消息后AI回复写入聊天记录"""
+        dialog = self.make_dialog('今天先做什么？')
+
+        asyncio.run(self.panel.send_message(dialog))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIn('今天先做什么？', self.server.requests[0]['messages'][-1]['content'])
+        self.assertEqual(self.panel.chat_history[0], {'message': '今天先做什么？', 'sender': 'user'})
+        self.assertEqual(self.panel.chat_history[-1]['sender'], 'ai')
+        self.assertTrue(self.panel.chat_history[-1]['message'].startswith('收到'))
+        self.assertFalse(self.panel.is_processing)
+
+    def test_all_modes_get_response(self):
+        """测试每种模式的处理函数都能拿到回复"""
+        for mode in ['task_recommendation', 'workload_estimation', 'efficiency_report', 'work_pattern', 'general']:
+            self.panel.current_mode = mode
+            self.panel.chat_history.clear()
+
+            asyncio.run(self.panel.send_message(self.make_dialog(f'{mode}请求')))
+
+            self.assertTrue(self.panel.chat_history[-1]['message'].startswith('收到'), mode)
+
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_second_click_while_in_flight_is_ignored(self):
+        """测试请求进行中再次发送不会发出并行请求"""
+        self.server.delay = 0.2
+        first = self.make_dialog('第一条')
+        second = self.make_dialog('第二条')
+
+        async def click_twice():
+            task = asyncio.create_task(self.panel.send_message(first))
+            await asyncio.sleep(0.05)
+            await self.panel.send_message(second)
+            await task
+
+        asyncio.run(click_twice())
+
+        self.assertEqual(len(self.server.requests), 1)
+        # 被忽略的消息保留在输入框中
+        self.assertEqual(second.message_input.value, '第二条')
+        self.assertEqual([m['sender'] for m in self.panel.chat_history], ['user', 'ai'])
+
+    def test_failed_call_reports_message(self):
+        """测试AI调用失败时给出提示而不是静默"""
+        async def failing_call(*args, **kwargs):
+            return None
+
+        with patch.object(self.panel.ai_assistant, 'call_llm_api', side_effect=failing_call):
+            asyncio.run(self.panel.send_message(self.make_dialog('你好')))
+
+        self.assertEqual(self.panel.chat_history[-1]['message'], 'AI暂时无法回复，请稍后再试')
+        self.assertFalse(self.panel.is_processing)
+
+    def test_user_data_loaded_on_event_loop(self):
+        """测试数据库读取在事件循环线程中执行，不与其他请求在线程池中并发使用共享连接"""
+        loop_threads = []
+        data_threads = []
+        get_user_data = self.panel.get_user_data
+
+        def record_thread():
+            data_threads.append(threading.get_ident())
+            return get_user_data()
+
+        async def send():
+            loop_threads.append(threading.get_ident())
+            await self.panel.send_message(self.make_dialog('今天先做什么？'))
+
+        with patch.object(self.panel, 'get_user_data', side_effect=record_thread):
+            asyncio.run(send())
+
+        self.assertEqual(data_threads, loop_threads)
+        self.assertTrue(self.panel.chat_history[-1]['message'].startswith('收到'))
+
+if __name__ == '__main__':
+    unittest.main()
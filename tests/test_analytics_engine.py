@@ -0,0 +1,182 @@
+"""
+统计分析引擎测试
+"""
+import unittest
+from unittest.mock import Mock
+from datetime import datetime, date
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.analytics_engine import AnalyticsEngine
+from src.services.statistics_manager import StatisticsManager
+from src.services.report_cache import RevisionedCache
+
+
+class TestAnalyticsEngine(unittest.TestCase):
+    """统计分析引擎测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        # 2025-07-02 是周三
+        self.now = datetime(2025, 7, 2, 18, 0)
+        self.tasks = [
+            {'task_id': 1, 'status': 'completed', 'priority': 'high', 'estimated_pomodoros': 2,
+             'used_pomodoros': 3, 'created_at': datetime(2025, 6, 30, 9), 'updated_at': datetime(2025, 7, 2, 10),
+             'completed_at': datetime(2025, 7, 2, 10)},
+            {'task_id': 2, 'status': 'pending', 'priority': 'low', 'estimated_pomodoros': 1,
+             'used_pomodoros': 0, 'created_at': datetime(2025, 7, 1, 9), 'updated_at': datetime(2025, 7, 2, 11),
+             'completed_at': None},
+            {'task_id': 3, 'status': 'completed', 'priority': 'high', 'estimated_pomodoros': 4,
+             'used_pomodoros': 2, 'created_at': datetime(2025, 7, 1, 9), 'updated_at': datetime(2025, 7, 1, 16),
+             'completed_at': datetime(2025, 7, 1, 16)},
+            {'task_id': 4, 'status': 'pending', 'priority': 'medium', 'estimated_pomodoros': 1,
+             'used_pomodoros': 0, 'created_at': datetime(2025, 5, 1, 9), 'updated_at': datetime(2025, 5, 1, 9),
+             'completed_at': None}
+        ]
+        self.task_tags = [
+            {'task_id': 1, 'tag': '工作'},
+            {'task_id': 3, 'tag': '工作'},
+            {'task_id': 3, 'tag': '学习'}
+        ]
+        self.sessions = [
+            {'session_id': 10, 'task_id': 1, 'start_time': datetime(2025, 7, 2, 9, 0), 'duration_minutes': 25},
+            {'session_id': 11, 'task_id': 1, 'start_time': datetime(2025, 7, 2, 9, 30), 'duration_minutes': 25},
+            {'session_id': 12, 'task_id': 3, 'start_time': datetime(2025, 7, 1, 14, 0), 'duration_minutes': 50},
+            {'session_id': 13, 'task_id': None, 'start_time': datetime(2025, 6, 29, 14, 0), 'duration_minutes': 20}
+        ]
+
+        def execute_query(query, params=None):
+            if 'FROM focus_sessions' in query:
+                return self.sessions
+            if 'FROM task_tags' in query:
+                return self.task_tags
+            return self.tasks
+
+        self.mock_db = Mock()
+        self.mock_db.execute_query.side_effect = execute_query
+        self.mock_db.get_data_revision.return_value = None
+        self.engine = AnalyticsEngine(self.mock_db)
+
+    def test_full_report_uses_three_queries(self):
+        """测试完整报告只执行固定数量的查询"""
+        report = self.engine.build_report(1, days=7, now=self.now)
+
+        self.assertEqual(self.mock_db.execute_query.call_count, 3)
+        self.assertEqual(set(report), {
+            'overview', 'completion_analysis', 'priority_distribution',
+            'tag_performance', 'pattern_analysis', 'efficiency_trends'
+        })
+
+    def test_overview(self):
+        """测试生产力概览"""
+        overview = self.engine.build_report(1, days=7, sections=['overview'], now=self.now)['overview']
+
+        self.assertEqual(overview, {
+            'today_focus_minutes': 50,
+            'period_focus_minutes': 120,
+            'today_focus_sessions': 2,
+            'period_focus_sessions': 4,
+            'today_completed_tasks': 1,
+            'period_completed_tasks': 2,
+            'pending_tasks': 2,
+            'today_pomodoros_used': 3
+        })
+
+    def test_later_edit_keeps_completion_date(self):
+        """测试完成后再编辑任务不改变其完成日期"""
+        self.tasks[2]['updated_at'] = datetime(2025, 7, 2, 17)
+
+        overview = self.engine.build_report(1, days=7, sections=['overview'], now=self.now)['overview']
+
+        self.assertEqual(overview['today_completed_tasks'], 1)
+
+    def test_completion_and_priority(self):
+        """测试完成率和优先级分布"""
+        report = self.engine.build_report(1, days=7, sections=['completion_analysis', 'priority_distribution'], now=self.now)
+
+        self.assertEqual(report['completion_analysis'], {
+            'total_tasks': 3,
+            'completed_tasks': 2,
+            'completion_rate': 66.7,
+            'avg_pomodoros_per_task': 2.5,
+            'estimation_accuracy': 100.0
+        })
+        self.assertEqual(report['priority_distribution'], [
+            {'priority': 'high', 'task_count': 2, 'completed_count': 2},
+            {'priority': 'medium', 'task_count': 1, 'completed_count': 0},
+            {'priority': 'low', 'task_count': 1, 'completed_count': 0}
+        ])
+        # 不需要专注记录和标签时不查询
+        self.assertEqual(self.mock_db.execute_query.call_count, 1)
+
+    def test_tag_performance(self):
+        """测试标签表现包含无标签任务"""
+        tags = self.engine.build_report(1, days=7, sections=['tag_performance'], now=self.now)['tag_performance']
+
+        by_tag = {row['tag']: row for row in tags}
+        self.assertEqual(tags[0]['tag'], '工作')
+        self.assertEqual(by_tag['工作']['completed_tasks'], 2)
+        self.assertEqual(by_tag['工作']['total_pomodoros'], 5)
+        self.assertEqual(by_tag['工作']['avg_pomodoros'], 2.5)
+        self.assertEqual(by_tag['无标签']['completion_rate'], 0)
+
+    def test_pattern_and_trends(self):
+        """测试工作模式和效率趋势"""
+        report = self.engine.build_report(1, days=7, sections=['pattern_analysis', 'efficiency_trends'], now=self.now)
+
+        hourly = {row['hour']: row for row in report['pattern_analysis']['hourly_pattern']}
+        self.assertEqual(hourly[9]['session_count'], 2)
+        self.assertEqual(hourly[14]['total_minutes'], 70)
+
+        weekly = {row['day_name']: row for row in report['pattern_analysis']['weekly_pattern']}
+        self.assertEqual(weekly['周三']['day_of_week'], 4)
+        self.assertEqual(weekly['周日']['total_minutes'], 20)
+
+        trends = {row['date']: row for row in report['efficiency_trends']['daily_trends']}
+        self.assertEqual(trends[date(2025, 7, 2)]['focus_sessions'], 2)
+        self.assertEqual(trends[date(2025, 7, 2)]['tasks_worked_on'], 1)
+        self.assertEqual(trends[date(2025, 7, 1)]['tasks_completed'], 1)
+        self.assertEqual(trends[date(2025, 6, 29)]['tasks_worked_on'], 0)
+        self.assertEqual(trends[date(2025, 7, 1)]['efficiency_score'], 2.0)
+
+    def test_empty_data(self):
+        """测试没有数据时返回默认值"""
+        self.tasks, self.task_tags, self.sessions = [], [], []
+
+        report = self.engine.build_report(1, days=7, now=self.now)
+
+        self.assertEqual(report['completion_analysis']['estimation_accuracy'], 100)
+        self.assertEqual(report['overview']['pending_tasks'], 0)
+        self.assertEqual(report['tag_performance'], [])
+        self.assertEqual(report['pattern_analysis'], {'hourly_pattern': [], 'weekly_pattern': []})
+        self.assertEqual(report['efficiency_trends'], {'daily_trends': []})
+
+    def test_summary_report_via_statistics_manager(self):
+        """测试StatisticsManager的汇总报告使用引擎生成"""
+        report = StatisticsManager(self.mock_db, RevisionedCache()).generate_summary_report(1, days=7)
+
+        self.assertEqual(report['period_days'], 7)
+        self.assertIn('generated_at', report)
+        self.assertEqual(self.mock_db.execute_query.call_count, 3)
+
+    def test_summary_report_cached_by_revision(self):
+        """测试数据版本不变时重复生成报告只查询版本号"""
+        manager = StatisticsManager(self.mock_db, RevisionedCache())
+        self.mock_db.get_data_revision.return_value = 5
+
+        first = manager.generate_summary_report(1, days=7)
+        second = manager.generate_summary_report(1, days=7)
+        self.assertIs(first, second)
+        self.assertEqual(self.mock_db.execute_query.call_count, 3)
+
+        # 数据写入后版本号递增，重新计算
+        self.mock_db.get_data_revision.return_value = 6
+        manager.generate_summary_report(1, days=7)
+        self.assertEqual(self.mock_db.execute_query.call_count, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
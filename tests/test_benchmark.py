@@ -0,0 +1,50 @@
+"""
+基准数据生成和基线比较测试
+"""
+import unittest
+import random
+from datetime import date
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.data_generator import generate_user
+from tests.benchmark import compare_results
+
+
+class TestBenchmarkTools(unittest.TestCase):
+    """基准测试工具测试类"""
+
+    def test_generator_is_reproducible(self):
+        """测试同一种子生成相同的数据，数据符合表约束"""
+        today = date(2025, 7, 1)
+        first = generate_user(random.Random('42-0'), 200, 5, 1, 4, today)
+        second = generate_user(random.Random('42-0'), 200, 5, 1, 4, today)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(first['tasks']), 200)
+        self.assertEqual(len({name for name, _ in first['tags']}), 5)
+        for title, _, _, priority, status, repeat_cycle, _, _, completed_at, created_at in first['tasks']:
+            self.assertIn(priority, ('high', 'medium', 'low'))
+            self.assertIn(repeat_cycle, ('none', 'daily', 'weekly', 'monthly'))
+            self.assertEqual(completed_at is not None, status == 'completed')
+            self.assertLess(created_at.date(), today)
+        self.assertTrue(all(task < 200 and tag < 5 for task, tag in first['task_tags']))
+        self.assertGreater(len(first['sessions']), 365)
+
+    def test_compare_flags_regressions(self):
+        """测试中位数变慢超过阈值时报告退化，极短耗时按下限比较"""
+        baseline = {'a': {'median_ms': 10.0}, 'b': {'median_ms': 10.0}, 'c': {'median_ms': 0.1}}
+        current = {'a': {'median_ms': 13.0}, 'b': {'median_ms': 11.0}, 'c': {'median_ms': 0.5},
+                   'd': {'median_ms': 99.0}}
+
+        regressions = compare_results(current, baseline, 0.2)
+
+        self.assertEqual([item['name'] for item in regressions], ['a'])
+        self.assertEqual(regressions[0]['ratio'], 1.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+数据变更事件总线测试
+"""
+import unittest
+from unittest.mock import Mock
+from datetime import date
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.event_bus import EventBus, LocalBroker
+from src.services.task_manager import TaskManager
+
+
+class TestEventBus(unittest.TestCase):
+    """事件总线测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.bus = EventBus(LocalBroker(), origin_provider=lambda: 'client-a')
+
+    def test_publish_reaches_same_user_only(self):
+        """测试事件只分发给同一用户的订阅者"""
+        received_1, received_2 = [], []
+        self.bus.subscribe(1, received_1.append)
+        self.bus.subscribe(1, received_1.append)
+        self.bus.subscribe(2, received_2.append)
+
+        self.bus.publish(1, 'task.updated', task_id=7, fields=['status'])
+
+        self.assertEqual(len(received_1), 2)
+        self.assertEqual(received_2, [])
+        event = received_1[0]
+        self.assertEqual(event['type'], 'task.updated')
+        self.assertEqual(event['task_id'], 7)
+        self.assertEqual(event['fields'], ['status'])
+        self.assertEqual(event['origin'], 'client-a')
+
+    def test_unsubscribe(self):
+        """测试取消订阅后不再收到事件"""
+        received = []
+        subscription_id = self.bus.subscribe(1, received.append)
+        self.bus.unsubscribe(subscription_id)
+
+        self.bus.publish(1, 'task.created', task_id=1)
+
+        self.assertEqual(received, [])
+        self.assertEqual(self.bus.subscriber_count(), 0)
+
+    def test_failing_callback_does_not_block_others(self):
+        """测试某个订阅者出错不影响其他订阅者"""
+        received = []
+        self.bus.subscribe(1, Mock(side_effect=RuntimeError('boom')))
+        self.bus.subscribe(1, received.append)
+
+        self.bus.publish(1, 'tag.changed', tag_id=3)
+
+        self.assertEqual(len(received), 1)
+
+    def test_dispatch_deferred_to_event_loop(self):
+        """测试在事件循环中发布时，回调在写操作返回之后执行"""
+        received = []
+
+        async def scenario():
+            self.bus.subscribe(1, received.append)
+            self.bus.publish(1, 'task.deleted', task_id=5)
+            self.assertEqual(received, [])
+            await asyncio.sleep(0)
+            self.assertEqual(len(received), 1)
+
+        asyncio.run(scenario())
+
+
+class TestTaskManagerEvents(unittest.TestCase):
+    """任务写操作发布事件测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.mock_db = Mock()
+        self.mock_db.execute_update.return_value = True
+        self.mock_db.execute_update_rowcount.return_value = 1
+        self.mock_db.execute_query.return_value = [{'user_id': 1}]
+        self.mock_db.get_last_insert_id.return_value = 42
+        self.bus = EventBus(LocalBroker(), origin_provider=lambda: None)
+        self.received = []
+        self.bus.subscribe(1, self.received.append)
+        self.task_manager = TaskManager(self.mock_db, event_bus=self.bus)
+
+    def test_create_publishes(self):
+        """测试创建任务发布事件"""
+        self.task_manager.create_task(1, '写报告')
+
+        self.assertEqual([(e['type'], e['task_id']) for e in self.received], [('task.created', 42)])
+
+    def test_update_publishes_changed_fields(self):
+        """测试更新任务时事件只包含修改的字段"""
+        self.task_manager.update_task(42, title='新标题', priority='high', user_id=1)
+
+        self.assertEqual(self.received[-1]['type'], 'task.updated')
+        self.assertEqual(self.received[-1]['fields'], ['title', 'priority'])
+
+    def test_delete_resolves_owner_before_delete(self):
+        """测试删除任务前查询所属用户"""
+        self.task_manager.delete_task(42)
+
+        self.assertEqual(self.received[-1]['type'], 'task.deleted')
+        owner_query = self.mock_db.execute_query.call_args_list[0]
+        self.assertIn('SELECT user_id FROM tasks', owner_query[0][0])
+
+    def test_failed_write_does_not_publish(self):
+        """测试写入失败时不发布事件"""
+        self.mock_db.execute_update_rowcount.return_value = 0
+
+        self.task_manager.toggle_task_status(42, 'completed', user_id=1)
+
+        self.assertEqual(self.received, [])
+
+    def test_task_matches_view(self):
+        """测试任务视图归属判断"""
+        today = date(2025, 7, 2)
+        task = {'status': 'pending', 'priority': 'low', 'due_date': date(2025, 7, 1), 'tags': [{'tag_id': 3}]}
+
+        self.assertTrue(self.task_manager.task_matches_view(task, 'my_day', today))
+        self.assertFalse(self.task_manager.task_matches_view(task, 'planned', today))
+        self.assertFalse(self.task_manager.task_matches_view(task, 'important', today))
+        self.assertTrue(self.task_manager.task_matches_view(task, 'tag_3', today))
+
+        task.update(due_date=date(2025, 7, 5), status='completed')
+        self.assertFalse(self.task_manager.task_matches_view(task, 'planned', today))
+        task['status'] = 'pending'
+        self.assertTrue(self.task_manager.task_matches_view(task, 'planned', today))
+
+
+if __name__ == '__main__':
+    unittest.main()
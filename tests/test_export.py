@@ -0,0 +1,87 @@
+"""
+流式导出测试
+"""
+import unittest
+from unittest.mock import Mock, patch
+from datetime import date, datetime
+import json
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from src.api.sync_api import SyncAPI, create_api_app
+from src.services.export_service import ExportService
+
+
+class TestExportService(unittest.TestCase):
+    """导出服务测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.rows = [
+            {'task_id': i, 'title': f'任务{i}', 'due_date': date(2025, 7, i), 'status': 'pending',
+             'completed_at': None, 'created_at': datetime(2025, 7, 1, 8, 0), 'tags': '工作,学习' if i == 1 else None}
+            for i in range(1, 6)
+        ]
+        self.mock_db = Mock()
+        self.mock_db.stream_query.side_effect = lambda query, params=None, batch_size=1000: iter(self.rows)
+        self.service = ExportService(self.mock_db, chunk_rows=2)
+
+    def test_csv_streams_in_chunks(self):
+        """测试CSV首块为BOM和表头，之后按批输出，行数据不一次性读入"""
+        chunks = list(self.service.export(1, 'tasks', 'csv'))
+
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[0].startswith('\ufeff'.encode('utf-8') + b'task_id,title,'))
+        text = b''.join(chunks).decode('utf-8-sig')
+        lines = text.strip().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertIn('1,任务1,,2025-07-01,,pending', lines[1])
+        self.assertTrue(lines[1].endswith('"工作,学习"'))
+        query, params = self.mock_db.stream_query.call_args[0]
+        self.assertIn('FROM tasks', query)
+        self.assertEqual(params, (1,))
+
+    def test_jsonl_one_object_per_line(self):
+        """测试JSONL每行一个对象，日期转为ISO格式"""
+        text = b''.join(self.service.export(1, 'tasks', 'jsonl')).decode('utf-8')
+        records = [json.loads(line) for line in text.splitlines()]
+
+        self.assertEqual([r['task_id'] for r in records], [1, 2, 3, 4, 5])
+        self.assertEqual(records[0]['created_at'], '2025-07-01T08:00:00')
+        self.assertIsNone(records[1]['tags'])
+
+    def test_invalid_requests_rejected_before_query(self):
+        """测试未知数据集、格式或缺少pyarrow时在查询前报错"""
+        with self.assertRaises(ValueError):
+            self.service.export(1, 'users', 'csv')
+        with self.assertRaises(ValueError):
+            self.service.export(1, 'tasks', 'xlsx')
+        with patch.object(ExportService, 'parquet_available', return_value=False):
+            with self.assertRaises(ValueError):
+                self.service.export(1, 'tasks', 'parquet')
+        self.mock_db.stream_query.assert_not_called()
+
+    def test_export_endpoint(self):
+        """测试导出接口以附件形式返回，参数错误时返回400"""
+        user_manager = Mock()
+        user_manager.get_user_by_email.return_value = {'user_id': 1, 'password_hash': 'x'}
+        user_manager.verify_password.return_value = True
+        api = SyncAPI(self.mock_db, user_manager, Mock(), Mock(), event_log=Mock(), export_service=self.service)
+        client = TestClient(create_api_app(self.mock_db, user_manager, Mock(), Mock(), api))
+        auth = ('a@example.com', 'secret')
+
+        response = client.get('/export/tasks', params={'format': 'jsonl'}, auth=auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tasks.jsonl', response.headers['content-disposition'])
+        self.assertEqual(len(response.text.splitlines()), 5)
+        self.assertEqual(client.get('/export/tasks', params={'format': 'xlsx'}, auth=auth).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
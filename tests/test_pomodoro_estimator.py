@@ -0,0 +1,141 @@
+"""
+历史番茄钟预估测试
+"""
+import unittest
+from unittest.mock import Mock
+from datetime import datetime, timedelta
+import time
+
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import pomodoro_estimator
+from src.services.pomodoro_estimator import PomodoroEstimator, get_shared_estimator
+
+
+class TestPomodoroEstimator(unittest.TestCase):
+    """历史番茄钟预估测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.base_time = datetime(2025, 7, 1, 9, 0)
+        self.history = [
+            self.make_row(1, '编写周报', '汇总本周工作', 2),
+            self.make_row(2, '编写月报', '汇总本月工作', 2),
+            self.make_row(3, '重构登录模块', '拆分会话和权限逻辑', 8),
+            self.make_row(4, '重构支付模块', '拆分订单和回调逻辑', 9),
+            self.make_row(5, '回复客户邮件', '', 1)
+        ]
+        self.mock_db = Mock()
+        self.mock_db.execute_query.side_effect = [list(self.history)]
+        self.estimator = PomodoroEstimator(self.mock_db)
+
+    def make_row(self, task_id, title, description, used, status='completed', minutes=0):
+        """构造查询返回的任务行"""
+        return {
+            'task_id': task_id,
+            'title': title,
+            'description': description,
+            'status': status,
+            'used_pomodoros': used,
+            'updated_at': self.base_time + timedelta(minutes=minutes or task_id)
+        }
+
+    def test_estimate_from_similar_tasks(self):
+        """测试根据相似历史任务给出预估"""
+        self.mock_db.execute_query.side_effect = [list(self.history), []]
+
+        result = self.estimator.estimate(1, '重构用户模块', '拆分会话逻辑')
+
+        self.assertIn(result['pomodoros'], (8, 9))
+        self.assertIn(result['neighbors'][0], (3, 4))
+        self.assertGreater(result['confidence'], 0)
+
+    def test_unrelated_task_has_low_confidence(self):
+        """测试与历史无关的任务置信度更低"""
+        self.mock_db.execute_query.side_effect = [list(self.history), [], []]
+
+        similar = self.estimator.estimate(1, '编写季报', '汇总本季度工作')
+        unrelated = self.estimator.estimate(1, 'xyz', None)
+
+        self.assertEqual(similar['pomodoros'], 2)
+        self.assertTrue(unrelated is None or unrelated['confidence'] < similar['confidence'])
+
+    def test_incremental_refresh(self):
+        """测试增量同步新完成和被重新打开的任务"""
+        self.mock_db.execute_query.side_effect = [
+            list(self.history),
+            [
+                self.make_row(6, '整理发票', '报销', 3, minutes=60),
+                self.make_row(5, '回复客户邮件', '', 1, status='pending', minutes=61)
+            ]
+        ]
+
+        self.estimator.refresh(1)
+        changed = self.estimator.refresh(1)
+        history = self.estimator._histories[1]
+
+        self.assertEqual(changed, 2)
+        self.assertIn(6, history.task_ids)
+        self.assertNotIn(5, history.task_ids)
+        self.assertEqual(history.tf.shape[0], 5)
+        # 第二次查询只取上次同步之后的更新
+        last_call = self.mock_db.execute_query.call_args_list[-1]
+        self.assertIn('updated_at >=', last_call[0][0])
+        self.assertEqual(last_call[0][1], (1, self.base_time + timedelta(minutes=5)))
+
+    def test_no_history_returns_none(self):
+        """测试没有历史任务时返回None"""
+        self.mock_db.execute_query.side_effect = [[]]
+
+        self.assertIsNone(self.estimator.estimate(1, '新任务'))
+
+    def test_estimate_is_fast(self):
+        """测试较大历史下预估仍在毫秒级"""
+        rows = [self.make_row(i, f'任务{i} 模块{i % 17}', f'描述{i % 13}', i % 8 + 1) for i in range(1, 501)]
+        self.mock_db.execute_query.side_effect = [rows] + [[] for _ in range(20)]
+        self.estimator.estimate(1, '预热', None)
+
+        started = time.perf_counter()
+        for _ in range(10):
+            self.estimator.estimate(1, '任务42 模块8', '描述3')
+        elapsed = (time.perf_counter() - started) / 10
+
+        self.assertLess(elapsed, 0.05)
+
+    def test_initial_load_is_fast(self):
+        """测试首次加载较大历史时一次构建矩阵，结果与逐行增量同步一致"""
+        rows = [self.make_row(i, f'任务{i} 模块{i % 17}', f'描述{i % 13}', i % 8 + 1) for i in range(1, 501)]
+        self.mock_db.execute_query.side_effect = [rows[::-1], []]  # 首次查询按更新时间倒序返回
+
+        started = time.perf_counter()
+        result = self.estimator.estimate(1, '任务42 模块8', '描述3')
+        self.assertLess(time.perf_counter() - started, 0.2)
+
+        incremental = PomodoroEstimator(Mock())
+        incremental.db.execute_query.side_effect = [[], list(rows), []]
+        incremental.refresh(1)
+        incremental.estimate(1, '预热', None)
+        history, expected = self.estimator._histories[1], incremental._histories[1]
+        self.assertEqual(history.task_ids, expected.task_ids)
+        self.assertTrue(np.allclose(history.tf, expected.tf))
+        self.assertTrue(np.array_equal(history.doc_freq, expected.doc_freq))
+        self.assertEqual(history.last_sync, self.base_time + timedelta(minutes=500))
+        self.assertEqual(result, incremental.estimate(1, '任务42 模块8', '描述3'))
+
+    def test_shared_estimator(self):
+        """测试多个页面共用同一个预估器，历史只加载一次"""
+        pomodoro_estimator._shared_estimator = None
+        self.addCleanup(setattr, pomodoro_estimator, '_shared_estimator', None)
+
+        first = get_shared_estimator(self.mock_db)
+        self.assertIs(get_shared_estimator(Mock()), first)
+        self.assertIs(first.db, self.mock_db)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+AI提示词组装测试
+"""
+import unittest
+from datetime import date, datetime, timedelta
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.prompt_builder import build_task_context, estimate_tokens, rank_tasks
+
+
+class TestPromptBuilder(unittest.TestCase):
+    """提示词组装测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.today = date(2025, 7, 1)
+
+    def make_task(self, task_id, **overrides):
+        """构造测试任务"""
+        task = {
+            'task_id': task_id,
+            'title': f'任务{task_id}',
+            'status': 'pending',
+            'priority': 'medium',
+            'due_date': None,
+            'estimated_pomodoros': 2,
+            'used_pomodoros': 0,
+            'tags': [],
+            'updated_at': datetime(2025, 6, 1)
+        }
+        task.update(overrides)
+        return task
+
+    def test_rank_order(self):
+        """测试待完成、临近截止、高优先级、最近更新的排序"""
+        tasks = [
+            self.make_task(1, status='completed', due_date=self.today),
+            self.make_task(2),
+            self.make_task(3, priority='high'),
+            self.make_task(4, due_date=self.today + timedelta(days=2)),
+            self.make_task(5, due_date=self.today - timedelta(days=1)),
+            self.make_task(6, updated_at=datetime(2025, 6, 30))
+        ]
+
+        ranked_ids = [task['task_id'] for task in rank_tasks(tasks, self.today)]
+        self.assertEqual(ranked_ids, [5, 4, 3, 6, 2, 1])
+
+    def test_context_stays_within_budget(self):
+        """测试任务数量很大时上下文仍在预算内"""
+        tasks = [self.make_task(i, tags=[{'name': '工作'}]) for i in range(5000)]
+
+        context = build_task_context(tasks, token_budget=800, today=self.today)
+
+        self.assertLessEqual(estimate_tokens(context), 800)
+        self.assertIn('未逐条列出', context)
+        self.assertIn('工作', context)
+
+    def test_small_backlog_fully_listed(self):
+        """测试任务较少时全部列出且无汇总"""
+        tasks = [self.make_task(i) for i in range(3)]
+
+        context = build_task_context(tasks, token_budget=800, today=self.today)
+
+        self.assertEqual(len(context.splitlines()), 3)
+        self.assertNotIn('未逐条列出', context)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+SQL查询统计测试
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.sync_api import SyncAPI, create_api_app
+from src.database.database import UserManager
+from src.database.query_stats import QueryStats, create_query_stats_middleware, fingerprint, query_scope
+from src.database.sqlite_backend import SQLiteDatabaseManager
+
+
+class TestQueryStats(unittest.TestCase):
+    """查询统计测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.stats = QueryStats(slow_query_ms=10000)
+        self.db = SQLiteDatabaseManager(':memory:', query_stats=self.stats)
+        self.addCleanup(self.db.disconnect)
+        self.user_manager = UserManager(self.db)
+        self.stats.reset()
+
+    def test_fingerprint(self):
+        """测试字面量、IN 列表和多行 VALUES 归一化"""
+        self.assertEqual(
+            fingerprint("SELECT *  FROM tasks\n WHERE user_id = 3 AND title = 'a''b' AND task_id IN (%s, %s, %s)"),
+            "SELECT * FROM tasks WHERE user_id = ? AND title = ? AND task_id IN (...)"
+        )
+        self.assertEqual(fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)"),
+                         "INSERT INTO t (a, b) VALUES (?, ?), ...")
+        self.assertEqual(fingerprint("SELECT * FROM t WHERE id IN (?)"), fingerprint("SELECT * FROM t WHERE id IN (?, ?)"))
+
+    def test_records_caller_rows_and_scope(self):
+        """测试按指纹汇总耗时、行数和调用方，作用域统计重复语句"""
+        self.user_manager.create_user('a@example.com', 'password123')
+        self.stats.reset()
+        with query_scope('GET /users', self.stats) as scope:
+            for _ in range(3):
+                self.user_manager.get_user_by_email('a@example.com')
+
+        lookup = next(row for row in self.stats.top(order_by='count') if 'FROM users' in row['fingerprint'])
+        self.assertEqual(lookup['count'], 3)
+        self.assertEqual(lookup['rows'], 3)
+        self.assertEqual(lookup['callers'], {'UserManager.get_user_by_email': 3})
+        self.assertEqual(scope.count, 3)
+        self.assertEqual(scope.repeated(), [{'fingerprint': lookup['fingerprint'], 'count': 3}])
+
+        request = self.stats.requests()[0]
+        self.assertEqual((request['name'], request['queries'], request['avg_queries']), ('GET /users', 3, 3.0))
+        self.assertEqual(request['top_repeated']['count'], 3)
+
+    def test_slow_query_explained_once(self):
+        """测试慢查询记入日志，执行计划只在指纹第一次变慢时获取"""
+        self.stats.slow_query_ms = 0
+        with patch.object(self.db, 'explain', wraps=self.db.explain) as explain:
+            self.user_manager.get_user_by_email('a@example.com')
+            self.user_manager.get_user_by_email('b@example.com')
+
+        explain.assert_called_once()
+        row = self.stats.top(1, order_by='count')[0]
+        self.assertEqual(row['slow'], 2)
+        self.assertTrue(any('users' in step['detail'] for step in row['plan']))
+        self.assertEqual(self.stats.slow_queries()[0]['caller'], 'UserManager.get_user_by_email')
+
+        with self.assertRaises(ValueError):
+            self.stats.top(order_by='fingerprint')
+
+    def test_middleware_and_debug_endpoint(self):
+        """测试中间件按请求计数，调试接口返回统计且只在单独开启时开放"""
+        app = FastAPI()
+        app.middleware('http')(create_query_stats_middleware(self.stats))
+
+        @app.get('/user')
+        def get_user():
+            self.user_manager.get_user_by_email('a@example.com')
+            return {}
+
+        response = TestClient(app).get('/user')
+        self.assertEqual(response.headers['X-Query-Count'], '1')
+        self.assertEqual(self.stats.requests()[0]['name'], 'GET /user')
+
+        user_manager = Mock()
+        user_manager.get_user_by_email.return_value = {'user_id': 1, 'password_hash': 'x'}
+        user_manager.verify_password.return_value = True
+        api = SyncAPI(Mock(), user_manager, Mock(), Mock(), event_log=Mock(), query_stats=self.stats)
+        client = TestClient(create_api_app(Mock(), user_manager, Mock(), Mock(), api))
+        auth = ('a@example.com', 'secret')
+
+        with patch.dict('src.api.sync_api.APP_CONFIG', {'query_debug_endpoint': True}):
+            report = client.get('/debug/queries', params={'order': 'count'}, auth=auth).json()
+            self.assertEqual(report['top'][0]['callers'], {'UserManager.get_user_by_email': 1})
+            self.assertEqual(client.get('/debug/queries', params={'order': 'x'}, auth=auth).status_code, 400)
+            self.assertEqual(client.delete('/debug/queries', auth=auth).status_code, 200)
+            self.assertEqual(self.stats.top(), [])
+        # 调试模式本身不开放接口
+        with patch.dict('src.api.sync_api.APP_CONFIG', {'debug': True, 'query_debug_endpoint': False}):
+            self.assertEqual(client.get('/debug/queries', auth=auth).status_code, 404)
+            self.assertEqual(client.delete('/debug/queries', auth=auth).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+重复任务引擎测试
+"""
+import unittest
+from unittest.mock import Mock, patch
+from datetime import date, timedelta
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.database import UserManager
+from src.database.sqlite_backend import SQLiteDatabaseManager
+from src.services.event_bus import EventBus, LocalBroker
+from src.services.recurrence_engine import RecurrenceEngine
+from src.services.report_cache import RevisionedCache
+from src.services.task_manager import TaskManager, SERIES_DATE_TAKEN
+
+
+class TestRecurrenceEngine(unittest.TestCase):
+    """重复任务引擎测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.mock_db = Mock()
+        self.mock_db.execute_update_rowcount.return_value = 1
+        self.mock_db.get_last_insert_id.return_value = 50
+        self.engine = RecurrenceEngine(self.mock_db, horizon_days=14)
+        self.today = date(2025, 7, 2)
+
+    def test_spawn_is_set_based_and_copies_tags(self):
+        """测试生成下一次任务用一条插入语句，并按新任务ID复制标签"""
+        next_id = self.engine.spawn_next([7, 8, 7], user_id=1, today=self.today)
+
+        self.assertEqual(next_id, 50)
+        query, params = self.mock_db.execute_update_rowcount.call_args[0]
+        self.assertIn('INSERT IGNORE INTO tasks', query)
+        self.assertIn("t.status = 'completed'", query)
+        self.assertIn('t.task_id IN (%s, %s)', query)
+        self.assertEqual(params, (self.today,) * 4 + (7, 8, 1))
+        tags_query, tags_params = self.mock_db.execute_update.call_args[0]
+        self.assertIn('INSERT IGNORE INTO task_tags', tags_query)
+        self.assertEqual(tags_params, (50, 7, 8))
+
+    def test_nothing_spawned_skips_tag_copy(self):
+        """测试非重复任务或已生成过时不复制标签"""
+        self.mock_db.execute_update_rowcount.return_value = 0
+
+        self.assertIsNone(self.engine.spawn_next([7], today=self.today))
+        statements = [call[0][0] for call in self.mock_db.execute_update.call_args_list]
+        self.assertEqual(len(statements), 1)
+        self.assertIn('SET series_id = task_id', statements[0])
+
+    def test_materialize_over_horizon(self):
+        """测试批量生成覆盖 [今天, 今天+horizon] 的一次集合式插入"""
+        self.mock_db.execute_update_rowcount.return_value = 12
+
+        self.assertEqual(self.engine.materialize(today=self.today), 12)
+
+        query, params = self.mock_db.execute_update_rowcount.call_args[0]
+        self.assertIn('WITH RECURSIVE steps', query)
+        self.assertEqual(params, (15,) + (self.today,) * 4 + (date(2025, 7, 16),))
+        statements = [call[0][0] for call in self.mock_db.execute_update.call_args_list]
+        self.assertIn('SET series_id = task_id', statements[0])
+        self.assertIn('INSERT IGNORE INTO task_tags', statements[1])
+
+    def test_completing_spawns_next(self):
+        """测试完成重复任务时生成下一次任务并发布创建事件，取消完成、翻转或非重复任务不生成"""
+        bus = EventBus(LocalBroker(), origin_provider=lambda: None)
+        received = []
+        bus.subscribe(1, received.append)
+        task_manager = TaskManager(self.mock_db, event_bus=bus)
+
+        self.assertTrue(task_manager.toggle_task_status(7, 'completed', user_id=1, repeat_cycle='daily'))
+        self.assertEqual([(e['type'], e['task_id']) for e in received],
+                         [('task.updated', 7), ('task.created', 50)])
+
+        for status, repeat_cycle in (('pending', 'daily'), (None, 'daily'), ('completed', 'none'),
+                                     ('completed', None)):
+            self.mock_db.reset_mock()
+            task_manager.toggle_task_status(7, status, user_id=1, repeat_cycle=repeat_cycle)
+            self.assertEqual(self.mock_db.execute_update_rowcount.call_count, 1)
+            self.mock_db.execute_update.assert_not_called()
+
+
+
+class TestRecurrenceOnSQLite(unittest.TestCase):
+    """重复任务引擎在真实数据库（内存SQLite）上的测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        patcher = patch('src.database.database.publish_change')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = SQLiteDatabaseManager(':memory:')
+        self.addCleanup(self.db.disconnect)
+        self.user_id = UserManager(self.db).create_user('recur@example.com', 'password123')
+        self.engine = RecurrenceEngine(self.db, horizon_days=14)
+        self.today = date.today()
+
+    def add_task(self, due_date, repeat_cycle='daily', status='completed', series_id=None) -> int:
+        self.db.execute_update(
+            "INSERT INTO tasks (user_id, title, due_date, status, repeat_cycle, series_id) VALUES (%s, %s, %s, %s, %s, %s)",
+            (self.user_id, '打卡', due_date, status, repeat_cycle, series_id)
+        )
+        return self.db.get_last_insert_id()
+
+    def due_dates(self, series_id: int) -> list:
+        rows = self.db.execute_query("SELECT due_date FROM tasks WHERE series_id = %s AND task_id <> %s "
+                                     "ORDER BY due_date", (series_id, series_id))
+        return [row['due_date'] for row in rows]
+
+    def test_materialize_stale_series(self):
+        """测试最晚任务已过期超过 horizon 天的系列也从今天起补齐"""
+        daily = self.add_task(self.today - timedelta(days=30))
+        weekly = self.add_task(self.today - timedelta(days=30), 'weekly')
+
+        self.engine.materialize(today=self.today)
+
+        self.assertEqual(self.due_dates(daily), [self.today + timedelta(days=i) for i in range(15)])
+        weekly_dates = self.due_dates(weekly)
+        self.assertEqual(len(weekly_dates), 2)
+        self.assertTrue(all(self.today <= due < self.today + timedelta(days=15) for due in weekly_dates))
+        self.assertEqual(self.engine.materialize(today=self.today), 0)
+
+    def test_spawn_links_source_once(self):
+        """测试生成下一次任务时原任务加入系列，没有截止日期的任务反复完成只生成一次"""
+        task_id = self.add_task(None)
+
+        self.assertIsNotNone(self.engine.spawn_next([task_id], self.user_id, today=self.today))
+        self.assertIsNone(self.engine.spawn_next([task_id], self.user_id, today=self.today + timedelta(days=1)))
+
+        source = self.db.execute_query("SELECT series_id FROM tasks WHERE task_id = %s", (task_id,))[0]
+        self.assertEqual(source['series_id'], task_id)
+        self.assertEqual(self.due_dates(task_id), [self.today + timedelta(days=1)])
+
+    def test_update_onto_taken_date_reports_error(self):
+        """测试把任务的截止日期改到系列中已有任务的日期时返回错误信息"""
+        first = self.add_task(self.today, status='pending', series_id=None)
+        self.db.execute_update("UPDATE tasks SET series_id = task_id WHERE task_id = %s", (first,))
+        second = self.add_task(self.today + timedelta(days=1), status='pending', series_id=first)
+        task_manager = TaskManager(self.db, event_bus=Mock(), report_cache=RevisionedCache())
+
+        result = task_manager.update_task(second, due_date=self.today, user_id=self.user_id)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['error'], SERIES_DATE_TAKEN)
+        self.assertTrue(task_manager.update_task(second, due_date=self.today + timedelta(days=2),
+                                                 user_id=self.user_id)['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
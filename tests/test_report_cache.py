@@ -0,0 +1,78 @@
+"""
+统计报告缓存测试
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.report_cache import RevisionedCache
+
+
+class TestRevisionedCache(unittest.TestCase):
+    """统计报告缓存测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.cache = RevisionedCache(max_entries=3)
+        self.calls = []
+
+    def compute(self, value):
+        """记录调用次数的计算函数"""
+        def inner():
+            self.calls.append(value)
+            return value
+        return inner
+
+    def test_hit_for_same_revision(self):
+        """测试同一版本和参数命中缓存"""
+        self.cache.get_or_compute(1, 'report', {'days': 7}, 1, self.compute('a'))
+        result = self.cache.get_or_compute(1, 'report', {'days': 7}, 1, self.compute('b'))
+
+        self.assertEqual(result, 'a')
+        self.assertEqual(self.calls, ['a'])
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+
+    def test_params_are_part_of_key(self):
+        """测试不同参数分别缓存"""
+        self.cache.get_or_compute(1, 'report', {'days': 7}, 1, self.compute('a'))
+        result = self.cache.get_or_compute(1, 'report', {'days': 30}, 1, self.compute('b'))
+
+        self.assertEqual(result, 'b')
+
+    def test_new_revision_drops_old_entries(self):
+        """测试版本递增后旧条目被清除"""
+        self.cache.get_or_compute(1, 'report', None, 1, self.compute('a'))
+        self.cache.get_or_compute(2, 'report', None, 1, self.compute('other'))
+        result = self.cache.get_or_compute(1, 'report', None, 2, self.compute('b'))
+
+        self.assertEqual(result, 'b')
+        self.assertEqual(self.cache.get_stats()['entries'], 2)
+        # 旧版本的结果不会再写入缓存
+        self.cache.get_or_compute(1, 'report', None, 1, self.compute('stale'))
+        self.assertEqual(self.cache.get_stats()['entries'], 2)
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        for name in ['a', 'b', 'c']:
+            self.cache.get_or_compute(1, name, None, 1, self.compute(name))
+        self.cache.get_or_compute(1, 'a', None, 1, self.compute('a2'))
+        self.cache.get_or_compute(1, 'd', None, 1, self.compute('d'))
+
+        self.assertEqual(self.cache.get_or_compute(1, 'a', None, 1, self.compute('a3')), 'a')
+        self.assertEqual(self.cache.get_or_compute(1, 'b', None, 1, self.compute('b2')), 'b2')
+        self.assertGreaterEqual(self.cache.get_stats()['evictions'], 1)
+
+    def test_no_revision_bypasses_cache(self):
+        """测试没有版本号时不缓存"""
+        self.cache.get_or_compute(1, 'report', None, None, self.compute('a'))
+        self.cache.get_or_compute(1, 'report', None, None, self.compute('b'))
+
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+多进程部署启动脚本测试
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serve import worker_ports, worker_env, missing_shared_backends, nicegui_supports_redis, render_nginx_config
+
+
+class TestServe(unittest.TestCase):
+    """多进程部署测试类"""
+
+    def test_worker_ports_and_env(self):
+        """测试工作进程端口连续分配且关闭自动重载"""
+        ports = worker_ports(3, 9001)
+        self.assertEqual(ports, [9001, 9002, 9003])
+
+        env = worker_env(9002, {'DEBUG': 'True', 'SECRET_KEY': 'k'})
+        self.assertEqual(env['PORT'], '9002')
+        self.assertEqual(env['RELOAD'], 'False')
+        self.assertEqual(env['SECRET_KEY'], 'k')
+
+    def test_nginx_config_is_sticky_with_websocket(self):
+        """测试Nginx配置使用IP粘性转发并支持websocket升级"""
+        config = render_nginx_config([9001, 9002], listen_port=8080)
+
+        self.assertIn('ip_hash;', config)
+        self.assertIn('server 127.0.0.1:9001;', config)
+        self.assertIn('server 127.0.0.1:9002;', config)
+        self.assertIn('listen 8080;', config)
+        self.assertIn('proxy_set_header Upgrade $http_upgrade;', config)
+
+    def test_missing_shared_backends(self):
+        """测试检查未配置的共享后端"""
+        missing = missing_shared_backends({'NICEGUI_REDIS_URL': 'redis://localhost:6379/0'})
+
+        self.assertEqual(missing, ['EVENT_BROKER_URL', 'AI_CACHE_REDIS_URL'])
+
+    def test_nicegui_redis_version(self):
+        """测试只有支持Redis存储的NiceGUI版本允许多进程部署"""
+        self.assertFalse(nicegui_supports_redis('1.4.21'))
+        self.assertFalse(nicegui_supports_redis('2.9.1'))
+        self.assertTrue(nicegui_supports_redis('2.10.0'))
+        self.assertTrue(nicegui_supports_redis('3.0.0rc1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
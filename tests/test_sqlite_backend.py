@@ -0,0 +1,210 @@
+"""
+SQLite后端测试（内存数据库，不需要MySQL服务）
+"""
+import unittest
+from unittest.mock import Mock, patch
+from datetime import date, datetime, time, timedelta
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.database import UserManager, TagManager, TagIdCache
+from src.database.sqlite_backend import SQLiteDatabaseManager, translate
+from src.services.report_cache import RevisionedCache
+from src.services.task_manager import TaskManager
+from src.services.task_events import TaskEventLog
+from src.services.task_import import TaskImporter
+from src.services.statistics_manager import StatisticsManager
+
+
+class TestSQLiteTranslate(unittest.TestCase):
+    """MySQL方言翻译测试类"""
+
+    def test_placeholders_and_ignore(self):
+        """测试占位符、双引号字符串和 INSERT IGNORE"""
+        self.assertEqual(
+            translate('INSERT IGNORE INTO t (a, b) VALUES (%s, "x\'s")'),
+            "INSERT OR IGNORE INTO t (a, b) VALUES (?, 'x''s')"
+        )
+        self.assertEqual(translate("SELECT '%s' FROM t WHERE a = %s"), "SELECT '%s' FROM t WHERE a = ?")
+
+    def test_upsert(self):
+        """测试 ON DUPLICATE KEY UPDATE 改写为 ON CONFLICT"""
+        self.assertEqual(
+            translate("INSERT INTO c (k, v) VALUES (%s, %s) ON DUPLICATE KEY UPDATE v = GREATEST(v, VALUES(v))"),
+            "INSERT INTO c (k, v) VALUES (?, ?) ON CONFLICT DO UPDATE SET v = GREATEST(v, excluded.v)"
+        )
+
+    def test_interval_and_group_concat(self):
+        """测试 INTERVAL 运算、TIMESTAMPDIFF 单位和 GROUP_CONCAT 分隔符"""
+        self.assertEqual(
+            translate("WHERE created_at <= NOW(3) - INTERVAL %s SECOND"),
+            "WHERE created_at <= DATE_ADD_INTERVAL(NOW(3), -(?), 'SECOND')"
+        )
+        self.assertEqual(
+            translate("SELECT d + INTERVAL GREATEST(1, TIMESTAMPDIFF(MONTH, d, %s) + 1) MONTH"),
+            "SELECT DATE_ADD_INTERVAL(d, (GREATEST(1, TIMESTAMPDIFF('MONTH', d, ?) + 1)), 'MONTH')"
+        )
+        self.assertEqual(
+            translate("SELECT GROUP_CONCAT(tg.name ORDER BY tg.name SEPARATOR ',') FROM tags tg"),
+            "SELECT GROUP_CONCAT(tg.name, ',') FROM tags tg"
+        )
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """SQLite后端与服务层集成测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        for target in ('src.database.database.publish_change', 'src.services.task_import.publish_change'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.db = SQLiteDatabaseManager(':memory:')
+        self.addCleanup(self.db.disconnect)
+        self.user_id = UserManager(self.db).create_user('sqlite@example.com', 'password123')
+        self.tag_manager = TagManager(self.db, TagIdCache())
+        self.task_manager = TaskManager(self.db, event_bus=Mock(), report_cache=RevisionedCache())
+        self.task_manager.tag_manager = self.tag_manager
+
+    def test_schema_and_user(self):
+        """测试建表并按邮箱（不区分大小写）查找用户"""
+        self.assertTrue(self.db.table_exists('tasks'))
+        self.assertFalse(self.db.table_exists('pomodoro_sessions'))
+        user = UserManager(self.db).get_user_by_email('SQLite@example.com')
+        self.assertEqual(user['user_id'], self.user_id)
+
+    def test_task_views_and_tags(self):
+        """测试创建任务、视图查询和标签计数"""
+        today = date.today()
+        task_id = self.task_manager.create_task(self.user_id, '写报告', due_date=today,
+                                                priority='high', tags=['工作', '写作'])
+        self.task_manager.create_task(self.user_id, '读书', due_date=today + timedelta(days=3), tags=['工作'])
+
+        task = self.task_manager.get_task_by_id(task_id)
+        self.assertEqual(task['due_date'], today)
+        self.assertIsInstance(task['created_at'], datetime)
+        self.assertEqual(sorted(tag['name'] for tag in task['tags']), ['写作', '工作'])
+
+        self.assertEqual([t['task_id'] for t in self.task_manager.get_tasks_by_view(self.user_id, 'my_day')],
+                         [task_id])
+        counts = self.task_manager.get_view_counts(self.user_id)
+        self.assertEqual((counts['my_day'], counts['important'], counts['all']), (1, 1, 2))
+
+        # 标签名不区分大小写，与MySQL排序规则一致
+        resolved = self.tag_manager.resolve_tags(self.user_id, ['工作', 'New', 'NEW'])
+        self.assertEqual(len(set(resolved.values())), 2)
+        pending = {tag['name']: tag['pending_count'] for tag in self.tag_manager.get_user_tags_with_count(self.user_id)}
+        self.assertEqual(pending['工作'], 2)
+        self.assertTrue(self.tag_manager.rebuild_pending_counts(self.user_id))
+
+    def test_estimate_marker(self):
+        """测试未指定预估的任务记为未预估，用户设置后（即使是1）记为已预估"""
+        default_id = self.task_manager.create_task(self.user_id, '默认')
+        explicit_id = self.task_manager.create_task(self.user_id, '指定', estimated_pomodoros=1)
+
+        self.assertFalse(self.task_manager.get_task_by_id(default_id)['pomodoros_estimated'])
+        self.assertTrue(self.task_manager.get_task_by_id(explicit_id)['pomodoros_estimated'])
+        self.task_manager.update_task(default_id, estimated_pomodoros=1, user_id=self.user_id)
+        self.assertTrue(self.task_manager.get_task_by_id(default_id)['pomodoros_estimated'])
+
+    def test_toggle_spawns_recurrence_and_logs_events(self):
+        """测试完成重复任务生成下一次任务，触发器记录事件"""
+        due = date.today() - timedelta(days=20)
+        task_id = self.task_manager.create_task(self.user_id, '周会', due_date=due,
+                                                repeat_cycle='weekly', tags=['会议'])
+
+        self.assertTrue(self.task_manager.toggle_task_status(task_id, 'completed', user_id=self.user_id,
+                                                          repeat_cycle='weekly'))
+
+        done = self.task_manager.get_task_by_id(task_id)
+        self.assertEqual(done['status'], 'completed')
+        self.assertIsInstance(done['completed_at'], datetime)
+        spawned = self.db.execute_query("SELECT * FROM tasks WHERE series_id = %s AND task_id <> %s",
+                                        (task_id, task_id))
+        self.assertEqual(len(spawned), 1)
+        self.assertEqual(spawned[0]['due_date'], due + timedelta(weeks=3))
+        self.assertEqual(self.task_manager.get_task_by_id(spawned[0]['task_id'])['tags'][0]['name'], '会议')
+
+        events, cursor = TaskEventLog(self.db).read_since(0, user_id=self.user_id, settle_seconds=0)
+        self.assertIn('complete', [event['event_type'] for event in events])
+        self.assertEqual(cursor, events[-1]['event_id'])
+        self.assertGreater(self.db.get_data_revision(self.user_id), 0)
+
+    def test_import_batch_ids(self):
+        """测试批量导入时多行插入返回第一行ID"""
+        importer = TaskImporter(self.db, self.tag_manager, batch_size=2)
+        records = [{'title': f"任务{i}", 'tags': '导入'} for i in range(5)]
+
+        summary = importer.run(self.user_id, records)
+
+        self.assertTrue(summary['completed'])
+        self.assertEqual(summary['imported'], 5)
+        rows = self.db.execute_query(
+            "SELECT t.title FROM tasks t JOIN task_tags tt ON tt.task_id = t.task_id ORDER BY t.task_id"
+        )
+        self.assertEqual([row['title'] for row in rows], [f"任务{i}" for i in range(5)])
+
+    def test_last_insert_id_skips_updated_rows(self):
+        """测试 ON DUPLICATE KEY UPDATE 和 INSERT IGNORE 只按实际插入的行计算第一行ID"""
+        upsert = ("INSERT INTO tags (user_id, name, color) VALUES (%s, %s, '#000'), (%s, %s, '#000') "
+                  "ON DUPLICATE KEY UPDATE tag_id = tag_id")
+        self.db.execute_update(upsert, (self.user_id, '甲', self.user_id, '乙'))
+        first = self.db.get_last_insert_id()
+
+        self.db.execute_update(upsert, (self.user_id, '乙', self.user_id, '丙'))
+        tag_ids = {row['name']: row['tag_id'] for row in self.db.execute_query("SELECT tag_id, name FROM tags")}
+        self.assertEqual(tag_ids['甲'], first)
+        self.assertEqual(self.db.get_last_insert_id(), tag_ids['丙'])
+
+        task_id = self.task_manager.create_task(self.user_id, '读书')
+        self.db.execute_update("INSERT IGNORE INTO tags (user_id, name) VALUES (%s, '丙'), (%s, '丁')",
+                               (self.user_id, self.user_id))
+        self.assertEqual(self.db.get_last_insert_id(),
+                         self.db.execute_query("SELECT tag_id FROM tags WHERE name = '丁'")[0]['tag_id'])
+        self.assertNotEqual(self.db.get_last_insert_id(), task_id)
+
+    def test_each_edit_bumps_revision_once(self):
+        """测试自动更新 updated_at 的嵌套语句不会让数据版本多加一次"""
+        task_id = self.task_manager.create_task(self.user_id, '写报告')
+        revision = self.db.get_data_revision(self.user_id)
+
+        self.db.execute_update("UPDATE tasks SET title = '改标题' WHERE task_id = %s", (task_id,))
+        self.assertEqual(self.db.get_data_revision(self.user_id), revision + 1)
+        self.db.execute_update("UPDATE tasks SET priority = 'high', updated_at = CURRENT_TIMESTAMP "
+                               "WHERE task_id = %s", (task_id,))
+        self.assertEqual(self.db.get_data_revision(self.user_id), revision + 2)
+
+    def test_stream_query_in_memory(self):
+        """测试内存数据库的流式查询在锁内读出结果，读取途中可以执行其他语句"""
+        for title in ('甲', '乙'):
+            self.task_manager.create_task(self.user_id, title)
+
+        rows = self.db.stream_query("SELECT title FROM tasks WHERE user_id = %s ORDER BY task_id", (self.user_id,))
+        self.assertEqual(next(rows)['title'], '甲')
+        self.task_manager.create_task(self.user_id, '丙')
+        self.assertEqual([row['title'] for row in rows], ['乙'])
+
+    def test_statistics_report(self):
+        """测试统计报表中的日期函数"""
+        task_id = self.task_manager.create_task(self.user_id, '专注', due_date=date.today())
+        self.task_manager.toggle_task_status(task_id, user_id=self.user_id)
+        start = datetime.combine(date.today(), time(0, 1))
+        self.db.execute_update(
+            "INSERT INTO focus_sessions (user_id, task_id, session_type, start_time, end_time, duration_minutes, "
+            "is_completed) VALUES (%s, %s, 'work', %s, %s, 25, TRUE)",
+            (self.user_id, task_id, start, start + timedelta(minutes=25))
+        )
+
+        report = StatisticsManager(self.db, report_cache=RevisionedCache()).generate_summary_report(self.user_id, 7)
+
+        self.assertEqual(report['overview']['today_focus_minutes'], 25)
+        self.assertEqual(report['overview']['today_completed_tasks'], 1)
+        self.assertEqual(report['completion_analysis']['completed_tasks'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+增量同步API测试
+"""
+import unittest
+import threading
+from unittest.mock import Mock
+from datetime import date
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from src.api.sync_api import SyncAPI, create_api_app
+
+
+class TestSyncAPI(unittest.TestCase):
+    """同步API测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.tasks = [{'task_id': i, 'title': f'任务{i}', 'due_date': date(2025, 7, i)} for i in range(1, 6)]
+
+        def execute_query(query, params=None):
+            if 'FROM task_tags' in query:
+                return [{'task_id': 2, 'tag_id': 9, 'name': '工作', 'color': '#757575'}]
+            if 'task_id IN' in query:
+                ids = set(params[1:])
+                return [task.copy() for task in self.tasks if task['task_id'] in ids]
+            if 'FROM tasks' in query:
+                _, after, limit = params
+                return [task.copy() for task in self.tasks if task['task_id'] > after][:limit]
+            return []
+
+        self.mock_db = Mock()
+        self.mock_db.execute_query.side_effect = execute_query
+        self.mock_db.get_data_revision.return_value = 3
+        self.user_manager = Mock()
+        self.user_manager.get_user_by_email.return_value = {'user_id': 1, 'password_hash': 'x'}
+        self.user_manager.verify_password.side_effect = lambda password, hashed: password == 'secret'
+        self.event_log = Mock()
+        self.event_log.current_cursor.return_value = 40
+        self.settings_manager = Mock()
+        self.settings_manager.get_user_settings.return_value = {'user_id': 1, 'pomodoro_work_duration': 25}
+
+        api = SyncAPI(self.mock_db, self.user_manager, Mock(), self.settings_manager,
+                      event_log=self.event_log, page_size=2)
+        self.client = TestClient(create_api_app(self.mock_db, self.user_manager, Mock(), self.settings_manager, api))
+        self.auth = ('a@example.com', 'secret')
+
+    def test_requires_credentials(self):
+        """测试未认证或密码错误时返回401"""
+        self.assertEqual(self.client.get('/tasks').status_code, 401)
+        self.assertEqual(self.client.get('/tasks', auth=('a@example.com', 'wrong')).status_code, 401)
+
+    def test_password_verified_off_event_loop(self):
+        """测试用户查询在事件循环线程，bcrypt校验在线程池中执行"""
+        threads = {}
+
+        def get_user_by_email(email):
+            threads['lookup'] = threading.get_ident()
+            return {'user_id': 1, 'password_hash': 'x'}
+
+        def verify_password(password, hashed):
+            threads['verify'] = threading.get_ident()
+            return False
+
+        self.user_manager.get_user_by_email.side_effect = get_user_by_email
+        self.user_manager.verify_password.side_effect = verify_password
+        self.assertEqual(self.client.get('/tasks', auth=('a@example.com', 'wrong')).status_code, 401)
+        self.assertNotEqual(threads['lookup'], threads['verify'])
+
+    def test_keyset_pagination(self):
+        """测试按task_id键集分页，第一页带游标"""
+        first = self.client.get('/tasks', auth=self.auth).json()
+
+        self.assertEqual([t['task_id'] for t in first['items']], [1, 2])
+        self.assertEqual(first['next_after'], 2)
+        self.assertEqual(first['cursor'], 40)
+        self.assertEqual(first['items'][1]['tags'][0]['name'], '工作')
+
+        last = self.client.get('/tasks', params={'after': 4}, auth=self.auth).json()
+        self.assertEqual([t['task_id'] for t in last['items']], [5])
+        self.assertIsNone(last['next_after'])
+        self.assertNotIn('cursor', last)
+
+    def test_etag_not_modified_without_query(self):
+        """测试数据版本未变时返回304且不查询任务"""
+        response = self.client.get('/tasks', auth=self.auth)
+        etag = response.headers['ETag']
+        self.mock_db.execute_query.reset_mock()
+
+        response = self.client.get('/tasks', auth=self.auth, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.mock_db.execute_query.assert_not_called()
+
+        self.mock_db.get_data_revision.return_value = 4
+        response = self.client.get('/tasks', auth=self.auth, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_delta_returns_changed_and_deleted(self):
+        """测试增量读取返回变化任务的最新内容和已删除的任务ID"""
+        self.event_log.read_since.return_value = (
+            [{'event_id': 41, 'task_id': 3}, {'event_id': 42, 'task_id': 7}, {'event_id': 43, 'task_id': 3}], 43
+        )
+
+        body = self.client.get('/tasks', params={'since': 40}, auth=self.auth).json()
+
+        self.assertEqual([t['task_id'] for t in body['items']], [3])
+        self.assertEqual(body['deleted'], [7])
+        self.assertEqual(body['cursor'], 43)
+        self.event_log.read_since.assert_called_once_with(40, 2, 1)
+
+    def test_gzip_and_settings_etag(self):
+        """测试大响应gzip压缩，设置接口按内容计算ETag"""
+        self.tasks = [{'task_id': i, 'title': '很长的标题' * 50} for i in range(1, 4)]
+        response = self.client.get('/tasks', auth=self.auth, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers.get('content-encoding'), 'gzip')
+
+        etag = self.client.get('/settings', auth=self.auth).headers['ETag']
+        response = self.client.get('/settings', auth=self.auth, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
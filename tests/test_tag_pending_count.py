@@ -0,0 +1,64 @@
+"""
+标签未完成任务计数测试
+"""
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.database import TagManager, TagIdCache
+
+
+class TestTagPendingCount(unittest.TestCase):
+    """标签未完成任务计数测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.mock_db = Mock()
+        self.tag_manager = TagManager(self.mock_db, TagIdCache())
+
+    def test_sidebar_reads_counter_column(self):
+        """测试侧边栏计数直接读取计数列，不做连接统计"""
+        self.mock_db.execute_query.return_value = [{'tag_id': 1, 'name': '工作', 'task_count': 2}]
+
+        tags = self.tag_manager.get_user_tags_with_count(1)
+
+        self.assertEqual(tags[0]['task_count'], 2)
+        self.mock_db.execute_query.assert_called_once()
+        query, params = self.mock_db.execute_query.call_args[0]
+        self.assertIn('pending_count AS task_count', query)
+        self.assertNotIn('JOIN', query)
+        self.assertEqual(params, (1,))
+
+    def test_falls_back_before_migration(self):
+        """测试计数列不存在时退回到只统计未完成任务的连接查询"""
+        self.mock_db.execute_query.side_effect = [None, [{'tag_id': 1, 'task_count': 0}]]
+
+        tags = self.tag_manager.get_user_tags_with_count(1)
+
+        self.assertEqual(tags, [{'tag_id': 1, 'task_count': 0}])
+        fallback_query = self.mock_db.execute_query.call_args[0][0]
+        self.assertIn('COUNT(ts.task_id)', fallback_query)
+
+    def test_rebuild_scoped_to_user(self):
+        """测试修复任务可以只重建一个用户的计数"""
+        self.mock_db.execute_update.return_value = True
+
+        self.assertTrue(self.tag_manager.rebuild_pending_counts(3))
+
+        query, params = self.mock_db.execute_update.call_args[0]
+        self.assertIn("ts.status = 'pending'", query)
+        self.assertTrue(query.rstrip().endswith('WHERE t.user_id = %s'))
+        self.assertEqual(params, (3,))
+
+        self.tag_manager.rebuild_pending_counts()
+        query, params = self.mock_db.execute_update.call_args[0]
+        self.assertNotIn('WHERE', query)
+        self.assertIsNone(params)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+标签批量解析测试
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.database import TagManager, TagIdCache
+from src.services.event_bus import EventBus, LocalBroker
+from src.services.task_manager import TaskManager
+
+
+class TestTagResolution(unittest.TestCase):
+    """标签批量解析测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.tags = {'工作': 1, 'Home': 2}  # 数据库中已有的标签
+        self.next_id = 3
+
+        def execute_update(query, params=None):
+            if query.startswith('INSERT INTO tags'):
+                names = params[1::3]
+                for name in names:
+                    if not any(existing.casefold() == name.casefold() for existing in self.tags):
+                        self.tags[name] = self.next_id
+                        self.next_id += 1
+            return True
+
+        def execute_query(query, params=None):
+            names = {name.casefold() for name in params[1:]}
+            return [{'tag_id': tag_id, 'name': name} for name, tag_id in self.tags.items()
+                    if name.casefold() in names]
+
+        self.mock_db = Mock()
+        self.mock_db.execute_update.side_effect = execute_update
+        self.mock_db.execute_query.side_effect = execute_query
+        self.mock_db.execute_many.return_value = True
+        self.mock_db.execute_update_rowcount.return_value = 1
+
+        publish_patcher = patch('src.database.database.publish_change')
+        publish_patcher.start()
+        self.addCleanup(publish_patcher.stop)
+
+        self.tag_manager = TagManager(self.mock_db, TagIdCache())
+
+    def test_resolve_creates_missing_in_one_statement(self):
+        """测试缺失的标签用一条语句创建，ID用一条查询取回"""
+        resolved = self.tag_manager.resolve_tags(1, [' 工作 ', '学习', 'home', '', '学习', 'x' * 16])
+
+        self.assertEqual(resolved, {'工作': 1, '学习': 3, 'home': 2})
+        self.assertEqual(self.mock_db.execute_update.call_count, 1)
+        self.assertEqual(self.mock_db.execute_query.call_count, 1)
+        upsert = self.mock_db.execute_update.call_args[0][0]
+        self.assertIn('ON DUPLICATE KEY UPDATE', upsert)
+
+    def test_cached_names_skip_database(self):
+        """测试已缓存的名称不再访问数据库"""
+        self.tag_manager.resolve_tags(1, ['工作', '学习'])
+        self.mock_db.reset_mock()
+
+        resolved = self.tag_manager.resolve_tags(1, ['学习', '工作'])
+
+        self.assertEqual(resolved, {'学习': 3, '工作': 1})
+        self.mock_db.execute_update.assert_not_called()
+        self.mock_db.execute_query.assert_not_called()
+
+    def test_cache_is_per_user_and_invalidated_on_delete(self):
+        """测试缓存按用户隔离，删除标签后失效"""
+        self.tag_manager.resolve_tags(1, ['工作'])
+        self.assertEqual(self.tag_manager.tag_id_cache.lookup(2, ['工作']), ({}, ['工作']))
+
+        self.mock_db.execute_query.side_effect = None
+        self.mock_db.execute_query.return_value = [{'user_id': 1}]
+        self.tag_manager.delete_tag(1)
+
+        self.assertEqual(self.tag_manager.tag_id_cache.lookup(1, ['工作']), ({}, ['工作']))
+
+    def test_tagging_task_uses_three_statements(self):
+        """测试给任务添加N个标签只需两条语句加一次executemany"""
+        task_manager = TaskManager(self.mock_db, event_bus=EventBus(LocalBroker()))
+        task_manager.tag_manager = self.tag_manager
+
+        task_manager._add_tags_to_task(9, 1, ['工作', '学习', '运动', '阅读'])
+
+        self.assertEqual(self.mock_db.execute_update.call_count, 1)
+        self.assertEqual(self.mock_db.execute_query.call_count, 1)
+        self.mock_db.execute_many.assert_called_once()
+        query, rows = self.mock_db.execute_many.call_args[0]
+        self.assertIn('INSERT IGNORE INTO task_tags', query)
+        self.assertEqual(sorted(rows), [(9, 1), (9, 3), (9, 4), (9, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+任务详情自动保存测试
+"""
+import unittest
+from unittest.mock import Mock, MagicMock, patch
+from datetime import date
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ui.components.task_detail import TaskDetailComponent
+
+
+class TestTaskDetailAutosave(unittest.TestCase):
+    """任务详情自动保存测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        # 不渲染UI：替换ui模块和AI助手
+        ui_patcher = patch('src.ui.components.task_detail.ui', MagicMock())
+        self.mock_ui = ui_patcher.start()
+        self.addCleanup(ui_patcher.stop)
+        ai_patcher = patch('src.ui.components.task_detail.AIAssistant')
+        ai_patcher.start()
+        self.addCleanup(ai_patcher.stop)
+
+        self.task_manager = Mock()
+        self.task_manager.update_task.return_value = {'success': True, 'view_change': None}
+        self.task_manager.check_and_notify_view_change.return_value = {'should_remove': False}
+        self.on_task_update = Mock()
+        self.on_task_patched = Mock()
+
+        self.component = TaskDetailComponent(
+            self.task_manager, self.on_task_update, Mock(), Mock(), user_id=1,
+            on_task_patched=self.on_task_patched
+        )
+        self.task = {'task_id': 5, 'title': '旧标题', 'priority': 'medium',
+                     'due_date': date(2025, 7, 2), 'estimated_pomodoros': 1, 'tags': []}
+        self.component.selected_task = self.task
+        self.component.task_detail_open = True
+        self.component.current_view = 'my_day'
+
+    def test_changes_coalesced_into_one_update(self):
+        """测试防抖时间内的多次修改合并为一次写入"""
+        self.component.auto_save_field('priority', new_value='high')
+        self.component.auto_save_field('estimated_pomodoros', new_value=3)
+        self.component.auto_save_field('priority', new_value='low')
+
+        self.task_manager.update_task.assert_not_called()
+        self.assertEqual(self.mock_ui.timer.call_count, 3)
+
+        self.component.flush_pending_changes()
+
+        self.task_manager.update_task.assert_called_once_with(
+            task_id=5, user_id=1, priority='low', estimated_pomodoros=3
+        )
+        self.assertEqual(self.task['priority'], 'low')
+        # 只更新对应任务行，不整体刷新
+        self.on_task_patched.assert_called_once_with(self.task)
+        self.on_task_update.assert_not_called()
+
+    def test_flush_writes_pending_changes_with_field(self):
+        """测试失去焦点时连同之前的修改一起立即写入"""
+        self.component.auto_save_field('priority', new_value='high')
+        self.component.title_input = Mock(value=' 新标题 ')
+
+        self.component.auto_save_field('title', flush=True)
+
+        self.task_manager.update_task.assert_called_once_with(
+            task_id=5, user_id=1, priority='high', title='新标题'
+        )
+        self.task_manager.get_task_by_id.assert_not_called()
+
+    def test_unchanged_value_not_written(self):
+        """测试值没有变化时不写入"""
+        self.component.auto_save_field('priority', new_value='medium', flush=True)
+
+        self.task_manager.update_task.assert_not_called()
+
+    def test_close_flushes(self):
+        """测试关闭面板时写入未保存的修改"""
+        self.component.auto_save_field('priority', new_value='high')
+
+        self.component.close_task_detail()
+
+        self.task_manager.update_task.assert_called_once()
+        self.assertEqual(self.component.pending_changes, {})
+
+    def test_due_date_view_change_from_local_values(self):
+        """测试截止日期修改的视图变更用本地值判断"""
+        self.component.auto_save_field('due_date', new_value=date(2025, 7, 20), flush=True)
+
+        self.task_manager.check_and_notify_view_change.assert_called_once_with(
+            5, date(2025, 7, 2), date(2025, 7, 20), 'my_day'
+        )
+
+    def test_failed_write_not_applied(self):
+        """测试写入失败时不修改本地任务数据"""
+        self.task_manager.update_task.return_value = {'success': False, 'view_change': None}
+
+        self.component.auto_save_field('priority', new_value='high')
+
+        self.assertFalse(self.component.flush_pending_changes())
+        self.assertEqual(self.task['priority'], 'medium')
+        self.on_task_patched.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+任务活动日志测试
+"""
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.task_events import TaskEventLog
+
+
+class TestTaskEventLog(unittest.TestCase):
+    """任务活动日志测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.rows = [
+            {'event_id': 11, 'user_id': 1, 'task_id': 5, 'event_type': 'complete',
+             'payload': '{"completed_at": "2025-07-02 10:00:00"}', 'created_at': None},
+            {'event_id': 12, 'user_id': 1, 'task_id': 5, 'event_type': 'retag',
+             'payload': b'{"added": 3}', 'created_at': None},
+        ]
+        self.mock_db = Mock()
+        self.mock_db.execute_update.return_value = True
+        self.log = TaskEventLog(self.mock_db)
+
+    def test_read_since_is_keyset(self):
+        """测试按游标的键集分页读取，并解析事件内容"""
+        self.mock_db.execute_query.return_value = self.rows
+
+        events, cursor = self.log.read_since(10, limit=2, user_id=1)
+
+        self.assertEqual(cursor, 12)
+        self.assertEqual(events[0]['payload'], {'completed_at': '2025-07-02 10:00:00'})
+        self.assertEqual(events[1]['payload'], {'added': 3})
+        query, params = self.mock_db.execute_query.call_args[0]
+        self.assertIn('event_id > %s', query)
+        self.assertTrue(query.rstrip().endswith('ORDER BY event_id LIMIT %s'))
+        self.assertEqual(params, (10, 1, 1, 2))
+
+    def test_no_new_events_keeps_cursor(self):
+        """测试没有新事件或查询失败时游标不变"""
+        self.mock_db.execute_query.return_value = None
+
+        self.assertEqual(self.log.read_since(12), ([], 12))
+
+    def test_consume_saves_cursor_after_handler(self):
+        """测试处理成功后保存游标，失败时不前进"""
+        self.mock_db.execute_query.side_effect = [[{'last_event_id': 10}], self.rows]
+        handled = []
+
+        self.assertEqual(self.log.consume('rollup', handled.extend), 2)
+        self.assertEqual(len(handled), 2)
+        self.assertEqual(self.mock_db.execute_update.call_args[0][1], ('rollup', 12))
+
+        self.mock_db.reset_mock()
+        self.mock_db.execute_query.side_effect = [[{'last_event_id': 10}], self.rows]
+        self.assertEqual(self.log.consume('rollup', Mock(side_effect=RuntimeError('boom'))), 0)
+        self.mock_db.execute_update.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+任务批量导入测试
+"""
+import unittest
+from unittest.mock import Mock, patch
+from datetime import date
+import io
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.database import TagManager, TagIdCache
+from src.services.task_import import TaskImporter, iter_records, normalize_record
+
+
+CSV_SOURCE = """Content,Priority,Due Date,Labels,Status,TYPE
+写报告,p1,2025-07-01,工作;写作,,task
+第一部分,,,,,section
+跑步,低,2025/07/03,运动,done,task
+,high,,,,task
+读书,medium,明天,,,task
+买菜,,,,,task
+"""
+
+
+class TestTaskImport(unittest.TestCase):
+    """任务批量导入测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.checkpoint = None
+        self.cursor = Mock()
+        self.cursor.lastrowid = 100
+        # 多行插入后按ID范围查回的任务与本批次一致
+        self.inserted = []
+
+        def executemany(query, rows):
+            self.cursor.rowcount = len(rows)
+            if 'INSERT INTO tasks' in query:
+                self.inserted = [(self.cursor.lastrowid + i, row[1]) for i, row in enumerate(rows)]
+
+        self.cursor.executemany.side_effect = executemany
+        self.cursor.fetchall.side_effect = lambda: self.inserted
+
+        def execute_query(query, params=None):
+            if 'FROM task_imports' in query:
+                return [self.checkpoint] if self.checkpoint else []
+            return [{'tag_id': 10 + i, 'name': name} for i, name in enumerate(params[1:])]
+
+        self.mock_db = Mock()
+        self.mock_db.execute_query.side_effect = execute_query
+        self.mock_db.execute_update.return_value = True
+        self.mock_db.get_last_insert_id.return_value = 5
+        self.mock_db.execute_in_transaction.side_effect = lambda work: work(self.cursor)
+
+        for target in ('src.services.task_import.publish_change', 'src.database.database.publish_change'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.importer = TaskImporter(self.mock_db, TagManager(self.mock_db, TagIdCache()), batch_size=3)
+
+    def test_normalize_aliases_and_values(self):
+        """测试常见列名和取值映射为任务字段"""
+        task, error = normalize_record({'Title': ' 写报告 ', 'priority': '高', 'due': '2025-07-01T09:00:00Z',
+                                        'completed': 'true', 'tags': ['#工作', ' ']})
+
+        self.assertIsNone(error)
+        self.assertEqual(task['title'], '写报告')
+        self.assertEqual(task['priority'], 'high')
+        self.assertEqual(task['due_date'], date(2025, 7, 1))
+        self.assertEqual(task['status'], 'completed')
+        self.assertIsNotNone(task['completed_at'])
+        self.assertEqual(task['tags'], ['工作'])
+
+        self.assertEqual(normalize_record({'title': 'x', 'priority': 'urgent'})[0], None)
+
+    def test_batches_commit_tasks_tags_and_checkpoint(self):
+        """测试每批用executemany写入任务和标签，并在同一事务中推进检查点"""
+        progress = []
+        summary = self.importer.run(1, iter_records(io.StringIO(CSV_SOURCE), 'csv'), progress=progress.append)
+
+        self.assertTrue(summary['completed'])
+        self.assertEqual(summary['import_id'], 5)
+        self.assertEqual(summary['imported'], 3)
+        self.assertEqual(summary['skipped'], 3)
+        self.assertEqual([index for index, _ in summary['errors']], [2, 4, 5])
+        self.assertEqual(self.mock_db.execute_in_transaction.call_count, 2)
+        self.assertEqual([p['rows_done'] for p in progress], [3, 6, 6])
+
+        query, rows = self.cursor.executemany.call_args_list[0][0]
+        self.assertIn('INSERT INTO tasks', query)
+        self.assertEqual([row[1] for row in rows], ['写报告', '跑步'])
+        self.assertEqual(rows[1][5], 'completed')
+        tag_query, tag_rows = self.cursor.executemany.call_args_list[1][0]
+        self.assertIn('INSERT IGNORE INTO task_tags', tag_query)
+        self.assertEqual(tag_rows, [(100, 10), (100, 11), (101, 12)])
+        # 保存点、ID范围校验、检查点
+        statements = [call[0] for call in self.cursor.execute.call_args_list[:3]]
+        self.assertEqual(statements[0][0], 'SAVEPOINT import_batch')
+        self.assertIn('WHERE task_id BETWEEN %s AND %s AND user_id = %s', statements[1][0])
+        self.assertEqual(statements[1][1], (100, 101, 1))
+        self.assertEqual(statements[2][1], (3, 2, 1, 5))
+
+    def test_interleaved_ids_fall_back_to_single_inserts(self):
+        """测试ID范围内混有其他任务时回滚到保存点，逐行插入并使用各自的ID"""
+        self.cursor.fetchall.side_effect = lambda: [(100, '写报告'), (101, '别人的任务')]
+        single_ids = iter(range(200, 210))
+
+        def execute(query, params=None):
+            if query.startswith('\nINSERT INTO tasks'):
+                self.cursor.lastrowid = next(single_ids)
+
+        self.cursor.execute.side_effect = execute
+
+        summary = self.importer.run(1, iter_records(io.StringIO(CSV_SOURCE), 'csv'))
+
+        self.assertEqual(summary['imported'], 3)
+        statements = [call[0][0] for call in self.cursor.execute.call_args_list]
+        self.assertIn('ROLLBACK TO SAVEPOINT import_batch', statements)
+        tag_rows = self.cursor.executemany.call_args_list[1][0][1]
+        self.assertEqual(tag_rows, [(200, 10), (200, 11), (201, 12)])
+
+    def test_resume_skips_committed_rows(self):
+        """测试从检查点继续时跳过已提交的源记录"""
+        self.checkpoint = {'import_id': 5, 'status': 'running', 'rows_done': 3, 'tasks_imported': 2,
+                           'rows_skipped': 1}
+
+        summary = self.importer.run(1, iter_records(io.StringIO(CSV_SOURCE), 'csv'), import_id=5)
+
+        self.assertTrue(summary['completed'])
+        self.assertEqual(summary['rows_done'], 6)
+        self.assertEqual(summary['imported'], 3)
+        rows = self.cursor.executemany.call_args_list[0][0][1]
+        self.assertEqual([row[1] for row in rows], ['买菜'])
+
+    def test_failed_batch_stops_for_resume(self):
+        """测试批次写入失败时停止，检查点停留在上一批"""
+        self.mock_db.execute_in_transaction.side_effect = None
+        self.mock_db.execute_in_transaction.return_value = None
+
+        summary = self.importer.run(1, iter_records(io.StringIO(CSV_SOURCE), 'csv'))
+
+        self.assertFalse(summary['completed'])
+        self.assertEqual(summary['rows_done'], 0)
+        self.assertEqual(self.mock_db.execute_in_transaction.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+任务推荐排序测试
+"""
+import unittest
+from unittest.mock import Mock, patch
+from datetime import date, datetime, timedelta
+import asyncio
+import time
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.task_ranker import TaskRanker
+from src.services.ai_cache import AIResponseCache
+from src.services.ai_assistant import AIAssistant
+
+
+class TestTaskRanker(unittest.TestCase):
+    """任务推荐排序测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.today = date(2025, 7, 1)
+        self.mock_db = Mock()
+        self.mock_db.execute_query.return_value = []
+        self.ranker = TaskRanker(self.mock_db)
+
+    def make_task(self, task_id, **overrides):
+        """构造测试任务"""
+        task = {
+            'task_id': task_id,
+            'title': f'任务{task_id}',
+            'status': 'pending',
+            'priority': 'medium',
+            'due_date': None,
+            'estimated_pomodoros': 2,
+            'used_pomodoros': 0,
+            'created_at': datetime(2025, 6, 30),
+            'tags': []
+        }
+        task.update(overrides)
+        return task
+
+    def test_urgent_high_priority_first(self):
+        """测试临近截止且高优先级的任务排在最前"""
+        tasks = [
+            self.make_task(1),
+            self.make_task(2, status='completed', due_date=self.today, priority='high'),
+            self.make_task(3, due_date=self.today, priority='high'),
+            self.make_task(4, due_date=self.today + timedelta(days=10)),
+            self.make_task(5, priority='low')
+        ]
+
+        ranked_ids = [task['task_id'] for task in self.ranker.rank(tasks, today=self.today)]
+
+        self.assertEqual(ranked_ids[0], 3)
+        self.assertNotIn(2, ranked_ids)
+        self.assertEqual(ranked_ids[-1], 5)
+
+    def test_tag_affinity_from_focus_sessions(self):
+        """测试专注记录中常用标签的任务得分更高"""
+        self.mock_db.execute_query.return_value = [
+            {'tag_id': 10, 'focus_minutes': 300},
+            {'tag_id': 20, 'focus_minutes': 30}
+        ]
+        tasks = [
+            self.make_task(1, tags=[{'tag_id': 20, 'name': '杂事'}]),
+            self.make_task(2, tags=[{'tag_id': 10, 'name': '学习'}])
+        ]
+
+        ranked_ids = [task['task_id'] for task in self.ranker.rank(tasks, user_id=1, today=self.today)]
+        self.ranker.rank(tasks, user_id=1, today=self.today)
+
+        self.assertEqual(ranked_ids, [2, 1])
+        # 标签偏好按用户缓存，不会每次推荐都查询数据库
+        self.assertEqual(self.mock_db.execute_query.call_count, 1)
+
+    def test_large_list_is_fast(self):
+        """测试大量任务时本地排序足够快"""
+        tasks = [
+            self.make_task(i, due_date=self.today + timedelta(days=i % 30), priority=['high', 'medium', 'low'][i % 3])
+            for i in range(5000)
+        ]
+
+        started = time.perf_counter()
+        ranked = self.ranker.rank(tasks, today=self.today)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(ranked), 5000)
+        self.assertLess(elapsed, 0.5)
+
+
+class TestAIRerank(unittest.TestCase):
+    """AI重排序测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        config_patcher = patch.dict('src.services.ai_assistant.AI_CONFIG', {
+            'api_key': 'test-key',
+            'base_url': 'http://127.0.0.1:9/v1',
+            'model': 'test-model'
+        })
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        self.assistant = AIAssistant(response_cache=AIResponseCache())
+        self.tasks = [
+            {'task_id': 1, 'title': '写周报', 'priority': 'high'},
+            {'task_id': 2, 'title': '回复邮件', 'priority': 'low'},
+            {'task_id': 3, 'title': '准备会议', 'priority': 'medium'}
+        ]
+
+    def test_rerank_by_task_id(self):
+        """测试按task_id匹配重排结果，缺失的任务保持原顺序追加"""
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            return '```json\n[3, 99, 3, 1]\n```'
+
+        with patch.object(self.assistant, '_request_completion', side_effect=fake_request):
+            order = asyncio.run(self.assistant.rerank_tasks(self.tasks))
+
+        self.assertEqual(order, [3, 1, 2])
+
+    def test_rerank_failure_keeps_local_order(self):
+        """测试AI无有效响应时保持本地排序"""
+        async def fake_request(prompt, system_prompt=None, **kwargs):
+            return '写周报'
+
+        with patch.object(self.assistant, '_request_completion', side_effect=fake_request):
+            order = asyncio.run(self.assistant.rerank_tasks(self.tasks))
+
+        self.assertEqual(order, [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+任务写操作（单条语句、按用户限定）测试
+"""
+import unittest
+from unittest.mock import Mock
+from datetime import date, timedelta
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.event_bus import EventBus, LocalBroker
+from src.services.task_manager import TaskManager
+
+
+class TestTaskWrites(unittest.TestCase):
+    """任务写操作测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.mock_db = Mock()
+        self.mock_db.execute_update_rowcount.return_value = 1
+        self.task_manager = TaskManager(self.mock_db, event_bus=EventBus(LocalBroker()))
+
+    def test_toggle_without_status_is_single_statement(self):
+        """测试不指定状态时用CASE在一条语句中翻转"""
+        self.assertTrue(self.task_manager.toggle_task_status(7, user_id=1))
+
+        self.mock_db.execute_query.assert_not_called()
+        query, params = self.mock_db.execute_update_rowcount.call_args_list[0][0]
+        self.assertIn("CASE WHEN status = 'pending' THEN 'completed' ELSE 'pending' END", query)
+        self.assertIn('AND user_id = %s', query)
+        self.assertEqual(params, (7, 1))
+        # 翻转时不知道结果是否为完成，不生成下一次重复任务
+        self.assertEqual(self.mock_db.execute_update_rowcount.call_count, 1)
+
+    def test_completed_at_set_and_cleared(self):
+        """测试完成时间在状态之前赋值：完成时写入（已完成则保留），取消完成时清空"""
+        self.task_manager.toggle_task_status(7, 'completed', user_id=1)
+        query = self.mock_db.execute_update_rowcount.call_args_list[0][0][0]
+        self.assertIn("completed_at = CASE WHEN status = 'completed' THEN completed_at ELSE CURRENT_TIMESTAMP END", query)
+        self.assertLess(query.index('completed_at ='), query.index('status = %s'))
+
+        self.mock_db.reset_mock()
+        self.task_manager.toggle_task_status(7, 'pending', user_id=1)
+        query = self.mock_db.execute_update_rowcount.call_args[0][0]
+        self.assertIn('completed_at = NULL', query)
+
+    def test_toggle_missing_task_fails(self):
+        """测试任务不存在或不属于该用户时返回False"""
+        self.mock_db.execute_update_rowcount.return_value = 0
+
+        self.assertFalse(self.task_manager.toggle_task_status(7, 'completed', user_id=2))
+
+    def test_delete_is_scoped_to_user(self):
+        """测试删除限定在该用户的任务上，没有删除任何行时返回False"""
+        self.assertTrue(self.task_manager.delete_task(7, user_id=1))
+        query, params = self.mock_db.execute_update_rowcount.call_args[0]
+        self.assertTrue(query.endswith('WHERE task_id = %s AND user_id = %s'))
+        self.assertEqual(params, (7, 1))
+        self.mock_db.execute_query.assert_not_called()
+
+        self.mock_db.execute_update_rowcount.return_value = 0
+        self.assertFalse(self.task_manager.delete_task(7, user_id=2))
+
+    def test_update_is_one_round_trip(self):
+        """测试更新字段并检查视图变更只需一次数据库往返"""
+        next_week = date.today() + timedelta(days=3)
+
+        result = self.task_manager.update_task(7, due_date=next_week, priority='high',
+                                               current_view='my_day', user_id=1)
+
+        self.assertTrue(result['success'])
+        self.assertTrue(result['view_change']['should_remove'])
+        self.assertEqual(result['view_change']['suggested_view'], 'planned')
+        self.mock_db.execute_query.assert_not_called()
+        self.assertEqual(self.mock_db.execute_update_rowcount.call_count, 1)
+        query, params = self.mock_db.execute_update_rowcount.call_args[0]
+        self.assertTrue(query.endswith('WHERE task_id = %s AND user_id = %s'))
+        self.assertEqual(params, (next_week, 'high', 7, 1))
+
+    def test_update_estimate_marks_task_estimated(self):
+        """测试设置预估番茄钟时同时标记为已预估（批量AI预估不再覆盖）"""
+        self.task_manager.update_task(7, estimated_pomodoros=1, user_id=1)
+
+        query, params = self.mock_db.execute_update_rowcount.call_args[0]
+        self.assertIn('estimated_pomodoros = %s, pomodoros_estimated = TRUE', query)
+        self.assertEqual(params, (1, 7, 1))
+
+    def test_update_of_other_users_task_fails(self):
+        """测试更新不属于该用户的任务时不写入标签"""
+        self.mock_db.execute_update_rowcount.return_value = 0
+
+        result = self.task_manager.update_task(7, tags=['工作'], user_id=2)
+
+        self.assertFalse(result['success'])
+        self.mock_db.execute_update.assert_not_called()
+
+    def test_database_error_fails(self):
+        """测试数据库出错时返回失败"""
+        self.mock_db.execute_update_rowcount.return_value = None
+
+        self.assertFalse(self.task_manager.update_task(7, title='新标题', user_id=1)['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+侧边栏视图数量测试
+"""
+import unittest
+from unittest.mock import Mock
+from decimal import Decimal
+from datetime import date, timedelta
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.event_bus import EventBus, LocalBroker
+from src.services.report_cache import RevisionedCache
+from src.services.task_manager import TaskManager
+
+
+class TestViewCounts(unittest.TestCase):
+    """视图数量测试类"""
+
+    def setUp(self):
+        """测试前的设置"""
+        self.mock_db = Mock()
+        self.mock_db.get_data_revision.return_value = 5
+        self.mock_db.execute_query.return_value = [
+            {'tag_id': None, 'my_day': Decimal(2), 'planned': Decimal(1), 'important': Decimal(3), 'all_tasks': 9},
+            {'tag_id': 4, 'my_day': 6, 'planned': None, 'important': None, 'all_tasks': None},
+            {'tag_id': 7, 'my_day': 0, 'planned': None, 'important': None, 'all_tasks': None},
+        ]
+        self.task_manager = TaskManager(self.mock_db, event_bus=EventBus(LocalBroker()),
+                                        report_cache=RevisionedCache())
+
+    def test_counts_from_one_query(self):
+        """测试内置视图和标签数量来自同一条查询"""
+        counts = self.task_manager.get_view_counts(1)
+
+        self.assertEqual(counts, {'my_day': 2, 'planned': 1, 'important': 3, 'all': 9, 'tags': {4: 6, 7: 0}})
+        self.mock_db.execute_query.assert_called_once()
+        query, params = self.mock_db.execute_query.call_args[0]
+        self.assertIn('UNION ALL', query)
+        today = date.today()
+        self.assertEqual(params, (today, today, today + timedelta(days=7), 1, 1))
+
+    def test_cached_until_revision_changes(self):
+        """测试数据版本不变时不再查询，版本变化后重新查询"""
+        self.task_manager.get_view_counts(1)
+        self.task_manager.get_view_counts(1)
+        self.assertEqual(self.mock_db.execute_query.call_count, 1)
+
+        self.mock_db.get_data_revision.return_value = 6
+        self.task_manager.get_view_counts(1)
+        self.assertEqual(self.mock_db.execute_query.call_count, 2)
+
+    def test_failed_query_not_cached(self):
+        """测试查询失败时返回零且不缓存"""
+        rows = self.mock_db.execute_query.return_value
+        self.mock_db.execute_query.return_value = None
+
+        self.assertEqual(self.task_manager.get_view_counts(1)['all'], 0)
+
+        self.mock_db.execute_query.return_value = rows
+        self.assertEqual(self.task_manager.get_view_counts(1)['all'], 9)
+
+
+if __name__ == '__main__':
+    unittest.main()